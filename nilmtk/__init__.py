@@ -11,7 +11,9 @@ from nilmtk.timeframe import TimeFrame
 from nilmtk.timeframegroup import TimeFrameGroup
 from nilmtk.elecmeter import ElecMeter
 from nilmtk.electric import Electric
-from nilmtk.datastore import DataStore, HDFDataStore, CSVDataStore, Key
+from nilmtk.datastore import DataStore, HDFDataStore, CSVDataStore, NpyDataStore, Key
+from nilmtk.statcache import StatCache
+from nilmtk.pipeline import Pipeline
 from nilmtk.metergroup import MeterGroup
 from nilmtk.appliance import Appliance
 from nilmtk.building import Building
@@ -29,7 +29,7 @@ class DataSet(object):
         See nilm-metadata.readthedocs.org/en/latest/dataset_metadata.html#dataset
     """
 
-    def __init__(self, filename=None, format='HDF'):
+    def __init__(self, filename=None, format='HDF', **store_kwargs):
         """
         Parameters
         ----------
@@ -37,13 +37,18 @@ class DataSet(object):
             path to data set
 
         format : str
-            format of output. Either 'HDF' or 'CSV'. Defaults to 'HDF'
+            format of output. Either 'HDF', 'CSV' or 'NPY'. Defaults to 'HDF'
+
+        **store_kwargs : optional
+            Compression settings for tables written to an HDF store (e.g.
+            cached stats), e.g. `compression='analysis'`.
+            See `nilmtk.utils.get_datastore`.
         """
         self.store = None
         self.buildings = OrderedDict()
         self.metadata = {}
         if filename is not None:
-            self.import_metadata(get_datastore(filename, format))
+            self.import_metadata(get_datastore(filename, format, **store_kwargs))
 
     def import_metadata(self, store):
         """
@@ -98,6 +103,24 @@ class DataSet(object):
 
         self.store.window = TimeFrame(start, end, tz)
 
+    def set_stat_cache(self, stat_cache):
+        """Caches the stats of all meters in `stat_cache` instead of the
+        store of this dataset.  Useful for read-only or shared datasets.
+
+        Parameters
+        ----------
+        stat_cache : nilmtk.StatCache or None
+            None caches the stats inside the store of the dataset again.
+
+        Examples
+        --------
+        >>> cache = StatCache(HDFDataStore('redd_stats.h5', 'a'))
+        >>> redd.set_stat_cache(cache)
+        """
+        if self.store is None:
+            raise RuntimeError("You need to set self.store first!")
+        self.store.stat_cache = stat_cache
+
     def describe(self, **desc_kwargs):
         """Returns a DataFrame describing this dataset.
         Each column is a building.  Each row is a feature.
@@ -157,7 +180,8 @@ class DataSet(object):
         '''
         return [building.elec for building in self.buildings.values()]
     
-    def calc_and_cache_stats(self, ignore_meters = None, verbose = False):
+    def calc_and_cache_stats(self, ignore_meters = None, verbose = False,
+                             n_workers = 1, journal = None):
         '''
         This functo assures that the statistics are calculated and 
         available for all meters after this call. They are then 
@@ -167,9 +191,20 @@ class DataSet(object):
 
         ignore_meters: This list of meters makes it possible to ignore 
                        several meters while calculating the statistics.
+        n_workers: Number of processes computing the stats. With more 
+                   than one the work is done by `nilmtk.precompute.precompute_stats`.
+        journal: Path of the journal of `precompute_stats`, which allows
+                 to resume an interrupted run.
         '''
-        for elec in self.elecs():
-            elec.calc_and_cache_stats(ignore_meters=ignore_meters, verbose=verbose)
+        if n_workers != 1 or journal is not None:
+            from .precompute import precompute_stats
+            return precompute_stats(self, n_workers=n_workers, journal=journal,
+                                    ignore_meters=ignore_meters, verbose=verbose)
+
+        # All meters share the dataset's store: flush it once at the end
+        with self.store.batch():
+            for elec in self.elecs():
+                elec.calc_and_cache_stats(ignore_meters=ignore_meters, verbose=verbose)
 
 
     def clear_cache(self):
@@ -229,15 +264,13 @@ class DataSet(object):
                     appliance.identifier.instance)
                 print("Computing activations for", key)
 
-                activations = meter.get_activations()
-                starts = []
-                ends = []
-                for activation in activations:
-                    starts.append(activation.index[0])
-                    ends.append(activation.index[-1])
+                activations = meter.activation_table()
+                tz = meter.get_timeframe().start.tz
+                starts = pd.Series(True, index=pd.DatetimeIndex(
+                    activations['start_ns'], tz='UTC').tz_convert(tz))
+                ends = pd.Series(False, index=pd.DatetimeIndex(
+                    activations['end_ns'], tz='UTC').tz_convert(tz))
                 del activations
-                starts = pd.Series(True, index=starts)
-                ends = pd.Series(False, index=ends)
                 script = pd.concat([starts, ends])
                 script = script.sort_index()
                 store[key] = script
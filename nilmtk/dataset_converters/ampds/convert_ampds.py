@@ -26,7 +26,7 @@ columnNameMapping = {'V': ('voltage', ''),
 TIMESTAMP_COLUMN_NAME = "TS"
 TIMEZONE = "America/Vancouver"
 
-def convert_ampds(input_path, output_filename, format='HDF'):
+def convert_ampds(input_path, output_filename, format='HDF', **store_kwargs):
     """
     Convert AMPds R2013 as seen on Dataverse. Download the files
     as CSVs and put them in the `input_path` folder for conversion.
@@ -45,6 +45,9 @@ def convert_ampds(input_path, output_filename, format='HDF'):
              random directory in order for this to work.
     format: str
         Defaults to HDF5
+    **store_kwargs:
+        Compression settings for the HDF output, e.g.
+        `compression='archive'`.  See `nilmtk.utils.get_datastore`.
     Example usage:
     --------------
     convert('/AMPds/electricity', 'store.h5')    
@@ -60,7 +63,7 @@ def convert_ampds(input_path, output_filename, format='HDF'):
     files.remove("WHE.csv")
     files.insert(0, "WHE.csv")
     assert isdir(input_path)
-    store = get_datastore(output_filename, format, mode='w')
+    store = get_datastore(output_filename, format, mode='w', **store_kwargs)
     for i, csv_file in enumerate(files):
         key = Key(building=1, meter=(i + 1))
         print('Loading file #', (i + 1), ' : ', csv_file, '. Please wait...')
@@ -36,7 +36,7 @@ column_mapping = OrderedDict({
     'Current': ('current', '')})
 
 
-def convert_combed(combed_path, output_filename, format='HDF'):
+def convert_combed(combed_path, output_filename, format='HDF', **store_kwargs):
     """
     Parameters
     ----------
@@ -44,12 +44,15 @@ def convert_combed(combed_path, output_filename, format='HDF'):
         The root path of the combed dataset.
     output_filename : str
         The destination HDF5 filename (including path and suffix).
+    **store_kwargs : optional
+        Compression settings for the HDF output, e.g.
+        `compression='archive'`.  See `nilmtk.utils.get_datastore`.
     """
 
     check_directory_exists(combed_path)
 
     # Open store
-    store = get_datastore(output_filename, format, mode='w')
+    store = get_datastore(output_filename, format, mode='w', **store_kwargs)
 
     any_file_converted = False
     
@@ -90,7 +90,7 @@ def load_list_of_house_ids(data_dir):
         * convert keys of `dataset.buildings`
     """
 
-def convert_hes(data_dir, output_filename, format='HDF', max_chunks=None):
+def convert_hes(data_dir, output_filename, format='HDF', max_chunks=None, **store_kwargs):
     metadata = {
         'name': 'HES',
         'geographic_coordinates': (51.464462,-0.076544), # London
@@ -98,7 +98,7 @@ def convert_hes(data_dir, output_filename, format='HDF', max_chunks=None):
     }
     
     # Open DataStore
-    store = get_datastore(output_filename, format, mode='w')
+    store = get_datastore(output_filename, format, mode='w', **store_kwargs)
     
     # load list of appliances
     hes_to_nilmtk_appliance_lookup = pd.read_csv(join(get_module_directory(), 
@@ -49,7 +49,7 @@ START_DATETIME, END_DATETIME = '2013-07-13', '2013-08-04'
 FREQ = "1T"
 
 
-def convert_iawe(iawe_path, output_filename, format="HDF"):
+def convert_iawe(iawe_path, output_filename, format="HDF", **store_kwargs):
     """
     Parameters
     ----------
@@ -57,6 +57,9 @@ def convert_iawe(iawe_path, output_filename, format="HDF"):
         The root path of the iawe dataset.
     output_filename : str
         The destination filename (including path and suffix).
+    **store_kwargs : optional
+        Compression settings for the HDF output, e.g.
+        `compression='archive'`.  See `nilmtk.utils.get_datastore`.
     """
 
     check_directory_exists(iawe_path)
@@ -64,7 +67,7 @@ def convert_iawe(iawe_path, output_filename, format="HDF"):
     idx = idx.tz_localize('GMT').tz_convert(TIMEZONE)
 
     # Open data store
-    store = get_datastore(output_filename, format, mode='w')
+    store = get_datastore(output_filename, format, mode='w', **store_kwargs)
     electricity_path = join(iawe_path, "electricity")
 
     # Mains data
@@ -21,7 +21,7 @@ TODO:
 """
 
 
-def convert_redd(redd_path, output_filename, format='HDF'):
+def convert_redd(redd_path, output_filename, format='HDF', **store_kwargs):
     """
     Parameters
     ----------
@@ -31,6 +31,9 @@ def convert_redd(redd_path, output_filename, format='HDF'):
         The destination filename (including path and suffix).
     format : str
         format of output. Either 'HDF' or 'CSV'. Defaults to 'HDF'
+    **store_kwargs : optional
+        Compression settings for the HDF output, e.g.
+        `compression='archive'`.  See `nilmtk.utils.get_datastore`.
     """
 
     def _redd_measurement_mapping_func(house_id, chan_id):
@@ -38,7 +41,7 @@ def convert_redd(redd_path, output_filename, format='HDF'):
         return [('power', ac_type)]
         
     # Open DataStore
-    store = get_datastore(output_filename, format, mode='w')
+    store = get_datastore(output_filename, format, mode='w', **store_kwargs)
 
     # Convert raw data to DataStore
     _convert(redd_path, store, _redd_measurement_mapping_func, 'US/Eastern')
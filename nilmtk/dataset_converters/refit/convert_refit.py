@@ -30,7 +30,7 @@ from nilmtk.utils import get_module_directory, check_directory_exists
 from nilm_metadata import convert_yaml_to_hdf5, save_yaml_to_datastore
 
 
-def convert_refit(input_path, output_filename, format='HDF'):
+def convert_refit(input_path, output_filename, format='HDF', **store_kwargs):
     """
     Parameters
     ----------
@@ -40,10 +40,13 @@ def convert_refit(input_path, output_filename, format='HDF'):
         The destination filename (including path and suffix).
     format : str
         format of output. Either 'HDF' or 'CSV'. Defaults to 'HDF'
+    **store_kwargs : optional
+        Compression settings for the HDF output, e.g.
+        `compression='archive'`.  See `nilmtk.utils.get_datastore`.
     """
         
     # Open DataStore
-    store = get_datastore(output_filename, format, mode='w')
+    store = get_datastore(output_filename, format, mode='w', **store_kwargs)
 
     # Convert raw data to DataStore
     _convert(input_path, store, 'Europe/London')
@@ -13,7 +13,7 @@ ONE_SEC_COLUMNS = [('power', 'active'), ('power', 'apparent'), ('voltage', '')]
 TZ = 'Europe/London'
 
 
-def convert_ukdale(ukdale_path, output_filename, format='HDF'):
+def convert_ukdale(ukdale_path, output_filename, format='HDF', **store_kwargs):
     """Converts the UK-DALE dataset to NILMTK HDF5 format.
 
     For more information about the UK-DALE dataset, and to download
@@ -28,6 +28,9 @@ def convert_ukdale(ukdale_path, output_filename, format='HDF'):
         The destination filename (including path and suffix).
     format : str
         format of output. Either 'HDF' or 'CSV'. Defaults to 'HDF'
+    **store_kwargs : optional
+        Compression settings for the HDF output, e.g.
+        `compression='archive'`.  See `nilmtk.utils.get_datastore`.
     """
     ac_type_map = _get_ac_type_map(ukdale_path)
 
@@ -36,7 +39,7 @@ def convert_ukdale(ukdale_path, output_filename, format='HDF'):
         return [('power', ac_type)]
 
     # Open DataStore
-    store = get_datastore(output_filename, format, mode='w')
+    store = get_datastore(output_filename, format, mode='w', **store_kwargs)
 
     # Convert 6-second data
     _convert(ukdale_path, store, _ukdale_measurement_mapping_func, TZ,
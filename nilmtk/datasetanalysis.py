@@ -11,6 +11,7 @@ from datetime import datetime
 from nilmtk import TimeFrameGroup, TimeFrame, MeterGroup
 import matplotlib.pyplot as plt
 import pickle as pckl
+from nilmtk.precompute import precompute_stats
 
 class DatasetAnalysis(object):
     """ Offers diverse analysis functionality for whole datasets
@@ -410,10 +411,13 @@ class DatasetAnalysis(object):
 
 
 
-def precalculate_all_stats(paths, bad_meters, verbose = True):
+def precalculate_all_stats(paths, bad_meters, verbose = True, n_workers = None,
+                           journal = None):
     """ Precalculates all statistics of the dataset.
     Afterwards the statistics are located in the caches.
-    This script is perfect to run it overnight.
+    This script is perfect to run it overnight. The meters are
+    distributed over `n_workers` processes and an interrupted run
+    continues where it stopped when started again with the same journal.
 
     Parameters
     ----------
@@ -424,27 +428,23 @@ def precalculate_all_stats(paths, bad_meters, verbose = True):
         malicious.
     verbose: bool
         Whether to return additional information.
+    n_workers: int (optional)
+        Number of processes. Defaults to the number of CPUs.
+    journal: str (optional)
+        Path of the journal file. See `nilmtk.precompute.precompute_stats`.
+
+    Returns
+    -------
+    jobs: pd.DataFrame
+        The time spent for each meter.
     """
-
     if not type(paths) is list:
         paths = [paths]
 
-    datasets = []
-    for path in paths:
-        if verbose:
-            print("Load Dataset {0}.".format(path))
-        datasets.append(DataSet(path))
-
-    total_sets = len(self.datasets)
-    for i, dataset in enumerate(datasets):
-        if verbose:
-            print("##### Calculate {0}/{1}".format(str(i),str(total_sets)))
-        dataset.calc_and_cache_stats(ignore_meters=bad_meters, verbose=True)
-        if verbose:
-            print("##### Finished {0} at {1}".format(str(i),datetime.now()))
-
-
-
-        
-
-
+    if verbose:
+        print("##### Calculate {0} datasets at {1}".format(len(paths), datetime.now()))
+    jobs = precompute_stats(paths, n_workers=n_workers, journal=journal,
+                            ignore_meters=bad_meters, verbose=verbose)
+    if verbose:
+        print("##### Finished at {0}".format(datetime.now()))
+    return jobs
@@ -1,12 +1,17 @@
 from __future__ import print_function, division
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from copy import deepcopy
 import numpy as np
 from os.path import isfile
+from collections import deque
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+from six.moves import queue
 from nilmtk.timeframe import TimeFrame
 from nilmtk.timeframegroup import TimeFrameGroup
-from .datastore import DataStore, MAX_MEM_ALLOWANCE_IN_BYTES
+from nilmtk.datastore.datastore import DataStore, MAX_MEM_ALLOWANCE_IN_BYTES
 from nilmtk.docinherit import doc_inherit
 from builtins import range
 import json
@@ -27,7 +32,8 @@ class VEPConnector(DataStore):
     '''
 
     @doc_inherit
-    def __init__(self, api_address, datastore_kwargs = None, logging = True):
+    def __init__(self, api_address, datastore_kwargs = None, logging = True,
+                 n_connections = 4):
         '''
         Sets up the connector to the VEP plattform.
         
@@ -43,6 +49,10 @@ class VEPConnector(DataStore):
             It set to true, the sent packages are logged to 
             standard output. This is usefull to check out
             when API access is not working properly.            
+        n_connections : int
+            Number of keep-alive HTTP sessions kept open to the API. 
+            This is also the default number of slices `load` 
+            requests at the same time.
         '''
 
         if not "username" in datastore_kwargs:
@@ -60,9 +70,21 @@ class VEPConnector(DataStore):
         if logging:
             self._init_logging()
 
+        # Pool of keep-alive sessions. Each session holds one connection
+        # and is only used by one thread at a time, see `_session`.
+        self.n_connections = max(int(n_connections), 1)
+        self._sessions = queue.Queue()
+        for i in range(self.n_connections):
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._sessions.put(session)
+
         #Get Token
         data = "grant_type=password&username=" + self.username +"&password=" + self.password
-        r = requests.post(self.base_url + "gettoken", data = data)
+        with self._session() as session:
+            r = session.post(self.base_url + "gettoken", data = data)
         tst = r.text
         tst = json.loads(tst)
         self.auth_token = tst["access_token"]
@@ -123,10 +145,11 @@ class VEPConnector(DataStore):
         header = {"Authorization": "Bearer " + self.auth_token, "Content-type": "application/json"}
         target_url = self.base_url + "/EnergyTK/" + fn + "/" + "/".join(parameters.values())
 
-        if type == "GET":
-            r = requests.get(target_url, headers = header)
-        else:
-            r = requests.post(target_url, headers = header, json = body_data)
+        with self._session() as session:
+            if type == "GET":
+                r = session.get(target_url, headers = header)
+            else:
+                r = session.post(target_url, headers = header, json = body_data)
 
         result = None
         txt = r.text 
@@ -134,6 +157,19 @@ class VEPConnector(DataStore):
             result = json.loads(txt)
         return result
 
+
+    @contextmanager
+    def _session(self):
+        '''
+        Borrows a session from the pool of keep-alive sessions. Blocks 
+        while all sessions are in use by other threads.
+        '''
+        session = self._sessions.get()
+        try:
+            yield session
+        finally:
+            self._sessions.put(session)
+
     
     def test(self):
         ''' 
@@ -201,15 +237,29 @@ class VEPConnector(DataStore):
     
     
     def load(self, key, columns=None, sections=None, n_look_ahead_rows=0,
-             chunksize=MAX_MEM_ALLOWANCE_IN_BYTES, verbose=False, **additionalLoaderKwargs):
+             chunksize=MAX_MEM_ALLOWANCE_IN_BYTES, verbose=False, 
+             n_concurrent_requests=None, **additionalLoaderKwargs):
         '''
         Load measurments over a certain period of time.
         The resampling is taking place on the serverside to save bandwidth. This is different from the 
         HDF datastore where always all data is loaded and then resampled.
-        '''
-        # TODO: calculate chunksize default based on physical
-        # memory installed and number of columns
 
+        Every section is split into slices of about `chunksize` rows at 
+        `sample_period`.  Loading is bound by the latency of the API, so 
+        `n_concurrent_requests` slices are requested at the same time by 
+        a pool of worker threads, which also parse the responses.  The 
+        chunks are yielded in the order of the slices nevertheless.
+
+        Parameters
+        ----------
+        See `DataStore.load`.  Additionally:
+
+        sample_period : int
+            Required.  Sample period in seconds the server resamples to.
+        n_concurrent_requests : int, optional
+            Defaults to the number of pooled connections.  With 1 the 
+            slices are requested one after the other.
+        '''
         # Make sure key has a slash at the front but not at the end.
         if key[0] != '/':
             key = '/' + key
@@ -217,6 +267,9 @@ class VEPConnector(DataStore):
             key = key[:-1]
 
         sample_period = additionalLoaderKwargs["sample_period"]
+        if n_concurrent_requests is None:
+            n_concurrent_requests = self.n_connections
+        n_concurrent_requests = max(int(n_concurrent_requests), 1)
 
         # Make sure chunksize is an int otherwise `range` complains later.
         chunksize = np.int64(chunksize)
@@ -226,6 +279,7 @@ class VEPConnector(DataStore):
         sections = TimeFrameGroup(sections)
 
         # Replace any Nones with '' in cols:
+        cols_idx = None
         if columns is not None:
             columns = [('' if pq is None else pq, '' if ac is None else ac)
                     for pq, ac in columns]
@@ -237,74 +291,114 @@ class VEPConnector(DataStore):
         columnsStr = str(columnsStr)
 
         if verbose:
-            print("HDFDataStore.load(key='{}', columns='{}', sections='{}',"
+            print("VEPConnector.load(key='{}', columns='{}', sections='{}',"
                   " n_look_ahead_rows='{}', chunksize='{}')"
                   .format(key, columns, sections, n_look_ahead_rows, chunksize))
 
         self.all_sections_smaller_than_chunksize = True
 
+        def load_slice(chunk_start, chunk_end):
+            # Runs inside the worker threads
+            data = self._load_slice(key, columns, columnsStr, sample_period,
+                                    chunk_start, chunk_end)
+            if n_look_ahead_rows > 0:
+                look_ahead_end = chunk_end + datetime.timedelta(
+                    seconds=int(sample_period * n_look_ahead_rows))
+                look_ahead = self._load_slice(key, columns, columnsStr, 
+                                              sample_period, chunk_end, 
+                                              look_ahead_end)
+                data.look_ahead = look_ahead.iloc[:n_look_ahead_rows]
+            return data
+
+        pool = ThreadPool(n_concurrent_requests)
+        # Slices in flight, oldest first: (slice, AsyncResult or None)
+        pending = deque()
+        try:
+            for slice_ in self._slices(key, sections, sample_period, 
+                                       chunksize, verbose):
+                if slice_.chunk_start is None:
+                    pending.append((slice_, None))
+                else:
+                    pending.append((slice_, pool.apply_async(
+                        load_slice, (slice_.chunk_start, slice_.chunk_end))))
+                while len(pending) > n_concurrent_requests:
+                    yield self._finish_slice(cols_idx, *pending.popleft())
+            while pending:
+                yield self._finish_slice(cols_idx, *pending.popleft())
+        finally:
+            pool.terminate()
+
+    def _slices(self, key, sections, sample_period, chunksize, verbose):
+        '''
+        Splits each section into contiguous slices with at most `chunksize` 
+        samples.  Yields `_Slice` objects.  Empty sections are returned as 
+        a single slice whose `chunk_start` is None.
+        '''
         for section in sections:
             if verbose:
                 print("   ", section)
             window_intersect = self.window.intersection(section)
+            if (not window_intersect.empty and 
+                    (window_intersect.start is None or window_intersect.end is None)):
+                window_intersect = self.get_timeframe(key).intersection(window_intersect)
 
             if window_intersect.empty: # Wenn der abgefragte Zeitabschnitt nicht in der Datenreihe enthalten ist
-                data = pd.DataFrame(columns = cols_idx)
-                data.timeframe = section
-                yield data
+                yield _Slice(section, window_intersect, 0, False, None, None)
                 continue
 
             # The estimation of fitting slices is avoided
-            delta = section.end -  section.start
+            delta = window_intersect.end - window_intersect.start
             n_chunks = int(np.ceil((delta.total_seconds() / sample_period / chunksize)))
-            delta = delta/n_chunks
-            slice_starts = []
-            for i in range(n_chunks):
-                slice_starts.append(section.start + delta * i)
+            n_chunks = max(n_chunks, 1)
+            delta = delta / n_chunks
             if n_chunks > 1:
                 self.all_sections_smaller_than_chunksize = False
 
-            # Load the sections
-            for chunk_i, chunk_start_i in enumerate(slice_starts):
-                chunk_end_i = chunk_start_i + datetime.timedelta(seconds=int(chunksize))
-                there_are_more_subchunks = (chunk_i < n_chunks-1)
-
-                if chunk_end_i > section.end:
-                    chunk_end_i = section.end
-
-                # The required parameter form is: base={lat}/{lng}/{deviceKey}/{deviceType} + {start}/{end}/{columns}/{sample_rate}
-                iso_chunk_start = chunk_start_i.isoformat()
-                iso_chunk_end = chunk_end_i.isoformat()
-                data = self._execute_request("load", type = "GET", parameters = {"url": key, "start": iso_chunk_start, "end": iso_chunk_end, "columns": columnsStr, "sample_period": str(sample_period)}) 
-                data = self._jsonDataToPandasDF(columns, data)
-
-                if len(data) <= 2:
-                    data = pd.DataFrame(columns=cols_idx)
-                    data.timeframe = section
-                    yield data
-
-                # Load look ahead if necessary
-                if n_look_ahead_rows > 0:
-                    if len(data.index) > 0:
-                        look_ahead_start_i = chunk_end_i
-                        look_ahead_end_i = look_ahead_start_i + n_look_ahead_rows
-                        try:
-                            #data.look_ahead = self.store.select(
-                            #    key=key, columns=columns,
-                            #    start=look_ahead_start_i,
-                            #    stop=look_ahead_end_i)
-                            data = self._execute_request("load", type = "GET", parameters = {"url": key, "start": look_ahead_start_i, "end": look_ahead_end_i, "columns": columnsStr, "sample_period": sample_period}) 
-                            data = self._jsonDataToPandasDF(columns, data)
-                        except ValueError:
-                            data.look_ahead = pd.DataFrame()
-                    else:
-                        data.look_ahead = pd.DataFrame()
-
-                data.timeframe = _timeframe_for_chunk(there_are_more_subchunks, 
-                                                      chunk_i, window_intersect,
-                                                      data.index)
-                yield data
-                del data
+            for chunk_i in range(n_chunks):
+                chunk_start = window_intersect.start + delta * chunk_i
+                if chunk_i < n_chunks - 1:
+                    chunk_end = window_intersect.start + delta * (chunk_i + 1)
+                else:
+                    chunk_end = window_intersect.end
+                yield _Slice(section, window_intersect, chunk_i, 
+                             chunk_i < n_chunks - 1, chunk_start, chunk_end)
+
+    def _load_slice(self, key, columns, columnsStr, sample_period, start, end):
+        '''
+        Requests the data between `start` and `end` and parses it into a 
+        DataFrame.  Thread-safe.
+        '''
+        # The required parameter form is: base={lat}/{lng}/{deviceKey}/{deviceType} + {start}/{end}/{columns}/{sample_rate}
+        data = self._execute_request("load", type = "GET", parameters = {
+            "url": key, "start": start.isoformat(), "end": end.isoformat(), 
+            "columns": columnsStr, "sample_period": str(sample_period)}) 
+        if data is None:
+            return pd.DataFrame(columns = pd.MultiIndex.from_tuples(columns, names = LEVEL_NAMES))
+        return self._jsonDataToPandasDF(columns, data)
+
+    def _finish_slice(self, cols_idx, slice_, result):
+        '''
+        Waits for the data of `slice_` and sets the `timeframe`.
+        '''
+        if result is None:
+            data = pd.DataFrame(columns = cols_idx)
+            data.timeframe = slice_.section
+            return data
+
+        data = result.get()
+        if len(data) == 0:
+            look_ahead = getattr(data, 'look_ahead', None)
+            data = pd.DataFrame(columns = cols_idx)
+            data.timeframe = slice_.section
+            if look_ahead is not None:
+                data.look_ahead = look_ahead
+            return data
+
+        data.timeframe = _timeframe_for_chunk(slice_.there_are_more_subchunks, 
+                                              slice_.chunk_i, 
+                                              slice_.window_intersect,
+                                              data.index)
+        return data
 
     @doc_inherit
     def append(self, key, value):
@@ -411,9 +505,12 @@ class VEPConnector(DataStore):
     @doc_inherit
     def close(self):
         """
-        Not necessary to close the connection to the REST API.
+        Closes the pooled keep-alive connections.  They are opened 
+        again by the next request.
         """
-        pass
+        for i in range(self.n_connections):
+            with self._session() as session:
+                session.close()
 
     @doc_inherit
     def open(self, mode='a'):
@@ -476,6 +573,20 @@ class VEPConnector(DataStore):
         return model
 
 
+class _Slice(object):
+    '''
+    A time slice of a section which is loaded with a single request.
+    '''
+    def __init__(self, section, window_intersect, chunk_i, 
+                 there_are_more_subchunks, chunk_start, chunk_end):
+        self.section = section
+        self.window_intersect = window_intersect
+        self.chunk_i = chunk_i
+        self.there_are_more_subchunks = there_are_more_subchunks
+        self.chunk_start = chunk_start
+        self.chunk_end = chunk_end
+
+
 def _timeframe_for_chunk(there_are_more_subchunks, chunk_i, window_intersect, index):
     start = None
     end = None
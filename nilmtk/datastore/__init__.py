@@ -1,4 +1,7 @@
 from .datastore import DataStore, MAX_MEM_ALLOWANCE_IN_BYTES
 from .hdfdatastore import HDFDataStore
 from .csvdatastore import CSVDataStore
+from .npydatastore import NpyDataStore
 from .key import Key
+from .bufferedwriter import BufferedWriter
+from .compressionbenchmark import benchmark_compression
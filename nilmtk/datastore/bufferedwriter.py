@@ -0,0 +1,90 @@
+from __future__ import print_function, division
+import pandas as pd
+from collections import OrderedDict
+from .datastore import MAX_MEM_ALLOWANCE_IN_BYTES
+
+
+class BufferedWriter(object):
+    """Collects many small DataFrames per key in memory and writes them to
+    a DataStore in large contiguous blocks.
+
+    Disaggregators produce one small DataFrame per chunk and appliance.
+    Appending each of them on its own makes `HDFDataStore` grow and
+    re-index every table thousands of times.  This writer instead keeps
+    the frames until `max_bytes` are buffered in total, then writes one
+    concatenated frame per key with the table index switched off.  The
+    `index` column index of every written table is built only once, in
+    `close`.
+
+    Frames of the same key have to be appended in time order and with
+    the same columns, just like with `DataStore.append`.
+
+    Parameters
+    ----------
+    datastore : nilmtk.DataStore
+    max_bytes : int, optional
+        Memory budget for the buffered frames.  When it is exceeded all
+        buffers are written to `datastore`.
+    index : bool, optional, defaults to True
+        If False then no table index is built at all.  Use this for fast
+        scratch stores which are only read back in full.
+
+    Examples
+    --------
+    >>> with BufferedWriter(output_datastore) as writer:
+    ...     for chunk in mains.power_series():
+    ...         writer.append(key, disaggregate(chunk))
+    """
+
+    def __init__(self, datastore, max_bytes=MAX_MEM_ALLOWANCE_IN_BYTES,
+                 index=True):
+        self.datastore = datastore
+        self.max_bytes = max_bytes
+        self.index = index
+        self._buffers = OrderedDict()
+        self._n_bytes = 0
+        self._written_keys = []
+
+    def append(self, key, value):
+        """Buffers `value` for `key` and writes all buffers to the
+        datastore if the memory budget is exceeded.
+
+        Parameters
+        ----------
+        key : str
+        value : pd.DataFrame
+        """
+        if len(value) == 0:
+            return
+        self._buffers.setdefault(key, []).append(value)
+        self._n_bytes += value.memory_usage(index=True).sum()
+        if self._n_bytes > self.max_bytes:
+            self.flush()
+
+    def flush(self):
+        """Writes all buffered frames to the datastore, one block per key."""
+        if not self._buffers:
+            return
+        with self.datastore.batch():
+            for key, frames in self._buffers.items():
+                value = frames[0] if len(frames) == 1 else pd.concat(frames)
+                self.datastore.append(key, value, index=False)
+                if key not in self._written_keys:
+                    self._written_keys.append(key)
+        self._buffers = OrderedDict()
+        self._n_bytes = 0
+
+    def close(self):
+        """Writes the remaining buffers and builds the table indices."""
+        self.flush()
+        if self.index:
+            with self.datastore.batch():
+                for key in self._written_keys:
+                    self.datastore.create_index(key)
+        self._written_keys = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
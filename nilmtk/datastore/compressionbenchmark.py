@@ -0,0 +1,92 @@
+from __future__ import print_function, division
+import pandas as pd
+from collections import OrderedDict
+from os.path import join, getsize
+from tempfile import mkdtemp
+from shutil import rmtree
+from time import time
+from .hdfdatastore import (HDFDataStore, DEFAULT_COMPRESSION,
+                           COMPRESSION_PRESETS)
+
+KEY = '/building1/elec/meter1'
+
+
+def benchmark_compression(data, settings=None, directory=None, n_repeats=3):
+    """Measures how fast `data` is written to and read from an HDF5 store
+    and how well it compresses, for several compression settings.
+
+    Use this with a sample of real meter data (a few million rows are
+    enough) to choose the settings for a machine and a dataset.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        e.g. `next(meter.load(chunksize=5000000))`
+    settings : dict, optional
+        Maps a name to a compression preset name or to a dict of
+        `HDFDataStore` settings (`complib`, `complevel`,
+        `expectedrows`).  Defaults to the default settings and all
+        `COMPRESSION_PRESETS`.
+    directory : str, optional
+        Where to write the temporary files.  Defaults to the temp directory.
+        Use a directory on the disk which will hold the real data.
+    n_repeats : int, optional
+        Each measurement is repeated and the fastest run is reported.
+
+    Returns
+    -------
+    pd.DataFrame with one row per setting and the columns:
+        write_MBps, read_MBps : float
+            Uncompressed megabytes of `data` per second of wall time.
+            Writing includes building the table index.  The file is read
+            right after writing, i.e. mostly from the OS page cache, so
+            `read_MBps` mostly measures decompression.
+        ratio : float
+            Uncompressed size of `data` divided by the file size.
+        file_MB : float
+    """
+    if settings is None:
+        settings = OrderedDict([('default', DEFAULT_COMPRESSION)])
+        for name in sorted(COMPRESSION_PRESETS.keys()):
+            settings[name] = name
+
+    raw_MB = data.memory_usage(index=True).sum() / 1E6
+    tmp_dir = mkdtemp(dir=directory)
+    results = OrderedDict()
+    try:
+        for name, setting in settings.items():
+            if isinstance(setting, dict):
+                setting = dict(setting)
+                expectedrows = setting.pop('expectedrows', None)
+                store_kwargs = dict(compression=setting,
+                                    expectedrows=expectedrows)
+            else:
+                store_kwargs = dict(compression=setting)
+            filename = join(tmp_dir, '{}.h5'.format(name))
+            write_durations = []
+            read_durations = []
+            for _ in range(n_repeats):
+                datastore = HDFDataStore(filename, 'w', **store_kwargs)
+                t_start = time()
+                datastore.append(KEY, data, index=False)
+                datastore.create_index(KEY)
+                datastore.close()
+                write_durations.append(time() - t_start)
+
+                datastore = HDFDataStore(filename, 'r')
+                t_start = time()
+                datastore[KEY]
+                read_durations.append(time() - t_start)
+                datastore.close()
+
+            file_MB = getsize(filename) / 1E6
+            results[name] = {
+                'write_MBps': raw_MB / min(write_durations),
+                'read_MBps': raw_MB / min(read_durations),
+                'ratio': raw_MB / file_MB,
+                'file_MB': file_MB}
+    finally:
+        rmtree(tmp_dir)
+
+    return pd.DataFrame(results).T[
+        ['write_MBps', 'read_MBps', 'ratio', 'file_MB']]
@@ -6,7 +6,7 @@ from copy import deepcopy
 from collections import OrderedDict
 import numpy as np
 import yaml
-from os.path import isdir, isfile, join, exists, dirname
+from os.path import isdir, isfile, join, exists, dirname, getsize, getmtime
 from os import listdir, makedirs, remove
 from shutil import rmtree
 import re
@@ -17,6 +17,7 @@ from nilmtk.node import Node
 from nilmtk.datastore import DataStore, MAX_MEM_ALLOWANCE_IN_BYTES
 from nilmtk.datastore.key import Key
 from nilmtk.datastore.datastore import write_yaml_to_file, join_key
+from nilmtk.datastore.hdfdatastore import _timeframe_for_chunk
 from nilmtk.docinherit import doc_inherit
 
 # do not edit! added by PythonBreakpoints
@@ -29,6 +30,8 @@ class CSVDataStore(DataStore):
     def __init__(self, filename):
 
         self.filename = filename
+        # Sparse byte-offset indices per file, see `_CSVRowIndex`
+        self._row_indices = {}
         # make root directory
         path = self._key_to_abs_path('/')
         if not exists(path):
@@ -48,70 +51,73 @@ class CSVDataStore(DataStore):
         else:
             raise KeyError('{} not found'.format(key))
 
+    @doc_inherit
+    def __contains__(self, key):
+        return isfile(self._key_to_abs_path(key))
+
     @doc_inherit
     def load(self, key, columns=None, sections=None, n_look_ahead_rows=0,
-             chunksize=MAX_MEM_ALLOWANCE_IN_BYTES):
+             chunksize=MAX_MEM_ALLOWANCE_IN_BYTES, verbose=False,
+             **additionalLoaderKwargs):
              
         file_path = self._key_to_abs_path(key)
+        if not isfile(file_path):
+            raise KeyError('{} not found'.format(key))
+        row_index = self._row_index(file_path)
         
         # Set `sections` variable
         sections = [TimeFrame()] if sections is None else sections
         sections = TimeFrameGroup(sections)
 
+        if verbose:
+            print("CSVDataStore.load(key='{}', columns='{}', sections='{}',"
+                  " n_look_ahead_rows='{}', chunksize='{}')"
+                  .format(key, columns, sections, n_look_ahead_rows, chunksize))
+
         self.all_sections_smaller_than_chunksize = True
+        chunksize = int(chunksize)
         
-        # iterate through parameter sections
-        # requires 1 pass through file for each section
-        for section in sections:
-            window_intersect = self.window.intersection(section)
-            header_rows = [0,1]
-            text_file_reader = pd.read_csv(file_path, 
-                                            index_col=0, 
-                                            header=header_rows, 
-                                            parse_dates=True,
-                                            chunksize=chunksize)
-                                            
-            # iterate through all chunks in file
-            for chunk_idx, chunk in enumerate(text_file_reader):
-                
-                # filter dataframe by specified columns
-                if columns:
-                    chunk = chunk[columns]
-                
-                # mask chunk by window and section intersect
-                subchunk_idx = [True]*len(chunk)
-                if window_intersect.start:
-                    subchunk_idx = np.logical_and(subchunk_idx, (chunk.index>=window_intersect.start))
-                if window_intersect.end:
-                    subchunk_idx = np.logical_and(subchunk_idx, (chunk.index<window_intersect.end))
+        # All sections are served by a single reader which only moves
+        # forwards through the file, as long as the sections are sorted.
+        # It seeks (using the sparse row index) whenever the next section
+        # starts in a later block than where the reader currently is.
+        reader = _ForwardCSVReader(file_path, row_index)
+        try:
+            for section in sections:
+                window_intersect = self.window.intersection(section)
                 if window_intersect.empty:
-                    subchunk_idx = [False]*len(chunk)
-                subchunk = chunk[subchunk_idx]
-                
-                if len(subchunk)>0:
-                    subchunk_end = np.max(np.nonzero(subchunk_idx))
-                    subchunk.timeframe = TimeFrame(subchunk.index[0], subchunk.index[-1])
-                    # Load look ahead if necessary
+                    data = pd.DataFrame(columns=row_index.columns)
+                    data.timeframe = section
+                    yield data
+                    continue
+
+                reader.move_to(window_intersect.start)
+                chunks = reader.read_until(window_intersect.end,
+                                           window_intersect.include_end,
+                                           chunksize)
+                for chunk_i, (data, there_are_more_subchunks) in enumerate(chunks):
+                    if there_are_more_subchunks:
+                        self.all_sections_smaller_than_chunksize = False
+                    if columns:
+                        data = data[columns]
                     if n_look_ahead_rows > 0:
-                        if len(subchunk.index) > 0:
-                            rows_to_skip = (len(header_rows)+1)+(chunk_idx*chunksize)+subchunk_end+1
-                            try:
-                                subchunk.look_ahead = pd.read_csv(file_path, 
-                                                index_col=0, 
-                                                header=None, 
-                                                parse_dates=True,
-                                                skiprows=rows_to_skip,
-                                                nrows=n_look_ahead_rows)
-                            except ValueError:
-                                subchunk.look_ahead = pd.DataFrame()
-                        else:
-                            subchunk.look_ahead = pd.DataFrame()
-                    
-                    yield subchunk
+                        look_ahead = reader.peek(n_look_ahead_rows)
+                        data.look_ahead = look_ahead[columns] if columns else look_ahead
+                    data.timeframe = _timeframe_for_chunk(
+                        there_are_more_subchunks, chunk_i, window_intersect,
+                        data.index)
+                    yield data
 
-    @doc_inherit
-    def append(self, key, value):
+                if chunks.n_chunks == 0:
+                    data = pd.DataFrame(columns=row_index.columns)
+                    data.timeframe = window_intersect
+                    yield data
+        finally:
+            reader.close()
 
+    @doc_inherit
+    def append(self, key, value, index=True):
+        # `index` is only accepted for compatibility with HDFDataStore.
         file_path = self._key_to_abs_path(key)
         path = dirname(file_path)
         if not exists(path):
@@ -221,20 +227,20 @@ class CSVDataStore(DataStore):
     def get_timeframe(self, key):
     
         file_path = self._key_to_abs_path(key)
-        text_file_reader = pd.read_csv(file_path, 
-                                        index_col=0, 
-                                        header=[0,1], 
-                                        parse_dates=True,
-                                        chunksize=MAX_MEM_ALLOWANCE_IN_BYTES)
-        start = None
-        end = None
-        for df in text_file_reader:
-            if start is None:
-                start = df.index[0]
-            end = df.index[-1]
-        timeframe = TimeFrame(start, end)
+        row_index = self._row_index(file_path)
+        timeframe = TimeFrame(row_index.first_timestamp, row_index.last_timestamp)
         return self.window.intersection(timeframe)
         
+    def _row_index(self, file_path):
+        """Returns the `_CSVRowIndex` of `file_path`.  It is built on first
+        use and rebuilt if the file has changed since."""
+        signature = (getsize(file_path), getmtime(file_path))
+        cached = self._row_indices.get(file_path)
+        if cached is None or cached.signature != signature:
+            cached = _CSVRowIndex(file_path, signature)
+            self._row_indices[file_path] = cached
+        return cached
+
     def _get_metadata_path(self):
         return join(self.filename, 'metadata')
         
@@ -249,3 +255,287 @@ class CSVDataStore(DataStore):
             if key_object.building and key_object.meter:
                 abs_path += '.csv'
         return abs_path
+
+
+class _CSVRowIndex(object):
+    """A sparse index from timestamps to byte offsets of a CSV file.
+
+    Built with a single scan of the raw bytes.  Only the timestamps of
+    every `ROW_STEP`-th row are parsed.
+
+    Attributes
+    ----------
+    signature : (size, mtime) of the file when the index was built
+    columns : pd.MultiIndex of the data columns
+    n_header_lines : int
+    offsets : np.ndarray of int64
+        Byte offset of rows 0, ROW_STEP, 2*ROW_STEP, ...
+    timestamps : np.ndarray of int64
+        Timestamps (ns since the epoch, UTC) of those rows.
+    first_timestamp, last_timestamp : pd.Timestamp
+    """
+
+    ROW_STEP = 10000
+
+    def __init__(self, file_path, signature):
+        self.signature = signature
+        columns = pd.read_csv(file_path, index_col=0, header=[0, 1], nrows=0).columns
+        # pandas names empty header cells e.g. 'Unnamed: 3_level_1'
+        self.columns = pd.MultiIndex.from_tuples(
+            [(pq, '' if ac.startswith('Unnamed:') else ac) for pq, ac in columns],
+            names=columns.names)
+
+        offsets = []
+        timestamps = []
+        first_line = last_line = None
+        with open(file_path, 'rb') as csv_file:
+            # Two header lines plus an optional line with the index name
+            self.n_header_lines = 2
+            offset = len(csv_file.readline()) + len(csv_file.readline())
+            for row_i, line in enumerate(csv_file):
+                if row_i == 0 and not line.split(b',', 1)[0].strip():
+                    self.n_header_lines += 1
+                    offset += len(line)
+                    continue
+                if not line.strip():
+                    offset += len(line)
+                    continue
+                if first_line is None:
+                    first_line = line
+                if len(offsets) == 0 or row_i % self.ROW_STEP == 0:
+                    offsets.append(offset)
+                    timestamps.append(line.split(b',', 1)[0].decode())
+                last_line = line
+                offset += len(line)
+
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.timestamps = _to_int64(pd.to_datetime(timestamps, utc=True))
+        self.first_timestamp = None
+        self.last_timestamp = None
+        if first_line is not None:
+            self.first_timestamp = self.parse_index(
+                [first_line.split(b',', 1)[0].decode()])[0]
+            self.last_timestamp = self.parse_index(
+                [last_line.split(b',', 1)[0].decode()])[0]
+
+    def parse_index(self, strings):
+        """Parses timestamps the way `pd.read_csv(parse_dates=True)` does."""
+        return pd.DatetimeIndex(pd.to_datetime(strings))
+
+    def block_before(self, timestamp):
+        """Returns (offset, timestamp as int64) of the last sampled row
+        not after `timestamp`, or of the first row if `timestamp` is None
+        or before the first row."""
+        i = 0
+        if timestamp is not None:
+            i = np.searchsorted(self.timestamps, _timestamp_to_int64(timestamp),
+                                side='right') - 1
+            i = max(i, 0)
+        return self.offsets[i], self.timestamps[i]
+
+
+class _ForwardCSVReader(object):
+    """Reads rows of a CSV file in timestamp order, keeping the rows which
+    have been parsed but not yet consumed in a buffer.  Used by
+    `CSVDataStore.load` to serve all sections (and their look ahead) in
+    one pass.
+
+    The buffer is a list of the parsed blocks, which are only 
+    concatenated when rows are returned, so each row is copied once
+    however many blocks a chunk spans."""
+
+    READ_CHUNKSIZE = 100000
+
+    def __init__(self, file_path, row_index):
+        self.file_path = file_path
+        self.row_index = row_index
+        self._file = None
+        self._reader = None
+        self._clear()
+
+    def _clear(self):
+        # Blocks of parsed rows and their int64 timestamps.  The first
+        # `_offset` rows of the first block have been consumed already.
+        self._blocks = []
+        self._blocks_ns = []
+        self._offset = 0
+        self._n_buffered = 0
+        self._last_consumed_ns = None
+        self._last_parsed_ns = None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._reader = None
+
+    def _seek(self, offset):
+        self.close()
+        self._clear()
+        self._file = open(self.file_path, 'rb')
+        self._file.seek(offset)
+        self._reader = pd.read_csv(self._file, header=None, index_col=0,
+                                   chunksize=self.READ_CHUNKSIZE)
+
+    def _fill(self):
+        """Parses the next block of rows into the buffer.  Returns False
+        at the end of the file."""
+        if self._reader is None:
+            return False
+        try:
+            data = next(self._reader)
+        except StopIteration:
+            self.close()
+            return False
+        if data.empty:
+            return True
+        data.index = self.row_index.parse_index(data.index)
+        data.index.name = None
+        data.columns = self.row_index.columns
+        data_ns = _to_int64(data.index)
+        self._blocks.append(data)
+        self._blocks_ns.append(data_ns)
+        self._n_buffered += len(data)
+        self._last_parsed_ns = data_ns[-1]
+        return True
+
+    def n_rows_before(self, time_ns, side='left'):
+        """Number of buffered rows before `time_ns`, like
+        `np.searchsorted(buffered timestamps, time_ns, side)`."""
+        n_rows = 0
+        for i, block_ns in enumerate(self._blocks_ns):
+            offset = self._offset if i == 0 else 0
+            if np.searchsorted(block_ns[-1:], time_ns, side=side) == 1:
+                # The whole block is before `time_ns`
+                n_rows += len(block_ns) - offset
+                continue
+            return n_rows + np.searchsorted(block_ns, time_ns, side=side) - offset
+        return n_rows
+
+    def has_rows_from(self, time_ns, side='left'):
+        """True if a buffered row is at or after (`side='left'`), or after
+        (`side='right'`), `time_ns`."""
+        if not self._n_buffered:
+            return False
+        return np.searchsorted(self._blocks_ns[-1][-1:], time_ns, side=side) == 0
+
+    def _rows(self, n_rows):
+        """Returns the next `n_rows` rows, concatenated once."""
+        pieces = []
+        start = self._offset
+        for block in self._blocks:
+            if n_rows <= 0:
+                break
+            piece = block.iloc[start:start + n_rows]
+            pieces.append(piece)
+            n_rows -= len(piece)
+            start = 0
+        if not pieces:
+            return pd.DataFrame(columns=self.row_index.columns)
+        return pieces[0] if len(pieces) == 1 else pd.concat(pieces)
+
+    def drop(self, n_rows):
+        """Removes the next `n_rows` rows."""
+        if n_rows <= 0:
+            return
+        self._n_buffered -= n_rows
+        n_rows += self._offset
+        while self._blocks and n_rows >= len(self._blocks_ns[0]):
+            n_rows -= len(self._blocks_ns[0])
+            self._last_consumed_ns = self._blocks_ns[0][-1]
+            del self._blocks[0], self._blocks_ns[0]
+        self._offset = n_rows
+        if n_rows:
+            self._last_consumed_ns = self._blocks_ns[0][n_rows - 1]
+
+    def consume(self, n_rows):
+        """Removes and returns the next `n_rows` rows."""
+        consumed = self._rows(n_rows)
+        self.drop(n_rows)
+        return consumed
+
+    def peek(self, n_rows):
+        """Returns the next `n_rows` rows without consuming them."""
+        while self._n_buffered < n_rows and self._fill():
+            pass
+        return self._rows(n_rows)
+
+    def move_to(self, start):
+        """Drops all rows before `start`.  Seeks if rows before `start`
+        have already been consumed, or if the reader can skip at least
+        one whole block of the file."""
+        if len(self.row_index.offsets) == 0:
+            return
+        offset, block_ns = self.row_index.block_before(start)
+        start_ns = None if start is None else _timestamp_to_int64(start)
+        already_consumed = (self._last_consumed_ns is not None and
+                            (start_ns is None or start_ns <= self._last_consumed_ns))
+        can_skip_block = (self._last_parsed_ns is not None and
+                          block_ns > self._last_parsed_ns)
+        if (self._last_parsed_ns is None and self._reader is None or
+                already_consumed or can_skip_block):
+            self._seek(offset)
+        if start_ns is None:
+            return
+        while True:
+            self.drop(self.n_rows_before(start_ns))
+            if self._n_buffered or not self._fill():
+                return
+
+    def read_until(self, end, include_end, chunksize):
+        """Returns a `_SectionChunks` iterator over the rows before `end`."""
+        return _SectionChunks(self, end, include_end, chunksize)
+
+
+class _SectionChunks(object):
+    """Iterates over (chunk, there_are_more_subchunks) for the rows of a
+    section.  Rows after the section stay in the reader's buffer, so that
+    they can be used as look ahead or by the next section."""
+
+    def __init__(self, reader, end, include_end, chunksize):
+        self.reader = reader
+        self.end_ns = None if end is None else _timestamp_to_int64(end)
+        self.side = 'right' if include_end else 'left'
+        self.chunksize = chunksize
+        self.n_chunks = 0
+
+    def _n_rows_in_section(self):
+        if self.end_ns is None:
+            return self.reader._n_buffered
+        return self.reader.n_rows_before(self.end_ns, side=self.side)
+
+    def _buffer_passes_end(self):
+        return (self.end_ns is not None and
+                self.reader.has_rows_from(self.end_ns, side=self.side))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # Parse until the buffer holds `chunksize` rows or a row beyond
+        # the section's end.  Only the last block can pass the end.
+        while (self.reader._n_buffered < self.chunksize and
+               not self._buffer_passes_end()):
+            if not self.reader._fill():
+                break
+        n_rows = min(self._n_rows_in_section(), self.chunksize)
+        if n_rows == 0:
+            raise StopIteration
+        chunk = self.reader.consume(n_rows)
+        self.n_chunks += 1
+        self.reader.peek(1)
+        there_are_more_subchunks = self._n_rows_in_section() > 0
+        return chunk, there_are_more_subchunks
+
+    next = __next__
+
+
+def _to_int64(index):
+    """Returns int64 nanoseconds since the epoch (UTC) of a DatetimeIndex."""
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return np.asarray(index.values, dtype='datetime64[ns]').view(np.int64)
+
+
+def _timestamp_to_int64(timestamp):
+    return np.int64(pd.Timestamp(timestamp).value)
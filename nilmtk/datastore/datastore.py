@@ -1,5 +1,10 @@
 from __future__ import print_function, division
+import sys
+import threading
 import yaml
+from contextlib import contextmanager
+from six import reraise
+from six.moves import queue
 from nilmtk.timeframe import TimeFrame
 from io import open
 
@@ -36,6 +41,9 @@ class DataStore(object):
         Defines the timeframe we are interested in.
     filename: string
         The filename where the store is located
+    stat_cache : nilmtk.StatCache or None
+        Where the stats of the meters in this store are cached.  If None
+        then they are cached inside this store.  See `DataSet.set_stat_cache`.
     """
     def __init__(self):
         """
@@ -44,6 +52,7 @@ class DataStore(object):
         filename : string
         """
         self.window = TimeFrame()
+        self.stat_cache = None
 
     def __getitem__(self, key):
         """Loads all of a DataFrame from disk.
@@ -62,6 +71,18 @@ class DataStore(object):
         """
         raise NotImplementedError("NotImplementedError")
 
+    def __contains__(self, key):
+        """
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        True if there is a table stored under `key`.
+        """
+        raise NotImplementedError("NotImplementedError")
+
     @property
     def window(self):
         return self._window
@@ -184,6 +205,39 @@ class DataStore(object):
         -------
         list of strings
         """
+
+    def flush(self):
+        """Writes all buffered changes to disk."""
+        raise NotImplementedError("NotImplementedError")
+
+    @contextmanager
+    def batch(self):
+        """Context manager which groups several writes together.
+
+        Inside the `with` block stores may defer expensive work which they
+        would otherwise do after every single write (e.g. flushing the file
+        to disk) until the outermost block exits.  Blocks can be nested.
+        Stores which write straight to disk use this default implementation
+        which does nothing.
+
+        Examples
+        --------
+        >>> with store.batch():
+        ...     for key, df in results:
+        ...         store.append(key, df)
+        """
+        yield self
+
+    def create_index(self, key):
+        """Builds the search index for the table stored under `key`.
+        Used after writing a table with `append(key, value, index=False)`.
+        Stores which do not keep a separate index do nothing.
+
+        Parameters
+        ----------
+        key : str
+        """
+        pass
     
     def close(self):
         raise NotImplementedError("NotImplementedError")
@@ -199,6 +253,94 @@ class DataStore(object):
         """
         raise NotImplementedError("NotImplementedError")
 
+    def fingerprint(self, key):
+        """Returns a cheap fingerprint of the table stored under `key`, 
+        which changes when data is added or removed.  Used to validate
+        cached stats, see `nilmtk.StatCache`.
+
+        Returns
+        -------
+        (n_rows, last_timestamp) : (int, pd.Timestamp)
+            Number of rows and last timestamp of the whole table, ignoring
+            self.window.
+        """
+        raise NotImplementedError("NotImplementedError")
+
+
+def prefetch_generator(generator, n_chunks=2):
+    """Runs `generator` inside a background reader thread which keeps up
+    to `n_chunks` chunks ready in a bounded queue.  This lets the I/O and
+    decompression of the next chunks overlap with the processing of the
+    current chunk downstream.
+
+    The chunks are handed over unchanged, so attributes like `timeframe`
+    and `look_ahead` survive.  Exceptions raised inside the reader thread
+    are re-raised in the consuming thread.  When the consumer stops early
+    (e.g. `break` or garbage collection of the generator) the reader
+    thread is signalled to stop after its current chunk.
+
+    Parameters
+    ----------
+    generator : generator of pd.DataFrames, e.g. from `DataStore.load`
+    n_chunks : int, optional
+        Maximum number of chunks kept in memory ahead of the consumer.
+
+    Returns
+    -------
+    generator of pd.DataFrames, in the same order as `generator`.
+
+    Notes
+    -----
+    Most file libraries (PyTables included) are not thread-safe.  Stores
+    which use this function have to serialise access to their file handle
+    themselves, see `HDFDataStore._lock`.
+    """
+    n_chunks = max(int(n_chunks), 1)
+    chunks = queue.Queue(maxsize=n_chunks)
+    stop = threading.Event()
+    finished = object()
+
+    def put(item):
+        # Block while the queue is full but give up as soon as
+        # the consumer has gone away.
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            else:
+                return True
+        return False
+
+    def reader():
+        try:
+            for chunk in generator:
+                if not put((chunk, None)):
+                    return
+            put((finished, None))
+        except BaseException:
+            put((finished, sys.exc_info()))
+        finally:
+            close = getattr(generator, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=reader, name='nilmtk-prefetch')
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            chunk, exc_info = chunks.get()
+            if chunk is finished:
+                if exc_info is not None:
+                    reraise(*exc_info)
+                return
+            yield chunk
+            del chunk
+    finally:
+        stop.set()
+        thread.join()
+
 
 def write_yaml_to_file(metadata_filename, metadata):
     metadata_file = open(metadata_filename, 'w')
@@ -240,9 +382,6 @@ def convert_datastore(input_store, output_store):
     output_store.save_metadata('/', metadata)
     for building in input_store.elements_below_key():
         building_key = '/'+building
-        # building metadata
-        metadata = input_store.load_metadata(building_key)
-        output_store.save_metadata(building_key, metadata)
         for utility in input_store.elements_below_key(building):
             utility_key = building_key+'/'+utility
             for meter in input_store.elements_below_key(utility_key):
@@ -252,6 +391,11 @@ def convert_datastore(input_store, output_store):
                 meter_key = utility_key+'/'+meter
                 # store meter data
                 for df in input_store.load(meter_key):
-                    output_store.append(meter_key, df)
+                    if len(df) > 0:
+                        output_store.append(meter_key, df)
+        # building metadata. Stored after the data because HDFDataStore
+        # can only attach metadata to nodes which already exist.
+        metadata = input_store.load_metadata(building_key)
+        output_store.save_metadata(building_key, metadata)
 
 
@@ -3,9 +3,11 @@ import pandas as pd
 from copy import deepcopy
 import numpy as np
 from os.path import isfile
+from threading import RLock
+from contextlib import contextmanager
 from nilmtk.timeframe import TimeFrame
 from nilmtk.timeframegroup import TimeFrameGroup
-from .datastore import DataStore, MAX_MEM_ALLOWANCE_IN_BYTES
+from .datastore import DataStore, MAX_MEM_ALLOWANCE_IN_BYTES, prefetch_generator
 from nilmtk.docinherit import doc_inherit
 from builtins import range
 
@@ -13,31 +15,108 @@ from builtins import range
 from pdb import set_trace as _breakpoint
 
 
+# Compression settings for tables written by HDFDataStore.  `complib` and
+# `complevel` are passed to pd.HDFStore and to each write.  PyTables
+# applies its byte-shuffle filter before compressing.
+DEFAULT_COMPRESSION = dict(complib='blosc', complevel=9)
+COMPRESSION_PRESETS = {
+    # Smallest files, for converted datasets which are written once.
+    'archive': dict(complib='blosc:zstd', complevel=5),
+    # Cheap compression and very fast decompression, for datasets which
+    # are loaded over and over again.
+    'analysis': dict(complib='blosc:lz4', complevel=4),
+    # No compression at all, for intermediate results which are thrown
+    # away again, e.g. disaggregation output during parameter searches.
+    'scratch': dict(complib=None, complevel=0)
+}
+
+
 class HDFDataStore(DataStore):
 
-    @doc_inherit
-    def __init__(self, filename, mode='a'):
+    def __init__(self, filename, mode='a', compression=None, complib=None,
+                 complevel=None, expectedrows=None):
+        """
+        Parameters
+        ----------
+        filename : string
+        mode : 'a' (append) or 'w' (write), optional
+        compression : str or dict, optional
+            Name of an entry in `COMPRESSION_PRESETS` ('archive', 'analysis'
+            or 'scratch') or a dict with `complib` and `complevel`.
+            Defaults to `DEFAULT_COMPRESSION` (blosc, level 9).
+        complib, complevel : optional
+            Override the codec and level of `compression`.  See
+            `pd.HDFStore` for the available codecs, e.g. 'blosc:lz4'.
+        expectedrows : int, optional
+            Number of rows new tables are expected to hold eventually.
+            PyTables derives the chunkshape of a table from it: larger
+            values give larger chunks which compress better but make
+            reading small sections slower.  By default `put` uses the
+            length of the table and `append` the PyTables default.
+
+        Only tables which are written by this instance use these settings.
+        Existing tables keep the settings they were written with.
+        """
         self.filename = filename
+        self.mode = mode
         if mode == 'a' and not isfile(filename):
             raise IOError("No such file as " + filename)
-        self.store = pd.HDFStore(filename, mode, complevel=9, complib='blosc')
+        self.compression = _compression_settings(
+            compression, complib=complib, complevel=complevel)
+        self.expectedrows = expectedrows
+        self.store = pd.HDFStore(filename, mode,
+                                 complevel=self.compression['complevel'],
+                                 complib=self.compression['complib'])
+        # PyTables is not thread-safe. All reads and writes go through this
+        # lock so that a prefetching reader thread can share the file.
+        self._lock = RLock()
+        # Sparse timestamp -> row indices per key, see `_TimestampRowIndex`
+        self._row_indices = {}
+        # Depth of nested `batch` blocks. Writes only flush when it is 0.
+        self._batch_depth = 0
         super(HDFDataStore, self).__init__()
 
     @doc_inherit
     def __getitem__(self, key):
-        return self.store[key]
+        with self._lock:
+            return self.store[key]
+
+    @doc_inherit
+    def __contains__(self, key):
+        with self._lock:
+            return _normalise_key(key) in self.store
 
-    
     def load(self, key, columns=None, sections=None, n_look_ahead_rows=0,
-             chunksize=MAX_MEM_ALLOWANCE_IN_BYTES, verbose=False, **additionalLoaderKwargs):
+             chunksize=MAX_MEM_ALLOWANCE_IN_BYTES, verbose=False, prefetch=0,
+             **additionalLoaderKwargs):
+        """
+        Parameters
+        ----------
+        See `DataStore.load`.  Additionally:
+
+        prefetch : int, optional, defaults to 0
+            If >0 then a background thread reads ahead and keeps up to
+            `prefetch` decoded chunks (including `look_ahead` and
+            `timeframe`) in memory, so that disk I/O and decompression
+            overlap with the processing of the current chunk.
+            If 0 then every chunk is read when it is requested.
+
+        Returns
+        -------
+        generator of DataFrame objects
+        """
+        generator = self._load_chunks(key, columns, sections,
+                                      n_look_ahead_rows, chunksize, verbose)
+        if prefetch > 0:
+            generator = prefetch_generator(generator, prefetch)
+        return generator
+
+    def _load_chunks(self, key, columns, sections, n_look_ahead_rows,
+                     chunksize, verbose):
         # TODO: calculate chunksize default based on physical
         # memory installed and number of columns
 
-        # Make sure key has a slash at the front but not at the end.
-        if key[0] != '/':
-            key = '/' + key
-        if len(key) > 1 and key[-1] == '/':
-            key = key[:-1]
+        key = _normalise_key(key)
 
         # Make sure chunksize is an int otherwise `range` complains later.
         chunksize = np.int64(chunksize)
@@ -47,6 +126,7 @@ class HDFDataStore(DataStore):
         sections = TimeFrameGroup(sections)
 
         # Replace any Nones with '' in cols:
+        cols_idx = None
         if columns is not None:
             columns = [('' if pq is None else pq, '' if ac is None else ac)
                     for pq, ac in columns]
@@ -73,34 +153,26 @@ class HDFDataStore(DataStore):
             terms = window_intersect.query_terms('window_intersect')
             if terms is None:
                 section_start_i = 0
-                section_end_i = self.store.get_storer(key).nrows
+                with self._lock:
+                    section_end_i = self.store.get_storer(key).nrows
                 if section_end_i <= 1:
                     data = pd.DataFrame(columns = cols_idx)
                     data.timeframe = section
                     yield data
                     continue
             else:
-                try:
-                    coords = self.store.select_as_coordinates(key=key, where=terms)
-                except AttributeError as e:
-                    if str(e) == ("'NoneType' object has no attribute "
-                                  "'read_coordinates'"):
-                        raise KeyError("key '{}' not found".format(key))
-                    else:
-                        raise
-                n_coords = len(coords)
-                if n_coords == 0:
+                first_row, stop_row = self._row_range(key, window_intersect)
+                if stop_row <= first_row:
                     data = pd.DataFrame(columns = cols_idx)
                     data.timeframe = window_intersect
                     yield data
                     continue
 
-                section_start_i = coords[0]
-                section_end_i   = coords[-1]
+                section_start_i = first_row
+                section_end_i   = stop_row - 1
                 if section_start_i == section_end_i: # For corner cases where there is really only a single entry.
                     section_end_i += 1
 
-                del coords
             slice_starts = range(section_start_i, section_end_i, chunksize)
             n_chunks = int(np.ceil((section_end_i - section_start_i) / chunksize))
 
@@ -115,8 +187,9 @@ class HDFDataStore(DataStore):
                     chunk_end_i = section_end_i
                 chunk_end_i += 1
 
-                data = self.store.select(key=key, columns=cols_idx,
-                                         start=chunk_start_i, stop=chunk_end_i)
+                with self._lock:
+                    data = self.store.select(key=key, columns=cols_idx,
+                                             start=chunk_start_i, stop=chunk_end_i)
 
                 if len(data) <= 2:
                     data = pd.DataFrame(columns=cols_idx)
@@ -129,10 +202,11 @@ class HDFDataStore(DataStore):
                         look_ahead_start_i = chunk_end_i
                         look_ahead_end_i = look_ahead_start_i + n_look_ahead_rows
                         try:
-                            data.look_ahead = self.store.select(
-                                key=key, columns=columns,
-                                start=look_ahead_start_i,
-                                stop=look_ahead_end_i)
+                            with self._lock:
+                                data.look_ahead = self.store.select(
+                                    key=key, columns=columns,
+                                    start=look_ahead_start_i,
+                                    stop=look_ahead_end_i)
                         except ValueError:
                             data.look_ahead = pd.DataFrame()
                     else:
@@ -144,13 +218,17 @@ class HDFDataStore(DataStore):
                 yield data
                 del data
 
-    @doc_inherit
-    def append(self, key, value):
+    def append(self, key, value, index=True):
         """
         Parameters
         ----------
         key : str
         value : pd.DataFrame
+        index : bool, optional, defaults to True
+            If False then the table index is not updated.  This makes
+            repeated appends much faster.  Call `create_index(key)` once
+            all data is written, otherwise selections on the table have
+            to scan it.
 
         Notes
         -----
@@ -158,24 +236,43 @@ class HDFDataStore(DataStore):
         Append does *not* check if data being appended overlaps with existing
         data in the table, so be careful.
         """
-        self.store.append(key=key, value=value)
-        self.store.flush()
+        with self._lock:
+            kwargs = dict(self.compression)
+            if self.expectedrows is not None:
+                kwargs['expectedrows'] = self.expectedrows
+            self.store.append(key=key, value=value, index=index, **kwargs)
+            self._row_indices.pop(_normalise_key(key), None)
+            self._flush_unless_batched()
 
     @doc_inherit
     def put(self, key, value, fixed = False):
-        if fixed:
-            self.store.put(key, value, format = 'fixed')
-        else:
-            self.store.put(key, value, format='table', 
-                           expectedrows=len(value), index=False)
-            self.store.create_table_index(key, columns=['index'], 
+        with self._lock:
+            if fixed:
+                # Fixed tables use the compression of pd.HDFStore
+                self.store.put(key, value, format = 'fixed')
+            else:
+                expectedrows = max(len(value), self.expectedrows or 0)
+                self.store.put(key, value, format='table', 
+                               expectedrows=expectedrows, index=False,
+                               **self.compression)
+                self.store.create_table_index(key, columns=['index'], 
+                                              kind='full', optlevel=9)
+            self._row_indices.pop(_normalise_key(key), None)
+            self._flush_unless_batched()
+
+    @doc_inherit
+    def create_index(self, key):
+        with self._lock:
+            self.store.create_table_index(key, columns=['index'],
                                           kind='full', optlevel=9)
-        self.store.flush()
+            self._flush_unless_batched()
 
     @doc_inherit
     def remove(self, key):
-        self.store.remove(key)
-        self.store.flush()
+        with self._lock:
+            self.store.remove(key)
+            self._row_indices.pop(_normalise_key(key), None)
+            self._flush_unless_batched()
 
     @doc_inherit
     def load_metadata(self, key='/'):
@@ -195,12 +292,12 @@ class HDFDataStore(DataStore):
             node = self.store.get_node(key)
 
         node._v_attrs.metadata = metadata
-        self.store.flush()
+        self._flush_unless_batched()
         
     @doc_inherit
     def update_root_metadata(self, new_metadata):
         self.store.root._v_attrs.metadata = new_metadata
-        self.store.flush()
+        self._flush_unless_batched()
 
     @doc_inherit
     def elements_below_key(self, key='/'):
@@ -212,7 +309,43 @@ class HDFDataStore(DataStore):
 
     @doc_inherit
     def flush(self):
-        self.store.flush()
+        with self._lock:
+            self.store.flush()
+
+    @contextmanager
+    def batch(self):
+        """Defers flushing the HDF5 file until the outermost `batch` block
+        exits.  `append`, `put`, `remove`, `save_metadata` and
+        `update_root_metadata` normally flush after every call which makes
+        loops with many small writes (e.g. caching stats for every meter)
+        very slow.  Inside a batch PyTables keeps the changes in its buffers
+        and the file is flushed once at the end.
+
+        The deferral applies to the whole store, i.e. also to writes from
+        other threads while the block is open.  Data written inside an
+        unfinished batch may be lost if the process dies before the block
+        exits.
+
+        Examples
+        --------
+        >>> with store.batch():
+        ...     for meter in elec.all_elecmeters():
+        ...         meter.calc_and_cache_stats()
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self.store.is_open:
+                    self.store.flush()
+
+    def _flush_unless_batched(self):
+        with self._lock:
+            if self._batch_depth == 0:
+                self.store.flush()
 
     @doc_inherit
     def close(self):
@@ -221,7 +354,7 @@ class HDFDataStore(DataStore):
     @doc_inherit
     def open(self, mode='a'):
         self.store.open(mode=mode)
-        
+
     @doc_inherit
     def get_timeframe(self, key):
         """
@@ -229,10 +362,36 @@ class HDFDataStore(DataStore):
         -------
         nilmtk.TimeFrame of entire table after intersecting with self.window.
         """
-        data_start_date = self.store.select(key, [0]).index[0]
-        data_end_date = self.store.select(key, start=-1).index[0]
+        row_index = self._row_index(key)
+        if row_index is None:
+            with self._lock:
+                data_start_date = self.store.select(key, [0]).index[0]
+                data_end_date = self.store.select(key, start=-1).index[0]
+        else:
+            data_start_date, data_end_date = row_index.first_and_last()
         timeframe = TimeFrame(data_start_date, data_end_date)
         return self.window.intersection(timeframe)
+
+    @doc_inherit
+    def fingerprint(self, key):
+        row_index = self._row_index(key)
+        if row_index is not None:
+            return row_index.nrows, row_index.first_and_last()[1]
+        # Only read the last row, or the last entry of the index of 
+        # fixed format frames ('axis1') and series ('index')
+        with self._lock:
+            storer = self.store.get_storer(key)
+            if storer.nrows is not None:
+                n_rows = storer.nrows
+                last = self.store.select(key, start=n_rows - 1).index
+            else:
+                index_name = 'index' if 'index' in storer.group else 'axis1'
+                node = getattr(storer.group, index_name)
+                # Empty arrays are stored as one element and their shape
+                n_rows = getattr(node._v_attrs, 'shape', node.shape)[0]
+                last = storer.read_index(index_name, start=n_rows - 1,
+                                         stop=n_rows)
+        return n_rows, (last[-1] if n_rows else None)
     
     def _check_columns(self, key, columns):
         if columns is None:
@@ -301,14 +460,72 @@ class HDFDataStore(DataStore):
         if timeframe_intersect.empty:
             nrows = 0
         elif timeframe_intersect:
-            terms = timeframe_intersect.query_terms('timeframe_intersect')
-            coords = self.store.select_as_coordinates(key, terms)
-            nrows = len(coords)
+            first_row, stop_row = self._row_range(key, timeframe_intersect)
+            nrows = max(stop_row - first_row, 0)
         else:
             storer = self._get_storer(key)
             nrows = storer.nrows
         return nrows
     
+    def _row_index(self, key):
+        """Returns the `_TimestampRowIndex` for `key`, building it when it
+        is neither in memory nor persisted in the file or when the table
+        has changed since.  Returns None for tables which have no sortable
+        'index' column (e.g. fixed format).
+
+        Raises
+        ------
+        KeyError if `key` is not in store.
+        """
+        key = _normalise_key(key)
+        with self._lock:
+            storer = self.store.get_storer(key)
+            if storer is None:
+                raise KeyError("key '{}' not found".format(key))
+            table = getattr(storer, 'table', None)
+            if table is None or 'index' not in table.colnames:
+                return None
+            row_index = self._row_indices.get(key)
+            if row_index is None or row_index.nrows != table.nrows:
+                row_index = _TimestampRowIndex(self.store, key, table)
+                self._row_indices[key] = row_index
+            return row_index
+
+    def _row_range(self, key, timeframe):
+        """Finds the rows of `key` which lie in `timeframe`.
+
+        Parameters
+        ----------
+        key : str
+        timeframe : nilmtk.TimeFrame (not empty)
+
+        Returns
+        -------
+        first_row, stop_row : int
+            `stop_row` is exclusive.  `stop_row <= first_row` if there
+            are no rows inside `timeframe`.
+        """
+        row_index = self._row_index(key)
+        if row_index is None:
+            terms = timeframe.query_terms('timeframe')
+            with self._lock:
+                coords = self.store.select_as_coordinates(key, terms)
+            if len(coords) == 0:
+                return 0, 0
+            return coords[0], coords[-1] + 1
+
+        with self._lock:
+            if timeframe.start is None:
+                first_row = 0
+            else:
+                first_row = row_index.searchsorted(timeframe.start, side='left')
+            if timeframe.end is None:
+                stop_row = row_index.nrows
+            else:
+                side = 'right' if timeframe.include_end else 'left'
+                stop_row = row_index.searchsorted(timeframe.end, side=side)
+        return first_row, stop_row
+
     def _keys(self):
         return self.store.keys()
 
@@ -350,3 +567,160 @@ def _timeframe_for_chunk(there_are_more_subchunks, chunk_i, window_intersect, in
         end = index[-1]
 
     return TimeFrame(start, end)
+
+
+
+def _compression_settings(compression=None, **overrides):
+    """Returns a dict with `complib` and `complevel` built from
+    `DEFAULT_COMPRESSION`, the preset or dict `compression` and all
+    `overrides` which are not None.
+    """
+    settings = dict(DEFAULT_COMPRESSION)
+    if isinstance(compression, dict):
+        settings.update(compression)
+    elif compression is not None:
+        try:
+            settings.update(COMPRESSION_PRESETS[compression])
+        except KeyError:
+            raise ValueError("Unknown compression preset '{}'. Use one of {}."
+                             .format(compression,
+                                     sorted(COMPRESSION_PRESETS.keys())))
+    for name, value in overrides.items():
+        if value is not None:
+            settings[name] = value
+    if not settings['complevel']:
+        settings['complevel'] = 0
+        settings['complib'] = None
+    return settings
+
+
+def _normalise_key(key):
+    """Make sure key has a slash at the front but not at the end."""
+    if key[0] != '/':
+        key = '/' + key
+    if len(key) > 1 and key[-1] == '/':
+        key = key[:-1]
+    return key
+
+
+_NS_PER_UNIT = {'ns': 1, 'us': 10**3, 'ms': 10**6, 's': 10**9}
+
+
+class _TimestampRowIndex(object):
+    """A sparse timestamp -> row number index for a single table.
+
+    Stores the value of the 'index' column for every `step`-th row, where
+    `step` is chosen so that at most MAX_SAMPLES values are kept.  Looking
+    up the row for a timestamp is a binary search over this sample
+    followed by a single read of at most `step` index values from disk.
+    So no coordinate array of the whole query range is allocated, as
+    `HDFStore.select_as_coordinates` does.
+
+    The sample is persisted as attributes of the table node, so that it
+    is only built once per file.  It is invalidated when the number of
+    rows of the table changes.  If the file is opened read-only, the
+    index only lives in memory.
+
+    Timestamps are compared as int64 values since the epoch (UTC for
+    timezone-aware data) in the unit of the stored index, which is what
+    pandas writes into the 'index' column.
+
+    Attributes
+    ----------
+    nrows : int
+    step : int
+    sample : np.ndarray of int64
+        Index value of rows 0, step, 2*step, ...
+    last : int64
+        Index value of the last row.
+    tz : timezone of the table's index, or None
+    unit : str
+        Resolution of the stored index, e.g. 'ns'.
+    """
+
+    MAX_SAMPLES = 4096
+    ATTR_NAME = 'nilmtk_row_index'
+
+    def __init__(self, store, key, table):
+        self.table = table
+        self.nrows = table.nrows
+        self.tz = None
+        self.unit = 'ns'
+        if self.nrows == 0:
+            self.step = 1
+            self.sample = np.array([], dtype=np.int64)
+            self.last = None
+            return
+
+        first_index = store.select(key, start=0, stop=1).index
+        self.tz = first_index.tz
+        self.unit = getattr(first_index.dtype, 'unit', None)
+        if self.unit is None:
+            self.unit = np.datetime_data(first_index.dtype)[0]
+        if not self._load_persisted():
+            self.step = max(int(np.ceil(self.nrows / self.MAX_SAMPLES)), 1)
+            coords = np.arange(0, self.nrows, self.step)
+            self.sample = table.read_coordinates(coords, field='index').astype(np.int64)
+            self.last = np.int64(table.read(self.nrows - 1, self.nrows, field='index')[0])
+            self._persist()
+
+    def _load_persisted(self):
+        attrs = self.table.attrs
+        if self.ATTR_NAME not in attrs._v_attrnames:
+            return False
+        persisted = getattr(attrs, self.ATTR_NAME)
+        if persisted.get('nrows') != self.nrows:
+            return False
+        self.step = persisted['step']
+        self.sample = np.asarray(persisted['sample'], dtype=np.int64)
+        self.last = np.int64(persisted['last'])
+        return True
+
+    def _persist(self):
+        persisted = {'nrows': self.nrows, 'step': self.step,
+                     'sample': self.sample, 'last': self.last}
+        try:
+            setattr(self.table.attrs, self.ATTR_NAME, persisted)
+        except Exception:
+            # e.g. file opened read-only
+            pass
+
+    def _to_int64(self, timestamp, side):
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tzinfo is None and self.tz is not None:
+            timestamp = timestamp.tz_localize(self.tz)
+        # Round such that searching the coarser stored values still
+        # gives the same answer as comparing at nanosecond resolution.
+        ns_per_unit = _NS_PER_UNIT[self.unit]
+        if side == 'left':
+            return np.int64(-(-timestamp.value // ns_per_unit))
+        return np.int64(timestamp.value // ns_per_unit)
+
+    def _to_timestamp(self, value):
+        timestamp = pd.Timestamp(int(value) * _NS_PER_UNIT[self.unit])
+        if self.tz is None:
+            return timestamp
+        return timestamp.tz_localize('UTC').tz_convert(self.tz)
+
+    def searchsorted(self, timestamp, side='left'):
+        """Returns the row at which `timestamp` would be inserted into
+        the table's (sorted) index to maintain order.  Same semantics
+        as `np.searchsorted`."""
+        if self.nrows == 0:
+            return 0
+        value = self._to_int64(timestamp, side)
+        j = np.searchsorted(self.sample, value, side=side)
+        if j == 0:
+            return 0
+        block_start = (j - 1) * self.step + 1
+        block_stop = min(j * self.step, self.nrows)
+        if block_start >= block_stop:
+            return block_start
+        block = self.table.read(block_start, block_stop, field='index')
+        return int(block_start + np.searchsorted(block, value, side=side))
+
+    def first_and_last(self):
+        """Returns the first and last timestamp of the table."""
+        if self.nrows == 0:
+            return None, None
+        return self._to_timestamp(self.sample[0]), self._to_timestamp(self.last)
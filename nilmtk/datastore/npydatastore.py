@@ -0,0 +1,403 @@
+from __future__ import print_function, division
+import pandas as pd
+import numpy as np
+import yaml
+from io import BytesIO
+from os.path import isdir, isfile, join
+from os import listdir, makedirs, remove, rename, rmdir
+from shutil import rmtree
+from numpy.lib import format as npy_format
+from nilmtk.timeframe import TimeFrame
+from nilmtk.timeframegroup import TimeFrameGroup
+from nilmtk.datastore import MAX_MEM_ALLOWANCE_IN_BYTES
+from nilmtk.datastore.csvdatastore import CSVDataStore
+from nilmtk.datastore.hdfdatastore import _normalise_key, _timeframe_for_chunk
+from nilmtk.docinherit import doc_inherit
+from builtins import range
+
+
+INDEX_FILENAME = 'index.npy'
+LAYOUT_FILENAME = 'columns.yaml'
+MEASUREMENT_LEVELS = ['physical_quantity', 'type']
+
+
+class NpyDataStore(CSVDataStore):
+    """Stores every table as a directory of uncompressed little-endian
+    `.npy` files: one int64 file for the index (nanoseconds since the epoch,
+    UTC, for a DatetimeIndex) and one file per column.  Columns of
+    measurement tables (i.e. with 'physical_quantity' and 'type' levels)
+    are stored as float32.  `columns.yaml` in the same directory stores
+    the column names, dtypes and the timezone.
+
+    Loading memory maps the files and finds the rows of each section with
+    `np.searchsorted` on the index.  Hence nothing has to be decompressed
+    and only the rows of the requested columns are read from the page
+    cache, which makes repeated runs over the same data much faster than
+    with `HDFDataStore`.  The price is the disk space.  Note that pandas
+    copies the columns of a chunk with more than one column into a single
+    block, so only single column chunks are views onto the files.  The
+    files are mapped copy-on-write, so changing a chunk never changes
+    the store.
+
+    Each table owns only its index, layout and column files.  Tables 
+    below its key (e.g. the rollups of a meter) live in subdirectories 
+    and are kept when the table is replaced or removed.
+
+    Metadata is stored in YAML files exactly like `CSVDataStore` does.
+
+    Example layout::
+
+        <filename>/metadata/dataset.yaml
+        <filename>/metadata/building1.yaml
+        <filename>/building1/elec/meter1/index.npy
+        <filename>/building1/elec/meter1/columns.yaml
+        <filename>/building1/elec/meter1/column0.npy
+    """
+
+    @doc_inherit
+    def __getitem__(self, key):
+        key = _normalise_key(key)
+        self._check_key(key)
+        return self._frame(key, self._layout(key), self._index_array(key),
+                           columns=None, start=0, stop=None)
+
+    @doc_inherit
+    def __contains__(self, key):
+        return isfile(join(self._key_to_abs_path(key), INDEX_FILENAME))
+
+    @doc_inherit
+    def load(self, key, columns=None, sections=None, n_look_ahead_rows=0,
+             chunksize=MAX_MEM_ALLOWANCE_IN_BYTES, verbose=False,
+             **additionalLoaderKwargs):
+        key = _normalise_key(key)
+        self._check_key(key)
+        layout = self._layout(key)
+        if columns is not None:
+            columns = [('' if pq is None else pq, '' if ac is None else ac)
+                       for pq, ac in columns]
+            self._check_columns(layout, columns)
+            cols_idx = pd.MultiIndex.from_tuples(columns, names=MEASUREMENT_LEVELS)
+        else:
+            cols_idx = self._column_index(layout)
+
+        chunksize = int(chunksize)
+        sections = [TimeFrame()] if sections is None else sections
+        sections = TimeFrameGroup(sections)
+        index = self._index_array(key)
+        nrows = len(index)
+
+        if verbose:
+            print("NpyDataStore.load(key='{}', columns='{}', sections='{}',"
+                  " n_look_ahead_rows='{}', chunksize='{}')"
+                  .format(key, columns, sections, n_look_ahead_rows, chunksize))
+
+        self.all_sections_smaller_than_chunksize = True
+
+        for section in sections:
+            window_intersect = self.window.intersection(section)
+            if window_intersect.empty:
+                data = pd.DataFrame(columns=cols_idx)
+                data.timeframe = section
+                yield data
+                continue
+
+            section_start_i, section_stop_i = self._row_range(
+                layout, index, window_intersect)
+            if section_stop_i <= section_start_i:
+                data = pd.DataFrame(columns=cols_idx)
+                data.timeframe = window_intersect
+                yield data
+                continue
+
+            slice_starts = range(section_start_i, section_stop_i, chunksize)
+            n_chunks = len(slice_starts)
+            if n_chunks > 1:
+                self.all_sections_smaller_than_chunksize = False
+
+            for chunk_i, chunk_start_i in enumerate(slice_starts):
+                chunk_stop_i = min(chunk_start_i + chunksize, section_stop_i)
+                there_are_more_subchunks = (chunk_i < n_chunks - 1)
+                data = self._frame(key, layout, index, columns,
+                                   chunk_start_i, chunk_stop_i)
+
+                # Load look ahead if necessary
+                if n_look_ahead_rows > 0:
+                    look_ahead_stop_i = min(chunk_stop_i + n_look_ahead_rows, nrows)
+                    data.look_ahead = self._frame(key, layout, index, columns,
+                                                  chunk_stop_i, look_ahead_stop_i)
+
+                data.timeframe = _timeframe_for_chunk(there_are_more_subchunks,
+                                                      chunk_i, window_intersect,
+                                                      data.index)
+                yield data
+                del data
+
+    @doc_inherit
+    def append(self, key, value, index=True):
+        # `index` is only accepted for compatibility with HDFDataStore.
+        key = _normalise_key(key)
+        path = self._key_to_abs_path(key)
+        if not isfile(join(path, INDEX_FILENAME)):
+            self.put(key, value)
+            return
+
+        layout = self._layout(key)
+        if self._column_index(layout).tolist() != value.columns.tolist():
+            raise ValueError("Columns of `value` do not match the columns"
+                             " stored under '{}'".format(key))
+        index, _ = _index_to_array(value.index)
+        _append_to_npy(join(path, INDEX_FILENAME), index)
+        for column_i, column in enumerate(layout['columns']):
+            values, _ = _column_to_array(value.iloc[:, column_i], column['dtype'])
+            _append_to_npy(join(path, column['file']), values)
+
+    @doc_inherit
+    def put(self, key, value, fixed=False):
+        # `fixed` is only accepted for compatibility with HDFDataStore.
+        key = _normalise_key(key)
+        path = self._key_to_abs_path(key)
+        if isfile(join(path, INDEX_FILENAME)):
+            self._remove_table_files(path)
+        if not isdir(path):
+            makedirs(path)
+
+        index, tz = _index_to_array(value.index)
+        if isinstance(value.index, pd.DatetimeIndex):
+            index_dtype = 'datetime64[ns]'
+        else:
+            index_dtype = str(value.index.dtype)
+        layout = {'tz': tz,
+                  'index_dtype': index_dtype,
+                  'column_levels': list(value.columns.names)
+                                   if value.columns.nlevels > 1 else None,
+                  'columns': []}
+        is_measurement = layout['column_levels'] == MEASUREMENT_LEVELS
+        np.save(join(path, INDEX_FILENAME), index)
+        for column_i, name in enumerate(value.columns):
+            series = value.iloc[:, column_i]
+            if is_measurement or series.dtype.kind == 'f':
+                dtype = '<f4' if is_measurement else '<f8'
+            elif series.dtype.kind == 'M':
+                dtype = 'datetime64[ns]'
+            elif series.dtype.kind in 'iub':
+                dtype = series.dtype.newbyteorder('<').str
+            else:
+                raise TypeError("Cannot store column '{}' of dtype {}"
+                                .format(name, series.dtype))
+            values, column_tz = _column_to_array(series, dtype)
+            column = {'name': list(name) if isinstance(name, tuple) else name,
+                      'file': 'column{:d}.npy'.format(column_i),
+                      'dtype': dtype,
+                      'tz': column_tz}
+            np.save(join(path, column['file']), values)
+            layout['columns'].append(column)
+
+        with open(join(path, LAYOUT_FILENAME), 'w') as layout_file:
+            yaml.safe_dump(layout, layout_file)
+
+    @doc_inherit
+    def remove(self, key):
+        path = self._key_to_abs_path(_normalise_key(key))
+        if isfile(join(path, INDEX_FILENAME)):
+            self._remove_table_files(path)
+            if not listdir(path):
+                rmdir(path)
+        elif isdir(path):
+            # A group without a table of its own, e.g. the stat cache
+            rmtree(path)
+        else:
+            raise KeyError(key + ' not in store')
+
+    @doc_inherit
+    def elements_below_key(self, key='/'):
+        path = self._key_to_abs_path('/' + key.strip('/'))
+        if not isdir(path):
+            return []
+        return [element for element in sorted(listdir(path))
+                if isdir(join(path, element)) and element != 'metadata']
+
+    @doc_inherit
+    def get_timeframe(self, key):
+        key = _normalise_key(key)
+        self._check_key(key)
+        layout = self._layout(key)
+        index = self._index_array(key)
+        if not len(index):
+            timeframe = TimeFrame()
+            timeframe._empty = True
+            return timeframe
+        timeframe = TimeFrame(_to_timestamp(index[0], layout['tz']),
+                              _to_timestamp(index[-1], layout['tz']))
+        return self.window.intersection(timeframe)
+
+    @doc_inherit
+    def fingerprint(self, key):
+        key = _normalise_key(key)
+        self._check_key(key)
+        index = self._index_array(key)
+        if not len(index):
+            return 0, None
+        return len(index), _to_timestamp(index[-1], self._layout(key)['tz'])
+
+    def _key_to_abs_path(self, key):
+        relative_path = key.strip('/')
+        if not relative_path:
+            return self.filename
+        return join(self.filename, *relative_path.split('/'))
+
+    def _remove_table_files(self, path):
+        """Removes the files of the table in directory `path`, but not 
+        the tables in its subdirectories."""
+        with open(join(path, LAYOUT_FILENAME)) as layout_file:
+            layout = yaml.safe_load(layout_file)
+        for column in layout['columns']:
+            filename = join(path, column['file'])
+            if isfile(filename):
+                remove(filename)
+        remove(join(path, INDEX_FILENAME))
+        remove(join(path, LAYOUT_FILENAME))
+
+    def _check_key(self, key):
+        if key not in self:
+            raise KeyError(key + ' not in store')
+
+    def _layout(self, key):
+        with open(join(self._key_to_abs_path(key), LAYOUT_FILENAME)) as layout_file:
+            return yaml.safe_load(layout_file)
+
+    def _index_array(self, key):
+        return np.load(join(self._key_to_abs_path(key), INDEX_FILENAME),
+                       mmap_mode='r')
+
+    def _column_index(self, layout):
+        names = [tuple(column['name']) if layout['column_levels'] else column['name']
+                 for column in layout['columns']]
+        if layout['column_levels']:
+            return pd.MultiIndex.from_tuples(names, names=layout['column_levels'])
+        return pd.Index(names)
+
+    def _check_columns(self, layout, columns):
+        stored = set(self._column_index(layout).tolist())
+        if not set(columns).issubset(stored):
+            raise KeyError('at least one of ' + str(columns) +
+                           ' is not a valid column')
+
+    def _row_range(self, layout, index, timeframe):
+        """Returns first and stop (exclusive) row of `timeframe`."""
+        first_row = 0
+        stop_row = len(index)
+        if timeframe.start is not None:
+            value = _to_int64(timeframe.start, layout['tz'])
+            first_row = int(np.searchsorted(index, value, side='left'))
+        if timeframe.end is not None:
+            value = _to_int64(timeframe.end, layout['tz'])
+            side = 'right' if timeframe.include_end else 'left'
+            stop_row = int(np.searchsorted(index, value, side=side))
+        return first_row, stop_row
+
+    def _frame(self, key, layout, index, columns, start, stop):
+        """Builds a DataFrame from rows [start, stop) of the memory mapped
+        column files.  Only the requested columns are touched."""
+        path = self._key_to_abs_path(key)
+        if stop is None:
+            stop = len(index)
+        column_index = self._column_index(layout)
+        if columns is None:
+            positions = list(range(len(layout['columns'])))
+            column_index_out = column_index
+        else:
+            names = column_index.tolist()
+            positions = [names.index(column) for column in columns]
+            column_index_out = pd.MultiIndex.from_tuples(columns,
+                                                         names=MEASUREMENT_LEVELS)
+
+        data = {}
+        for position in positions:
+            column = layout['columns'][position]
+            values = np.load(join(path, column['file']), mmap_mode='c')[start:stop]
+            if column['dtype'] == 'datetime64[ns]':
+                values = _to_datetime_index(values, column.get('tz'))
+            data[position] = values
+        frame = pd.DataFrame(data, index=_to_datetime_index(index[start:stop],
+                                                            layout['tz'],
+                                                            layout['index_dtype']),
+                             columns=positions, copy=False)
+        frame.columns = column_index_out
+        return frame
+
+
+def _index_to_array(index):
+    """Returns the int64 representation of `index` and its timezone name."""
+    if isinstance(index, pd.DatetimeIndex):
+        tz = None if index.tz is None else str(index.tz)
+        if tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        values = np.asarray(index.values, dtype='datetime64[ns]').view(np.int64)
+        return values.astype('<i8'), tz
+    return np.asarray(index.values), None
+
+
+def _column_to_array(series, dtype):
+    """Returns the values of `series` as array of `dtype` and the
+    timezone name of datetime columns."""
+    if dtype == 'datetime64[ns]':
+        return _index_to_array(pd.DatetimeIndex(series))
+    return np.asarray(series.values, dtype=dtype), None
+
+
+def _to_datetime_index(values, tz, index_dtype='datetime64[ns]'):
+    if index_dtype != 'datetime64[ns]':
+        return pd.Index(values)
+    index = pd.DatetimeIndex(np.asarray(values).view('datetime64[ns]'))
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz)
+    return index
+
+
+def _to_int64(timestamp, tz):
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None and tz is not None:
+        timestamp = timestamp.tz_localize(tz)
+    return np.int64(timestamp.value)
+
+
+def _to_timestamp(value, tz):
+    timestamp = pd.Timestamp(int(value))
+    if tz is None:
+        return timestamp
+    return timestamp.tz_localize('UTC').tz_convert(tz)
+
+
+def _append_to_npy(filename, values):
+    """Appends the 1D array `values` to the .npy file `filename`.
+
+    The header is rewritten in place if the new shape fits into the
+    padding of the old header, which is nearly always the case.
+    Otherwise the whole file is rewritten.
+    """
+    with open(filename, 'r+b') as npy_file:
+        version = npy_format.read_magic(npy_file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = npy_format.read_array_header_1_0(npy_file)
+        else:
+            shape, fortran_order, dtype = npy_format.read_array_header_2_0(npy_file)
+        header_length = npy_file.tell()
+        values = np.ascontiguousarray(values, dtype=dtype)
+        header = BytesIO()
+        npy_format.write_array_header_1_0(
+            header, {'descr': npy_format.dtype_to_descr(dtype),
+                     'fortran_order': fortran_order,
+                     'shape': (shape[0] + len(values),)})
+        if version == (1, 0) and len(header.getvalue()) == header_length:
+            npy_file.seek(0, 2)
+            npy_file.write(values.tobytes())
+            npy_file.seek(0)
+            npy_file.write(header.getvalue())
+            return
+
+    tmp_filename = filename[:-len('.npy')] + '.tmp.npy'
+    old_values = np.load(filename, mmap_mode='r')
+    np.save(tmp_filename, np.concatenate([old_values, values]))
+    del old_values
+    remove(filename)
+    rename(tmp_filename, filename)
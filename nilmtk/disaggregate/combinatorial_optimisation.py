@@ -9,7 +9,7 @@ import copy
 from nilmtk.utils import find_nearest
 from nilmtk.feature_detectors import cluster
 from nilmtk.disaggregate import SupervisedDisaggregator
-from nilmtk.datastore import HDFDataStore
+from nilmtk.datastore import HDFDataStore, BufferedWriter
 
 # Fix the seed for repeatability of experiments
 SEED = 42
@@ -158,39 +158,41 @@ class CombinatorialOptimisation(SupervisedDisaggregator):
         mains_data_location = building_path + '/elec/meter1'
         data_is_available = False
 
-        for chunk in mains.power_series(**load_kwargs):
-            # Check that chunk is sensible size
-            if len(chunk) < self.MIN_CHUNK_LENGTH:
-                continue
-
-            # Record metadata
-            timeframes.append(chunk.timeframe)
-            measurement = chunk.name
-
-            # Do the disaggregation
-            appliance_powers = self.disaggregate_chunk(chunk)
-
-            # Write results into the data storage
-            for i, model in enumerate(self.model):
-                appliance_power = appliance_powers.iloc[:, i]
-                if len(appliance_power) == 0:
+        # Chunks are written in large blocks and indexed once at the end
+        with BufferedWriter(output_datastore) as writer:
+            for chunk in mains.power_series(**load_kwargs):
+                # Check that chunk is sensible size
+                if len(chunk) < self.MIN_CHUNK_LENGTH:
                     continue
-                data_is_available = True
-                cols = pd.MultiIndex.from_tuples([chunk.name])
-                meter_instance = model['training_metadata'].instance()
-                df = pd.DataFrame(
-                    appliance_power.values, index=appliance_power.index,
-                    columns=cols)
-                key = '{}/elec/meter{}'.format(building_path, meter_instance)
-
-                raise("Does this really work? Todo")
-                if dont_write_zerosections:
-                    df = df[df[('power','active')] != 0]
-                output_datastore.append(key, df)
-
-            # Copy mains data to disag output (sothat it is accessible together with disaggregations=
-            mains_df = pd.DataFrame(chunk, columns=cols, dtype="float32")
-            output_datastore.append(key=mains_data_location, value=mains_df)
+
+                # Record metadata
+                timeframes.append(chunk.timeframe)
+                measurement = chunk.name
+
+                # Do the disaggregation
+                appliance_powers = self.disaggregate_chunk(chunk)
+
+                # Write results into the data storage
+                for i, model in enumerate(self.model):
+                    appliance_power = appliance_powers.iloc[:, i]
+                    if len(appliance_power) == 0:
+                        continue
+                    data_is_available = True
+                    cols = pd.MultiIndex.from_tuples([chunk.name])
+                    meter_instance = model['training_metadata'].instance()
+                    df = pd.DataFrame(
+                        appliance_power.values, index=appliance_power.index,
+                        columns=cols)
+                    key = '{}/elec/meter{}'.format(building_path, meter_instance)
+
+                    raise("Does this really work? Todo")
+                    if dont_write_zerosections:
+                        df = df[df[('power','active')] != 0]
+                    writer.append(key, df)
+
+                # Copy mains data to disag output (sothat it is accessible together with disaggregations=
+                mains_df = pd.DataFrame(chunk, columns=cols, dtype="float32")
+                writer.append(key=mains_data_location, value=mains_df)
 
         # Finally write metadata
         if data_is_available:
@@ -246,24 +246,25 @@ class CustomBaranski(UnsupervisedDisaggregator):
 
         timeframes = []
         # Now iterating over mains data and disaggregating chunk by chunk
-        for chunk in mains.power_series(**load_kwargs):
-            # Record metadata
-            timeframes.append(chunk.timeframe)
-            measurement = chunk.name
-            power_df = self.disaggregate_chunk(
-                chunk, prev, transients)
-
-            cols = pd.MultiIndex.from_tuples([chunk.name])
-
-            for meter in learnt_meters:
-                data_is_available = True
-                df = power_df[[meter]]
-                df.columns = cols
-                key = '{}/elec/meter{:d}'.format(building_path, meter + 2)
-                output_datastore.append(key, df)
-
-            output_datastore.append(key=mains_data_location,
-                                    value=pd.DataFrame(chunk, columns=cols))
+        with output_datastore.batch():
+            for chunk in mains.power_series(**load_kwargs):
+                # Record metadata
+                timeframes.append(chunk.timeframe)
+                measurement = chunk.name
+                power_df = self.disaggregate_chunk(
+                    chunk, prev, transients)
+
+                cols = pd.MultiIndex.from_tuples([chunk.name])
+
+                for meter in learnt_meters:
+                    data_is_available = True
+                    df = power_df[[meter]]
+                    df.columns = cols
+                    key = '{}/elec/meter{:d}'.format(building_path, meter + 2)
+                    output_datastore.append(key, df)
+
+                output_datastore.append(key=mains_data_location,
+                                        value=pd.DataFrame(chunk, columns=cols))
 
         if data_is_available:
             self._save_metadata_for_disaggregation(
@@ -1392,14 +1392,15 @@ class EventbasedCombination(UnsupervisedDisaggregator):
         # 5. Store the results (Not in parallel since writing to same file)
         print('Store')
         t4 = time.time()
-        for phase in range(len(model.transients)):
-            building_path = '/building{}'.format(building_number * 10 + phase)
-            for i in range(len(self.model.appliances[phase])):
-                key = '{}/elec/meter{:d}'.format(building_path, i + 2) # 0 not existing and Meter1 is rest
-                output_datastore.append(key, self.model.appliances[phase][i]) 
-                if not exact_nilm_datastore is None:
-                    exact_nilm_datastore.append(key, self.model.appliances_detailed[phase][i])
-            output_datastore.append('{}/elec/meter{:d}'.format(building_path, 1), self.model.overall_powerflow[phase])
+        with output_datastore.batch():
+            for phase in range(len(model.transients)):
+                building_path = '/building{}'.format(building_number * 10 + phase)
+                for i in range(len(self.model.appliances[phase])):
+                    key = '{}/elec/meter{:d}'.format(building_path, i + 2) # 0 not existing and Meter1 is rest
+                    output_datastore.append(key, self.model.appliances[phase][i]) 
+                    if not exact_nilm_datastore is None:
+                        exact_nilm_datastore.append(key, self.model.appliances_detailed[phase][i])
+                output_datastore.append('{}/elec/meter{:d}'.format(building_path, 1), self.model.overall_powerflow[phase])
         num_meters = [len(cur) + 1 for cur in self.model.appliances] 
         stores = [(output_datastore, 300, True)] if exact_nilm_datastore is None else [(output_datastore, 300, True), (exact_nilm_datastore, 0, False)]
         for store, res, rest_included in stores:
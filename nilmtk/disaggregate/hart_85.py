@@ -7,6 +7,7 @@ from nilmtk.feature_detectors.steady_states import (
     find_steady_states_transients)
 from nilmtk.disaggregate import UnsupervisedDisaggregator
 from nilmtk import TimeFrame, TimeFrameGroup
+from nilmtk.datastore import BufferedWriter
 
 # Fix the seed for repeatability of experiments
 SEED = 42
@@ -466,13 +467,19 @@ class Hart85(UnsupervisedDisaggregator):
 
 
         
+        # Written in large blocks and indexed once at the end
+        writer = BufferedWriter(output_datastore)
+        exact_nilm_writer = None if exact_nilm_datastore is None else BufferedWriter(exact_nilm_datastore)
         for column in disaggregation_overall:
             key = '{}/elec/meter{:d}'.format(building_path, column + 2) # 0 not existing and Meter1 is rest
             tmp = disaggregation_overall[[column]]
             tmp.columns = (pd.MultiIndex.from_tuples([('power', 'active')], names=['physical_quantity', 'type']))
-            output_datastore.append(key, tmp)
-            if not exact_nilm_datastore is None:
-                exact_nilm_datastore.append(key, self.model.appliances_detailed[[column]])
+            writer.append(key, tmp)
+            if not exact_nilm_writer is None:
+                exact_nilm_writer.append(key, self.model.appliances_detailed[[column]])
+        writer.close()
+        if not exact_nilm_writer is None:
+            exact_nilm_writer.close()
         #output_datastore.append('{}/elec/meter{:d}'.format(building_path, 1), self.model.overall_powerflow[phase])
         num_meters = [len(disaggregation_overall.columns)] 
         stores = [(output_datastore, 300, True)] if exact_nilm_datastore is None else [(output_datastore, 300, True), (exact_nilm_datastore, 0, False)]
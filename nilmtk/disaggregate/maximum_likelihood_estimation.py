@@ -336,29 +336,30 @@ class MLE(SupervisedDisaggregator):
         chunk_number = 0
         timeframes = []
 
-        for chunk in mains.power_series():
+        with output_datastore.batch():
+            for chunk in mains.power_series():
         
-            # Record metadata
-            timeframes.append(chunk.timeframe)
-            measurement = chunk.name
-            cols = pd.MultiIndex.from_tuples([chunk.name])
+                # Record metadata
+                timeframes.append(chunk.timeframe)
+                measurement = chunk.name
+                cols = pd.MultiIndex.from_tuples([chunk.name])
             
-            dis_chunk = self.disaggregate_chunk(
-                pd.DataFrame(chunk.resample(self.sample_period, how=self.sampling_method)))
-            #dis_main = pd.concat([dis_main, dis_chunk])
-            chunk_number += 1
-            print(str(chunk_number) + " chunks disaggregated")
+                dis_chunk = self.disaggregate_chunk(
+                    pd.DataFrame(chunk.resample(self.sample_period, how=self.sampling_method)))
+                #dis_main = pd.concat([dis_main, dis_chunk])
+                chunk_number += 1
+                print(str(chunk_number) + " chunks disaggregated")
             
-            # Write appliance data to disag output
-            key = '{}/elec/meter{}'.format(building_path, meter_instance)
-            df = pd.DataFrame(
-                    dis_chunk.values, index=dis_chunk.index,
-                    columns=cols)
-            output_datastore.append(key, df)
-
-            # Copy mains data to disag output
-            output_datastore.append(key=mains_data_location,
-                                    value=pd.DataFrame(chunk, columns=cols))
+                # Write appliance data to disag output
+                key = '{}/elec/meter{}'.format(building_path, meter_instance)
+                df = pd.DataFrame(
+                        dis_chunk.values, index=dis_chunk.index,
+                        columns=cols)
+                output_datastore.append(key, df)
+
+                # Copy mains data to disag output
+                output_datastore.append(key=mains_data_location,
+                                        value=pd.DataFrame(chunk, columns=cols))
 
         # Saving output datastore:
         #output_datastore.append(key=mains.key, value=dis_main)
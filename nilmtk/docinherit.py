@@ -39,7 +39,13 @@ class DocInherit(object):
 
     def get_with_inst(self, obj, cls):
 
-        overridden = getattr(super(cls, obj), self.name, None)
+        # Start the lookup above the class which defines this method, not
+        # above `cls`.  Otherwise subclasses which inherit the method
+        # without overriding it recurse forever.
+        for owner in cls.__mro__:
+            if owner.__dict__.get(self.name) is self:
+                break
+        overridden = getattr(super(owner, obj), self.name, None)
 
         @wraps(self.mthd, assigned=('__name__', '__module__'))
         def f(*args, **kwargs):
@@ -1,6 +1,6 @@
 from __future__ import print_function, division
 from warnings import warn
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from copy import deepcopy
 import numpy as np
 import pandas as pd
@@ -13,14 +13,36 @@ from .measurement import (select_best_ac_type, PHYSICAL_QUANTITIES,
 from .node import Node
 from .electric import Electric
 from nilmtk.exceptions import MeasurementError
-from .utils import flatten_2d_list, capitalise_first_letter
+from .utils import flatten_2d_list, capitalise_first_letter, safe_resample
+from .timeframe import TimeFrame
+from .datastore import MAX_MEM_ALLOWANCE_IN_BYTES
 from nilmtk.timeframegroup import TimeFrameGroup
+from .statcache import get_stat_cache
 #from nilmtk.stats.accelerators_stat import get_good_sections_fast
 import nilmtk
 
 
 ElecMeterID = namedtuple('ElecMeterID', ['instance', 'building', 'dataset'])
 
+# Sample periods in seconds of the resampled copies of the meter data,
+# see `ElecMeter.build_rollups`.
+ROLLUP_PERIODS = [1, 10, 60, 900]
+# Column of the rollups with the time in ns of the raw sample each row
+# was forward filled from
+ROLLUP_SOURCE_COLUMN = ('rollup', 'source_ns')
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Stats which `ElecMeter.compute_stats` can compute in a single pass, with
+# the nodes each of them needs.  The pipeline is built in this order.
+# Clip changes the chunks in place, so it has to come after all stats
+# which need the original values.
+FUSABLE_STATS = OrderedDict([
+    ('good_sections', [GoodSections]),
+    ('nonzero_sections', [NonZeroSections]),
+    ('overbasepower_sections', [OverBasepowerSections]),
+    ('total_energy', [Clip, TotalEnergy])
+])
+
 class test():
     pass
 
@@ -144,6 +166,17 @@ class ElecMeter(Hashable, Electric):
             raise RuntimeError("ElecMeter needs `store` attribute set to an"
                                " instance of a `nilmtk.DataStore` subclass")
 
+    @property
+    def stat_cache(self):
+        """The nilmtk.StatCache which holds the cached stats of this meter."""
+        self._check_store()
+        return get_stat_cache(self.store, self.building())
+
+    def key_for_stat_cache(self):
+        """Returns the key which identifies this meter in the StatCache,
+        e.g. 'REDD/building1/elec/meter1'."""
+        return "{}/{}".format(self.dataset(), self.key.lstrip('/'))
+
     def upstream_meter(self, raise_warning=True):
         """
         Returns
@@ -464,6 +497,11 @@ class ElecMeter(Hashable, Electric):
         preprocessing : list of Node subclass instances
             e.g. [Clip()].
 
+        use_rollups : boolean, defaults to True
+            If True and `build_rollups` has been run then resampled data
+            is loaded from the coarsest rollup which gives the same result
+            as resampling the raw data.  See `_rollup_period_for`.
+
         **load_kwargs : any other key word arguments to pass to `self.store.load()`
 
         Returns
@@ -504,6 +542,16 @@ class ElecMeter(Hashable, Electric):
             print("kwargs after setting resample setting:")
             print(load_kwargs)
 
+        if load_kwargs.pop('use_rollups', True):
+            rollup_period = self._rollup_period_for(**load_kwargs)
+            if rollup_period is not None:
+                load_kwargs['rollup_period'] = rollup_period
+                # Rows which resampling would not fill from their source
+                limit = load_kwargs['resample_kwargs'].get('limit')
+                if limit is not None:
+                    load_kwargs['rollup_max_age'] = limit * int(
+                        round(load_kwargs['sample_period']))
+
         load_kwargs = self._prep_kwargs_for_sample_period_and_resample(**load_kwargs)
 
         if verbose:
@@ -523,6 +571,150 @@ class ElecMeter(Hashable, Electric):
 
         return generator
 
+    def rollup_key(self, period):
+        """Returns the key of the rollup table for `period` seconds."""
+        return "{}/rollup_{:d}".format(self.key, int(period))
+
+    def rollup_sources_key(self):
+        """Returns the key of the table which records, for each rollup
+        period, the number of raw rows and the last raw timestamp (in
+        nanoseconds) the rollup was built from."""
+        return "{}/rollup_sources".format(self.key)
+
+    def build_rollups(self, periods=None, chunksize=MAX_MEM_ALLOWANCE_IN_BYTES):
+        """Stores resampled copies of this meter's data, one per period,
+        under `rollup_key(period)`.  Afterwards `load(sample_period=...)`
+        reads from the coarsest suitable rollup instead of the raw data.
+
+        Each rollup holds the forward filled value at every multiple of
+        `period`, without a limit, and in `ROLLUP_SOURCE_COLUMN` the time
+        of the raw sample it was filled from.  Loading from a rollup sets
+        rows to NaN which are further from their sample than the `limit`
+        of forward filling allows, so it returns the same values as
+        resampling the raw data with the default `resample_kwargs`.
+
+        The number of raw rows and the last raw timestamp are stored
+        with the rollups under `rollup_sources_key()`.  Rollups are not
+        updated automatically: once data has been appended to the meter
+        they no longer match the store's `fingerprint` and `load` ignores
+        them until this function is called again.  Stores which cannot
+        tell a fingerprint never load from rollups.
+
+        Parameters
+        ----------
+        periods : list of ints, optional
+            Sample periods in seconds.  Defaults to ROLLUP_PERIODS.
+            Periods which are not longer than the meter's sample period
+            are skipped.
+        chunksize : int, optional
+            Number of raw rows to process at once.
+        """
+        if periods is None:
+            periods = ROLLUP_PERIODS
+        native_sample_period = self.sample_period() or 0
+        periods = [int(period) for period in periods
+                   if period > native_sample_period]
+        for key in [self.rollup_key(period) for period in periods] + [
+                self.rollup_sources_key()]:
+            try:
+                self.store.remove(key)
+            except KeyError:
+                pass
+
+        # Rollups always cover all data, independent of the current window
+        window = self.store.window
+        self.store.window = TimeFrame()
+        try:
+            last_label = dict.fromkeys(periods)
+            last_row = None
+            n_rows = 0
+            for chunk in self.store.load(key=self.key, chunksize=chunksize):
+                if chunk.empty:
+                    continue
+                n_rows += len(chunk)
+                # Prepend the last row of the previous chunk so that the
+                # first bins are forward filled from it.
+                if last_row is not None:
+                    chunk = pd.concat([last_row, chunk])
+                for period in periods:
+                    rollup = safe_resample(chunk, rule='{:d}S'.format(period),
+                                           fill_method='ffill')
+                    rollup[ROLLUP_SOURCE_COLUMN] = _source_times(
+                        chunk.index.asi8, rollup.index.asi8)
+                    if last_label[period] is not None:
+                        rollup = rollup[rollup.index > last_label[period]]
+                    if rollup.empty:
+                        continue
+                    self.store.append(self.rollup_key(period), rollup)
+                    last_label[period] = rollup.index[-1]
+                last_row = chunk.iloc[-1:]
+        finally:
+            self.store.window = window
+        if last_row is None:
+            return
+        sources = pd.DataFrame(
+            {'n_rows': n_rows, 'last_ns': last_row.index[-1].value},
+            index=pd.Index(periods, dtype=np.int64),
+            columns=['n_rows', 'last_ns'], dtype=np.int64)
+        self.store.append(self.rollup_sources_key(), sources)
+        self._rollup_periods_cache = None
+
+    def _current_rollup_periods(self):
+        """Returns the set of periods whose rollups were built from the
+        data which is in the store now.  The result is cached per
+        fingerprint of the data, see `_data_fingerprint`."""
+        fingerprint = self._data_fingerprint()
+        cache = getattr(self, '_rollup_periods_cache', None)
+        if cache is not None and cache[0] == fingerprint:
+            return cache[1]
+        n_rows, last_timestamp = fingerprint
+        key = self.rollup_sources_key()
+        if n_rows is None or last_timestamp is None or key not in self.store:
+            periods = set()
+        else:
+            sources = self.store[key]
+            current = ((sources['n_rows'] == n_rows) &
+                       (sources['last_ns'] == pd.Timestamp(last_timestamp).value))
+            periods = set(sources.index[current.values])
+        self._rollup_periods_cache = (fingerprint, periods)
+        return periods
+
+    def _rollup_period_for(self, sample_period=None, resample=False,
+                           resample_kwargs=None, preprocessing=None,
+                           high_res=False, **load_kwargs):
+        """Returns the period of the coarsest rollup from which the
+        requested resampling can be computed without changing the result,
+        or None if the raw data has to be loaded.
+
+        This is the case if the data is resampled with the default
+        `resample_kwargs` (forward filling, no 'how') without any
+        preprocessing and `sample_period` is a multiple of the rollup's
+        period and a divisor of one day (so that the resampling bins of
+        both line up).  Rollups which were built before data was appended
+        to the meter are skipped.
+        """
+        if not resample or sample_period is None or high_res or preprocessing:
+            return None
+        resample_kwargs = resample_kwargs or {}
+        if (resample_kwargs.get('how') or
+                resample_kwargs.get('fill_method', 'ffill') != 'ffill'):
+            return None
+        sample_period = int(round(sample_period))
+        if sample_period <= 0 or SECONDS_PER_DAY % sample_period:
+            return None
+        native_sample_period = self.sample_period() or 0
+        candidates = [period for period in sorted(ROLLUP_PERIODS, reverse=True)
+                      if native_sample_period < period <= sample_period and
+                      sample_period % period == 0]
+        if not candidates:
+            return None
+        current_periods = self._current_rollup_periods()
+        for period in candidates:
+            if (period in current_periods and
+                    self.rollup_key(period) in self.store):
+                return period
+        return None
+
     def _ac_type_to_columns(self, ac_type):
         if ac_type is None:
             return []
@@ -653,8 +845,17 @@ class ElecMeter(Hashable, Electric):
             raise RuntimeError(
                 "Cannot get source node if meter.store is None!")
 
+        rollup_period = loader_kwargs.pop('rollup_period', None)
+        rollup_max_age = loader_kwargs.pop('rollup_max_age', None)
+        key = self.key if rollup_period is None else self.rollup_key(rollup_period)
         loader_kwargs = self._convert_physical_quantity_and_ac_type_to_cols(**loader_kwargs)
-        generator = self.store.load(key=self.key, **loader_kwargs)
+        if rollup_period is None:
+            generator = self.store.load(key=key, **loader_kwargs)
+        else:
+            loader_kwargs['columns'] = (list(loader_kwargs['columns']) + 
+                                        [ROLLUP_SOURCE_COLUMN])
+            generator = _mask_stale_rows(self.store.load(key=key, **loader_kwargs),
+                                         rollup_max_age)
         self.metadata['device'] = self.device
         return Node(self, generator=generator)
     #endregion
@@ -790,13 +991,141 @@ class ElecMeter(Hashable, Electric):
             return tmp._data
 
 
+    def compute_stats(self, stats, **loader_kwargs):
+        """Computes several statistics with a single pass over the data.
+
+        Each of the single stat functions (e.g. `good_sections`) loads
+        the whole meter on its own.  This function loads every chunk only
+        once and pushes it through the nodes of all requested statistics.
+        Statistics which are already cached are taken from the cache.  The
+        others are finalized and cached exactly like the single stat
+        functions do it.  If all of them are cached partially, only the
+        sections missing in any of the caches are loaded.
+
+        Parameters
+        ----------
+        stats : list of str
+            Names of the statistics to compute. See `FUSABLE_STATS`.
+        full_results : bool, default=False
+        **loader_kwargs : key word arguments for DataStore.load()
+
+        Returns
+        -------
+        dict which maps each name in `stats` to the value the stat
+        function of the same name returns.
+
+        Examples
+        --------
+        >>> stats = meter.compute_stats(['good_sections', 'total_energy'])
+        >>> stats['total_energy']
+        """
+        unknown = [stat for stat in stats if stat not in FUSABLE_STATS]
+        if unknown:
+            raise ValueError("Can not compute {} in a single pass. Possible"
+                             " stats are {}.".format(unknown, list(FUSABLE_STATS)))
+        full_results = loader_kwargs.pop('full_results', False)
+        if 'ac_type' in loader_kwargs or 'physical_quantity' in loader_kwargs:
+            loader_kwargs = self._convert_physical_quantity_and_ac_type_to_cols(**loader_kwargs)
+        columns = loader_kwargs.get('columns') or []
+        ac_types = set([m[1] for m in columns if m[1]])
+        use_cache = loader_kwargs.get('preprocessing') is None
+        sections = self._requested_sections(loader_kwargs)
+
+        # Nonzero and overbasepower sections are limited to the good sections
+        required = set(stats)
+        if required & set(['nonzero_sections', 'overbasepower_sections']):
+            required.add('good_sections')
+        to_compute = []
+        cached_stats = {}
+        missing_sections = []
+        for stat in FUSABLE_STATS:
+            if not stat in required:
+                continue
+            cached_stat, sections_to_compute = None, sections
+            if use_cache:
+                cached_stat, sections_to_compute = self._uncached_sections(
+                    FUSABLE_STATS[stat][-1].results_class, sections, loader_kwargs)
+            if sections_to_compute:
+                to_compute.append(stat)
+                cached_stats[stat] = cached_stat
+                missing_sections.append(TimeFrameGroup(sections_to_compute))
+
+        computed = {}
+        if to_compute:
+            # A single pass over all sections which any of the stats misses
+            load_kwargs = dict(loader_kwargs)
+            if all(cached_stats[stat] is not None for stat in to_compute):
+                missing = TimeFrameGroup.union_many(missing_sections)
+                sections = self._non_empty_sections(missing.merge_shorter_gaps_than(0))
+                load_kwargs['sections'] = sections
+            computed = self._compute_stats(to_compute, load_kwargs)
+            for stat in ['nonzero_sections', 'overbasepower_sections']:
+                if stat in computed:
+                    if 'good_sections' in computed:
+                        good_sections = computed['good_sections']._data
+                    else:
+                        good_sections = self.good_sections(**dict(loader_kwargs))
+                    computed[stat]._data = computed[stat]._data.intersection(good_sections)
+            for stat in to_compute:
+                if cached_stats[stat] is not None:
+                    # Only the section stats are incremental
+                    results_obj = FUSABLE_STATS[stat][-1].results_class(
+                        self.device['max_sample_period'])
+                    results_obj.import_from_cache(cached_stats[stat], sections)
+                    results_obj.update(computed[stat])
+                    computed[stat] = results_obj
+            if use_cache:
+                with self.store.batch():
+                    for stat in to_compute:
+                        self._cache_stat(computed[stat], sections, loader_kwargs,
+                                         extend=cached_stats[stat] is not None)
+
+        results = {}
+        for stat in stats:
+            if stat in computed:
+                results[stat] = self._stat_return_value(
+                    computed[stat], full_results, ac_types)
+            else:
+                # Cached, the stat function only loads the cache
+                results[stat] = getattr(self, stat)(
+                    full_results=full_results, **dict(loader_kwargs))
+        return results
+
+    def _compute_stats(self, stats, loader_kwargs):
+        """Runs a single pipeline with the nodes of all `stats`.
+
+        Parameters
+        ----------
+        stats : list of str, in the order of `FUSABLE_STATS`
+        loader_kwargs : dict
+
+        Returns
+        -------
+        dict which maps each name in `stats` to the finalized
+        nilmtk.Results subclass instance.
+        """
+        if 'good_sections' in stats:
+            loader_kwargs.setdefault('n_look_ahead_rows', 10)
+        last_node = self.get_source_node(**loader_kwargs)
+        stat_nodes = {}
+        for stat in stats:
+            for node in FUSABLE_STATS[stat]:
+                last_node = node(last_node)
+            stat_nodes[stat] = last_node
+        last_node.run()
+        for node in stat_nodes.values():
+            node.results.finalize()
+        return dict((stat, node.results) for stat, node in iteritems(stat_nodes))
+
     def _get_stat_from_cache_or_compute(self, nodes, results_obj, loader_kwargs):
         """General function for computing statistics and/or loading them from
         cache.
 
-        Cached statistics lives in the DataStore at
-        'building<I>/elec/cache/meter<K>/<statistic_name>' e.g.
-        'building1/elec/cache/meter1/total_energy'.  We store the
+        Cached statistics live in the `stat_cache` of the meter, by default
+        inside the DataStore below 'building<I>/elec/cache'.  An entry is
+        identified by the meter, the statistic and the parameters it depends
+        on (see `_stat_cache_params`) and is dropped as soon as the data of
+        the meter changes other than by appending rows.  We store the
         'full' statistic... i.e we store a representation of the `Results._data`
         DataFrame. Some times we need to do some conversion to store
         `Results._data` on disk.  The logic for doing this conversion lives
@@ -804,6 +1133,10 @@ class ElecMeter(Hashable, Electric):
         `ElecMeter.clear_cache()`.
         When 'preprocessing' is set, then the cache is not used because the cache
         is only valid for the version without preprocessing.
+        Next to each stat the cache holds the timeframes it covers.  For 
+        `incremental` results only the sections which are not covered yet
+        (e.g. newly appended data) are computed and merged into the cached
+        results with `Results.update`.
 
         Parameters
         ----------
@@ -822,8 +1155,8 @@ class ElecMeter(Hashable, Electric):
         --------
         clear_cache
         _compute_stat
-        key_for_cached_stat
         get_cached_stat
+        nilmtk.StatCache
         """
         full_results = loader_kwargs.pop('full_results', False)
         verbose = loader_kwargs.get('verbose')
@@ -831,92 +1164,162 @@ class ElecMeter(Hashable, Electric):
             loader_kwargs = self._convert_physical_quantity_and_ac_type_to_cols(**loader_kwargs)
         columns = loader_kwargs.get('columns', [])
         ac_types = set([m[1] for m in columns if m[1]])
-        results_obj_copy = deepcopy(results_obj)
-
-        # Prepare `sections` list
-        sections = loader_kwargs.get('sections')
-        if sections is None:
-            tf = self.get_timeframe()
-            tf.include_end = True
-            sections = [tf]
-        sections = TimeFrameGroup(sections) # Takes care that NILMTK timeframe
-        sections = [s for s in sections if not s.empty]
+        use_cache = loader_kwargs.get('preprocessing') is None
+        sections = self._requested_sections(loader_kwargs)
 
-        # Retrieve usable stats from cache
-        key_for_cached_stat = self.key_for_cached_stat(results_obj.name)
+        # Retrieve usable stats from cache and find the sections it misses
         cached_stat = None
-        if loader_kwargs.get('preprocessing') is None:
-            cached_stat = self.get_cached_stat(key_for_cached_stat)
-            #results_obj.import_from_cache(cached_stat, sections) # Fill results_obj with cache
-
-            #def find_sections_to_compute():
-            #    # Get sections_to_compute
-            #    results_obj_timeframes = results_obj.timeframes()
-            #    sections_to_compute = set(sections) - set(results_obj_timeframes)
-            #    t1 = TimeFrameGroup(sections)
-            #    t2 = TimeFrameGroup(results_obj_timeframes)
-            #    sections_to_compute = t1.diff(t2)   # HIER IST DAS DIFF, DAS ICH NEU GEBAUT HABE!!! NUR WARUM GEHT ES GERADE NICHT MEHR???
-            #    sections_to_compute = sorted(sections_to_compute)
-            #    return sections_to_compute
-            #try:
-            #    ac_type_keys = results_obj.keys() #.simple().keys()
-            #except:
-            #    sections_to_compute = find_sections_to_compute()
-            #else:
-            #    if ac_types.issubset(ac_type_keys):
-            #        # IF ac_type in cache, only calculate remaining sections
-            #        sections_to_compute = find_sections_to_compute()
-            #    else:
-            #        # If false ac_type cached, still have to compute all
-            #        sections_to_compute = sections
-            #        results_obj = results_obj_copy
-        #else:
-        #    sections_to_compute = sections
-        if verbose and not cached_stat is None: #._data.empty:
+        sections_to_compute = sections
+        if use_cache:
+            cached_stat, sections_to_compute = self._uncached_sections(
+                type(results_obj), sections, loader_kwargs)
+        if verbose and not cached_stat is None:
             print("Using cached result.")
-            
+        if not cached_stat is None:
+            results_obj.import_from_cache(cached_stat, sections) # Fill results_obj with cache
+
         # If necessary compute stats for missing sections 
-        if cached_stat is None: #sections_to_compute:
-            # If we need everything either way, we don't need expensive index lookup during load
-            #if not self.get_timeframe() in sections_to_compute:
-            #    loader_kwargs['sections'] = sections_to_compute
-
-            #computed_result = self._compute_stat(nodes, loader_kwargs)
-
-            # Merge newly computed stats into the main stat result         
-            # DAS HIER BAUT MAN BESSER DIREKT IN DEN NODE EIN!!! DASS SEIN RESULT ERWEITERT WIRD
-            # DANN KANN MAN IMMER NOCH DAS RESULT VOM CACHING NEHMEN UND VERBINDEN!
-            # MAN SETZT DANN VON ALLEN NODE ELEMENTEN DAS RESULT MIT IN DIE PIPELINE ELEMENTE! 
-            # DANN KANN MAN SIE HINTEN RAUSHOLEN. SO KANN MAN DIE BERECHNUNG IN EINEM ZUG MACHEN.  
-            # => Ist ja so gemacht. Nur eben fuer jede Section!
-            # => Die einzige rweiterung waere das durchreichen von Results.                                                                 
-            #results_obj.update(computed_result.results)
-            
-            results_obj = self._compute_stat(nodes, loader_kwargs).results
+        if cached_stat is None or sections_to_compute:
+            if not cached_stat is None:
+                loader_kwargs['sections'] = sections_to_compute
+            computed_results = self._compute_stat(nodes, loader_kwargs).results
             
             # For Nonzero section exclude where there are not good sections
             if  results_obj.name == 'nonzero_sections' or results_obj.name == 'overbasepower_sections':
                 good_sections = self.good_sections(**loader_kwargs) #_data
-                results_obj._data = results_obj._data.intersection(good_sections)
+                computed_results._data = computed_results._data.intersection(good_sections)
+
+            # Merge newly computed stats into the cached stats
+            if cached_stat is None:
+                results_obj = computed_results
+            else:
+                results_obj.update(computed_results)
 
             # Save to disk newly computed stats
-            stat_for_store = results_obj.export_to_cache()
-            try:
-                #self.store.remove(key_for_cached_stat)
-                self.store.put(key_for_cached_stat, stat_for_store, fixed = True)
-                # Temporary workarround to store the good sections also for the other meters TODO
-                if results_obj.name == 'good_sections':
-                    for i in range(2,4):
-                        self.store.put(key_for_cached_stat.replace('meter1', 'meter' +str(i)), stat_for_store, fixed = True) 
-
-            except ValueError:
-                # the old table probably had different columns
-                self.store.remove(key_for_cached_stat)
-                self.store.put(key_for_cached_stat, results_obj.export_to_cache())
-        else:
-            results_obj.import_from_cache(cached_stat, sections) # Fill results_obj with cache
+            if use_cache:
+                self._cache_stat(results_obj, sections_to_compute, loader_kwargs,
+                                 extend=not cached_stat is None)
 
-        # Return the correct value depending on options
+        return self._stat_return_value(results_obj, full_results, ac_types)
+
+    def _requested_sections(self, loader_kwargs):
+        """Returns the `sections` of `loader_kwargs` as a list of non empty
+        TimeFrames.  Defaults to the whole timeframe of the meter."""
+        sections = loader_kwargs.get('sections')
+        if sections is None:
+            tf = self.get_timeframe()
+            # The loaders turn sections into a TimeFrameGroup, which drops
+            # `include_end`.  So the end is moved past the last row instead.
+            tf.end += pd.Timedelta(1, 'ns')
+            sections = [tf]
+        sections = TimeFrameGroup(sections) # Takes care that NILMTK timeframe
+        return [s for s in sections if not s.empty]
+
+    def _uncached_sections(self, results_class, sections, loader_kwargs):
+        """Finds the parts of `sections` which are not covered by the cached
+        stat of `results_class`.
+
+        Only stats whose results are `incremental` can be completed 
+        by computing the missing parts.  All other stats have to be 
+        recomputed for all `sections` as soon as anything is missing.
+
+        Parameters
+        ----------
+        results_class : nilmtk.Results subclass
+        sections : list of nilmtk.TimeFrame
+        loader_kwargs : dict
+
+        Returns
+        -------
+        cached_stat : pd.DataFrame or None if the cache can not be used
+        sections_to_compute : list of nilmtk.TimeFrame
+
+        See Also
+        --------
+        get_cached_timeframes
+        """
+        cached = self._get_cache_entry(results_class.name, loader_kwargs)
+        if cached is None:
+            return None, sections
+        cached_stat, cached_timeframes = cached
+
+        missing = TimeFrameGroup(sections).diff(TimeFrameGroup(cached_timeframes))
+        sections_to_compute = self._non_empty_sections(missing)
+        if not sections_to_compute:
+            return cached_stat, []
+        if not results_class.incremental:
+            return None, sections
+        return cached_stat, sections_to_compute
+
+    def _non_empty_sections(self, timeframes):
+        """Returns the non empty TimeFrames of the TimeFrameGroup 
+        `timeframes` as a list."""
+        df = timeframes._df
+        return list(TimeFrameGroup(df[df['section_end'] > df['section_start']]))
+
+    def _cache_stat(self, results_obj, timeframes, loader_kwargs, extend=False):
+        """Saves the finalized `results_obj` in the StatCache, together 
+        with the timeframes it covers.
+
+        Parameters
+        ----------
+        results_obj : nilmtk.Results subclass instance
+        timeframes : list of nilmtk.TimeFrame
+            The sections `results_obj` has been computed for.
+        loader_kwargs : dict
+            The parameters the stat has been computed with.
+        extend : bool
+            If True then `results_obj` contains the cached stat and the 
+            `timeframes` are added to the cached timeframes.
+
+        See Also
+        --------
+        _get_stat_from_cache_or_compute
+        get_cached_timeframes
+        """
+        timeframes = TimeFrameGroup(timeframes)
+        if extend:
+            cached_timeframes = self.get_cached_timeframes(
+                results_obj.name, **loader_kwargs)
+            if not cached_timeframes is None:
+                timeframes = TimeFrameGroup.union_many([cached_timeframes, timeframes])
+                timeframes = timeframes.merge_shorter_gaps_than(0)
+        self.stat_cache.put(
+            self.key_for_stat_cache(), results_obj.name,
+            self._stat_cache_params(loader_kwargs), self._data_fingerprint(),
+            results_obj.export_to_cache(), timeframes._df.reset_index(drop=True))
+
+    def _stat_cache_params(self, loader_kwargs):
+        """Returns everything apart from the data and the sections which 
+        the cached stats depend on.  The chunksize is left out because the 
+        results of all chunks are stitched together."""
+        columns = loader_kwargs.get('columns')
+        if columns is not None:
+            columns = sorted([list(column) for column in columns])
+        return {'max_sample_period': self.device.get('max_sample_period'),
+                'sample_period': loader_kwargs.get('sample_period'),
+                'resample': loader_kwargs.get('resample', False),
+                'columns': columns}
+
+    def _data_fingerprint(self):
+        """Returns the fingerprint of the meter's data in the store or 
+        (None, None) if the store can not tell, see `DataStore.fingerprint`."""
+        try:
+            return self.store.fingerprint(self.key)
+        except NotImplementedError:
+            return None, None
+
+    def _get_cache_entry(self, stat_name, loader_kwargs):
+        """Returns the (stat, timeframes) pair of DataFrames from the 
+        StatCache or None."""
+        if self.store is None:
+            return None
+        return self.stat_cache.get(
+            self.key_for_stat_cache(), stat_name,
+            self._stat_cache_params(loader_kwargs), self._data_fingerprint())
+
+    def _stat_return_value(self, results_obj, full_results, ac_types):
+        """Return the correct value depending on options"""
         if full_results:
             return results_obj
         res = results_obj #.simple()
@@ -952,7 +1355,6 @@ class ElecMeter(Hashable, Electric):
         --------
         clear_cache
         _get_stat_from_cache_or_compute
-        key_for_cached_stat
         get_cached_stat
         """
         last_node = self.get_source_node(**loader_kwargs)
@@ -962,48 +1364,19 @@ class ElecMeter(Hashable, Electric):
         last_node.results.finalize()
         return last_node
 
-    def key_for_cached_stat(self, stat_name):
-        """
-        This function puts together the key, where the 
-        cached stat can be found in the HDF hierarchy.
-
-        Parameters
-        ----------
-        stat_name : str
-
-        Returns
-        -------
-        key : str
-
-        See Also
-        --------
-        clear_cache
-        _compute_stat
-        _get_stat_from_cache_or_compute
-        get_cached_stat
-        """
-        if isinstance(self.instance(), tuple):
-            meter_str = "_".join([str(i) for i in (self.instance())])
-        else:
-            meter_str = "{:d}".format(self.instance())
-
-        relative_path = ("building{:d}/elec/cache/meter{}/{:s}"
-                .format(self.building(), meter_str, stat_name))
-        #absolute_path = os.path.dirname(self.store.filename) + relative_path
-        #os.path.normpath(absolute_path) # clean for os
-        return relative_path
-
     def calc_and_cache_stats(self, verbose = False, ):
         '''
         This function calls all available status calculation functions sothat 
         the results are placed inside the stats-buffer. 
         This comes handy when your want to preprocess the dataset in the
         beginning sothat you can access the values in a fast way afterwards.
+        All stats are computed within a single pass over the data and the
+        cache writes are batched sothat the store is flushed only once.
         '''
 
         try:
-            self.good_sections(chunksize=100000000, verbose = verbose)
-            self.nonzero_sections(chunksize=100000000, verbose = verbose)
+            self.compute_stats(['good_sections', 'nonzero_sections'],
+                               chunksize=100000000, verbose = verbose)
         except Exception as e:
             print("STILL BROKEN")
 
@@ -1025,37 +1398,44 @@ class ElecMeter(Hashable, Electric):
 
 
     def clear_cache(self, caches_to_delete = None, verbose=False):
-        """
+        """Removes the cached stats of this meter for all parameters.
+
+        Parameters
+        ----------
+        caches_to_delete : list of str, optional
+            Names of the stats to remove.  Defaults to all stats.
+        verbose : bool
+
         See Also
         --------
         _compute_stat
         _get_stat_from_cache_or_compute
-        key_for_cached_stat
         get_cached_stat
         """
+        if self.store is None:
+            return
         if caches_to_delete is None:
-            caches_to_delete = ['overbasepower_sections', 'nonzero_sections', 'good_sections', 'total_energy']
+            caches_to_delete = [None]
         elif not isinstance(caches_to_delete, list):
             caches_to_delete = list(caches_to_delete)
-        if self.store is not None:
-            for cache in caches_to_delete:
-                key_for_cache = self.key_for_cached_stat(cache)
-                try:
-                    self.store.remove(key_for_cache)
-                except KeyError:
-                    if verbose:
-                        print("No existing cache for", key_for_cache)
-                else:
-                    print("Removed", key_for_cache)
-
-    def get_cached_stat(self, key_for_stat):
+        meter_key = self.key_for_stat_cache()
+        for cache in caches_to_delete:
+            n_removed = self.stat_cache.remove(meter_key, cache)
+            if n_removed:
+                print("Removed", n_removed, "cached",
+                      "stats" if cache is None else cache, "of", meter_key)
+            elif verbose:
+                print("No existing cache for", meter_key, cache or '')
+
+    def get_cached_stat(self, stat_name, **loader_kwargs):
         """
-        Tries to load the cache from the store. Returns 
-        empty DataFrame if not available.
+        Tries to load the stat from the StatCache. Returns None if
+        there is no valid entry for the given parameters.
 
         Parameters
         ----------
-        key_for_stat : str
+        stat_name : str, e.g. 'good_sections'
+        **loader_kwargs : the parameters the stat has been computed with
 
         Returns
         -------
@@ -1065,18 +1445,23 @@ class ElecMeter(Hashable, Electric):
         --------
         _compute_stat
         _get_stat_from_cache_or_compute
-        key_for_cached_stat
         clear_cache
         """
-        if self.store is None:
-            return #pd.DataFrame()
-        try:
-            stat_from_cache = self.store[key_for_stat]
-            #stat_from_cache = pd.load(key_for_stat)
-        except KeyError:
-            return None #pd.DataFrame()
-        else:
-            return pd.DataFrame() if stat_from_cache is None else stat_from_cache
+        cached = self._get_cache_entry(stat_name, loader_kwargs)
+        return None if cached is None else cached[0]
+
+    def get_cached_timeframes(self, stat_name, **loader_kwargs):
+        """
+        Returns the timeframes covered by the cached stat `stat_name` as a 
+        TimeFrameGroup or None if they are not available.
+
+        See Also
+        --------
+        get_cached_stat
+        _get_stat_from_cache_or_compute
+        """
+        cached = self._get_cache_entry(stat_name, loader_kwargs)
+        return None if cached is None else TimeFrameGroup(cached[1])
     #endregion
 
 
@@ -1112,4 +1497,25 @@ class ElecMeter(Hashable, Electric):
     #     cleaning steps have been executed and some summary results (e.g. the number of
     #     implausible values removed)"""
     #     raise NotImplementedError
-    #endregion
\ No newline at end of file
+    #endregion
+
+def _source_times(times, labels):
+    """Returns, for each of the sorted `labels`, the last of the sorted
+    `times` at or before it, or the first time for labels before all."""
+    positions = np.searchsorted(times, labels, side='right') - 1
+    return times[np.maximum(positions, 0)]
+
+
+def _mask_stale_rows(generator, max_age):
+    """Yields the rollup chunks of `generator` without their
+    `ROLLUP_SOURCE_COLUMN`, with NaN in the rows which are more than
+    `max_age` seconds after their source sample."""
+    for chunk in generator:
+        if ROLLUP_SOURCE_COLUMN not in chunk.columns:
+            yield chunk
+            continue
+        if max_age is not None and not chunk.empty:
+            age = chunk.index.asi8 - chunk[ROLLUP_SOURCE_COLUMN].values
+            chunk.loc[age > max_age * 1E9, :] = np.nan
+        chunk.drop(ROLLUP_SOURCE_COLUMN, axis=1, inplace=True)
+        yield chunk
@@ -4,19 +4,13 @@ import numpy as np
 from collections import Counter
 from builtins import zip
 from warnings import warn
-import scipy.spatial as ss
 from scipy import fft
 from pandas.plotting import lag_plot, autocorrelation_plot
-from scipy.special import digamma,gamma
-from math import log,pi
-import numpy.random as nr
 import matplotlib.pyplot as plt
 import numpy as np
 from datetime import timedelta
-import gc
 import pytz
 from .meterseries import MeterSeries
-from .timeframe import TimeFrame
 from .measurement import select_best_ac_type
 from .utils import (offset_alias_to_seconds, convert_to_timestamp, normalise_timestamp,
                     flatten_2d_list, append_or_extend_list,
@@ -24,10 +18,15 @@ from .utils import (offset_alias_to_seconds, convert_to_timestamp, normalise_tim
 from .plots import plot_series
 from .preprocessing import Apply
 from nilmtk.stats.histogram import histogram_from_generator
+from nilmtk.stats.correlation import CorrelationAccumulator
+from nilmtk.stats.activations import (ActivationFinder, ActivityCounter,
+                                      activation_histogram)
+from nilmtk.stats.entropy import (DEFAULT_MAX_SAMPLES, check_random_state,
+                                  knn_entropy, knn_mutual_information,
+                                  sample_rows)
 from nilmtk.appliance import DEFAULT_ON_POWER_THRESHOLD
 import pickle as pckl
 
-MAX_SIZE_ENTROPY = 10000
 
 class Electric(MeterSeries):
     """
@@ -369,9 +368,10 @@ class Electric(MeterSeries):
     def correlation(self, other, **load_kwargs):
         """
         Finds the correlation between the two ElecMeters. Both the ElecMeters 
-        should be perfectly aligned
-        Adapted from: 
-        http://www.johndcook.com/blog/2008/11/05/how-to-calculate-pearson-correlation-accurately/
+        should be perfectly aligned, i.e. their chunks have to cover the 
+        same timeframes.  Both are loaded once and correlated in a single 
+        pass over the samples they have in common, see 
+        `nilmtk.stats.correlation.CorrelationAccumulator`.
 
         Parameters
         ----------
@@ -379,59 +379,17 @@ class Electric(MeterSeries):
 
         Returns
         -------
-        float : [-1, 1]
+        float : [-1, 1] or NaN if there are less than two common samples
         """
         sample_period = max(self.sample_period(), other.sample_period())
         load_kwargs.setdefault('sample_period', sample_period)
 
-        def sum_and_count(electric):
-            n = 0
-            cumulator = 0.0
-            for power in electric.power_series(**load_kwargs):
-                n += len(power.index)
-                cumulator += power.sum()
-            return n, cumulator
-
-        x_n, x_sum = sum_and_count(self)
-        if x_n <= 1:
-            return np.NaN
-
-        y_n, y_sum = sum_and_count(other)
-        if y_n <= 1:
-            return np.NaN
-
-        # we're using Python 3's division (which returns a float)
-        raise Exception("Hier wird Python 3 Funktionalitaet benutzt! Aufpassen!!!")
-        x_bar = x_sum / x_n 
-        y_bar = y_sum / y_n
-
-        # Second pass is used to find x_s and y_s (std.devs)
-        def stdev(electric, mean, n):
-            s_square_sum = 0.0
-            for power in electric.power_series(**load_kwargs):
-                s_square_sum += ((power - mean) * (power - mean)).sum()
-            s_square = s_square_sum / (n - 1)
-            return np.sqrt(s_square)
-
-        x_s = stdev(self, x_bar, x_n)
-        y_s = stdev(other, y_bar, y_n)
-
-        numerator = 0.0
+        accumulator = CorrelationAccumulator(2)
         for (x_power, y_power) in zip(self.power_series(**load_kwargs), 
                                        other.power_series(**load_kwargs)):
-            xi_minus_xbar = x_power - x_bar
-            del x_power
-            gc.collect()
-            yi_minus_ybar = y_power - y_bar
-            del y_power
-            gc.collect()
-            numerator += (xi_minus_xbar * yi_minus_ybar).sum()
-            del xi_minus_xbar
-            del yi_minus_ybar
-            gc.collect()
-        denominator = (x_n - 1) * x_s * y_s
-        corr = numerator / denominator
-        return corr
+            block = pd.concat([x_power, y_power], axis=1)
+            accumulator.update(block.values)
+        return accumulator.correlation()[0, 1]
 
     def plot_lag(self, lag=1, ax=None):
         """
@@ -553,101 +511,85 @@ class Electric(MeterSeries):
             datetime_switches.append(delta_power_absolute[(delta_power_absolute>threshold)].index.values.tolist())
         return flatten_2d_list(datetime_switches)
 
-    def entropy(self, k=3, base=2):
+    def entropy(self, k=3, base=2, max_samples=DEFAULT_MAX_SAMPLES,
+                random_state=None, **load_kwargs):
         """ 
+        The classic K-L k-nearest neighbor continuous entropy estimator 
+        of the power, see `nilmtk.stats.entropy.knn_entropy`.
         This implementation is provided courtesy NPEET toolbox,
         the authors kindly allowed us to directly use their code.
         As a courtesy procedure, you may wish to cite their paper, 
         in case you use this function.
-        This fails if there is a large number of records. Need to
-        ask the authors what to do about the same! 
-        The classic K-L k-nearest neighbor continuous entropy estimator
-        x should be a list of vectors, e.g. x = [[1.3],[3.7],[5.1],[2.4]]
-        if x is a one-dimensional scalar and we have four samples
-        """
-        def kdtree_entropy(z):
-            assert k <= len(z)-1, "Set k smaller than num. samples - 1"
-            d = len(z[0])
-            N = len(z)
-            #small noise to break degeneracy, see doc.
-            intens = 1e-10
-            z = [list(p + intens*nr.rand(len(z[0]))) for p in z]
-            tree = ss.cKDTree(z)
-            nn = [tree.query(point, k+1, p=float('inf'))[0][k] for point in z]
-            const = digamma(N)-digamma(k) + d*log(2)
-            return (const + d*np.mean(map(log, nn)))/log(base)
-
-        out = []
-        for power in self.power_series():
-            x = power.values
-            num_elements = len(x)
-            x = x.reshape((num_elements, 1))            
-            if num_elements > MAX_SIZE_ENTROPY:
-
-                splits = num_elements/MAX_SIZE_ENTROPY + 1
-                y = np.array_split(x, splits)
-                for z in y:            
-                    out.append(kdtree_entropy(z))                    
-            else:
-                out.append(kdtree_entropy(x))
-        return sum(out)/len(out)
 
-    def mutual_information(self, other, k=3, base=2):
+        Parameters
+        ----------
+        k : int
+        base : number
+        max_samples : int or None
+            Number of randomly chosen samples the entropy is estimated
+            from.  See `nilmtk.stats.entropy` for the error this adds.
+            None uses all samples.
+        random_state : int or np.random.RandomState, optional
+        **load_kwargs : passed to `power_series`
+
+        Returns
+        -------
+        float
+
+        Raises
+        ------
+        ValueError if there are not more than `k` samples without NaN.
+        """
+        random_state = check_random_state(random_state)
+        samples = sample_rows(
+            (power.values[:, np.newaxis] for power in self.power_series(**load_kwargs)),
+            max_samples, self._expected_n_rows(load_kwargs), random_state,
+            n_columns=1)
+        return knn_entropy(samples, k=k, base=base, max_samples=max_samples,
+                           random_state=random_state)
+
+    def mutual_information(self, other, k=3, base=2,
+                           max_samples=DEFAULT_MAX_SAMPLES, random_state=None,
+                           **load_kwargs):
         """ 
-        Mutual information of two ElecMeters
-        x,y should be a list of vectors, e.g. x = [[1.3],[3.7],[5.1],[2.4]]
-        if x is a one-dimensional scalar and we have four samples
+        Mutual information of two ElecMeters, see 
+        `nilmtk.stats.entropy.knn_mutual_information`.  Both should be 
+        aligned like for `correlation`.
 
         Parameters
         ----------
         other : ElecMeter or MeterGroup
+        k, base, max_samples, random_state : see `entropy`
+        **load_kwargs : passed to `power_series`
+
+        Returns
+        -------
+        float
+
+        Raises
+        ------
+        ValueError if there are not more than `k` samples without NaN.
         """
-        def kdtree_mi(x, y, k, base):
-            intens = 1e-10 #small noise to break degeneracy, see doc.
-            x = [list(p + intens*nr.rand(len(x[0]))) for p in x]
-            y = [list(p + intens*nr.rand(len(y[0]))) for p in y]
-            points = zip2(x,y)
-            # Find nearest neighbors in joint space, p=inf means max-norm
-            tree = ss.cKDTree(points)
-            dvec = [tree.query(point, k+1, p=float('inf'))[0][k] for point in points]
-            a, b, c, d = avgdigamma(x, dvec), avgdigamma(y, dvec), digamma(k), digamma(len(x))
-            return (-a-b+c+d)/log(base)
-            
-        def zip2(*args):
-            # zip2(x,y) takes the lists of vectors and makes it a list of vectors in a joint space
-            # E.g. zip2([[1],[2],[3]],[[4],[5],[6]]) = [[1,4],[2,5],[3,6]]
-            return [sum(sublist, []) for sublist in zip(*args)]
-
-        def avgdigamma(points, dvec):
-            #This part finds number of neighbors in some radius in the marginal space
-            #returns expectation value of <psi(nx)>
-            N = len(points)
-            tree = ss.cKDTree(points)
-            avg = 0.
-            for i in range(N):
-                dist = dvec[i]
-                #subtlety, we don't include the boundary point, 
-                #but we are implicitly adding 1 to kraskov def bc center point is included
-                num_points = len(tree.query_ball_point(points[i],dist-1e-15,p=float('inf'))) 
-                avg += digamma(num_points)/N
-            return avg
-
-        out = []
-        for power_x, power_y in zip(self.power_series(), other.power_series()):
-            power_x_val = power_x.values
-            power_y_val = power_y.values 
-            num_elements = len(power_x_val)
-            power_x_val = power_x_val.reshape((num_elements, 1))
-            power_y_val = power_y_val.reshape((num_elements, 1))            
-            if num_elements > MAX_SIZE_ENTROPY:
-                splits = num_elements/MAX_SIZE_ENTROPY + 1
-                x_split = np.array_split(power_x_val, splits)
-                y_split = np.array_split(power_y_val, splits)
-                for x, y  in zip(x_split, y_split):
-                    out.append(kdtree_mi(x, y, k, base))
-            else:
-                out.append(kdtree_mi(power_x_val, power_y_val, k, base))
-        return sum(out)/len(out)
+        random_state = check_random_state(random_state)
+        sample_period = max(self.sample_period(), other.sample_period())
+        load_kwargs.setdefault('sample_period', sample_period)
+        blocks = (pd.concat([power_x, power_y], axis=1).values
+                  for power_x, power_y in zip(self.power_series(**load_kwargs),
+                                              other.power_series(**load_kwargs)))
+        samples = sample_rows(blocks, max_samples,
+                              self._expected_n_rows(load_kwargs), random_state,
+                              n_columns=2)
+        return knn_mutual_information(
+            samples[:, 0], samples[:, 1], k=k, base=base,
+            max_samples=max_samples, random_state=random_state)
+
+    def _expected_n_rows(self, load_kwargs):
+        """Estimates the number of rows `load(**load_kwargs)` yields."""
+        sample_period = load_kwargs.get('sample_period') or self.sample_period()
+        timeframe = self.get_timeframe()
+        if not sample_period or timeframe.start is None or timeframe.end is None:
+            return None
+        return int(timeframe.timedelta.total_seconds() / sample_period) + 1
 
     def available_power_ac_types(self):
         """Finds available alternating current types from power measurements.
@@ -688,12 +630,20 @@ class Electric(MeterSeries):
         e.g. to see when, over the course of an average day, activity occurs
         then use `bin_duration='H'` and `period='D'`.
 
+        Each value is the number of periods in which the appliance had at
+        least one sample at or above its on power threshold in that bin,
+        see `nilmtk.stats.activations.ActivityCounter`.
+
         Parameters
         ----------
         period : str. Pandas period alias.
         bin_duration : str. Pandas period alias e.g. 'H' = hourly; 'D' = daily.
             Width of each bin of the histogram.  `bin_duration` must exactly
             divide the chosen `period`.
+        on_power_threshold : number, optional
+            Defaults to the appliance's on power threshold.
+        **load_kwargs : kwargs for self.power_series()
+
         Returns
         -------
         hist : np.ndarray
@@ -704,38 +654,39 @@ class Electric(MeterSeries):
         if n_bins != int(n_bins):
             raise ValueError('`bin_duration` must exactly divide the'
                              ' chosen `period`')
-        n_bins = int(n_bins)
-
-        # Resample to `bin_duration` and load
-        load_kwargs['sample_period'] = offset_alias_to_seconds(bin_duration)
-        load_kwargs['resample_kwargs'] = {'how': 'max'}
-        when_on = self.when_on(**load_kwargs)
 
-        # Calculate histogram...
-        hist = np.zeros(n_bins, dtype=int)
-        for on_chunk in when_on:
-            if len(on_chunk) < 5:
-                continue
-
-            on_chunk = on_chunk.fillna(0).astype(int)
-
-            # Trick using resample to 'normalise' start and end dates
-            # to natural boundaries of 'period'.
-            resampled_to_period = on_chunk.iloc[[0, -1]].resample(period).mean().index
-            start = resampled_to_period[0]
-            end = resampled_to_period[-1] + 1
+        on_power_threshold = load_kwargs.pop('on_power_threshold', None)
+        if on_power_threshold is None:
+            on_power_threshold = self.on_power_threshold()
+        counter = ActivityCounter(
+            on_power_threshold, int(offset_alias_to_seconds(period) * 1E9),
+            int(offset_alias_to_seconds(bin_duration) * 1E9), tz=self._tz())
+        for chunk in self.power_series(**load_kwargs):
+            counter.update(chunk.index, chunk.values)
+        return counter.histogram()
 
-            # Reindex chunk
-            new_index = pd.date_range(start, end, freq=bin_duration, closed='left')
-            on_chunk = on_chunk.reindex(new_index, fill_value=0, copy=False)
+    def activation_histogram(self, by='hour', weights=None, **kwargs):
+        """Counts the activations by the hour, weekday or month they start
+        in, in the local time of the meter.
 
-            # reshape
-            matrix = on_chunk.reshape((-1, n_bins))
+        Parameters
+        ----------
+        by : {'hour', 'weekday', 'month'}
+        weights : str, optional
+            Field of the activations to sum instead of counting, e.g. 
+            'energy'.
+        **kwargs : passed to `activation_table`
 
-            # histogram
-            hist += matrix.sum(axis=0)
+        Returns
+        -------
+        np.ndarray with 24, 7 (Monday first) or 12 bins
+        """
+        return activation_histogram(self.activation_table(**kwargs), by=by,
+                                    tz=self._tz(), weights=weights)
 
-        return hist
+    def _tz(self):
+        start = self.get_timeframe().start
+        return None if start is None else start.tz
 
     def plot_activity_histogram(self, ax=None, period='D', bin_duration='H',
                                 plot_kwargs=None, **load_kwargs):
@@ -840,6 +791,43 @@ class Electric(MeterSeries):
 
         return activations
 
+    def activation_table(self, min_off_duration=None, min_on_duration=None,
+                         on_power_threshold=None, **load_kwargs):
+        """Returns the activations of an appliance as a compact table.
+
+        Like `get_activations`, but all chunks are processed in one 
+        vectorised pass each and activations which span chunk boundaries
+        are joined, see `nilmtk.stats.activations.ActivationFinder`.
+
+        Parameters
+        ----------
+        min_off_duration, min_on_duration, on_power_threshold : 
+            see `get_activations`
+        **load_kwargs : kwargs for self.power_series()
+
+        Returns
+        -------
+        np.ndarray of `nilmtk.stats.activations.ACTIVATION_DTYPE` with 
+        fields start_ns, end_ns, energy (kWh), peak (watts) and duration
+        (seconds).
+        """
+        if on_power_threshold is None:
+            on_power_threshold = self.on_power_threshold()
+
+        if min_off_duration is None:
+            min_off_duration = self.min_off_duration()
+
+        if min_on_duration is None:
+            min_on_duration = self.min_on_duration()
+
+        load_kwargs.setdefault('resample', True)
+        sample_period = load_kwargs.get('sample_period') or self.sample_period()
+        finder = ActivationFinder(on_power_threshold, min_off_duration,
+                                  min_on_duration, max_gap=sample_period)
+        for chunk in self.power_series(**load_kwargs):
+            finder.update(chunk.index, chunk.values)
+        return finder.activations()
+
 
 
 
@@ -851,6 +839,9 @@ def align_two_meters(master, slave, func='power_series', sample_period = None):
     `master`, the second from `slave`.
 
     Takes the sample rate and good_periods of `master` and applies to `slave`.
+    One generator per meter is opened over these sections and all of them
+    are advanced in lockstep, see `iterate_in_lockstep`, so that each
+    meter is read exactly once.
 
     Parameters
     ----------
@@ -873,29 +864,61 @@ def align_two_meters(master, slave, func='power_series', sample_period = None):
     if sample_period is None:
         sample_period = master.sample_period()
 
-    period_alias = '{:d}S'.format(sample_period)
     sections = master.good_sections().merge_shorter_gaps_than(sample_period) # I have included the merge to be capable to measure ECO Dataset
-    master_generator = getattr(master, func)(sections=sections, sample_period = sample_period)
-    for master_chunk in master_generator:
-        if len(master_chunk) < 2:
+    slaves = slave if type(slave) is list else [slave]
+    keys = ['master'] + (list(range(len(slaves))) if type(slave) is list else ['slave'])
+    generators = [getattr(meter, func)(sections=sections, sample_period=sample_period)
+                  for meter in [master] + slaves]
+    for chunks in iterate_in_lockstep(generators):
+        yield pd.DataFrame(data=dict(zip(keys, chunks)))
+
+
+def iterate_in_lockstep(generators):
+    """Advances generators of time series in lockstep.
+
+    Each generator is consumed exactly once.  Its chunks are buffered and
+    split at the last timestamp which all generators have reached, so that
+    the pieces yielded together cover the same time.  The first generator
+    is the master: iteration stops once it is exhausted.
+
+    Parameters
+    ----------
+    generators : list of generators of pd.Series or pd.DataFrames
+        Sorted by time, e.g. from `power_series` with the same
+        `sections` and `sample_period`.
+
+    Returns
+    -------
+    generator of lists with one piece per generator.  A generator which 
+    has no data in the time of a step contributes an empty piece.
+    """
+    n_generators = len(generators)
+    buffers = [None] * n_generators
+    exhausted = [False] * n_generators
+    while True:
+        for i, generator in enumerate(generators):
+            while not exhausted[i] and (buffers[i] is None or buffers[i].empty):
+                try:
+                    buffers[i] = next(generator)
+                except StopIteration:
+                    exhausted[i] = True
+        master = buffers[0]
+        if master is None or master.empty:
             return
-        chunk_timeframe = TimeFrame(master_chunk.index[0], master_chunk.index[-1])
-
-        if not type(slave) is list:
-            slave_generator = getattr(slave, func)(sections=[chunk_timeframe], sample_period = sample_period)
-            slave_chunk = next(slave_generator)
-            # TODO: do this resampling in the pipeline? Yes!? Why not! I do so and additionally added highres. meters! :)
-            #slave_chunk = slave_chunk.resample(period_alias)
-            #if slave_chunk.empty:
-            #    continue
-            #master_chunk = master_chunk.resample(period_alias)
-            yield pd.DataFrame({'master': master_chunk, 'slave': slave_chunk})
-        else:
-            data = {"master": master_chunk}
-            for i, cur_slave in enumerate(slave):
-                slave_generator = getattr(cur_slave, func)(sections=[chunk_timeframe], sample_period = sample_period)
-                data[i] = next(slave_generator)
-            yield pd.DataFrame(data = data)
+
+        # Only the meters which still have data limit the step
+        frontier = min(buffer.index[-1] for buffer in buffers
+                       if buffer is not None and not buffer.empty)
+        chunks = []
+        for i, buffer in enumerate(buffers):
+            if buffer is None:
+                chunks.append(master.iloc[:0])
+                continue
+            position = buffer.index.searchsorted(frontier, side='right')
+            chunks.append(buffer.iloc[:position])
+            buffers[i] = buffer.iloc[position:]
+        if any(not chunk.empty for chunk in chunks):
+            yield chunks
 
 
 def activation_series_for_chunk(*args, **load_kwargs):
@@ -1001,21 +1024,18 @@ def get_activations(chunk, min_off_duration=0, min_on_duration=0,
             np.concatenate([[0], above_threshold_off_durations+1])]
     assert len(switch_on_events) == len(switch_off_events)
 
-    activations = []
-    for on, off in zip(switch_on_events, switch_off_events):
-        duration = (chunk.index[off] - chunk.index[on]).total_seconds()
-        if duration < min_on_duration:
-            continue
-        on -= 1 + border
-        if on < 0:
-            on = 0
-        off += border
-        activation = chunk.iloc[on:off]
-        # throw away any activation with any NaN values
-        if not activation.isnull().values.any():
-            activations.append(activation)
-
-    return activations
+    durations = timedelta64_to_secs(chunk.index.values[switch_off_events] -
+                                    chunk.index.values[switch_on_events])
+    long_enough = durations >= min_on_duration
+    ons = np.maximum(switch_on_events[long_enough] - 1 - border, 0)
+    offs = switch_off_events[long_enough] + border
+
+    # throw away any activation with any NaN values
+    nans_before = np.concatenate([[0], np.cumsum(chunk.isnull().values)])
+    without_nans = nans_before[np.minimum(offs, len(chunk))] == nans_before[ons]
+
+    return [chunk.iloc[on:off]
+            for on, off in zip(ons[without_nans], offs[without_nans])]
 
 
 def get_vampire_power(power_series):
@@ -1,11 +1,11 @@
 from __future__ import print_function, division
 
-import gc
 import time
 from collections import Counter
-from collections import namedtuple
+from collections import namedtuple, deque
 from copy import copy, deepcopy
 from datetime import timedelta
+from multiprocessing.pool import ThreadPool
 from sys import stdout
 from warnings import warn
 
@@ -25,11 +25,29 @@ from .elecmeter import ElecMeter, ElecMeterID
 from .electric import Electric
 from .measurement import (AC_TYPES, LEVEL_NAMES,
                           PHYSICAL_QUANTITIES_TO_AVERAGE)
-from .timeframe import split_timeframes
+from .profiling import profiled
+from .stats.correlation import CorrelationAccumulator
+from .stats.entropy import (DEFAULT_MAX_SAMPLES, check_random_state,
+                            knn_mutual_information, sample_rows)
+from .stats.totalenergy import EnergyIntegrator
+from .timeframe import TimeFrame, split_timeframes
 from .utils import (nodes_adjacent_to_root, simplest_type_for,
                     flatten_2d_list, normalise_timestamp,
                     print_on_line, convert_to_list, append_or_extend_list,
-                    most_common, capitalise_first_letter)
+                    most_common, capitalise_first_letter,
+                    offset_alias_to_seconds)
+
+
+# Number of sample periods per block of `MeterGroup._aligned_blocks`
+# unless `chunksize` is given.
+DEFAULT_BLOCK_SIZE = 100000
+
+
+def _max_sample_period(meter):
+    if isinstance(meter, MeterGroup):
+        return max(_max_sample_period(m) for m in meter.meters)
+    return meter.device['max_sample_period']
+
 
 # MeterGroupID.meters is a tuple of ElecMeterIDs.  Order doesn't matter.
 # (we can't use a set because sets aren't hashable so we can't use 
@@ -702,6 +720,7 @@ class MeterGroup(Electric):
         
         return graph, ax
 
+    @profiled()
     def load(self, **load_kwargs):
         """Returns a generator of DataFrames loaded from the DataStore.
 
@@ -749,6 +768,9 @@ class MeterGroup(Electric):
             `columns` can't be used if `ac_type` and/or `physical_quantity` are set.
         preprocessing : list of Node subclass instances
             e.g. [Clip()]
+        n_workers : int, optional
+            Number of threads used to load the meters of each chunk
+            concurrently.  Defaults to 1.  See `combine_chunks_from_generators`.
 
         Returns
         ---------
@@ -767,6 +789,7 @@ class MeterGroup(Electric):
 
         sections = load_kwargs.pop('sections', [self.get_timeframe()])
         chunksize = load_kwargs.pop('chunksize', MAX_MEM_ALLOWANCE_IN_BYTES)
+        n_workers = load_kwargs.pop('n_workers', 1)
         
         duration_threshold = chunksize * sample_period
         columns = pd.MultiIndex.from_tuples(
@@ -792,9 +815,17 @@ class MeterGroup(Electric):
                 start, section.end, tz=tz,
                 closed='left', freq=freq)
             chunk = combine_chunks_from_generators(
-                index, columns, self.meters, load_kwargs)
+                index, columns, self.meters, load_kwargs, n_workers)
             yield chunk
 
+    def build_rollups(self, periods=None, **kwargs):
+        """Calls `build_rollups` on every meter.  See
+        `ElecMeter.build_rollups`."""
+        for meter in self.all_elecmeters():
+            print_on_line("\rBuilding rollups for", meter.identifier, "...   ")
+            meter.build_rollups(periods, **kwargs)
+        print()
+
     def _convert_physical_quantity_and_ac_type_to_cols(self, ignore_missing_columns = False, **load_kwargs):
         all_columns = set()
         load_kwargs = deepcopy(load_kwargs)
@@ -926,7 +957,8 @@ class MeterGroup(Electric):
         """Returns True if any meters are site meters"""
         return any([meter.is_site_meter() for meter in self.meters])
 
-    def total_energy(self, **load_kwargs):
+    @profiled()
+    def total_energy(self, batched=False, **load_kwargs):
         """Sums together total meter_energy for each meter.
 
         Note that this function does *not* return the total aggregate
@@ -937,6 +969,10 @@ class MeterGroup(Electric):
         Parameters
         ----------
         full_results : bool, default=False
+        batched : bool, default=False
+            If True then integrate all meters together in a single pass
+            over the data (see `energy_per_meter`) instead of computing
+            and caching `total_energy` meter by meter.
         **loader_kwargs : key word arguments for DataStore.load()
 
         Returns
@@ -944,6 +980,12 @@ class MeterGroup(Electric):
         if `full_results` is True then return TotalEnergyResults object
         else return a pd.Series with a row for each AC type.
         """
+        if batched:
+            if load_kwargs.get('full_results'):
+                raise ValueError("'full_results' is not supported with"
+                                 " 'batched=True'.")
+            return (self.energy_per_meter(batched=True, **load_kwargs)
+                    .sum(axis=1, min_count=1).dropna())
         self._check_kwargs_for_full_results_and_sections(load_kwargs)
         full_results = load_kwargs.pop('full_results', False)
 
@@ -981,6 +1023,7 @@ class MeterGroup(Electric):
 
         return collected_stats
 
+    @profiled()
     def dropout_rate(self, **load_kwargs):
         """Sums together total energy for each meter.
 
@@ -1020,6 +1063,7 @@ class MeterGroup(Electric):
                                " different periods and hence"
                                " cannot be unified.")
 
+    @profiled()
     def good_sections(self, **load_kwargs):
         """Returns the intersection of the good sections of all
         contained meters.
@@ -1033,6 +1077,7 @@ class MeterGroup(Electric):
         else:
             return TimeFrameGroup()
 
+    @profiled()
     def overbasepower_sections(self, **load_kwargs):
         """Returns union of overbaseload sections for all contained meters.
         So the overall sections above baseload.
@@ -1047,13 +1092,31 @@ class MeterGroup(Electric):
         else:
             return TimeFrameGroup()
 
-    def dataframe_of_meters(self, **load_kwargs):
-        """
+    @profiled()
+    def dataframe_of_meters(self, memmap_filename=None, n_workers=1,
+                            **load_kwargs):
+        """Loads all meters into one DataFrame with a float32 column per
+        meter.
+
+        One 2-D array (time x meters) is preallocated for the requested
+        sections and sample period and each meter's column is filled in
+        place from its stream of chunks, so the chunks of different meters
+        do not need to line up.  The DataFrame is a view of that array.
+
         Parameters
         ----------
+        memmap_filename : str, optional
+            If given, the array is a `np.memmap` backed by this file, so 
+            the result may be larger than the memory.  The file is 
+            overwritten.
+        n_workers : int, optional
+            Number of threads which load meters concurrently.
         sample_period : int or float, optional
             Number of seconds to use as sample period when reindexing meters.
             If not specified then will use the max of all meters' sample_periods.
+        sections : list of TimeFrames, optional
+            Defaults to the union of the timeframes of the meters.  
+            Sections without a start or end are bounded by that union.
         resample : bool, defaults to True
             If True then resample to `sample_period`.
         **load_kwargs : 
@@ -1064,46 +1127,83 @@ class MeterGroup(Electric):
         Returns
         -------
         DataFrame
-            Each column is a meter.
+            Each column is a meter.  NaN where a meter has no sample.  The
+            index has a row per sample period of all sections.
         """
         load_kwargs.setdefault('sample_period', self.sample_period())
         load_kwargs.setdefault('ac_type', 'best')
         load_kwargs.setdefault('physical_quantity', 'power')
-        identifiers, generators = self._meter_generators(**load_kwargs)
-        segments = []
-        while True:
-            chunks = []
-            ids = []
-            for meter_id, generator in zip(identifiers, generators):
-                try:
-                    chunk_from_next_meter = next(generator)
-                except StopIteration:
-                    continue
-
-                if not chunk_from_next_meter.empty:
-                    ids.append(meter_id)
-                    chunks.append(chunk_from_next_meter.sum(axis=1))
-
-            if chunks:
-                df = pd.concat(chunks, axis=1)
-                df.columns = ids
-                segments.append(df)
-            else:
-                break
-
-        if segments:
-            return pd.concat(segments)
+        load_kwargs.setdefault('resample', True)
+        sections = load_kwargs.get('sections')
+        if sections is None:
+            sections = self._union_sections()
+        elif any(section.start is None or section.end is None
+                 for section in sections):
+            # Open-ended sections end where the data of the meters ends
+            union = self._union_sections()
+            bounded = []
+            for section in sections:
+                if section.start is None or section.end is None:
+                    if not union:
+                        continue
+                    section = section.intersection(union[0])
+                bounded.append(section)
+            sections = bounded
+        load_kwargs['sections'] = sections = [section for section in sections
+                                              if not section.empty]
+        period_ns = int(round(load_kwargs['sample_period'] * 1E9))
+        section_starts, offsets = _grid_of_sections(sections, period_ns)
+
+        n_rows, n_meters = offsets[-1], len(self.meters)
+        if memmap_filename is None:
+            values = np.empty((n_rows, n_meters), dtype=np.float32, order='F')
         else:
-            return pd.DataFrame(columns=self.identifier.meters)
-
-    def entropy_per_meter(self):
+            values = np.memmap(memmap_filename, dtype=np.float32, mode='w+',
+                               shape=(n_rows, n_meters), order='F')
+        values[:] = np.NaN
+
+        def fill(i):
+            return _fill_column(values[:, i], self.meters[i], section_starts,
+                                offsets, period_ns, load_kwargs)
+
+        empty_indexes = [index for index in _map(fill, range(n_meters), n_workers)
+                         if index is not None]
+        times = np.concatenate(
+            [start + np.arange(offsets[j + 1] - offsets[j]) * period_ns
+             for j, start in enumerate(section_starts)] or [[]])
+        index = pd.DatetimeIndex(times.astype('M8[ns]'))
+        if empty_indexes and empty_indexes[0].tz is not None:
+            index = index.tz_localize('UTC').tz_convert(empty_indexes[0].tz)
+        # A 2-D array in column-major order becomes a single block 
+        # without copying
+        return pd.DataFrame(values, index=index, copy=False,
+                            columns=[meter.identifier for meter in self.meters])
+
+    @profiled()
+    def entropy_per_meter(self, k=3, base=2, max_samples=DEFAULT_MAX_SAMPLES,
+                          random_state=None, n_workers=1, **load_kwargs):
         """Finds the entropy of each meter in this MeterGroup.
 
+        Parameters
+        ----------
+        k, base, max_samples, random_state : see `Electric.entropy`
+        n_workers : int, optional
+            Number of threads which load and evaluate meters concurrently.
+        **load_kwargs : passed to `Electric.entropy`
+
         Returns
         -------
         pd.Series of entropy
         """
-        return self.call_method_on_all_meters('entropy')
+        seeds = _seeds(random_state, len(self.meters))
+
+        def entropy(i):
+            return self.meters[i].entropy(
+                k=k, base=base, max_samples=max_samples,
+                random_state=seeds[i], **deepcopy(load_kwargs))
+
+        entropies = _map(entropy, range(len(self.meters)), n_workers)
+        return pd.Series(entropies, index=list(self.identifier.meters))
 
     def call_method_on_all_meters(self, method):
         """Calls `method` on each element in `self.meters`.
@@ -1153,29 +1253,98 @@ class MeterGroup(Electric):
                     result[id_i][id_j] = getattr(m_i, method)(m_j)
         return result
 
-    def pairwise_mutual_information(self):
+    @profiled()
+    def pairwise_mutual_information(self, k=3, base=2,
+                                    max_samples=DEFAULT_MAX_SAMPLES,
+                                    random_state=None, n_workers=1,
+                                    **load_kwargs):
         """
         Finds the pairwise mutual information among different 
         meters in a MeterGroup.
 
+        All meters are loaded once, in blocks of `chunksize` sample 
+        periods, resampled to a common sample period.  At most about 
+        twice `max_samples` randomly chosen timestamps are kept in memory, 
+        from which the mutual information of each pair is estimated, see 
+        `nilmtk.stats.entropy.knn_mutual_information`.
+
+        Parameters
+        ----------
+        k, base, max_samples, random_state : see `Electric.entropy`
+        n_workers : int, optional
+            Number of threads which evaluate pairs concurrently.
+        sample_period : int or float, optional
+            Defaults to the max of all meters' sample periods.
+        chunksize : int, optional
+            Number of sample periods per block.  Defaults to 
+            DEFAULT_BLOCK_SIZE.
+        **load_kwargs : passed to `ElecMeter.load`, e.g. `sections`.
+
         Returns
         -------
         pd.DataFrame of mutual information between
         pair of ElecMeters.
         """
-        return self.pairwise('mutual_information')
+        load_kwargs.setdefault('sample_period', self.sample_period())
+        load_kwargs.setdefault('ac_type', 'best')
+        rng = check_random_state(random_state)
+        n_meters = len(self.meters)
+        samples = sample_rows(
+            (block.values for block in self._aligned_blocks(**load_kwargs)),
+            max_samples, self._expected_n_rows(load_kwargs), rng,
+            n_columns=n_meters)
+        pairs = [(i, j) for i in range(n_meters) for j in range(i, n_meters)]
+        seeds = _seeds(rng, len(pairs))
+
+        def mutual_information(pair_index):
+            i, j = pairs[pair_index]
+            return knn_mutual_information(
+                samples[:, i], samples[:, j], k=k, base=base,
+                max_samples=max_samples, random_state=seeds[pair_index])
+
+        result = np.empty((n_meters, n_meters))
+        values = _map(mutual_information, range(len(pairs)), n_workers)
+        for (i, j), value in zip(pairs, values):
+            result[i, j] = result[j, i] = value
+        meter_identifiers = list(self.identifier.meters)
+        return pd.DataFrame(result, index=meter_identifiers,
+                            columns=meter_identifiers)
 
-    def pairwise_correlation(self):
+    @profiled()
+    def pairwise_correlation(self, **load_kwargs):
         """
         Finds the pairwise correlation among different 
         meters in a MeterGroup.
 
+        All meters are loaded once, resampled to a common sample period 
+        and correlated in a single pass with a `CorrelationAccumulator`, 
+        instead of loading both meters of every pair several times.
+        Only one block of all meters is in memory at a time.
+
+        Parameters
+        ----------
+        sample_period : int or float, optional
+            Defaults to the max of all meters' sample periods.
+        ac_type : str, defaults to 'best'
+        chunksize : int, optional
+            Number of sample periods per block.  Defaults to 
+            DEFAULT_BLOCK_SIZE.
+        **load_kwargs : passed to `ElecMeter.load`, e.g. `sections`.
+
         Returns
         -------
         pd.DataFrame of correlation between pair of ElecMeters.
         """
-        return self.pairwise('correlation')
+        load_kwargs.setdefault('sample_period', self.sample_period())
+        load_kwargs.setdefault('ac_type', 'best')
+        accumulator = CorrelationAccumulator(len(self.meters))
+        for block in self._aligned_blocks(**load_kwargs):
+            accumulator.update(block.values)
+        meter_identifiers = list(self.identifier.meters)
+        return pd.DataFrame(accumulator.correlation(),
+                            index=meter_identifiers, columns=meter_identifiers)
 
+    @profiled()
     def proportion_of_energy_submetered(self, **load_kwargs):
         """
         Returns
@@ -1228,8 +1397,10 @@ class MeterGroup(Electric):
                                for meter in self.meters]
         return list(set(flatten_2d_list(all_physical_quants)))
 
+    @profiled()
     def energy_per_meter(self, per_period=None, mains=None, 
-                         use_meter_labels=False, **load_kwargs):
+                         use_meter_labels=False, batched=False,
+                         **load_kwargs):
         """Returns pd.DataFrame where columns is meter.identifier and 
         each value is total energy.  Index is AC types.
 
@@ -1252,6 +1423,12 @@ class MeterGroup(Electric):
             If not None then will return a Series including a 'remainder'
             row which will be `mains.total_energy() - energy_per_meter.sum()`
             and an attempt will be made to use the correct AC_TYPE.
+        batched : bool
+            If True then load all meters section by section and integrate
+            their power together with a single `EnergyIntegrator`, instead
+            of calling `total_energy` on each meter.  Faster for many
+            meters, but nothing is cached.  With `per_period` the energy
+            is averaged over each meter's whole timeframe.
 
         Returns
         -------
@@ -1261,16 +1438,20 @@ class MeterGroup(Electric):
         energy_per_meter = pd.DataFrame(columns=meter_identifiers, index=AC_TYPES)
         n_meters = len(self.meters)
         load_kwargs.setdefault('ac_type', 'best')
-        for i, meter in enumerate(self.meters):
-            print('\r{:d}/{:d} {}'.format(i+1, n_meters, meter), end='')
-            stdout.flush()
-            if per_period is None:
-                meter_energy = meter.total_energy(**load_kwargs)
-            else:
-                load_kwargs.setdefault('use_uptime', False)
-                meter_energy = meter.average_energy_per_period(
-                    offset_alias=per_period, **load_kwargs)
-            energy_per_meter[meter.identifier] = meter_energy
+        if batched:
+            self._fill_energy_per_meter_batched(energy_per_meter, per_period,
+                                                **load_kwargs)
+        else:
+            for i, meter in enumerate(self.meters):
+                print('\r{:d}/{:d} {}'.format(i+1, n_meters, meter), end='')
+                stdout.flush()
+                if per_period is None:
+                    meter_energy = meter.total_energy(**load_kwargs)
+                else:
+                    load_kwargs.setdefault('use_uptime', False)
+                    meter_energy = meter.average_energy_per_period(
+                        offset_alias=per_period, **load_kwargs)
+                energy_per_meter[meter.identifier] = meter_energy
 
         energy_per_meters = energy_per_meter.dropna(how='all')
 
@@ -1283,6 +1464,121 @@ class MeterGroup(Electric):
 
         return energy_per_meter
 
+    def _fill_energy_per_meter_batched(self, energy_per_meter, per_period,
+                                       **load_kwargs):
+        energy, ac_types = self._batched_energy(**load_kwargs)
+        for i, meter in enumerate(self.meters):
+            if ac_types[i] is None:
+                continue
+            meter_energy = energy[i]
+            if per_period is not None:
+                td = meter.get_timeframe().timedelta
+                meter_energy /= (td.total_seconds() /
+                                 offset_alias_to_seconds(per_period))
+            energy_per_meter.loc[ac_types[i], meter.identifier] = meter_energy
+
+    @profiled()
+    def energy_per_period(self, per_period='D', **load_kwargs):
+        """Returns the energy of each meter in each period, computed in
+        a single pass over all meters.
+
+        Parameters
+        ----------
+        per_period : str, default='D'
+            A Pandas offset alias.  Periods follow the wall clock of
+            the meters' timezone.
+        **load_kwargs : key word arguments for DataStore.load()
+            e.g. 'ac_type' (defaults to 'best'), 'sections' or 'chunksize'.
+
+        Returns
+        -------
+        pd.DataFrame
+            Index is the start of each period, columns are
+            meter.identifier.  Values are energy in kWh.
+        """
+        load_kwargs.setdefault('ac_type', 'best')
+        energy, _ = self._batched_energy(per_period=per_period, **load_kwargs)
+        energy.columns = list(self.identifier.meters)
+        return energy
+
+    def _batched_energy(self, per_period=None, **load_kwargs):
+        """Integrates the power of all meters with one `EnergyIntegrator`.
+
+        The meters are loaded section by section and joined into a single
+        DataFrame with a column per meter, so that every meter is
+        integrated with its own max_sample_period but in the same pass.
+
+        Returns
+        -------
+        energy : pd.Series or pd.DataFrame
+            Energy in kWh, indexed (or with columns) by the position of the
+            meter in `self.meters`.  A DataFrame per period if `per_period`.
+        ac_types : list
+            The AC type which was loaded for each meter, None if the meter
+            has no power data.
+        """
+        n_meters = len(self.meters)
+        max_sample_periods = [_max_sample_period(meter) for meter in self.meters]
+        integrator = EnergyIntegrator(max_sample_periods, per_period=per_period,
+                                      columns=range(n_meters))
+        ac_types = [None] * n_meters
+        for block in self._aligned_blocks(ac_types, **load_kwargs):
+            integrator.update(block.index, block.values)
+        return integrator.energy(), ac_types
+
+    def _aligned_blocks(self, ac_types=None, **load_kwargs):
+        """Loads the power of all meters section by section and yields 
+        a DataFrame per section with a column per meter, labelled by the 
+        position of the meter in `self.meters`.  Each block is loaded 
+        with a separate `ElecMeter.load` per meter.
+
+        Parameters
+        ----------
+        ac_types : list, optional
+            Receives the AC type which was loaded for each meter.
+        **load_kwargs : passed to `ElecMeter.load`.  `sections` defaults
+            to the union of the timeframes of the meters.  Sections are
+            split into blocks of at most `chunksize` sample periods 
+            (defaults to DEFAULT_BLOCK_SIZE), so that only one block of 
+            all meters is in memory at a time.
+        """
+        load_kwargs['physical_quantity'] = 'power'
+        chunksize = load_kwargs.pop('chunksize', DEFAULT_BLOCK_SIZE)
+        sections = load_kwargs.pop('sections', None)
+        if sections is None:
+            sections = self._union_sections()
+        sample_period = load_kwargs.get('sample_period') or self.sample_period()
+        if chunksize and sample_period:
+            sections = _split_into_blocks(
+                sections, pd.Timedelta(seconds=chunksize * sample_period))
+
+        n_meters = len(self.meters)
+        for section in sections:
+            if section.empty:
+                continue
+            block = []
+            for i, meter in enumerate(self.meters):
+                chunks = [chunk for chunk in meter.load(
+                    sections=[section], **deepcopy(load_kwargs))
+                    if not chunk.empty]
+                if not chunks:
+                    continue
+                chunk = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+                if ac_types is not None:
+                    ac_types[i] = chunk.columns[0][1]
+                block.append(chunk.iloc[:, 0].rename(i))
+            if block:
+                yield pd.concat(block, axis=1).reindex(columns=range(n_meters))
+
+    def _union_sections(self):
+        """Returns a list with the union of the timeframes of the meters,
+        including the last sample, or an empty list if there is no data."""
+        timeframe = self.get_timeframe(intersection_instead_union=False)
+        if timeframe is None or timeframe.start is None or timeframe.end is None:
+            return []
+        # The end of the timeframe is the last sample, include it
+        return [TimeFrame(timeframe.start, timeframe.end + pd.Timedelta(1, 'ns'))]
+
     def _energy_per_meter_with_remainder(self, energy_per_meter,
                                          mains, per_period, **load_kwargs):
         ac_types = energy_per_meter.keys()
@@ -1333,6 +1629,7 @@ class MeterGroup(Electric):
         prop_per_meter.sort_values(inplace=True, ascending=False)
         return prop_per_meter
 
+    @profiled()
     def train_test_split(self, train_fraction=0.5):
         """
         This function returns the timestamp which is advisable for splitting the load profile
@@ -1411,6 +1708,7 @@ class MeterGroup(Electric):
     # def on_off_events(self, minimum_state_duration):
     #     raise NotImplementedError
 
+    @profiled()
     def select_top_k(self, k=5, by="energy", asc=False, group_remainder=False, **load_kwargs):
         """Only select the top K meters, according to energy.
 
@@ -1916,15 +2214,35 @@ def iterate_through_submeters_of_two_metergroups(master, slave):
     return zipped
 
 
-def combine_chunks_from_generators(index, columns, meters, load_kwargs):
+def combine_chunks_from_generators(index, columns, meters, load_kwargs,
+                                   n_workers=1):
     """Combines chunks into a single DataFrame.
 
     Adds or averages columns, depending on whether each column is in
     PHYSICAL_QUANTITIES_TO_AVERAGE.
 
+    Parameters
+    ----------
+    index : pd.DatetimeIndex
+    columns : pd.MultiIndex
+    meters : list of ElecMeters
+    load_kwargs : dict, passed to each `meter.load()`
+    n_workers : int, optional
+        Number of threads which load and reindex meters concurrently.
+        Defaults to 1, i.e. load one meter after the other.  The
+        results are always added up in the order of `meters`, so the
+        output does not depend on `n_workers`.
+
     Returns
     -------
     DataFrame
+
+    Notes
+    -----
+    Threads pay off when the stores release the GIL during loading (e.g.
+    decompression, memory-mapped files) and for the resampling done
+    in `ElecMeter.load`.  Meters sharing one `HDFDataStore` are read one
+    at a time, because PyTables access is serialised by the store.
     """
     # Regarding columns (e.g. voltage) that we need to average:
     # The approach is that we first add everything together
@@ -1945,75 +2263,204 @@ def combine_chunks_from_generators(index, columns, meters, load_kwargs):
     columns_to_average_counter = pd.DataFrame(dtype=np.uint16)
     timeframe = None
 
-    # Go through each generator to try sum values together
-    for meter in meters:
-        # Load the data
+    # Go through each meter's chunk to sum values together
+    for meter, loaded in _load_aligned_chunks(index, columns, meters,
+                                              load_kwargs, n_workers):
         print_on_line("\rLoading data for meter", meter.identifier, "    ")
-        load_kwargs_copy = deepcopy(load_kwargs)
-        generator = meter.load(**load_kwargs_copy)
-        try:
-            chunk_from_next_meter = next(generator)
-        except StopIteration:
-            continue
-
-        del generator
-        del load_kwargs_copy
-        gc.collect()
-
-        if chunk_from_next_meter.empty or not chunk_from_next_meter.timeframe:
+        if loaded is None:
             continue
+        chunk_timeframe, chunk_index, aligned_columns, columns_to_average = loaded
 
         if timeframe is None:
-            timeframe = chunk_from_next_meter.timeframe
+            timeframe = chunk_timeframe
         else:
-            timeframe = timeframe.union(chunk_from_next_meter.timeframe)
+            timeframe = timeframe.union(chunk_timeframe)
 
         # Add (in-place)
-        for i, column_name in enumerate(columns):
-            try:
-                column = chunk_from_next_meter[column_name]
-            except KeyError:
-                continue
-
-            aligned = column.reindex(index, copy=False).values.astype('float32')
-            del column
+        for i, aligned in aligned_columns:
             cumulator_col = cumulator_arr[:,i] # Call by reference
             where_both_are_nan = np.isnan(cumulator_col) & np.isnan(aligned)
-            np.nansum([cumulator_col, aligned], axis=0, out=cumulator_col,  # HIER IN DER FUNKTION WIRD ADDIERT UND DIE SPALTE GESETZT 
+            np.nansum([cumulator_col, aligned], axis=0, out=cumulator_col,
                       dtype=DTYPE)
             cumulator_col[where_both_are_nan] = np.NaN
-            del aligned
-            del where_both_are_nan
-            gc.collect()
 
         # Update columns_to_average_counter - this is necessary so we do not
         # add up columns like 'voltage' which should be averaged.
-        physical_quantities = chunk_from_next_meter.columns.get_level_values('physical_quantity')
-        columns_to_average = (set(PHYSICAL_QUANTITIES_TO_AVERAGE)
-                              .intersection(physical_quantities))
         if columns_to_average:
             counter_increment = pd.DataFrame(1, columns=columns_to_average, 
                                              dtype=np.uint16,
-                                             index=chunk_from_next_meter.index)
+                                             index=chunk_index)
             columns_to_average_counter = columns_to_average_counter.add(
                 counter_increment, fill_value=0)
-            del counter_increment
-
-        del chunk_from_next_meter
-        gc.collect()
 
     del cumulator_arr
-    gc.collect()
 
     # Create mean values by dividing any columns which need dividing
     for column in columns_to_average_counter:
         cumulator[column] /= columns_to_average_counter[column]
 
-    del columns_to_average_counter
-    gc.collect()
     print("Done loading data all meters for this chunk.")
     cumulator.timeframe = timeframe
     return cumulator
 
 
+def _grid_of_sections(sections, period_ns):
+    """Returns the first row time of each section, in ns, and the offsets 
+    of the rows of each section, which end with the total number of rows.
+    Like the bins of resampling, rows are aligned to multiples of 
+    `period_ns` counted from midnight of the day the section starts."""
+    starts = np.array([_floor_from_midnight(section.start, period_ns)
+                       for section in sections], dtype=np.int64)
+    ends = np.array([section.end.value for section in sections], dtype=np.int64)
+    n_rows = np.maximum(-((starts - ends) // period_ns), 0)
+    return starts, np.concatenate([[0], np.cumsum(n_rows)])
+
+
+def _split_into_blocks(sections, block_duration):
+    """Splits each section at the multiples of `block_duration` (a 
+    pd.Timedelta) counted from midnight of the day the section starts.
+    Resampling bins start at midnight as well, so for sample periods 
+    which divide a day no bin is split between two blocks.  Sections 
+    without a start or end are not split."""
+    for section in sections:
+        if section.empty or section.start is None or section.end is None:
+            yield section
+            continue
+        origin = section.start.normalize()
+        n_blocks_before = (section.start - origin) // block_duration
+        boundary = origin + (n_blocks_before + 1) * block_duration
+        start = section.start
+        while boundary < section.end:
+            yield TimeFrame(start, boundary)
+            start = boundary
+            boundary = boundary + block_duration
+        block = TimeFrame(section)
+        block.start = start
+        yield block
+
+
+def _fill_column(column, meter, section_starts, offsets, period_ns,
+                 load_kwargs):
+    """Writes the samples of `meter` into the rows of `column` which cover
+    their time, see `_grid_of_sections`.  Returns an empty index with the
+    time zone of the meter or None if it has no data."""
+    empty_index = None
+    for chunk in meter.load(**deepcopy(load_kwargs)):
+        if chunk.empty:
+            continue
+        empty_index = chunk.index[:0]
+        times = chunk.index.asi8
+        sections = np.searchsorted(section_starts, times, side='right') - 1
+        in_section = sections >= 0
+        sections = np.maximum(sections, 0)
+        rows = offsets[sections] + (times - section_starts[sections]) // period_ns
+        chunk_values = chunk.sum(axis=1, min_count=1).values
+        # Chunks resampled separately may both have a row for the period 
+        # at their boundary, the one without data must not overwrite it
+        keep = in_section & (rows < offsets[sections + 1]) & ~np.isnan(chunk_values)
+        column[rows[keep]] = chunk_values[keep]
+    return empty_index
+
+
+def _floor_from_midnight(timestamp, period_ns):
+    origin = timestamp.normalize().value
+    return origin + (timestamp.value - origin) // period_ns * period_ns
+
+
+def _map(func, items, n_workers):
+    """Returns `[func(item) for item in items]`, evaluated by up to 
+    `n_workers` threads."""
+    n_workers = max(int(n_workers), 1)
+    items = list(items)
+    if n_workers == 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    pool = ThreadPool(min(n_workers, len(items)))
+    try:
+        return pool.map(func, items)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _seeds(random_state, n):
+    """Returns `n` seeds drawn from `random_state`, so that results do not
+    depend on the order in which threads evaluate them."""
+    return check_random_state(random_state).randint(np.iinfo(np.int32).max, size=n)
+
+
+def _load_aligned_chunks(index, columns, meters, load_kwargs, n_workers):
+    """Yields (meter, result of `_load_aligned_chunk`) in the order of
+    `meters`.  If `n_workers > 1` then up to `n_workers` meters are loaded
+    concurrently.  At most `2 * n_workers` results are kept in memory.
+    """
+    n_workers = max(int(n_workers), 1)
+    if n_workers == 1 or len(meters) <= 1:
+        for meter in meters:
+            yield meter, _load_aligned_chunk(meter, index, columns, load_kwargs)
+        return
+
+    pool = ThreadPool(n_workers)
+    try:
+        pending = deque()
+        meters_iter = iter(meters)
+        for meter in meters_iter:
+            pending.append((meter, pool.apply_async(
+                _load_aligned_chunk, (meter, index, columns, load_kwargs))))
+            if len(pending) >= 2 * n_workers:
+                break
+        while pending:
+            meter, async_result = pending.popleft()
+            loaded = async_result.get()
+            for next_meter in meters_iter:
+                pending.append((next_meter, pool.apply_async(
+                    _load_aligned_chunk,
+                    (next_meter, index, columns, load_kwargs))))
+                break
+            yield meter, loaded
+            del loaded
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _load_aligned_chunk(meter, index, columns, load_kwargs):
+    """Loads the first chunk of `meter` and reindexes it onto `index`.
+
+    Returns
+    -------
+    None if the meter has no data, else a tuple of
+        timeframe : TimeFrame of the chunk
+        chunk_index : the index of the loaded chunk
+        aligned_columns : list of (position in `columns`, float32 array)
+        columns_to_average : set of the physical quantities which are
+            in PHYSICAL_QUANTITIES_TO_AVERAGE
+    """
+    generator = meter.load(**deepcopy(load_kwargs))
+    try:
+        chunk = next(generator)
+    except StopIteration:
+        return None
+    finally:
+        close = getattr(generator, 'close', None)
+        if close is not None:
+            close()
+
+    if chunk.empty or not chunk.timeframe:
+        return None
+
+    aligned_columns = []
+    for i, column_name in enumerate(columns):
+        try:
+            column = chunk[column_name]
+        except KeyError:
+            continue
+        aligned = column.reindex(index, copy=False).values.astype(np.float32)
+        aligned_columns.append((i, aligned))
+
+    physical_quantities = chunk.columns.get_level_values('physical_quantity')
+    columns_to_average = (set(PHYSICAL_QUANTITIES_TO_AVERAGE)
+                          .intersection(physical_quantities))
+    return chunk.timeframe, chunk.index, aligned_columns, columns_to_average
+
+
 meter_sorting_key = lambda meter: meter.instance()
\ No newline at end of file
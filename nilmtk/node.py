@@ -1,8 +1,9 @@
 from copy import deepcopy
-from six import iteritems
+from six import iteritems, with_metaclass
 from nilm_metadata import recursively_update_dict
+from .profiling import NodeMeta
 
-class Node(object):
+class Node(with_metaclass(NodeMeta, object)):
     """Abstract class defining interface for all Node subclasses,
     where a 'node' is a module which runs pre-processing or statistics
     (or, later, maybe NILM training or disaggregation).
@@ -14,6 +15,8 @@ class Node(object):
     postconditions : 
     results_class : The correspoinding result class for this node.
     upstream:       The node that streams its data into this node (the source of this node's incoming data)
+
+    `process` of every subclass is instrumented by `nilmtk.profiling`.
     See Also
     --------
     results
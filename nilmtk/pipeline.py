@@ -0,0 +1,270 @@
+from __future__ import print_function, division
+import threading
+from collections import OrderedDict, deque
+from six.moves import queue
+from .node import Node
+
+# Marks the end of the chunks in a branch queue
+_END = object()
+# Seconds after which blocked threads check whether the pipeline aborted
+_POLL_SECONDS = 0.1
+
+
+class Pipeline(object):
+    """Runs a directed acyclic graph of nodes on the chunks of one source.
+
+    A linear chain of nodes (`TotalEnergy(Clip(meter.get_source_node()))`)
+    pulls each chunk through all its nodes.  To compute several
+    independent stats the source had to be loaded once per chain.  A
+    Pipeline instead tees the chunks of a node into several branches:
+    every downstream node of the branch sees the same chunk objects,
+    which are not copied unless a branch asks for it.
+
+    The nodes themselves are normal `Node` subclasses.  They are
+    constructed by `add` with a `Branch` as their upstream, which looks
+    like the upstream node to them.
+
+    Parameters
+    ----------
+    source : Node
+        Usually `meter.get_source_node(**loader_kwargs)`.
+
+    Examples
+    --------
+    >>> pipeline = Pipeline(meter.get_source_node())
+    >>> good_sections = pipeline.add(GoodSections)
+    >>> energy = pipeline.add(TotalEnergy, upstream=pipeline.add(Clip))
+    >>> results = pipeline.run(threads=True, max_queue_size=4)
+    >>> results[energy]
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.nodes = [source]
+        self._branches = OrderedDict([(source, [])])
+        self._upstream = {}
+
+    def add(self, node_class, upstream=None, copy=False, **kwargs):
+        """Adds a node downstream of `upstream`.
+
+        Parameters
+        ----------
+        node_class : Node subclass
+            Constructed as `node_class(branch, **kwargs)`.
+        upstream : Node, optional
+            A node of this pipeline.  Defaults to the source.
+        copy : bool, default=False
+            If True then the node gets a copy of each chunk.  Required for
+            nodes which modify chunks in place (e.g. `Clip`) while other
+            branches of the same upstream run in other threads, or are
+            added after it.
+
+        Returns
+        -------
+        The new node.
+        """
+        upstream = self.source if upstream is None else upstream
+        if upstream not in self._branches:
+            raise ValueError("{} is not a node of this pipeline.".format(upstream))
+        branch = Branch(upstream, copy=copy)
+        node = node_class(branch, **kwargs)
+        self._branches[upstream].append(branch)
+        self._branches[node] = []
+        self._upstream[node] = branch
+        self.nodes.append(node)
+        return node
+
+    def leaves(self):
+        """Returns the nodes without downstream nodes."""
+        return [node for node in self.nodes if not self._branches[node]]
+
+    def run(self, threads=False, max_queue_size=2):
+        """Pushes all chunks of the source through the graph.
+
+        Without threads, the branches of a node take turns: each branch
+        processes one chunk, then the next branch does.  A chunk is only
+        kept until all branches have processed it, as long as each node
+        yields one chunk per chunk it reads.
+
+        With threads, every branch runs in its own thread.  A node's
+        chunks are put into a bounded queue per branch, so a fast branch
+        is at most `max_queue_size` chunks ahead of the slowest one.
+
+        Parameters
+        ----------
+        threads : bool, default=False
+        max_queue_size : int, default=2
+            Only used with `threads`.
+
+        Returns
+        -------
+        OrderedDict which maps each node to its `results`.
+        """
+        if threads:
+            self._run_threads(max_queue_size)
+        else:
+            for _ in self._round_robin(self.source):
+                pass
+        return OrderedDict((node, node.results) for node in self.nodes)
+
+    def _chain_end(self, branch):
+        """Follows nodes with a single branch from `branch` down to the
+        first node which is a leaf or fans out."""
+        node = self._node_of(branch)
+        while len(self._branches[node]) == 1:
+            node = self._node_of(self._branches[node][0])
+        return node
+
+    def _node_of(self, branch):
+        for node, node_branch in self._upstream.items():
+            if node_branch is branch:
+                return node
+
+    #region SINGLE THREADED
+    def _round_robin(self, node):
+        """Generator which advances all branches below `node` in turns."""
+        branches = self._branches[node]
+        if not branches:
+            for chunk in node.process():
+                yield chunk
+            return
+        tee = _Tee(node.process(), branches)
+        consumers = deque(self._round_robin(self._chain_end(branch))
+                          for branch in branches)
+        for branch in branches:
+            branch._tee, branch._queue = tee, None
+        while consumers:
+            consumer = consumers.popleft()
+            try:
+                next(consumer)
+            except StopIteration:
+                continue
+            consumers.append(consumer)
+            yield
+    #endregion
+
+    #region THREADED
+    def _run_threads(self, max_queue_size):
+        self._abort = threading.Event()
+        self._errors = []
+        threads = []
+        self._start_branch_threads(self.source, max_queue_size, threads)
+        self._drive(self.source)
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+    def _start_branch_threads(self, node, max_queue_size, threads):
+        for branch in self._branches[node]:
+            branch._queue = queue.Queue(maxsize=max_queue_size)
+            branch._abort = self._abort
+            branch._ended = False
+            end = self._chain_end(branch)
+            self._start_branch_threads(end, max_queue_size, threads)
+            thread = threading.Thread(target=self._drive, args=(end, branch))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+    def _drive(self, node, upstream_branch=None):
+        """Pulls the chunks of `node` and puts them into its branches.
+        Runs in the thread of `upstream_branch`, the start of the chain
+        which ends at `node`."""
+        branches = self._branches[node]
+        try:
+            for chunk in node.process():
+                for branch in branches:
+                    if not _put(branch._queue, chunk, self._abort):
+                        return
+        except Exception as e:
+            self._errors.append(e)
+            self._abort.set()
+        finally:
+            for branch in branches:
+                _put(branch._queue, _END, self._abort)
+            if upstream_branch is not None and not upstream_branch._ended:
+                # Don't block the upstream if the chain stopped early
+                for _ in upstream_branch._iterate_queue():
+                    pass
+    #endregion
+
+
+class Branch(Node):
+    """The upstream of a node in a `Pipeline`.
+
+    Forwards the metadata and results of the upstream node and yields the
+    chunks which the pipeline tees into it.
+    """
+
+    def __init__(self, upstream, copy=False):
+        self.copy = copy
+        self._tee = None
+        self._queue = None
+        self._abort = None
+        self._ended = False
+        super(Branch, self).__init__(upstream)
+
+    def process(self):
+        if self._queue is not None:
+            chunks = self._iterate_queue()
+        else:
+            chunks = self._tee.iterate(self)
+        for chunk in chunks:
+            yield _copy_chunk(chunk) if self.copy else chunk
+
+    def _iterate_queue(self):
+        while not self._abort.is_set():
+            try:
+                chunk = self._queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if chunk is _END:
+                self._ended = True
+                return
+            yield chunk
+
+    def dry_run_metadata(self):
+        return self.upstream.dry_run_metadata()
+
+    def get_metadata(self):
+        return self.upstream.get_metadata()
+
+
+class _Tee(object):
+    """Hands the chunks of one generator to several branches, reading the
+    next chunk when the first branch asks for it."""
+
+    def __init__(self, generator, branches):
+        self.generator = generator
+        self.buffers = dict((id(branch), deque()) for branch in branches)
+
+    def iterate(self, branch):
+        buffer = self.buffers[id(branch)]
+        while True:
+            if not buffer:
+                try:
+                    chunk = next(self.generator)
+                except StopIteration:
+                    return
+                for other in self.buffers.values():
+                    other.append(chunk)
+            yield buffer.popleft()
+
+
+def _put(chunk_queue, chunk, abort):
+    while not abort.is_set():
+        try:
+            chunk_queue.put(chunk, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _copy_chunk(chunk):
+    copied = chunk.copy()
+    for attribute in ['timeframe', 'look_ahead']:
+        if hasattr(chunk, attribute):
+            setattr(copied, attribute, getattr(chunk, attribute))
+    return copied
@@ -0,0 +1,295 @@
+from __future__ import print_function, division
+import os
+from collections import OrderedDict
+from datetime import datetime
+from multiprocessing import get_context, cpu_count
+from time import time
+import numpy as np
+import pandas as pd
+from six import iteritems
+from .datastore import HDFDataStore
+from .statcache import StatCache, get_stat_cache
+
+JOB_COLUMNS = ['dataset', 'building', 'meter', 'key', 'status', 'seconds',
+               'n_rows', 'rows_per_second', 'error', 'finished']
+JOB_DTYPES = {'dataset': str, 'building': np.int64, 'meter': np.int64,
+              'key': str, 'status': str, 'seconds': np.float64,
+              'n_rows': np.int64, 'rows_per_second': np.float64,
+              'error': str, 'finished': 'datetime64[ns]'}
+DEFAULT_STATS = ['good_sections', 'nonzero_sections']
+
+# Datasets opened read-only by this process, see `_get_dataset`
+_opened_datasets = {}
+# Datasets passed in by the caller of `precompute_stats`
+_given_datasets = {}
+
+
+def precompute_stats(datasets, stats=None, n_workers=None, journal=None,
+                     ignore_meters=None, copy_to_datasets=True, verbose=True,
+                     **load_kwargs):
+    """Computes and caches the stats of all meters of `datasets` with a
+    pool of worker processes.
+
+    The meters are the work items.  Each worker opens the datasets
+    read-only and computes all `stats` of a meter in a single pass (see
+    `ElecMeter.compute_stats`).  The computed stats are sent back to this
+    process, the only one which writes.  It puts them into the StatCache
+    of the `journal` and records the job together with its timing.  When
+    a run is interrupted, the next run with the same journal skips the
+    meters which are done already.  Finally the stats are copied from the
+    journal into the caches of the datasets, at which point no worker
+    reads them any more.
+
+    Parameters
+    ----------
+    datasets : str, nilmtk.DataSet or list of these
+        Paths of HDF datasets or datasets opened by the caller.
+    stats : list of str, optional
+        Names of the stats, see `nilmtk.elecmeter.FUSABLE_STATS`.
+        Defaults to `DEFAULT_STATS`.
+    n_workers : int, optional
+        Number of worker processes.  Defaults to the number of CPUs.
+        With 1 the meters are processed in this process.
+    journal : str, optional
+        Path of the HDF file holding the journal.  Defaults to
+        '<first dataset>_precompute.h5'.  It can also be used as
+        a sidecar cache: `dataset.set_stat_cache(StatCache(HDFDataStore(journal)))`
+    ignore_meters : list of str, optional
+        `original_name`s of buildings which are skipped, as in
+        `DataSet.calc_and_cache_stats`.
+    copy_to_datasets : bool, optional
+        If False the stats are only kept in the journal.  Datasets which
+        are passed in opened read-only need a stat cache of their own
+        (see `DataSet.set_stat_cache`), otherwise a ValueError is raised
+        before any stats are computed.
+    verbose : bool, optional
+        If True print the progress.
+    **load_kwargs : passed to `ElecMeter.compute_stats`, e.g. `chunksize`.
+
+    Returns
+    -------
+    pd.DataFrame with one row per meter and the columns in `JOB_COLUMNS`,
+    including the meters done by previous runs.
+    """
+    if not isinstance(datasets, list):
+        datasets = [datasets]
+    stats = list(DEFAULT_STATS if stats is None else stats)
+    paths = [_dataset_path(dataset) for dataset in datasets]
+    if copy_to_datasets:
+        for dataset in datasets:
+            if not isinstance(dataset, str):
+                _check_cache_is_writable(dataset)
+    if journal is None:
+        journal = os.path.splitext(paths[0])[0] + '_precompute.h5'
+    if n_workers is None:
+        n_workers = cpu_count()
+    load_kwargs.setdefault('chunksize', 100000000)
+
+    journal_store = HDFDataStore(journal, 'a' if os.path.isfile(journal) else 'w')
+    try:
+        for path, dataset in zip(paths, datasets):
+            if not isinstance(dataset, str):
+                _given_datasets[path] = dataset
+        journal_cache = StatCache(journal_store)
+        jobs = _load_jobs(journal_store)
+        done = jobs[jobs['status'] == 'done']
+        done = set(zip(done['dataset'], done['building'], done['meter']))
+        items = [(path, building, meter, stats, load_kwargs)
+                 for path in paths
+                 for building, meter in _work_items(path, ignore_meters)
+                 if (path, building, meter) not in done]
+        if verbose:
+            print("Precompute {} of {} meters with {} workers".format(
+                len(items), len(items) + len(done), n_workers))
+
+        for i, result in enumerate(_run(items, n_workers, paths)):
+            for entry in result.pop('entries'):
+                journal_cache.put(*entry)
+            same_job = ((jobs['dataset'] == result['dataset']) &
+                        (jobs['building'] == result['building']) &
+                        (jobs['meter'] == result['meter']))
+            jobs = pd.concat([jobs[~same_job],
+                              pd.DataFrame([result], columns=JOB_COLUMNS)],
+                             ignore_index=True).astype(JOB_DTYPES)
+            journal_store.put('/jobs', jobs, fixed=True)
+            if verbose:
+                _print_progress(i + 1, len(items), result)
+
+        _close_opened_datasets()
+        if copy_to_datasets:
+            _copy_to_datasets(journal_cache, jobs, paths)
+    finally:
+        _close_opened_datasets()
+        _given_datasets.clear()
+        journal_store.close()
+    return jobs
+
+
+def _run(items, n_workers, paths):
+    """Yields the results of `_compute_meter` for `items`, in the order in
+    which they finish."""
+    if n_workers <= 1 or len(items) <= 1:
+        for item in items:
+            yield _compute_meter(item)
+        return
+
+    # The workers open the datasets themselves
+    _close_opened_datasets()
+    for dataset in _given_datasets.values():
+        dataset.store.flush()
+    # Forked workers would share the HDF5 state of this process
+    pool = get_context('spawn').Pool(min(n_workers, len(items)),
+                                     initializer=_init_worker)
+    try:
+        for result in pool.imap_unordered(_compute_meter, items):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _init_worker():
+    # The datasets may be opened for writing by the main process
+    os.environ['HDF5_USE_FILE_LOCKING'] = 'FALSE'
+
+
+def _compute_meter(item):
+    """Computes the stats of one meter.  Runs in a worker process.
+
+    Returns
+    -------
+    dict with the columns in `JOB_COLUMNS` and 'entries', the arguments
+    of the `StatCache.put` calls for the computed stats.
+    """
+    path, building, instance, stats, load_kwargs = item
+    result = {'dataset': path, 'building': building, 'meter': instance,
+              'key': '', 'status': 'done', 'error': '', 'entries': []}
+    t0 = time()
+    n_rows = 0
+    try:
+        dataset = _get_dataset(path)
+        meter = _find_meter(dataset, building, instance)
+        result['key'] = meter.key_for_stat_cache()
+        store = dataset.store
+        collector = _CollectingStatCache(get_stat_cache(store, building))
+        previous_cache, store.stat_cache = store.stat_cache, collector
+        try:
+            n_rows = meter._data_fingerprint()[0] or 0
+            meter.compute_stats(stats, **dict(load_kwargs))
+        finally:
+            store.stat_cache = previous_cache
+        result['entries'] = list(collector.collected.values())
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = repr(e)
+    seconds = time() - t0
+    result.update(seconds=seconds, n_rows=n_rows, finished=datetime.now(),
+                  rows_per_second=n_rows / seconds if seconds else 0.)
+    return result
+
+
+class _CollectingStatCache(StatCache):
+    """Reads from the cache of the dataset but keeps everything which is
+    put into it in memory, so that the writer process can store it."""
+
+    def __init__(self, stat_cache):
+        super(_CollectingStatCache, self).__init__(
+            stat_cache.store, root=stat_cache.root, read_only=True)
+        self.collected = OrderedDict()
+
+    def get(self, meter, stat, params, fingerprint):
+        entry_id = self.entry_id(meter, stat, params)
+        if entry_id in self.collected:
+            return self.collected[entry_id][-2:]
+        return super(_CollectingStatCache, self).get(
+            meter, stat, params, fingerprint)
+
+    def put(self, meter, stat, params, fingerprint, data, timeframes):
+        self.collected[self.entry_id(meter, stat, params)] = (
+            meter, stat, params, fingerprint, data, timeframes)
+
+
+def _get_dataset(path):
+    from .dataset import DataSet
+    if path in _given_datasets:
+        return _given_datasets[path]
+    if path not in _opened_datasets:
+        _opened_datasets[path] = DataSet(path, mode='r')
+    return _opened_datasets[path]
+
+
+def _close_opened_datasets():
+    for dataset in _opened_datasets.values():
+        dataset.store.close()
+    _opened_datasets.clear()
+
+
+def _dataset_path(dataset):
+    if isinstance(dataset, str):
+        return os.path.abspath(dataset)
+    return os.path.abspath(dataset.store.filename)
+
+
+def _work_items(path, ignore_meters):
+    """Yields (building, meter instance) for all meters of a dataset."""
+    dataset = _get_dataset(path)
+    for building_id, building in iteritems(dataset.buildings):
+        original_name = building.metadata.get('original_name')
+        if ignore_meters is not None and original_name in ignore_meters:
+            continue
+        for meter in building.elec.all_elecmeters():
+            yield building_id, meter.instance()
+
+
+def _find_meter(dataset, building, instance):
+    for meter in dataset.buildings[building].elec.all_elecmeters():
+        if meter.instance() == instance:
+            return meter
+    raise KeyError("No meter {} in building {}".format(instance, building))
+
+
+def _load_jobs(journal_store):
+    try:
+        return journal_store['/jobs']
+    except KeyError:
+        return pd.DataFrame(columns=JOB_COLUMNS).astype(JOB_DTYPES)
+
+
+def _check_cache_is_writable(dataset):
+    """Raises a ValueError if the stats cannot be copied into the cache of
+    `dataset` because it is cached inside its store, which is read-only.
+    The store cannot be reopened for writing while the caller holds it."""
+    store = dataset.store
+    if store.stat_cache is None and getattr(store, 'mode', None) == 'r':
+        raise ValueError(
+            "'{}' is opened read-only.  Open it with mode='a', set a stat"
+            " cache with `DataSet.set_stat_cache` or pass"
+            " copy_to_datasets=False.".format(store.filename))
+
+
+def _copy_to_datasets(journal_cache, jobs, paths):
+    """Copies the stats of all done meters from the journal into the
+    caches of their datasets."""
+    done = jobs[jobs['status'] == 'done']
+    for path in paths:
+        jobs_of_dataset = done[done['dataset'] == path]
+        if jobs_of_dataset.empty:
+            continue
+        given = path in _given_datasets
+        store = _given_datasets[path].store if given else HDFDataStore(path, 'a')
+        try:
+            with store.batch():
+                for _, job in jobs_of_dataset.iterrows():
+                    cache = get_stat_cache(store, job['building'])
+                    journal_cache.copy_to(cache, meter=job['key'])
+        finally:
+            if not given:
+                store.close()
+
+
+def _print_progress(i, n, result):
+    print("[{}/{}] {} building{} meter{}: {} in {:.1f}s ({:.0f} rows/s){}".format(
+        i, n, os.path.basename(result['dataset']), result['building'],
+        result['meter'], result['status'], result['seconds'],
+        result['rows_per_second'],
+        " " + result['error'] if result['error'] else ""))
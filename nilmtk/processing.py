@@ -1,12 +1,16 @@
+from six import with_metaclass
 from nilmtk.elecmeter import ElecMeter
+from nilmtk.profiling import ProcessingMeta
 
 
 
-class Processing(object):
+class Processing(with_metaclass(ProcessingMeta, object)):
     """This is the baseclass for all predictors which process ElecMeters.
     At the moment disaggregator, clustering and forecasting inherits from this class.
 
     Do not confuse it with the node system which is only used for calculating the stats.
+    The train and disaggregate methods of all subclasses are instrumented
+    by `nilmtk.profiling`.
     """
 
     # This has to be overwritten by the subclasses sothat one can check whether 
@@ -0,0 +1,294 @@
+"""Profiling of node pipelines, MeterGroup operations and disaggregators.
+
+Profiling is off by default and then costs a single check per call of an
+instrumented function (not per chunk).  It is switched on with
+
+    >>> with profile() as profiler:
+    ...     meter.good_sections()
+    >>> profiler.table()
+
+or for a whole run by setting the environment variable NILMTK_PROFILE.
+Its value is the path of a JSON file which gets the results when the
+interpreter exits.  Any other value (e.g. '1') prints the table to stderr.
+
+Instrumented are:
+- `Node.process` of all nodes, via `NodeMeta`.  The chunks of the source
+  node are recorded as 'DataStore.load'.
+- Functions decorated with `profiled`, e.g. the MeterGroup operations.
+- The train and disaggregate methods of all `Processing` subclasses,
+  via `ProcessingMeta`.
+
+For every span name the profiler records the number of calls and chunks,
+the rows it reads from nested spans and yields, the bytes it yields, the
+wall time and the wall time without the nested spans ('self_seconds').
+"""
+from __future__ import print_function, division
+import atexit
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from inspect import isgeneratorfunction
+from time import time
+import pandas as pd
+
+PROFILE_ENV_VAR = 'NILMTK_PROFILE'
+COLUMNS = ['kind', 'calls', 'chunks', 'rows_in', 'rows_out', 'bytes_out',
+           'seconds', 'self_seconds']
+
+# The active Profiler, None if profiling is off
+_profiler = None
+
+
+class Profiler(object):
+    """Collects the spans of all threads.
+
+    Use `profile` to activate a Profiler.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = OrderedDict()
+
+    #region RECORDING
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name, kind):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = dict.fromkeys(COLUMNS[1:], 0)
+                stats['kind'] = kind
+            return stats
+
+    def _enter(self, name):
+        frame = [name, time(), 0.]
+        self._stack().append(frame)
+        return frame
+
+    def _exit(self, frame, kind, calls=0, chunk=None):
+        stack = self._stack()
+        stack.pop()
+        seconds = time() - frame[1]
+        if stack:
+            stack[-1][2] += seconds
+        stats = self._record(frame[0], kind)
+        with self._lock:
+            stats['calls'] += calls
+            stats['seconds'] += seconds
+            stats['self_seconds'] += seconds - frame[2]
+            if chunk is not None:
+                rows = len(chunk)
+                stats['chunks'] += 1
+                stats['rows_out'] += rows
+                stats['bytes_out'] += _nbytes(chunk)
+                if stack:
+                    consumer = self._stats.get(stack[-1][0])
+                    if consumer is not None:
+                        consumer['rows_in'] += rows
+
+    @contextmanager
+    def span(self, name, kind='span'):
+        """Records the code in the `with` block as a call of `name`."""
+        frame = self._enter(name)
+        # Make sure the consumer exists before nested spans report to it
+        self._record(name, kind)
+        try:
+            yield
+        finally:
+            self._exit(frame, kind, calls=1)
+
+    def chunks(self, name, iterable, kind='node'):
+        """Generator which records every step through `iterable` as a
+        chunk of `name`.  Only the time spent in `iterable` counts."""
+        self._record(name, kind)
+        iterator = iter(iterable)
+        calls = 1
+        while True:
+            frame = self._enter(name)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                self._exit(frame, kind, calls=calls)
+                return
+            except:
+                self._exit(frame, kind, calls=calls)
+                raise
+            self._exit(frame, kind, calls=calls,
+                       chunk=chunk if hasattr(chunk, '__len__') else None)
+            calls = 0
+            yield chunk
+    #endregion
+
+    #region EXPORT
+    def table(self):
+        """Returns a pd.DataFrame with a row per span name, sorted by
+        'self_seconds'."""
+        with self._lock:
+            table = pd.DataFrame.from_dict(self._stats, orient='index')
+        if table.empty:
+            return pd.DataFrame(columns=COLUMNS)
+        return table[COLUMNS].sort_values('self_seconds', ascending=False)
+
+    def to_dict(self):
+        with self._lock:
+            return OrderedDict((name, dict(stats))
+                               for name, stats in self._stats.items())
+
+    def to_json(self, path=None):
+        """Returns the stats as a JSON string and writes it to `path`
+        if given."""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+    #endregion
+
+
+@contextmanager
+def profile(profiler=None):
+    """Activates a Profiler for the `with` block.
+
+    Parameters
+    ----------
+    profiler : Profiler, optional
+        To add to the stats of an earlier run.
+
+    Yields
+    ------
+    Profiler
+    """
+    global _profiler
+    profiler = Profiler() if profiler is None else profiler
+    previous, _profiler = _profiler, profiler
+    try:
+        yield profiler
+    finally:
+        _profiler = previous
+
+
+def get_profiler():
+    """Returns the active Profiler or None."""
+    return _profiler
+
+
+@contextmanager
+def span(name):
+    """Records the `with` block if profiling is on."""
+    if _profiler is None:
+        yield
+    else:
+        with _profiler.span(name):
+            yield
+
+
+def profiled(name=None):
+    """Decorator which records each call of a function as a span.
+
+    The chunks of generator functions are recorded like those of nodes.
+
+    Parameters
+    ----------
+    name : str, optional
+        Defaults to the qualified name of the function,
+        e.g. 'MeterGroup.load'.
+    """
+    def decorator(func):
+        span_name = name or getattr(func, '__qualname__', func.__name__)
+
+        if isgeneratorfunction(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if _profiler is None:
+                    return func(*args, **kwargs)
+                return _profiler.chunks(span_name, func(*args, **kwargs),
+                                        kind='span')
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if _profiler is None:
+                    return func(*args, **kwargs)
+                with _profiler.span(span_name):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class NodeMeta(type):
+    """Metaclass of `Node` which instruments `process` of every subclass."""
+
+    def __new__(mcs, name, bases, namespace):
+        if 'process' in namespace:
+            namespace['process'] = _profiled_process(namespace['process'])
+        return super(NodeMeta, mcs).__new__(mcs, name, bases, namespace)
+
+
+class ProcessingMeta(type):
+    """Metaclass of `Processing` which instruments the train and
+    disaggregate methods of every subclass."""
+
+    METHODS = ['train', 'train_on_chunk', 'disaggregate', 'disaggregate_chunk']
+
+    def __new__(mcs, name, bases, namespace):
+        for method in mcs.METHODS:
+            if method in namespace:
+                namespace[method] = profiled('{}.{}'.format(name, method))(
+                    namespace[method])
+        return super(ProcessingMeta, mcs).__new__(mcs, name, bases, namespace)
+
+
+def _profiled_process(process):
+    @wraps(process)
+    def wrapper(node):
+        if _profiler is None:
+            return process(node)
+        return _profiler.chunks(_node_name(node), process(node))
+    return wrapper
+
+
+def _node_name(node):
+    if getattr(node, 'generator', None) is not None:
+        return 'DataStore.load'
+    name = type(node).__name__
+    func = getattr(node, 'func', None)
+    if func is not None:
+        name += '({})'.format(getattr(func, '__name__', type(func).__name__))
+    return name
+
+
+def _nbytes(chunk):
+    try:
+        return int(chunk.memory_usage(index=True).sum())
+    except (AttributeError, TypeError):
+        return int(getattr(chunk, 'nbytes', 0))
+
+
+def _profile_from_environment():
+    global _profiler
+    target = os.environ.get(PROFILE_ENV_VAR)
+    if not target:
+        return
+    _profiler = Profiler()
+
+    def report(profiler=_profiler):
+        if target.endswith('.json'):
+            profiler.to_json(target)
+        else:
+            print(profiler.table().to_string(), file=sys.stderr)
+    atexit.register(report)
+
+
+_profile_from_environment()
@@ -1,6 +1,9 @@
 import abc
+from bisect import bisect_right
+import numpy as np
 import pandas as pd
 import copy
+from collections import OrderedDict
 from six import iteritems
 from .timeframe import TimeFrame
 from nilmtk.utils import get_tz, tz_localize_naive
@@ -22,17 +25,72 @@ class Results(object):
     _data : DataFrame
         Index is period start.  
         Columns are: `end` and any columns for internal storage of stats.
+        Appended rows are collected in columnar buffers and only turned 
+        into a DataFrame when `_data` is accessed, usually in `finalize`.
+    _starts, _ends : np.ndarray of int64
+        Preallocated nanosecond bounds of the buffered rows, used to
+        check for overlaps.  Only the first `_n_buffered` are valid.
+    _sorted_starts, _sorted_ends : list of int or None
+        Nanosecond bounds of all non-empty rows, sorted by start.  Built 
+        at the first row which is not appended in order, so that each 
+        such row only needs a binary search, see `_check_new_bounds`.
+    _columns : OrderedDict
+        Maps each column of the buffered rows to the list of its values.
 
     Static Attributes
     -----------------
     name : str
         The string used to cache this results object.
+    incremental : bool
+        True if `update` can merge finalized results which were computed
+        for other timeframes.  Then a cached stat is only computed for the
+        timeframes which are not yet covered by the cache.
     """
     __metaclass__ = abc.ABCMeta
+    incremental = False
 
     def __init__(self):
         self._data = pd.DataFrame() #columns=['end']
 
+    @property
+    def _data(self):
+        if self._n_buffered:
+            self._materialize()
+        return self._frame
+
+    @_data.setter
+    def _data(self, data):
+        self._frame = data
+        self._clear_buffer()
+
+    def _clear_buffer(self):
+        self._starts = np.empty(16, dtype=np.int64)
+        self._ends = np.empty(16, dtype=np.int64)
+        self._n_buffered = 0
+        self._index = []
+        self._columns = OrderedDict([('end', [])])
+        # Latest end of all rows if known, see `_append_overlaps`
+        self._max_end = None
+        self._sorted_starts = None
+        self._sorted_ends = None
+
+    def _materialize(self):
+        """Turns the buffered rows into a DataFrame and merges it with the 
+        rows which are already in `_frame`."""
+        buffered = pd.DataFrame(self._columns, index=self._index,
+                                columns=list(self._columns))
+        frame = self._frame
+        max_end = self._max_end
+        sorted_bounds = self._sorted_starts, self._sorted_ends
+        if isinstance(frame, pd.DataFrame) and not (frame.empty and len(frame.columns) == 0):
+            buffered = _concat_rows([frame, buffered], verify_integrity=True)
+        elif not buffered.index.is_unique:
+            raise ValueError("Indexes have overlapping values")
+        buffered.sort_index(inplace=True)
+        self._data = buffered
+        self._max_end = max_end
+        self._sorted_starts, self._sorted_ends = sorted_bounds
+
     def finalize(self):
         """Return all results from each chunk combined.  Either return single
         float for all periods or a dict where necessary, e.g. if
@@ -72,32 +130,95 @@ class Results(object):
             raise TypeError("`new_results` must of a dict, not '{}' type."
                             .format(type(new_results)))
         
-        # check that there is no overlap
-        if check_overlap:
-            for index, series in self._data.iterrows():
-                tf = TimeFrame(index, series['end'])
-                tf.check_for_overlap(timeframe)
-
-        row = pd.DataFrame(index=[timeframe.start],
-                           columns=['end'] + list(new_results))
-        row['end'] = timeframe.end
-        for key, val in iteritems(new_results):
-            row[key] = val
-        self._data = self._data.append(row, verify_integrity=True)
-        self._data.sort_index(inplace=True)
+        start, end = _timeframe_to_ns(timeframe)
+        if check_overlap and self._append_overlaps(start, end):
+            self._check_new_bounds(start, end)
+        if self._max_end is not None and start < end:
+            self._max_end = max(self._max_end, end)
+        if self._sorted_starts is not None and start < end:
+            if check_overlap:
+                i = bisect_right(self._sorted_starts, start)
+                self._sorted_starts.insert(i, start)
+                self._sorted_ends.insert(i, end)
+            else:
+                # The bounds might not be sorted by their ends any more
+                self._sorted_starts = self._sorted_ends = None
+
+        n = self._n_buffered
+        if n == len(self._starts):
+            self._starts = np.resize(self._starts, 2 * n)
+            self._ends = np.resize(self._ends, 2 * n)
+        self._starts[n] = start
+        self._ends[n] = end
+        self._n_buffered = n + 1
+        self._index.append(timeframe.start)
+        for key in new_results:
+            if key not in self._columns:
+                self._columns[key] = [np.nan] * n
+        for key, column in iteritems(self._columns):
+            if key == 'end':
+                column.append(timeframe.end)
+            elif key in new_results:
+                val = new_results[key]
+                # As when assigning a list to the column of a single row
+                if isinstance(val, (list, np.ndarray)) and len(val) == 1:
+                    val = val[0]
+                column.append(val)
+            else:
+                column.append(np.nan)
+
+    def _append_overlaps(self, start, end):
+        """Cheap test whether a new row might overlap the existing ones.
+        Chunks are appended in order, so usually it only has to be 
+        compared with the latest end."""
+        if start >= end:
+            return False
+        if self._max_end is None:
+            _, ends = self._bounds()
+            self._max_end = ends.max() if len(ends) else np.iinfo(np.int64).min
+        return start < self._max_end
+
+    def _check_new_bounds(self, start, end):
+        """Raises a ValueError if the new row [start, end) overlaps any 
+        row.  As the rows do not overlap, their ends are sorted like 
+        their starts and only the neighbours of `start` have to be 
+        compared."""
+        if self._sorted_starts is None:
+            starts, ends = self._bounds()
+            _check_for_overlap(starts, ends)
+            non_empty = starts < ends
+            order = np.argsort(starts[non_empty], kind='mergesort')
+            self._sorted_starts = starts[non_empty][order].tolist()
+            self._sorted_ends = ends[non_empty][order].tolist()
+        i = bisect_right(self._sorted_starts, start)
+        if i > 0 and self._sorted_ends[i - 1] > start:
+            other = i - 1
+        elif i < len(self._sorted_starts) and self._sorted_starts[i] < end:
+            other = i
+        else:
+            return
+        raise ValueError("Periods overlap: " +
+                         str(_ns_to_timeframe(self._sorted_starts[other],
+                                              self._sorted_ends[other])) +
+                         " " + str(_ns_to_timeframe(start, end)))
+
+    def _bounds(self):
+        """Returns the nanosecond starts and ends of all rows."""
+        frame = self._frame
+        if isinstance(frame, pd.DataFrame) and len(frame) and 'end' in frame:
+            starts = _to_ns_array(frame.index, np.iinfo(np.int64).min)
+            ends = _to_ns_array(frame['end'], np.iinfo(np.int64).max)
+        else:
+            starts, ends = [], []
+        starts = np.concatenate([np.asarray(starts, dtype=np.int64),
+                                 self._starts[:self._n_buffered]])
+        ends = np.concatenate([np.asarray(ends, dtype=np.int64),
+                               self._ends[:self._n_buffered]])
+        return starts, ends
 
     def check_for_overlap(self):
-        pass
-        # TODO this could be made much faster
-        n = len(self._data)
-        index = self._data.index
-        for i in range(n):
-            row1 = self._data.iloc[i]
-            tf1 = TimeFrame(index[i], row1['end'])
-            for j in range(i+1, n):
-                row2 = self._data.iloc[j]
-                tf2 = TimeFrame(index[j], row2['end'])
-                tf1.check_for_overlap(tf2)
+        """Raises a ValueError if any two rows overlap."""
+        _check_for_overlap(*self._bounds())
 
     def update(self, new_result):
         """ Add results from a new chunk. This adds a whole 
@@ -120,7 +241,7 @@ class Results(object):
         if new_result._data.empty:
             return
 
-        self._data = self._data.append(new_result._data)
+        self._data = _concat_rows([self._data, new_result._data])
         self._data.sort_index(inplace=True)
         self.check_for_overlap()
 
@@ -225,3 +346,62 @@ class Results(object):
         When printed, the results only show their data.
         '''
         return str(self._data)
+
+
+def _concat_rows(frames, **kwargs):
+    """Concatenates the rows of `frames`.  The columns of the first frame
+    come first, followed by the new columns of the others in order."""
+    columns = []
+    for frame in frames:
+        columns.extend(column for column in frame.columns
+                       if column not in columns)
+    return pd.concat(frames, **kwargs).reindex(columns=columns)
+
+
+def _to_ns(timestamp, default):
+    if timestamp is None or pd.isnull(timestamp):
+        return default
+    return pd.Timestamp(timestamp).value
+
+
+def _to_ns_array(timestamps, default):
+    timestamps = pd.DatetimeIndex(timestamps)
+    values = timestamps.asi8.copy()
+    values[timestamps.isna()] = default
+    return values
+
+
+def _timeframe_to_ns(timeframe):
+    """Returns the bounds of `timeframe` in nanoseconds.  Open bounds 
+    become the smallest and largest int64."""
+    return (_to_ns(timeframe.start, np.iinfo(np.int64).min),
+            _to_ns(timeframe.end, np.iinfo(np.int64).max))
+
+
+def _check_for_overlap(starts, ends):
+    """Raises a ValueError if any two of the intervals [start, end) 
+    overlap.  A single sweep over the intervals sorted by their start: 
+    each interval must not start before the latest end seen so far.
+    Empty intervals never overlap (as in `TimeFrame.check_for_overlap`)."""
+    non_empty = starts < ends
+    starts, ends = starts[non_empty], ends[non_empty]
+    if len(starts) < 2:
+        return
+    order = np.argsort(starts, kind='mergesort')
+    starts, ends = starts[order], ends[order]
+    latest_end = np.maximum.accumulate(ends)[:-1]
+    overlapping = np.flatnonzero(starts[1:] < latest_end)
+    if len(overlapping):
+        i = overlapping[0] + 1
+        j = np.argmax(ends[:i])
+        raise ValueError("Periods overlap: " + 
+                         str(_ns_to_timeframe(starts[j], ends[j])) + " " +
+                         str(_ns_to_timeframe(starts[i], ends[i])))
+
+
+def _ns_to_timeframe(start, end):
+    def to_timestamp(value):
+        if value in (np.iinfo(np.int64).min, np.iinfo(np.int64).max):
+            return None
+        return pd.Timestamp(value, tz='UTC')
+    return TimeFrame(to_timestamp(start), to_timestamp(end))
@@ -0,0 +1,301 @@
+from __future__ import print_function, division
+import hashlib
+import json
+from threading import RLock
+from time import time
+from weakref import WeakKeyDictionary
+import numpy as np
+import pandas as pd
+from .datastore.datastore import join_key
+
+INDEX_COLUMNS = ['meter', 'stat', 'params', 'n_rows', 'last_timestamp',
+                 'n_bytes', 'last_used']
+INDEX_DTYPES = {'meter': object, 'stat': object, 'params': object,
+                'n_rows': np.int64, 'last_timestamp': np.int64,
+                'n_bytes': np.int64, 'last_used': np.float64}
+
+# The caches inside the stores of the datasets, see `get_stat_cache`
+_stat_caches_in_stores = WeakKeyDictionary()
+
+
+class StatCache(object):
+    """Stores the stats computed for meters (e.g. good sections) together
+    with the timeframes they cover and what they have been computed from.
+
+    An entry is identified by the key of the meter, the name of the stat
+    and a hash of the parameters the stat depends on (e.g. the
+    `max_sample_period`).  It also records a fingerprint of the meter's
+    data at the time the stat was computed: the number of rows and the
+    last timestamp.  `get` removes entries whose fingerprint does not fit
+    the data any more.  If rows have only been appended, the entry stays
+    valid for the timeframes it covers, so that only the new rows have to
+    be computed (see `ElecMeter._get_stat_from_cache_or_compute`).
+
+    By default the stats of a building are cached inside the store of
+    the dataset, below 'building<i>/elec/cache'.  A StatCache with its own
+    store can hold the stats of read-only or shared datasets, see
+    `DataSet.set_stat_cache`.  The index is read from the store once and
+    then kept in memory, so a cache must not be written through more than
+    one StatCache or process at a time, and readers do not see entries
+    added by another process after they read the index.  (HDF5 files do
+    not support concurrent readers while they are written anyway.)
+
+    Parameters
+    ----------
+    store : nilmtk.DataStore
+        Where the entries are kept, e.g. `HDFDataStore('stats.h5', 'w')`.
+    root : str, optional
+        Key below which all entries and the index are stored.
+    max_entries, max_bytes : int, optional
+        Size limits.  When one of them is exceeded, the least recently
+        used entries are removed.  `max_bytes` counts the in-memory size
+        of the cached DataFrames.  By default the cache is unlimited.
+    read_only : bool, optional
+        If True, then nothing is ever written to `store`.
+
+    Attributes
+    ----------
+    _index : pd.DataFrame
+        One row per entry with the columns in `INDEX_COLUMNS`.  Persisted
+        at `<root>/index`.
+    """
+
+    def __init__(self, store, root='/statcache', max_entries=None,
+                 max_bytes=None, read_only=False):
+        self.store = store
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.read_only = read_only
+        self._index = None
+        self._index_changed = False
+        self._lock = RLock()
+
+    def get(self, meter, stat, params, fingerprint):
+        """Returns the cached stat and the timeframes it covers.
+
+        Parameters
+        ----------
+        meter : str
+            Unique key of the meter.
+        stat : str
+            Name of the stat, e.g. 'good_sections'.
+        params : dict
+            Everything the stat depends on apart from the data.  Has to be
+            serializable as JSON (other objects are converted to str).
+        fingerprint : (int or None, pd.Timestamp or None)
+            Number of rows and last timestamp of the meter's data,
+            see `DataStore.fingerprint`.
+
+        Returns
+        -------
+        (data, timeframes) : pair of pd.DataFrames or None if there is no
+            valid entry.  `timeframes` is the `_df` of a TimeFrameGroup.
+        """
+        entry_id = self.entry_id(meter, stat, params)
+        with self._lock:
+            index = self._get_index()
+            if entry_id not in index.index:
+                return None
+            if not _fingerprint_is_valid(index.loc[entry_id], fingerprint):
+                self._remove_entries([entry_id])
+                return None
+            try:
+                data = self.store[self._key(entry_id)]
+                timeframes = self.store[self._key(entry_id + '_timeframes')]
+            except KeyError:
+                self._remove_entries([entry_id])
+                return None
+            index.loc[entry_id, 'last_used'] = time()
+            self._index_changed = True
+        return data, timeframes
+
+    def put(self, meter, stat, params, fingerprint, data, timeframes):
+        """Adds or replaces an entry.  See `get` for the parameters.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            The stat in the form of `Results.export_to_cache`.
+        timeframes : pd.DataFrame
+            `_df` of the TimeFrameGroup which `data` covers.
+        """
+        if self.read_only:
+            return
+        entry_id = self.entry_id(meter, stat, params)
+        n_rows, last_timestamp = fingerprint
+        n_bytes = (data.memory_usage(index=True).sum() +
+                   timeframes.memory_usage(index=True).sum())
+        with self._lock:
+            index = self._get_index()
+            with self.store.batch():
+                self.store.put(self._key(entry_id), data, fixed=True)
+                self.store.put(self._key(entry_id + '_timeframes'),
+                               timeframes, fixed=True)
+                index.loc[entry_id] = [
+                    meter, stat, _params_hash(params),
+                    -1 if n_rows is None else n_rows,
+                    -1 if last_timestamp is None else pd.Timestamp(last_timestamp).value,
+                    n_bytes, time()]
+                self._evict()
+                self._save_index()
+
+    def remove(self, meter=None, stat=None):
+        """Removes all entries of `meter` and `stat`, regardless of their
+        parameters.  None matches everything.
+
+        Returns
+        -------
+        int : number of removed entries
+        """
+        with self._lock:
+            index = self._get_index()
+            to_remove = pd.Series(True, index=index.index)
+            if meter is not None:
+                to_remove &= index['meter'] == meter
+            if stat is not None:
+                to_remove &= index['stat'] == stat
+            entry_ids = list(index.index[to_remove])
+            self._remove_entries(entry_ids)
+        return len(entry_ids)
+
+    def clear(self):
+        """Removes all entries."""
+        self.remove()
+
+    def entries(self):
+        """Returns a copy of the index, i.e. one row per entry."""
+        with self._lock:
+            return self._get_index().copy()
+
+    def flush(self):
+        """Persists the times of last use updated by `get`."""
+        with self._lock:
+            if self._index_changed:
+                self._save_index()
+
+    def copy_to(self, other, meter=None):
+        """Copies the entries of `meter` (None copies all entries) into 
+        the StatCache `other`, replacing entries with the same identity.
+
+        Returns
+        -------
+        int : number of copied entries
+        """
+        with self._lock:
+            index = self._get_index()
+            if meter is not None:
+                index = index[index['meter'] == meter]
+            entries = []
+            for entry_id, entry in index.iterrows():
+                try:
+                    data = self.store[self._key(entry_id)]
+                    timeframes = self.store[self._key(entry_id + '_timeframes')]
+                except KeyError:
+                    continue
+                entries.append((entry_id, entry, data, timeframes))
+        if other.read_only or not entries:
+            return 0
+        with other._lock:
+            other_index = other._get_index()
+            with other.store.batch():
+                for entry_id, entry, data, timeframes in entries:
+                    other.store.put(other._key(entry_id), data, fixed=True)
+                    other.store.put(other._key(entry_id + '_timeframes'),
+                                    timeframes, fixed=True)
+                    other_index.loc[entry_id] = entry[INDEX_COLUMNS].values
+                other._evict()
+                other._save_index()
+        return len(entries)
+
+    @staticmethod
+    def entry_id(meter, stat, params):
+        key = json.dumps([meter, stat, _params_hash(params)])
+        return 'e' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    def _key(self, name):
+        return join_key(self.root, name)
+
+    def _get_index(self):
+        if self._index is None:
+            try:
+                self._index = self.store[self._key('index')]
+            except KeyError:
+                self._index = pd.DataFrame(columns=INDEX_COLUMNS)
+        return self._index
+
+    def _save_index(self):
+        self._index_changed = False
+        if self.read_only:
+            return
+        index = self._index.astype(INDEX_DTYPES)
+        self.store.put(self._key('index'), index, fixed=True)
+
+    def _remove_entries(self, entry_ids):
+        if not entry_ids or self.read_only:
+            return
+        index = self._get_index()
+        with self.store.batch():
+            for entry_id in entry_ids:
+                for key in [entry_id, entry_id + '_timeframes']:
+                    try:
+                        self.store.remove(self._key(key))
+                    except KeyError:
+                        pass
+            self._index = index.drop(entry_ids)
+            self._save_index()
+
+    def _evict(self):
+        """Removes the least recently used entries until the index is
+        within the size limits."""
+        index = self._index.sort_values('last_used', kind='mergesort')
+        n_entries = len(index)
+        n_bytes = np.cumsum(index['n_bytes'].values[::-1])[::-1]
+        to_remove = []
+        for i, entry_id in enumerate(index.index[:-1]):
+            too_many = self.max_entries is not None and n_entries - i > self.max_entries
+            too_large = self.max_bytes is not None and n_bytes[i] > self.max_bytes
+            if not (too_many or too_large):
+                break
+            to_remove.append(entry_id)
+        for entry_id in to_remove:
+            for key in [entry_id, entry_id + '_timeframes']:
+                try:
+                    self.store.remove(self._key(key))
+                except KeyError:
+                    pass
+        self._index = self._index.drop(to_remove)
+
+
+def get_stat_cache(store, building):
+    """Returns the StatCache for the meters of `building` in `store`.
+
+    That is `store.stat_cache` if it is set and otherwise a cache inside
+    `store` below 'building<building>/elec/cache', which is read-only if
+    `store` was opened with mode 'r'.
+    """
+    if store.stat_cache is not None:
+        return store.stat_cache
+    caches = _stat_caches_in_stores.setdefault(store, {})
+    if building not in caches:
+        root = '/building{:d}/elec/cache'.format(building)
+        caches[building] = StatCache(
+            store, root=root, read_only=getattr(store, 'mode', None) == 'r')
+    return caches[building]
+
+
+def _params_hash(params):
+    params = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(params.encode('utf-8')).hexdigest()[:16]
+
+
+def _fingerprint_is_valid(entry, fingerprint):
+    """An entry stays valid as long as the data is unchanged or rows have
+    only been appended after its last timestamp."""
+    n_rows, last_timestamp = fingerprint
+    n_rows = -1 if n_rows is None else n_rows
+    last_timestamp = -1 if last_timestamp is None else pd.Timestamp(last_timestamp).value
+    if n_rows == entry['n_rows'] and last_timestamp == entry['last_timestamp']:
+        return True
+    return (entry['n_rows'] >= 0 and n_rows > entry['n_rows'] and
+            last_timestamp > entry['last_timestamp'])
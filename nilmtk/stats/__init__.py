@@ -3,9 +3,17 @@ from .goodsections import GoodSections
 from .dropoutrate import DropoutRate
 from .overbasepowersections import OverBasepowerSections
 from .nonzerosections import NonZeroSections
-from .accelerators_stat import get_good_sections_fast
-from .accelerators_stat import get_nonzero_sections_fast
-from .accelerators_stat import intersect_many_fast
+from .sectionkernels import good_sections, threshold_sections
+try:
+    from .accelerators_stat import get_good_sections_fast
+    from .accelerators_stat import get_nonzero_sections_fast
+    from .accelerators_stat import intersect_many_fast
+except ImportError:
+    # The compiled accelerators are optional
+    from .goodsections import get_good_sections as get_good_sections_fast
+    from .nonzerosections import get_nonzero_sections as get_nonzero_sections_fast
+    from ..timeframegroup import TimeFrameGroup
+    intersect_many_fast = TimeFrameGroup.intersect_many
 
 '''
 This name space contains the nodes which calculate an statistic/status. 
@@ -1,23 +1,22 @@
 from __future__ import print_function, division
-import numpy as np
-from numpy import diff, concatenate
-import gc
-from .AboveFreqsectionsresults import AboveFreqSectionsResults
+from .abovefreqsectionsresults import AboveFreqSectionsResults
+from .sectionkernels import NO_TIME, good_sections, sections_frame
 from ..timeframe import TimeFrame
-from ..utils import timedelta64_to_secs
 from ..node import Node
 from ..timeframe import list_of_timeframes_from_list_of_dicts, timeframe_from_dict
 
 
 class AboveFreqSections(Node):
     """Locate sections of data where the sampling rate is above a certain limit.
-    TODO
+    Only samples with a power above 0 count, the limit is the
+    device's max_sample_period.
 
     Attributes
     ----------
     previous_chunk_ended_with_open_ended_AboveFreq_section : bool
     """
 
+    requirements = {'device': {'max_sample_period': 'ANY VALUE'}}
     postconditions =  {'statistics': {'AboveFreq_sections': []}}
     results_class = AboveFreqSectionsResults
         
@@ -29,10 +28,10 @@ class AboveFreqSections(Node):
         self.check_requirements()
         self.results = AboveFreqSectionsResults()
         for chunk in self.upstream.process():
-            self._process_chunk(chunk)
+            self._process_chunk(chunk, metadata)
             yield chunk
 
-    def _process_chunk(self, df):
+    def _process_chunk(self, df, metadata):
         """
         Only checks where the chunk has AboveFreq values.
 
@@ -61,7 +60,8 @@ class AboveFreqSections(Node):
 
         # Process dataframe
         AboveFreq_sections = get_AboveFreq_sections(
-            df, self.previous_chunk_ended_with_open_ended_AboveFreq_section)
+            df, metadata['device']['max_sample_period'],
+            self.previous_chunk_ended_with_open_ended_AboveFreq_section)
 
         # Set self.previous_chunk_ended_with_open_ended_AboveFreq_section
         if AboveFreq_sections:
@@ -74,84 +74,28 @@ class AboveFreqSections(Node):
 
 
 
-def _free_memory_dataframe(df):
-    last_index = df[-1]
-    del index
-    gc.collect()
-    return last_index
-
-def get_AboveFreq_sections(df, previous_chunk_ended_with_zero=False):
+def get_AboveFreq_sections(df, max_sample_period,
+                           previous_chunk_ended_with_open_ended_AboveFreq_section=False):
     """
     Parameters
     ----------
     df : pd.DataFrame
+    max_sample_period : number
+        Seconds.  Samples further apart end a section.
 
     Returns
     -------
     sections : list of TimeFrame objects
         Each AboveFreq section in `df` is marked with a TimeFrame.
-        If this df ends with an open-ended AboveFreq section (assessed by
-        examining `look_ahead`) then the last TimeFrame will have
-        `end=None`.  If this df starts with an open-ended AboveFreq section
-        then the first TimeFrame will have `start=None`.
+        If this df ends with an open-ended AboveFreq section then the
+        last TimeFrame will have `end=None`.  If this df starts with an
+        open-ended AboveFreq section then the first TimeFrame will have
+        `start=None`.
     """
-    df = df.dropna()
-    df = df[df > 0]
-    index = df.index
-    
-    switches = diff(timedeltas_check.astype(np.int))
-    AboveFreq_sect_starts = list(index[:-1][transitions ==  1])
-    AboveFreq_sect_ends   = list(index[:-1][transitions == -1])
-    last_index = _free_memory_dataframe(index)
-
-    # Use look_ahead to see if we need to append a 
-    # AboveFreq sect start or AboveFreq sect end.
-    look_ahead_valid = look_ahead is not None and not look_ahead.empty
-    if look_ahead_valid:
-        look_ahead_timedelta = look_ahead.dropna().index[0] - last_index
-        look_ahead_gap = look_ahead_timedelta.total_seconds()
-    if last_timedeltas_check: # current chunk ends with a AboveFreq section
-        if not look_ahead_valid or look_ahead_gap > max_sample_period:
-            # current chunk ends with a AboveFreq section which needs to 
-            # be closed because next chunk either does not exist
-            # or starts with a sample which is more than max_sample_period
-            # away from df.index[-1]
-            AboveFreq_sect_ends += [last_index]
-    elif look_ahead_valid and look_ahead_gap <= max_sample_period:
-        # Current chunk appears to end with a bad section
-        # but last sample is the start of a AboveFreq section
-        AboveFreq_sect_starts += [last_index]
-
-    # Work out if this chunk ends with an open ended AboveFreq section
-    if len(AboveFreq_sect_ends) == 0:
-        ends_with_open_ended_AboveFreq_section = (
-            len(AboveFreq_sect_starts) > 0 or 
-            previous_chunk_ended_with_open_ended_AboveFreq_section)
-    elif len(AboveFreq_sect_starts) > 0:
-        # We have AboveFreq_sect_ends and AboveFreq_sect_starts
-        ends_with_open_ended_AboveFreq_section = (
-            AboveFreq_sect_ends[-1] < AboveFreq_sect_starts[-1])
-    else:
-        # We have AboveFreq_sect_ends but no AboveFreq_sect_starts
-        ends_with_open_ended_AboveFreq_section = False
-
-    # If this chunk starts or ends with an open-ended
-    # AboveFreq section then the relevant TimeFrame needs to have
-    # a None as the start or end.
-    if previous_chunk_ended_with_open_ended_AboveFreq_section:
-        AboveFreq_sect_starts = [None] + AboveFreq_sect_starts
-    if ends_with_open_ended_AboveFreq_section:
-        AboveFreq_sect_ends += [None]
-
-    assert len(AboveFreq_sect_starts) == len(AboveFreq_sect_ends)
-
-    sections = [TimeFrame(start, end)
-                for start, end in zip(AboveFreq_sect_starts, AboveFreq_sect_ends)
-                if not (start == end and start is not None)]
-
-    # Memory management
-    del AboveFreq_sect_starts
-    del AboveFreq_sect_ends
-    gc.collect()
-
-    return sections
+    above_zero = (df.iloc[:, 0] > 0).values
+    starts, ends = good_sections(
+        df.index.asi8[above_zero], max_sample_period, NO_TIME,
+        previous_chunk_ended_with_open_ended_AboveFreq_section)
+    sections = sections_frame(starts, ends, df.index.tz)
+    return [TimeFrame(start, end) for start, end in
+            zip(sections['section_start'], sections['section_end'])]
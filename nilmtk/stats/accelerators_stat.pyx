@@ -6,6 +6,7 @@ import time
 import sys
 import numpy as np
 cimport numpy as np
+cimport cython
 from libc.stdlib cimport malloc, free
 from cython.parallel import parallel, prange
 from ..timeframe import TimeFrame
@@ -60,7 +61,7 @@ def get_good_sections_fast(df, max_sample_period, look_ahead=None,
     timedeltas_check = concatenate(
         [[previous_chunk_ended_with_open_ended_good_section],
          timedeltas_check])
-    transitions = diff(timedeltas_check.astype(np.int))
+    transitions = diff(timedeltas_check.astype(np.int64))
     last_timedeltas_check  = _free_enumerable_fast(timedeltas_check)
     good_sect_starts = list(index[:-1][transitions ==  1])
     good_sect_ends   = list(index[:-1][transitions == -1])
@@ -114,79 +115,6 @@ def get_good_sections_fast(df, max_sample_period, look_ahead=None,
 
 
 
-def get_nonzero_sections_fast(df):
-    """
-    Parameters
-    ----------
-    df : pd.DataFrame
-
-    Returns
-    -------
-    sections : list of TimeFrame objects
-        Each nonzero section in `df` is marked with a TimeFrame.
-        If this df ends with an open-ended nonzero section (assessed by
-        examining `look_ahead`) then the last TimeFrame will have
-        `end=None`.  If this df starts with an open-ended nonzero section
-        then the first TimeFrame will have `start=None`.
-    """
-
-    # Find the switching actions, which stay constant for minimal_zerotime times
-    minimal_zerotime = 3
-    look_ahead = getattr(df, 'look_ahead', None)
-    df = df > 0    
-
-    tmp = df.astype(np.int).diff()
-    nonzero_sect_starts = (tmp == 1)
-    nonzero_sect_ends = (tmp == 0)
-    for i in range(2,minimal_zerotime):
-        tmp = df.astype(np.int).diff(i)
-        nonzero_sect_starts *= tmp == 1
-        nonzero_sect_ends *= tmp == 0
-    tmp = df.astype(np.int).diff(minimal_zerotime)
-    nonzero_sect_starts *=  tmp == 1
-    nonzero_sect_ends *= tmp == -1
-    del tmp
-    nonzero_sect_starts = list(df[nonzero_sect_starts].dropna().index)
-    nonzero_sect_ends   = list(df[nonzero_sect_ends.shift(-minimal_zerotime).fillna(False)].dropna().index)
-
-    # If this chunk starts or ends with an open-ended
-    # nonzero section then the relevant TimeFrame needs to have
-    # a None as the start or end.
-    for i in range(minimal_zerotime):
-        if df.iloc[i, 0] == True:
-            nonzero_sect_starts = [df.index[i]] + nonzero_sect_starts
-            break
-
-    if df.iloc[-1,0] == True:
-        nonzero_sect_ends += [None]
-    else:
-        # Only start new zerosection when long enough, need look_ahead
-        for i in range(1,minimal_zerotime+1):
-            if df.iloc[-i, 0] != False:
-                break
-
-        if i < (minimal_zerotime):
-            if look_ahead.head(minimal_zerotime-i).sum()[0] == 0:
-                nonzero_sect_ends += [df.index[-i]] #, 0]]
-            else:
-                nonzero_sect_ends += [None]
-
-
-    # Merge together ends and starts
-    assert len(nonzero_sect_starts) == len(nonzero_sect_ends)
-    sections = [TimeFrame(start, end)
-                for start, end in zip(nonzero_sect_starts, nonzero_sect_ends)
-                if not (start == end and start is not None)]
-
-    # Memory management
-    del nonzero_sect_starts
-    del nonzero_sect_ends
-    gc.collect()
-
-    return sections
-
-
-
 def get_nonzero_sections_fast(df):
     """
     The input are always good_sections
@@ -206,7 +134,7 @@ def get_nonzero_sections_fast(df):
     """
 
     df = df > 0    
-    tmp = df.astype(np.int).diff()
+    tmp = df.astype(np.int64).diff()
     nonzero_sect_starts = df[(tmp == 1).values].index.values
     nonzero_sect_ends = df[(tmp == -1).values].index.values
     return nonzero_sect_starts, nonzero_sect_ends
@@ -228,4 +156,81 @@ def intersect_many_fast(groups):
     ends[0] = False
     ends = all_events[ends].index
     result = pd.DataFrame({"section_start": starts, "section_end":ends})
-    return TimeFrameGroup(result)
\ No newline at end of file
+    return TimeFrameGroup(result)
+
+
+# Kernels on int64 ns arrays, see nilmtk.stats.sectionkernels for the
+# NumPy versions which give identical results.
+cdef np.int64_t NO_TIME = np.iinfo(np.int64).min
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def good_sections_compiled(times, max_sample_period, np.int64_t look_ahead_time=NO_TIME,
+                           bint previous_open=False):
+    """See `nilmtk.stats.sectionkernels.good_sections_numpy`."""
+    cdef np.int64_t[:] t = np.ascontiguousarray(times, dtype=np.int64)
+    cdef Py_ssize_t n = t.shape[0], i, n_sections = 0
+    if n < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    cdef np.int64_t limit = <np.int64_t>(max_sample_period * 1000000000)
+    starts_array = np.empty(n + 1, dtype=np.int64)
+    ends_array = np.empty(n + 1, dtype=np.int64)
+    cdef np.int64_t[:] starts = starts_array, ends = ends_array
+    cdef bint good = previous_open, next_good
+    cdef bint look_ahead_good = (look_ahead_time != NO_TIME and
+                                 look_ahead_time - t[n - 1] <= limit)
+
+    if previous_open:
+        starts[0] = NO_TIME
+    for i in range(n):
+        if i < n - 1:
+            next_good = t[i + 1] - t[i] <= limit
+        else:
+            next_good = look_ahead_good
+        if next_good and not good:
+            starts[n_sections] = t[i]
+        elif good and not next_good:
+            ends[n_sections] = t[i]
+            n_sections += 1
+        good = next_good
+    if good:
+        ends[n_sections] = NO_TIME
+        n_sections += 1
+
+    # Drop sections which start and end at the same sample
+    cdef Py_ssize_t j = 0
+    for i in range(n_sections):
+        if starts[i] != ends[i] or starts[i] == NO_TIME:
+            starts[j] = starts[i]
+            ends[j] = ends[i]
+            j += 1
+    return starts_array[:j].copy(), ends_array[:j].copy()
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def threshold_sections_compiled(times, values, double threshold,
+                                np.int64_t open_start=NO_TIME):
+    """See `nilmtk.stats.sectionkernels.threshold_sections_numpy`."""
+    cdef np.int64_t[:] t = np.ascontiguousarray(times, dtype=np.int64)
+    cdef double[:] v = np.ascontiguousarray(values, dtype=np.float64)
+    cdef Py_ssize_t n = t.shape[0], i, n_sections = 0
+    starts_array = np.empty(n + 1, dtype=np.int64)
+    ends_array = np.empty(n + 1, dtype=np.int64)
+    cdef np.int64_t[:] starts = starts_array, ends = ends_array
+    cdef np.int64_t start = open_start
+    cdef bint above = open_start != NO_TIME
+    for i in range(n):
+        # NaN is not above the threshold
+        if v[i] > threshold:
+            if not above:
+                start = t[i]
+                above = True
+        elif above:
+            starts[n_sections] = start
+            ends[n_sections] = t[i]
+            n_sections += 1
+            above = False
+    return (starts_array[:n_sections].copy(), ends_array[:n_sections].copy(),
+            start if above else NO_TIME)
@@ -0,0 +1,321 @@
+from __future__ import print_function, division
+import numpy as np
+import pandas as pd
+from ..consts import JOULES_PER_KWH
+
+# One row per activation.  Times are UTC nanoseconds since the epoch,
+# `end_ns` is the first sample below the threshold, the energy is in kWh,
+# the peak in watts and the duration in seconds.
+ACTIVATION_DTYPE = np.dtype([('start_ns', np.int64), ('end_ns', np.int64),
+                             ('energy', np.float64), ('peak', np.float64),
+                             ('duration', np.float64)])
+
+# Marks that `ActivationFinder` has no previous sample
+NO_SAMPLE = np.iinfo(np.int64).min
+
+NS_PER_SECOND = 1000000000
+
+
+class ActivationFinder(object):
+    """Finds the activations of an appliance in a single vectorised pass
+    per chunk, i.e. the runs of samples at or above `on_power_threshold`.
+
+    Consecutive chunks are stitched together: a run which is still on at
+    the end of a chunk continues in the next chunk, unless the next chunk
+    starts more than `max_gap` seconds after the last sample.  Runs whose
+    start or end is not known are left out: runs which are already on at
+    the first sample or after a gap or NaN, and runs which are still on
+    at the last sample or before a gap or NaN.
+
+    Each sample holds until the next sample, so the energy of a run is
+    the sum of power times the time to the next sample over its samples.
+
+    Parameters
+    ----------
+    on_power_threshold : number
+        Watts
+    min_off_duration : number
+        Seconds.  Activations separated by less seconds of sub-threshold
+        power are joined into one, unless there is a gap or NaN between.
+    min_on_duration : number
+        Seconds.  Shorter activations are left out.
+    max_gap : number, optional
+        Seconds.  Defaults to unlimited.
+
+    Examples
+    --------
+    >>> finder = ActivationFinder(on_power_threshold=10, max_gap=60)
+    >>> for chunk in meter.power_series():
+    ...     finder.update(chunk.index, chunk.values)
+    >>> finder.activations()   # structured array of ACTIVATION_DTYPE
+    """
+
+    def __init__(self, on_power_threshold, min_off_duration=0,
+                 min_on_duration=0, max_gap=None):
+        self.on_power_threshold = on_power_threshold
+        self.min_off_duration = min_off_duration
+        self.min_on_duration = min_on_duration
+        self.max_gap = max_gap
+        self._tables = []
+        self._segments = []
+        self._segment = 0
+        self._last_time = NO_SAMPLE
+        self._last_value = np.nan
+        # Start, energy in joules and peak of a run still on at the last sample
+        self._open_run = None
+
+    def update(self, index, values):
+        """Processes the next chunk.
+
+        Parameters
+        ----------
+        index : pd.DatetimeIndex or int64 nanoseconds, sorted
+            Must start after the end of the previous chunk.
+        values : 1-D array
+            Power.  NaN where there is no sample.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return
+        times = _to_ns(index)
+        if self._last_time != NO_SAMPLE and self.max_gap is not None and \
+                times[0] - self._last_time > self.max_gap * NS_PER_SECOND:
+            self._start_segment()
+        stitched = self._last_time != NO_SAMPLE
+        if stitched:
+            # The last sample of the previous chunk now knows its successor
+            times = np.concatenate([[self._last_time], times])
+            values = np.concatenate([[self._last_value], values])
+        n_samples = len(values)
+        valid = ~np.isnan(values)
+        with np.errstate(invalid='ignore'):
+            on = values >= self.on_power_threshold
+
+        # Runs of on samples, [starts, ends) in samples
+        switches = np.diff(np.concatenate([[False], on, [False]]).astype(np.int8))
+        starts = np.flatnonzero(switches == 1)
+        ends = np.flatnonzero(switches == -1)
+
+        joules = np.zeros(n_samples + 1)
+        joules[1:-1] = np.cumsum(np.where(on[:-1], values[:-1], 0) *
+                                 (np.diff(times) / NS_PER_SECOND))
+        joules[-1] = joules[-2]
+        energy = joules[ends] - joules[starts]
+        if len(starts):
+            peaks = np.maximum.reduceat(
+                np.concatenate([np.where(on, values, -np.inf), [-np.inf]]),
+                np.ravel(np.column_stack([starts, ends])))[::2]
+        else:
+            peaks = np.empty(0)
+        invalid_before = np.concatenate([[0], np.cumsum(~valid)])
+        segments = self._segment + invalid_before[starts]
+
+        known_start = starts > 0
+        known_start[known_start] = valid[starts[known_start] - 1]
+        starts_ns = times[starts]
+        if self._open_run is not None and len(starts) and starts[0] == 0:
+            # Continue the open run of the previous chunk
+            starts_ns[0], open_energy, open_peak = self._open_run
+            energy[0] += open_energy
+            peaks[0] = max(peaks[0], open_peak)
+            known_start[0] = True
+
+        # The run at the end stays open until the next chunk
+        self._open_run = None
+        open_at_end = len(ends) > 0 and ends[-1] == n_samples
+        if open_at_end:
+            if known_start[-1]:
+                # Without the last sample, whose energy is not known yet
+                self._open_run = (starts_ns[-1], energy[-1], peaks[-1])
+            starts, ends, energy, peaks, segments, known_start, starts_ns = [
+                array[:-1] for array in
+                (starts, ends, energy, peaks, segments, known_start, starts_ns)]
+        complete = known_start & valid[np.minimum(ends, n_samples - 1)]
+
+        table = np.empty(complete.sum(), dtype=ACTIVATION_DTYPE)
+        table['start_ns'] = starts_ns[complete]
+        table['end_ns'] = times[ends[complete]]
+        table['energy'] = energy[complete]
+        table['peak'] = peaks[complete]
+        self._tables.append(table)
+        self._segments.append(segments[complete])
+
+        self._segment += invalid_before[-1]
+        self._last_time = times[-1]
+        self._last_value = values[-1]
+        if not valid[-1]:
+            self._start_segment()
+
+    def activations(self):
+        """Returns the activations found so far, after joining those
+        closer than `min_off_duration` and dropping those shorter than
+        `min_on_duration`.
+
+        Returns
+        -------
+        np.ndarray of ACTIVATION_DTYPE, sorted by time.  The energy is in
+        kWh.
+        """
+        if not self._tables:
+            return np.empty(0, dtype=ACTIVATION_DTYPE)
+        table = np.concatenate(self._tables)
+        segments = np.concatenate(self._segments)
+        if len(table) and self.min_off_duration > 0:
+            off_ns = table['start_ns'][1:] - table['end_ns'][:-1]
+            new = np.concatenate([
+                [True], (segments[1:] != segments[:-1]) |
+                (off_ns >= self.min_off_duration * NS_PER_SECOND)])
+            firsts = np.flatnonzero(new)
+            lasts = np.concatenate([firsts[1:], [len(table)]]) - 1
+            joined = np.empty(len(firsts), dtype=ACTIVATION_DTYPE)
+            joined['start_ns'] = table['start_ns'][firsts]
+            joined['end_ns'] = table['end_ns'][lasts]
+            joined['energy'] = np.add.reduceat(table['energy'], firsts)
+            joined['peak'] = np.maximum.reduceat(table['peak'], firsts)
+            table = joined
+        table['duration'] = (table['end_ns'] - table['start_ns']) / NS_PER_SECOND
+        table = table[table['duration'] >= self.min_on_duration]
+        table['energy'] /= JOULES_PER_KWH
+        return table
+
+    def _start_segment(self):
+        if self._open_run is not None or self._last_time != NO_SAMPLE:
+            self._segment += 1
+        self._open_run = None
+        self._last_time = NO_SAMPLE
+        self._last_value = np.nan
+
+
+class ActivityCounter(object):
+    """Counts in how many periods an appliance was on in each bin of the
+    period, e.g. on how many days it was on in each hour, from the
+    samples of consecutive chunks.
+
+    A bin counts as on if any of its samples is at or above
+    `on_power_threshold`, just like the maximum of the bin after
+    resampling.  Unlike `activity_histogram` this includes runs at the
+    edges of the data and next to gaps or NaNs, and does not extend a
+    run to the next sample.
+
+    Parameters
+    ----------
+    on_power_threshold : number
+        Watts
+    period_ns, bin_duration_ns : int
+        `bin_duration_ns` must exactly divide `period_ns`.  Periods are
+        aligned to the epoch in local time.
+    tz : str, optional
+        Time zone of the local time.  Defaults to UTC.
+    """
+
+    def __init__(self, on_power_threshold, period_ns, bin_duration_ns,
+                 tz=None):
+        self.on_power_threshold = on_power_threshold
+        self.period_ns = period_ns
+        self.bin_duration_ns = bin_duration_ns
+        self.tz = tz
+        # Unique numbers of the bins since the epoch which were on, per chunk
+        self._bins = []
+
+    def update(self, index, values):
+        """Processes the next chunk.
+
+        Parameters
+        ----------
+        index : pd.DatetimeIndex or int64 nanoseconds
+        values : 1-D array
+            Power.  NaN where there is no sample.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        with np.errstate(invalid='ignore'):
+            on = values >= self.on_power_threshold
+        if not on.any():
+            return
+        times = _local_ns(_to_ns(index)[on], self.tz)
+        self._bins.append(np.unique(times // self.bin_duration_ns))
+
+    def histogram(self):
+        """Returns np.ndarray of int, with `period_ns // bin_duration_ns`
+        bins."""
+        n_bins = self.period_ns // self.bin_duration_ns
+        if not self._bins:
+            return np.zeros(n_bins, dtype=int)
+        covered = np.unique(np.concatenate(self._bins))
+        return np.bincount(covered % n_bins, minlength=n_bins)
+
+
+def activation_histogram(activations, by='hour', tz=None, weights=None):
+    """Counts activations by the hour, weekday or month they start in.
+
+    Parameters
+    ----------
+    activations : np.ndarray of ACTIVATION_DTYPE
+    by : {'hour', 'weekday', 'month'}
+    tz : str, optional
+        Time zone of the local time.  Defaults to UTC.
+    weights : str, optional
+        Name of a field to sum instead of counting, e.g. 'energy'.
+
+    Returns
+    -------
+    np.ndarray with 24, 7 (Monday first) or 12 bins
+    """
+    n_bins = {'hour': 24, 'weekday': 7, 'month': 12}[by]
+    starts = pd.DatetimeIndex(activations['start_ns'].astype('M8[ns]'), tz='UTC')
+    if tz is not None:
+        starts = starts.tz_convert(tz)
+    bins = np.asarray(getattr(starts, by))
+    if by == 'month':
+        bins = bins - 1
+    weights = None if weights is None else activations[weights]
+    return np.bincount(bins, weights=weights, minlength=n_bins)
+
+
+def activity_histogram(activations, period_ns, bin_duration_ns, tz=None):
+    """Counts in how many periods there was activity in each bin of the
+    period, e.g. on how many days an appliance was on in each hour.
+
+    Only the bins covered by `activations` count, from their start to 
+    their end (the first sample below the threshold).  So activations 
+    which `ActivationFinder` leaves out, e.g. at the edges of the data 
+    or next to gaps, are missing.  Use `ActivityCounter` to count every 
+    bin with a sample above the threshold.
+
+    Parameters
+    ----------
+    activations : np.ndarray of ACTIVATION_DTYPE
+    period_ns, bin_duration_ns : int
+        `bin_duration_ns` must exactly divide `period_ns`.  Periods are
+        aligned to the epoch in local time.
+    tz : str, optional
+        Time zone of the local time.  Defaults to UTC.
+
+    Returns
+    -------
+    np.ndarray of int, with `period_ns // bin_duration_ns` bins
+    """
+    n_bins = period_ns // bin_duration_ns
+    if not len(activations):
+        return np.zeros(n_bins, dtype=int)
+    starts = _local_ns(activations['start_ns'], tz)
+    # The last sample which is on is before the end
+    lasts = _local_ns(activations['end_ns'], tz) - 1
+    first_bins = starts // bin_duration_ns
+    n_covered = np.maximum(lasts // bin_duration_ns - first_bins + 1, 1)
+    offsets = np.arange(n_covered.sum()) - np.repeat(
+        np.cumsum(n_covered) - n_covered, n_covered)
+    covered = np.unique(np.repeat(first_bins, n_covered) + offsets)
+    return np.bincount(covered % n_bins, minlength=n_bins)
+
+
+def _local_ns(times, tz):
+    if tz is None:
+        return times
+    index = pd.DatetimeIndex(times.astype('M8[ns]'), tz='UTC').tz_convert(tz)
+    return index.tz_localize(None).asi8
+
+
+def _to_ns(index):
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8
+    return np.asarray(index, dtype=np.int64)
@@ -0,0 +1,86 @@
+from __future__ import print_function, division
+import numpy as np
+
+
+class CorrelationAccumulator(object):
+    """Computes the Pearson correlation between all pairs of many meters
+    in a single pass over their data.
+
+    The power is passed in aligned 2-D blocks: one row per timestamp and
+    one column per meter, with NaN where a meter has no sample.  Each pair
+    of columns is correlated over the rows in which both have a sample,
+    like `pd.DataFrame.corr` does.
+
+    For every pair the accumulator keeps the number of rows, the means,
+    the sums of squared deviations from the means and the co-moment.  The
+    statistics of a block are computed around the means of the block and
+    then merged into the running statistics with the update of Chan et
+    al., the block-wise form of Welford's algorithm.  Unlike sums of
+    squares and cross-products this does not lose precision when the
+    power is large compared to its variation.
+
+    Parameters
+    ----------
+    n_columns : int
+
+    Examples
+    --------
+    >>> accumulator = CorrelationAccumulator(3)
+    >>> for block in blocks:
+    ...     accumulator.update(block.values)
+    >>> accumulator.correlation()   # 3 x 3 matrix
+    """
+
+    def __init__(self, n_columns):
+        shape = (n_columns, n_columns)
+        # [i, j] refers to column i in the rows where column j is valid
+        self._n = np.zeros(shape)
+        self._mean = np.zeros(shape)
+        self._m2 = np.zeros(shape)
+        # Co-moment of columns i and j
+        self._comoment = np.zeros(shape)
+
+    def update(self, values):
+        """Adds the next block.
+
+        Parameters
+        ----------
+        values : 2-D array, shape (number of rows, number of columns)
+            NaN where a column has no sample.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        valid = ~np.isnan(values)
+        weights = valid.astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shift = np.nansum(values, axis=0) / weights.sum(axis=0)
+        shift[np.isnan(shift)] = 0.
+        shifted = np.where(valid, values - shift, 0.)
+
+        # Statistics of the block, around the means of the block
+        n = weights.T.dot(weights)
+        sums = shifted.T.dot(weights)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(n > 0, sums / n, 0.)
+        m2 = (shifted * shifted).T.dot(weights) - sums * mean
+        comoment = shifted.T.dot(shifted) - sums * mean.T
+        mean += shift[:, np.newaxis]
+
+        # Merge with the previous blocks
+        n_total = self._n + n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = np.where(n_total > 0, n / n_total, 0.)
+        delta = mean - self._mean
+        self._m2 += m2 + delta * delta * self._n * fraction
+        self._comoment += comoment + delta * delta.T * self._n * fraction
+        self._mean += delta * fraction
+        self._n = n_total
+
+    def correlation(self):
+        """Returns the N x N matrix of correlations.  NaN for pairs with
+        less than two common rows or a constant column."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            correlation = self._comoment / np.sqrt(self._m2 * self._m2.T)
+        correlation[(self._n < 2) | ~np.isfinite(correlation)] = np.nan
+        return np.clip(correlation, -1., 1.)
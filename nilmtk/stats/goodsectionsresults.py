@@ -21,6 +21,7 @@ class GoodSectionsResults(Results):
     """
     
     name = "good_sections"
+    incremental = True
 
     def __init__(self, max_sample_period):
         self.max_sample_period_td = timedelta(seconds=max_sample_period)
@@ -85,12 +86,27 @@ class GoodSectionsResults(Results):
         if sections and sections.count() > 0:
             sections[-1].include_end = True
             if sections[-1].end is None:
-                sections[-1,1] = end_date_of_prev_row  # HIER MUSSTE ICH AUFPASSEN, DASS ICH UEBERSCHREIBE!
+                sections._df.iloc[-1,1] = end_date_of_prev_row  # HIER MUSSTE ICH AUFPASSEN, DASS ICH UEBERSCHREIBE!
 
         sections._df.reset_index(drop=True, inplace=True)
         self._data = sections
         #return sections
 
+    def update(self, new_result):
+        """Merges the finalized sections of `new_result`, which were
+        computed for other timeframes, into the finalized sections of self.
+        Sections which meet at the border of two timeframes are joined.
+
+        Parameters
+        ----------
+        new_result : GoodSectionsResults
+        """
+        if not isinstance(new_result, self.__class__):
+            raise TypeError("new_results must be of type '{}'"
+                            .format(self.__class__))
+        sections = TimeFrameGroup.union_many([self._data, new_result._data])
+        self._data = sections.merge_shorter_gaps_than(self.max_sample_period_td)
+
     def unify(self, other):
         super(GoodSectionsResults, self).unify(other)
         for start, row in self._data.iterrows():
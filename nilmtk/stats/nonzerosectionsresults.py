@@ -20,6 +20,7 @@ class NonZeroSectionsResults(Results):
     """
     
     name = "nonzero_sections"
+    incremental = True
 
     def __init__(self, max_sample_rate):
         # Used to know when to combine
@@ -62,6 +63,21 @@ class NonZeroSectionsResults(Results):
         self._data = TimeFrameGroup(starts_and_ends={'starts': starts, 'ends': ends}).merge_shorter_gaps_than(rate)
 
 
+    def update(self, new_result):
+        """Adds the finalized sections of `new_result`, computed for
+        other timeframes, to self.  As in `finalize`, gaps shorter than
+        the max sample rate are closed.
+
+        Parameters
+        ----------
+        new_result : NonZeroSectionsResults
+        """
+        if not isinstance(new_result, self.__class__):
+            raise TypeError("new_results must be of type '{}'"
+                            .format(self.__class__))
+        sections = TimeFrameGroup.union_many([self._data, new_result._data])
+        self._data = sections.merge_shorter_gaps_than(pd.Timedelta(seconds=self.max_sample_rate))
+
     def unify(self, other):
         raise Exception("Did not try this yet for the new nonzeroresults")
         super(NonZeroSectionsResults, self).unify(other)
@@ -1,16 +1,15 @@
 from __future__ import print_function, division
-#from .accelerators_stat import get_overbasepower_sections_fast
 import numpy as np
 from numpy import diff, concatenate
 import gc
 from .overbasepowersectionsresults import OverBasepowerSectionsResults
 from ..timeframe import TimeFrame
 from ..utils import timedelta64_to_secs
-from ..node import Node
+from .thresholdsections import ThresholdSections
 from ..timeframe import list_of_timeframes_from_list_of_dicts, timeframe_from_dict
 import pandas as pd
 
-class OverBasepowerSections(Node):
+class OverBasepowerSections(ThresholdSections):
     """Locate sections of data where the samples are bigger 
     larger 0. This is mostly used for disaggregated powerflows
     where there is really a power of 0 when the appliance 
@@ -22,59 +21,12 @@ class OverBasepowerSections(Node):
     Only regards sections longer than 1 step. Because otherwise to many      
     problems.
 
-    Attributes
-    ----------
-    previous_chunk_ended_with_open_ended_overbasepower_section : bool
+    See `ThresholdSections`.
     """
 
     postconditions =  {'statistics': {'overbasepower_sections': []}}
     results_class = OverBasepowerSectionsResults
-        
-    def reset(self):
-        ''' nothing to do here '''
-        pass
-
-    def process(self):
-        metadata = self.upstream.get_metadata()
-        self.check_requirements()
-        self.results = OverBasepowerSectionsResults(2.3) #TODO
-        for chunk in self.upstream.process():
-            self._process_chunk(chunk)
-            yield chunk
-
-    def _process_chunk(self, df):
-        """
-        Only checks where the chunk has overbasepower values.
-
-        Parameters
-        ----------
-        df : pd.DataFrame
-            with attributes:
-            - look_ahead : pd.DataFrame
-            - timeframe : nilmtk.TimeFrame
-
-        Returns
-        -------
-        None
-
-        Notes
-        -----
-        Updates `self.results`
-            Each overbasepower section in `df` is marked with a TimeFrame.
-            If this df ends with an open-ended overbasepower section (assessed by
-            examining df.look_ahead) then the last TimeFrame will have
-            `end=None`. If this df starts with an open-ended overbasepower section
-            then the first TimeFrame will have `start=None`.
-        """
-        # Retrieve relevant metadata
-        timeframe = df.timeframe
-
-        # Process dataframe
-        overbasepower_sections_starts, overbasepower_sections_ends = get_overbasepower_sections(df)#_fast(df)
-
-        # Update self.results
-        #if overbasepower_sections:
-        self.results.append(timeframe, {'sections' : [{'start': overbasepower_sections_starts, 'end': overbasepower_sections_ends}]})
+    threshold = 15
 
 
 def get_overbasepower_sections(df):
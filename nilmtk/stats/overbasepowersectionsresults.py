@@ -19,6 +19,7 @@ class OverBasepowerSectionsResults(Results):
     """
     
     name = "overbasepower_sections"
+    incremental = True
 
     def __init__(self, max_sample_rate):
         # Used to know when to combine
@@ -62,6 +63,20 @@ class OverBasepowerSectionsResults(Results):
         self._data = TimeFrameGroup(starts_and_ends={'starts': starts, 'ends': ends})#.merge_shorter_gaps_than(rate) TODO: Merge needed?
 
 
+    def update(self, new_result):
+        """Adds the finalized sections of `new_result`, computed for
+        other timeframes, to self.  Only sections which touch are joined.
+
+        Parameters
+        ----------
+        new_result : OverBasepowerSectionsResults
+        """
+        if not isinstance(new_result, self.__class__):
+            raise TypeError("new_results must be of type '{}'"
+                            .format(self.__class__))
+        sections = TimeFrameGroup.union_many([self._data, new_result._data])
+        self._data = sections.merge_shorter_gaps_than(0)
+
     def unify(self, other):
         raise Exception("Did not try this yet for the new nonzeroresults")
         super(OverBasepowerSectionsResults, self).unify(other)
@@ -0,0 +1,165 @@
+"""Kernels which locate sections in the chunks of a meter.
+
+All kernels work on int64 arrays of nanoseconds since the epoch (UTC),
+e.g. `df.index.asi8`, and return the sections as a pair of int64 arrays
+`(starts, ends)`, without building a TimeFrame per section.  Open edges,
+i.e. sections which started in a previous chunk or continue in the next
+one, are marked with `NO_TIME`.  The state which has to be carried from
+one chunk to the next is passed in and returned explicitly.
+
+The kernels are implemented twice: in NumPy in this module and compiled
+in `accelerators_stat.pyx`.  Both give identical results.  The compiled
+ones are used if the extension has been built (see setup.py), which
+`COMPILED` tells.
+"""
+from __future__ import print_function, division
+import numpy as np
+import pandas as pd
+
+# Marks an open edge of a section
+NO_TIME = np.iinfo(np.int64).min
+NS_PER_SECOND = 1000000000
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def good_sections_numpy(times, max_sample_period, look_ahead_time=NO_TIME,
+                        previous_open=False):
+    """Locates the sections in which no two consecutive samples are more
+    than `max_sample_period` apart.
+
+    Parameters
+    ----------
+    times : np.ndarray of int64
+        Sorted times of the valid samples of the chunk in ns.
+    max_sample_period : number
+        Seconds.
+    look_ahead_time : int64, optional
+        Time of the first valid sample after the chunk, NO_TIME if there
+        is none.
+    previous_open : bool, optional
+        Whether the previous chunk ended with an open section.
+
+    Returns
+    -------
+    starts, ends : np.ndarray of int64
+        The first start is NO_TIME if the section continues from the
+        previous chunk and the last end is NO_TIME if it continues in the
+        next chunk.  Both are empty if the chunk has less than 2 samples,
+        in which case the open section state does not change.
+    """
+    times = np.asarray(times, dtype=np.int64)
+    n = len(times)
+    if n < 2:
+        return _EMPTY, _EMPTY
+    limit = max_sample_period * NS_PER_SECOND
+
+    # Determine start and end of good sections
+    check = np.empty(n, dtype=np.int8)
+    check[0] = previous_open
+    check[1:] = np.diff(times) <= limit
+    transitions = np.diff(check)
+    starts = times[:-1][transitions == 1]
+    ends = times[:-1][transitions == -1]
+
+    # Use look_ahead to see if we need to append a start or an end
+    last = times[-1]
+    look_ahead_valid = look_ahead_time != NO_TIME
+    look_ahead_good = look_ahead_valid and look_ahead_time - last <= limit
+    if check[-1]:
+        if not look_ahead_good:
+            ends = np.append(ends, last)
+    elif look_ahead_good:
+        starts = np.append(starts, last)
+
+    # Does this chunk end with an open section?
+    all_closed = (len(ends) > len(starts) or
+                  len(ends) == len(starts) and not previous_open)
+    if previous_open:
+        starts = np.append(NO_TIME, starts)
+    if not all_closed:
+        ends = np.append(ends, NO_TIME)
+
+    keep = (starts != ends) | (starts == NO_TIME)
+    return starts[keep], ends[keep]
+
+
+def threshold_sections_numpy(times, values, threshold, open_start=NO_TIME):
+    """Locates the sections in which `values` are above `threshold`.
+
+    A section starts at the first sample above the threshold and ends at
+    the first sample which is not (NaN is not).  A section which is still
+    open at the end of the chunk is not returned but its start is, so that
+    it can be passed on to the next chunk.
+
+    Parameters
+    ----------
+    times : np.ndarray of int64
+        Sorted times of the samples in ns.
+    values : np.ndarray
+    threshold : number
+    open_start : int64, optional
+        Start of the section which is open at the end of the previous
+        chunk, NO_TIME if there is none.
+
+    Returns
+    -------
+    starts, ends : np.ndarray of int64
+        The sections which end in this chunk.
+    open_start : int64
+        Start of the section which is open at the end of this chunk, or
+        NO_TIME.
+    """
+    times = np.asarray(times, dtype=np.int64)
+    if len(times) == 0:
+        return _EMPTY, _EMPTY, open_start
+    above = np.empty(len(times) + 1, dtype=np.int8)
+    above[0] = open_start != NO_TIME
+    np.greater(values, threshold, out=above[1:])
+    transitions = np.diff(above)
+    starts = times[transitions == 1]
+    ends = times[transitions == -1]
+    if above[0]:
+        starts = np.append(open_start, starts)
+    if above[-1]:
+        open_start = starts[-1]
+        starts = starts[:-1]
+    else:
+        open_start = NO_TIME
+    return starts, ends, open_start
+
+
+try:
+    from .accelerators_stat import (
+        good_sections_compiled, threshold_sections_compiled)
+except ImportError:
+    COMPILED = False
+    good_sections = good_sections_numpy
+    threshold_sections = threshold_sections_numpy
+else:
+    COMPILED = True
+    good_sections = good_sections_compiled
+    threshold_sections = threshold_sections_compiled
+
+
+def sections_frame(starts, ends, tz=None):
+    """Converts the result of a kernel into the DataFrame of a
+    TimeFrameGroup.  Open edges become NaT, i.e. None in TimeFrames."""
+    return pd.DataFrame({'section_start': to_timestamps(starts, tz),
+                         'section_end': to_timestamps(ends, tz)})
+
+
+def to_timestamps(times, tz=None):
+    """Converts int64 ns to a DatetimeIndex in `tz`.  NO_TIME becomes NaT."""
+    index = pd.DatetimeIndex(np.asarray(times, dtype='datetime64[ns]'))
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz)
+    return index
+
+
+def times_of(df):
+    """Returns the sorted times of the rows of `df` without NaNs in ns."""
+    index = df.dropna().index
+    times = index.asi8
+    if not index.is_monotonic_increasing:
+        times = np.sort(times)
+    return times
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+import numpy as np
+import pandas as pd
+from ..activations import (ActivationFinder, ActivityCounter,
+                           activation_histogram, activity_histogram)
+from ...electric import get_activations
+
+NS_PER_HOUR = 3600 * 10**9
+
+
+def find(index, values, n_chunks=1, **kwargs):
+    finder = ActivationFinder(**kwargs)
+    for rows in np.array_split(np.arange(len(index)), n_chunks):
+        finder.update(index[rows], values[rows])
+    return finder.activations()
+
+
+class TestActivations(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(42)
+        n_samples = 20000
+        self.index = pd.date_range('2014-01-01', periods=n_samples, freq='6S',
+                                   tz='Europe/London')
+        on = (np.cumsum(rng.rand(n_samples) < 1. / 50) % 2).astype(bool)
+        self.values = np.where(on, 100 + rng.rand(n_samples) * 50,
+                               rng.rand(n_samples) * 3)
+        self.values[rng.rand(n_samples) < 1E-3] = np.nan
+
+    def test_like_get_activations(self):
+        legacy = get_activations(pd.Series(self.values, index=self.index),
+                                 border=1, on_power_threshold=10,
+                                 min_on_duration=30)
+        for n_chunks in [1, 7, 500]:
+            activations = find(self.index, self.values, n_chunks,
+                               on_power_threshold=10, min_on_duration=30,
+                               max_gap=6)
+            # The first sample of an activation is the second after border
+            np.testing.assert_array_equal(
+                activations['start_ns'], [a.index[2].value for a in legacy])
+            np.testing.assert_array_equal(
+                activations['end_ns'], [a.index[-1].value for a in legacy])
+            self.assertTrue((activations['duration'] >= 30).all())
+
+        activation = legacy[0].iloc[2:-1]
+        self.assertAlmostEqual(activations['peak'][0], activation.max())
+        self.assertAlmostEqual(activations['energy'][0],
+                               activation.sum() * 6 / 3.6E6)
+
+    def test_join_and_gaps(self):
+        index = pd.date_range('2014-01-01', periods=12, freq='1min', tz='UTC')
+        values = np.array([0, 50, 50, 0, 60, 0, 0, 0, 70, 0, 80, 0.])
+        self.assertEqual(len(find(index, values, on_power_threshold=10)), 4)
+        activations = find(index, values, 3, on_power_threshold=10,
+                           min_off_duration=120)
+        self.assertEqual(len(activations), 2)
+        self.assertEqual(activations['peak'].tolist(), [60, 80])
+        self.assertEqual(activations['duration'].tolist(), [240, 180])
+        self.assertAlmostEqual(activations['energy'][0], 160 * 60 / 3.6E6)
+
+        # Runs next to a gap or at the edges are left out
+        finder = ActivationFinder(10, max_gap=60)
+        finder.update(index[:3], values[:3])
+        finder.update(index[4:], values[4:])
+        self.assertEqual(finder.activations()['peak'].tolist(), [70, 80])
+        self.assertEqual(len(find(index[1:-1], values[1:-1],
+                                  on_power_threshold=10)), 2)
+
+    def test_histograms(self):
+        activations = find(self.index, self.values, on_power_threshold=10)
+        by_hour = activation_histogram(activations, 'hour', tz='Europe/London')
+        self.assertEqual(len(by_hour), 24)
+        self.assertEqual(by_hour.sum(), len(activations))
+        by_weekday = activation_histogram(activations, 'weekday',
+                                          weights='energy')
+        self.assertAlmostEqual(by_weekday.sum(), activations['energy'].sum())
+        self.assertEqual(len(activation_histogram(activations, 'month')), 12)
+
+        # On how many of the days an appliance was on in each hour
+        hist = activity_histogram(activations, 24 * NS_PER_HOUR, NS_PER_HOUR,
+                                  tz='Europe/London')
+        when_on = pd.Series(self.values >= 10, index=self.index)
+        expected = when_on.resample('H').max().groupby(lambda t: t.hour).sum()
+        np.testing.assert_array_equal(hist, expected.values)
+
+    def test_activity_counter(self):
+        # On at the first and last sample, with NaNs and a gap of 5 hours
+        values = self.values.copy()
+        values[:3] = values[-3:] = 120
+        keep = np.ones(len(values), dtype=bool)
+        keep[5000:8000] = False
+        index, values = self.index[keep], values[keep]
+        counter = ActivityCounter(10, 24 * NS_PER_HOUR, NS_PER_HOUR,
+                                  tz='Europe/London')
+        for rows in np.array_split(np.arange(len(index)), 7):
+            counter.update(index[rows], values[rows])
+        when_on = pd.Series(values >= 10, index=index)
+        expected = when_on.resample('H').max().groupby(lambda t: t.hour).sum()
+        np.testing.assert_array_equal(counter.histogram(), expected.values)
+        self.assertEqual(counter.histogram()[11], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+import numpy as np
+import pandas as pd
+from ..correlation import CorrelationAccumulator
+
+
+class TestCorrelation(unittest.TestCase):
+
+    def test_blocks(self):
+        rng = np.random.RandomState(42)
+        values = rng.randn(1000, 4)
+        values[:, 1] += values[:, 0]
+        values[:, 3] = -values[:, 2]
+        # Large offsets must not cost precision
+        values += 1E6
+        values[rng.rand(*values.shape) < 0.2] = np.nan
+        values[:300, 2] = np.nan
+        accumulator = CorrelationAccumulator(4)
+        for block in np.array_split(values, 7):
+            accumulator.update(block)
+        correlation = accumulator.correlation()
+        np.testing.assert_allclose(correlation, pd.DataFrame(values).corr().values,
+                                   atol=1E-9)
+        self.assertAlmostEqual(correlation[2, 3], -1)
+
+    def test_no_common_samples(self):
+        accumulator = CorrelationAccumulator(3)
+        accumulator.update([[1., np.nan, 5.], [2., np.nan, 5.], [np.nan, 3., 5.]])
+        correlation = accumulator.correlation()
+        self.assertAlmostEqual(correlation[0, 0], 1)
+        self.assertTrue(np.isnan(correlation[0, 1]))
+        # Constant column
+        self.assertTrue(np.isnan(correlation[0, 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
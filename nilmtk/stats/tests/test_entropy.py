@@ -0,0 +1,69 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+import numpy as np
+from ..entropy import knn_entropy, knn_mutual_information, sample_rows
+
+
+class TestEntropy(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.RandomState(42)
+
+    def test_entropy(self):
+        # Uniform on [0, 1] has 0 bits, standard normal 0.5 log2(2 pi e)
+        self.assertAlmostEqual(knn_entropy(self.rng.rand(5000), random_state=0),
+                               0, delta=0.05)
+        normal = self.rng.randn(5000)
+        self.assertAlmostEqual(knn_entropy(normal, random_state=0),
+                               0.5 * np.log2(2 * np.pi * np.e), delta=0.05)
+        self.assertAlmostEqual(knn_entropy(normal, base=np.e, random_state=0),
+                               0.5 * np.log(2 * np.pi * np.e), delta=0.05)
+        # NaNs are left out
+        with_nans = np.concatenate([normal, [np.nan] * 100])
+        self.assertEqual(knn_entropy(with_nans, random_state=0),
+                         knn_entropy(normal, random_state=0))
+        with self.assertRaises(ValueError):
+            knn_entropy([1., 2., 3.], k=3)
+
+    def test_mutual_information(self):
+        x = self.rng.randn(5000)
+        noise = self.rng.randn(5000)
+        self.assertAlmostEqual(knn_mutual_information(x, noise, random_state=0),
+                               0, delta=0.05)
+        rho = 0.8
+        y = rho * x + np.sqrt(1 - rho ** 2) * noise
+        self.assertAlmostEqual(knn_mutual_information(x, y, random_state=0),
+                               -0.5 * np.log2(1 - rho ** 2), delta=0.05)
+        with self.assertRaises(ValueError):
+            knn_mutual_information(x, y[:-1])
+
+    def test_subsampling(self):
+        x = self.rng.randn(50000)
+        exact = knn_entropy(x, max_samples=None)
+        estimate, error = knn_entropy(x, max_samples=2000, random_state=0,
+                                      return_error=True)
+        self.assertGreater(error, 0)
+        # Within the standard error plus the bias of the smaller sample
+        self.assertLess(abs(estimate - exact), 4 * error + 0.02)
+        self.assertEqual(knn_entropy(x, max_samples=2000, random_state=1),
+                         knn_entropy(x, max_samples=2000, random_state=1))
+
+    def test_sample_rows(self):
+        blocks = [np.ones((1000, 2)) * i for i in range(10)]
+        rows = sample_rows(blocks, max_samples=500, n_rows=10000,
+                           random_state=0)
+        self.assertEqual(rows.shape[1], 2)
+        self.assertTrue(800 < len(rows) < 1200)
+        self.assertEqual(len(sample_rows(blocks, max_samples=None)), 10000)
+        self.assertEqual(sample_rows([]).shape, (0, 0))
+        no_rows = sample_rows([], n_columns=2)
+        self.assertEqual(no_rows.shape, (0, 2))
+        with self.assertRaises(ValueError):
+            knn_mutual_information(no_rows[:, 0], no_rows[:, 1])
+        with self.assertRaises(ValueError):
+            knn_entropy(np.full(10, np.nan))
+
+
+if __name__ == '__main__':
+    unittest.main()
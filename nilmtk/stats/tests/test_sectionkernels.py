@@ -0,0 +1,81 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+import numpy as np
+from ..sectionkernels import (NO_TIME, NS_PER_SECOND, COMPILED,
+                              good_sections_numpy, threshold_sections_numpy,
+                              sections_frame)
+
+
+def seconds(*values):
+    return np.array(values, dtype=np.int64) * NS_PER_SECOND
+
+
+class TestSectionKernels(unittest.TestCase):
+
+    def test_good_sections(self):
+        times = seconds(0, 5, 10, 30, 35, 60)
+        starts, ends = good_sections_numpy(times, 10)
+        np.testing.assert_array_equal(starts, seconds(0, 30))
+        np.testing.assert_array_equal(ends, seconds(10, 35))
+
+    def test_good_sections_across_chunks(self):
+        times = seconds(0, 5, 10, 15, 20, 25, 30)
+        chunks = [times[:3], times[3:5], times[5:]]
+        look_aheads = [times[3], times[5], NO_TIME]
+        previous_open = False
+        all_starts, all_ends = [], []
+        for chunk, look_ahead in zip(chunks, look_aheads):
+            starts, ends = good_sections_numpy(chunk, 10, look_ahead,
+                                               previous_open)
+            previous_open = len(ends) > 0 and ends[-1] == NO_TIME
+            all_starts.extend(starts)
+            all_ends.extend(ends)
+        self.assertEqual(all_starts, [0, NO_TIME, NO_TIME])
+        self.assertEqual(all_ends, [NO_TIME, NO_TIME, 30 * NS_PER_SECOND])
+
+    def test_threshold_sections_across_chunks(self):
+        times = seconds(0, 1, 2, 3, 4, 5)
+        values = np.array([0, 20, 20, np.nan, 20, 20])
+        starts, ends, open_start = threshold_sections_numpy(
+            times[:5], values[:5], 15)
+        np.testing.assert_array_equal(starts, seconds(1))
+        np.testing.assert_array_equal(ends, seconds(3))
+        self.assertEqual(open_start, 4 * NS_PER_SECOND)
+        starts, ends, open_start = threshold_sections_numpy(
+            times[5:], values[5:], 15, open_start)
+        self.assertEqual(len(starts), 0)
+        self.assertEqual(open_start, 4 * NS_PER_SECOND)
+
+    def test_compiled_matches_numpy(self):
+        if not COMPILED:
+            self.skipTest("accelerators_stat is not built")
+        from ..sectionkernels import good_sections, threshold_sections
+        rng = np.random.RandomState(42)
+        for _ in range(200):
+            n = rng.randint(0, 20)
+            times = np.cumsum(rng.choice([5, 10, 20], size=n)) * NS_PER_SECOND
+            look_ahead = NO_TIME if n == 0 else times[-1] + 10 * NS_PER_SECOND
+            previous_open = bool(rng.randint(2))
+            expected = good_sections_numpy(times, 10, look_ahead, previous_open)
+            result = good_sections(times, 10, look_ahead, previous_open)
+            for a, b in zip(expected, result):
+                np.testing.assert_array_equal(a, b)
+
+            values = rng.choice([0., 20., np.nan], size=n)
+            expected = threshold_sections_numpy(times, values, 15)
+            result = threshold_sections(times, values, 15)
+            for a, b in zip(expected[:2], result[:2]):
+                np.testing.assert_array_equal(a, b)
+            self.assertEqual(expected[2], result[2])
+
+    def test_sections_frame(self):
+        df = sections_frame(seconds(0, 10), np.array([NO_TIME, NO_TIME]),
+                            tz='Europe/London')
+        self.assertEqual(list(df.columns), ['section_start', 'section_end'])
+        self.assertEqual(str(df['section_start'].dt.tz), 'Europe/London')
+        self.assertTrue(df['section_end'].isnull().all())
+
+
+if __name__ == '__main__':
+    unittest.main()
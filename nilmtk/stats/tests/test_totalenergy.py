@@ -1,7 +1,8 @@
 #!/usr/bin/python
 from __future__ import print_function, division
 import unittest
-from ..totalenergy import TotalEnergy, _energy_for_power_series
+from ..totalenergy import (TotalEnergy, EnergyIntegrator, energy_per_column,
+                           _energy_for_power_series)
 from ...preprocessing import Clip
 from ... import TimeFrame, ElecMeter, HDFDataStore
 from ...elecmeter import ElecMeterID
@@ -44,6 +45,39 @@ class TestEnergy(unittest.TestCase):
         kwh = _energy_for_power_series(df, max_sample_period=15)
         self.assertAlmostEqual(true_kwh, kwh)
 
+    def test_energy_per_column(self):
+        index = pd.date_range('2014-03-29', periods=1000, freq='5min',
+                              tz='Europe/London')
+        rng = np.random.RandomState(42)
+        df = pd.DataFrame(rng.rand(len(index), 3) * 100, index=index)
+        df[df > 80] = np.nan
+        df.iloc[100:200, 1] = np.nan
+        max_sample_periods = [400, 0, 1000]
+        true_kwh = [_energy_for_power_series(df[col].dropna(), max_sample_period)
+                    for col, max_sample_period in zip(df.columns, max_sample_periods)]
+        kwh = energy_per_column(df, max_sample_periods)
+        np.testing.assert_allclose(kwh.values, true_kwh)
+
+        # Blocks are stitched together
+        integrator = EnergyIntegrator(max_sample_periods, per_period='D')
+        for start in range(0, len(df), 150):
+            block = df.iloc[start:start+150]
+            integrator.update(block.index, block.values)
+        per_day = integrator.energy()
+        self.assertEqual(len(per_day), 4)
+        self.assertEqual(per_day.index[1], pd.Timestamp('2014-03-30', tz='Europe/London'))
+        np.testing.assert_allclose(per_day.sum().values, true_kwh)
+
+        # A day which starts in a DST gap starts at the end of the gap
+        index = pd.date_range('2014-10-18 12:00', periods=48, freq='H',
+                              tz='America/Sao_Paulo')
+        per_day = energy_per_column(pd.DataFrame({'a': np.ones(48)}, index=index),
+                                    [3600], per_period='D')
+        self.assertEqual(list(per_day.index),
+                         [pd.Timestamp('2014-10-18', tz='America/Sao_Paulo'),
+                          pd.Timestamp('2014-10-19 01:00', tz='America/Sao_Paulo'),
+                          pd.Timestamp('2014-10-20', tz='America/Sao_Paulo')])
+
     def test_pipeline(self):
         meter = ElecMeter(store=self.datastore, 
                           metadata=self.meter_meta, 
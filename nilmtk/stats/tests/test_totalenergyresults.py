@@ -1,8 +1,10 @@
 #!/usr/bin/python
 from __future__ import print_function, division
 import unittest
+from unittest.mock import patch
+import pandas as pd
 from ..totalenergyresults import TotalEnergyResults
-from ... import TimeFrame
+from ... import TimeFrame, results
 
 class TestEnergyResults(unittest.TestCase):
 
@@ -48,5 +50,40 @@ class TestEnergyResults(unittest.TestCase):
         with self.assertRaises(ValueError):
             er.append(tf7, {'active':20})
 
+    def test_append_many(self):
+        er = TotalEnergyResults()
+        days = pd.date_range('2012-01-01', periods=1001, freq='D')
+        # Out of order, but without overlaps.  The existing rows are only
+        # swept once, later rows are checked by a binary search.
+        with patch('nilmtk.results._check_for_overlap',
+                   wraps=results._check_for_overlap) as sweep:
+            for i in list(range(500, 1000)) + list(range(499, -1, -1)):
+                er.append(TimeFrame(days[i], days[i+1]), {'active': i})
+        self.assertEqual(sweep.call_count, 1)
+        self.assertTrue(er._data.index.equals(days[:-1]))
+        self.assertEqual(er._data['active'].tolist(), list(range(1000)))
+        self.assertEqual(er._data['end'].iloc[-1], days[-1])
+        with self.assertRaises(ValueError):
+            er.append(TimeFrame('2012-03-01 06:00', '2012-03-01 18:00'),
+                      {'active': 1})
+        er.check_for_overlap()
+
+    def test_update(self):
+        er = TotalEnergyResults()
+        er.append(TimeFrame('2012-01-01', '2012-01-02'), {'active': 20})
+        er.append(TimeFrame('2012-01-03', '2012-01-04'), {'active': 30})
+        other = TotalEnergyResults()
+        other.append(TimeFrame('2012-01-02', '2012-01-03'),
+                     {'reactive': 5, 'active': 10})
+        er.update(other)
+        self.assertEqual(list(er._data.columns), ['end', 'active', 'reactive'])
+        self.assertEqual(er._data['active'].tolist(), [20, 10, 30])
+        self.assertEqual(er._data['reactive'].sum(), 5)
+        # The buffered rows of `er` are merged with its existing rows
+        er.append(TimeFrame('2012-01-04', '2012-01-05'), {'active': 40})
+        self.assertEqual(er._data['active'].sum(), 100)
+        with self.assertRaises(ValueError):
+            er.update(other)
+
 if __name__ == '__main__':
     unittest.main()
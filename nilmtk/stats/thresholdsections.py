@@ -0,0 +1,85 @@
+from __future__ import print_function, division
+import pandas as pd
+from .sectionkernels import NO_TIME, threshold_sections, to_timestamps
+from ..node import Node
+
+
+class ThresholdSections(Node):
+    """Base class of the nodes which locate the sections of data where
+    the load is above `threshold`.
+
+    Subclasses set `threshold`, `postconditions` and `results_class`,
+    which is constructed with the device's max_sample_period.
+
+    Attributes
+    ----------
+    threshold : number
+        Samples above this power belong to a section.
+    _open_start : int64
+        Start in ns of the section which continues in the next chunk.
+    """
+
+    requirements = {'device': {'max_sample_period': 'ANY VALUE'}}
+    threshold = 0
+
+    def reset(self):
+        # Start of the section which is open at the end of the last chunk
+        self._open_start = NO_TIME
+        # The results of the last chunk are only appended with the
+        # next chunk, when it is known whether its open section ends
+        self._pending = None
+
+    def process(self):
+        metadata = self.upstream.get_metadata()
+        self.check_requirements()
+        self.results = self.results_class(
+            metadata['device']['max_sample_period'])
+        for chunk in self.upstream.process():
+            self._process_chunk(chunk)
+            yield chunk
+        self._append_pending(close_open_section=True)
+
+    def _process_chunk(self, df):
+        """
+        Only checks where the chunk has values above `self.threshold`.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            with attributes:
+            - look_ahead : pd.DataFrame
+            - timeframe : nilmtk.TimeFrame
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        Updates `self.results`
+            Each section is appended together with the chunk in which it
+            ends.  A section which is still open at the end of `df` is
+            carried on to the next chunk.
+        """
+        self._append_pending()
+        if len(df) == 0:
+            return
+        starts, ends, self._open_start = threshold_sections(
+            df.index.asi8, df.iloc[:, 0].values, self.threshold, self._open_start)
+        self._pending = (df.timeframe, starts, ends, df.index[-1])
+
+    def _append_pending(self, close_open_section=False):
+        """Appends the sections of the last chunk to `self.results`.  If
+        `close_open_section` the open section ends with the last sample."""
+        if self._pending is None:
+            return
+        timeframe, starts, ends, last_timestamp = self._pending
+        self._pending = None
+        tz = last_timestamp.tz
+        starts, ends = to_timestamps(starts, tz), to_timestamps(ends, tz)
+        if close_open_section and self._open_start != NO_TIME:
+            starts = starts.append(to_timestamps([self._open_start], tz))
+            ends = ends.append(pd.DatetimeIndex([last_timestamp]))
+            self._open_start = NO_TIME
+        self.results.append(timeframe, {'sections': [
+            {'start': pd.Series(starts), 'end': pd.Series(ends)}]})
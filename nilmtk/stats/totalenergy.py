@@ -1,13 +1,16 @@
 from __future__ import print_function, division
 import numpy as np
-import gc
+import pandas as pd
+import pytz
 from .totalenergyresults import TotalEnergyResults
 from ..node import Node
-from ..utils import timedelta64_to_secs
 from ..consts import JOULES_PER_KWH
 from ..measurement import AC_TYPES
 from ..timeframe import TimeFrame
 
+# Marks columns without a previous sample in `EnergyIntegrator`
+NO_SAMPLE = np.iinfo(np.int64).min
+
 
 class TotalEnergy(Node):
 
@@ -95,13 +98,183 @@ def _energy_for_power_series(series, max_sample_period):
     energy : float
         kWh
     """
-    series = series.dropna()
-    timedelta = np.diff(series.index.values)
-    timedelta_secs = timedelta64_to_secs(timedelta)
-    del timedelta
-    gc.collect()
-    if max_sample_period > 0:
-        timedelta_secs = timedelta_secs.clip(max=max_sample_period)
-    joules = (timedelta_secs * series.values[:-1]).sum()
-    kwh = joules / JOULES_PER_KWH
-    return kwh
+    integrator = EnergyIntegrator([max_sample_period])
+    integrator.update(series.index, series.values.reshape(-1, 1))
+    return integrator.energy()[0]
+
+
+class EnergyIntegrator(object):
+    """Integrates the power of many meters at once.
+
+    The power is passed in aligned 2-D blocks: one row per timestamp and
+    one column per meter, with NaN where a meter has no sample.  Each
+    column is integrated exactly like `_energy_for_power_series` would
+    integrate it after dropping its NaNs: every sample holds until the
+    next sample of the same column, for at most the column's
+    `max_sample_period`.  Consecutive blocks are stitched together, i.e.
+    the last sample of a block holds until the first sample of the
+    column in the next block.
+
+    Parameters
+    ----------
+    max_sample_periods : list of numbers
+        Seconds, one per column.  0 means unlimited.
+    per_period : str, optional
+        Pandas offset alias, e.g. 'D' or 'M'.  If set, then the energy is
+        also summed per period.  A sample counts towards the period it
+        was taken in, in the local time of the index.
+    columns : list, optional
+        Labels of the columns, used by `energy`.
+
+    Examples
+    --------
+    >>> integrator = EnergyIntegrator([60, 60], per_period='D')
+    >>> for block in blocks:
+    ...     integrator.update(block.index, block.values)
+    >>> integrator.energy()   # kWh per day and meter
+    """
+
+    def __init__(self, max_sample_periods, per_period=None, columns=None):
+        self.max_sample_periods = np.asarray(max_sample_periods, dtype=np.float64)
+        n_columns = len(self.max_sample_periods)
+        self.per_period = per_period
+        self.columns = list(range(n_columns)) if columns is None else list(columns)
+        self._total = np.zeros(n_columns)
+        self._per_period = []
+        self._last_time = np.full(n_columns, NO_SAMPLE, dtype=np.int64)
+        self._last_value = np.zeros(n_columns)
+        self._last_period = np.empty(n_columns, dtype=object)
+        self._tz = None
+
+    def update(self, index, values):
+        """Integrates the next block.
+
+        Parameters
+        ----------
+        index : pd.DatetimeIndex, sorted
+            Must start after the end of the previous block.
+        values : 2-D array, shape (len(index), number of columns)
+            Power.  NaN where a column has no sample.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        n_rows = len(index)
+        if n_rows == 0:
+            return
+        index = pd.DatetimeIndex(index)
+        self._tz = index.tz
+        times = index.asi8
+        valid = ~np.isnan(values)
+        rows = np.arange(n_rows)[:, np.newaxis]
+
+        # Row of the next sample of each column (n_rows if there is none)
+        next_row = np.minimum.accumulate(
+            np.where(valid, rows, n_rows)[::-1], axis=0)[::-1]
+        first_row = next_row[0]
+        next_row = np.vstack([next_row[1:], np.full((1, values.shape[1]), n_rows)])
+        has_next = valid & (next_row < n_rows)
+        seconds = (times[np.minimum(next_row, n_rows - 1)] - 
+                   times[:, np.newaxis]) / 1e9
+        energy = np.where(has_next, self._limit(seconds) * np.where(valid, values, 0), 0)
+
+        # The last samples of the previous block hold until the first
+        # samples of this block
+        stitched = (self._last_time != NO_SAMPLE) & (first_row < n_rows)
+        last_time = np.where(stitched, self._last_time, 0)
+        first_time = np.where(stitched, times[np.minimum(first_row, n_rows - 1)], 0)
+        seconds = (first_time - last_time) / 1e9
+        boundary = np.where(stitched, self._limit(seconds) * self._last_value, 0)
+
+        self._total += energy.sum(axis=0) + boundary
+        if self.per_period is not None:
+            periods = self._periods(index)
+            ordinals = periods.asi8
+            starts = np.flatnonzero(np.r_[True, ordinals[1:] != ordinals[:-1]])
+            sums = np.add.reduceat(energy, starts, axis=0)
+            self._per_period.append(pd.DataFrame(sums, index=periods[starts]))
+            if stitched.any():
+                stitched_columns = np.flatnonzero(stitched)
+                boundary_sums = np.zeros((len(stitched_columns), values.shape[1]))
+                boundary_sums[np.arange(len(stitched_columns)), stitched_columns] = \
+                    boundary[stitched_columns]
+                self._per_period.append(pd.DataFrame(
+                    boundary_sums,
+                    index=pd.PeriodIndex(self._last_period[stitched_columns])))
+
+        # Remember the last sample of each column
+        last_row = np.where(valid, rows, -1).max(axis=0)
+        has_sample = last_row >= 0
+        last_row = np.maximum(last_row, 0)
+        self._last_time = np.where(has_sample, times[last_row], self._last_time)
+        self._last_value = np.where(
+            has_sample, values[last_row, np.arange(values.shape[1])], self._last_value)
+        if self.per_period is not None:
+            self._last_period[has_sample] = np.asarray(periods[last_row[has_sample]])
+
+    def energy(self):
+        """Returns the energy in kWh so far.
+
+        Returns
+        -------
+        pd.Series with an entry per column if `per_period` is None,
+        otherwise a pd.DataFrame with a row per period.  Its index is the
+        start of each period.
+        """
+        if self.per_period is None:
+            return pd.Series(self._total / JOULES_PER_KWH, index=self.columns)
+        if not self._per_period:
+            return pd.DataFrame(columns=self.columns)
+        per_period = pd.concat(self._per_period).groupby(level=0).sum()
+        per_period.index = per_period.index.to_timestamp()
+        if self._tz is not None:
+            per_period.index = _localize_labels(per_period.index, self._tz)
+        per_period.columns = self.columns
+        return per_period / JOULES_PER_KWH
+
+    def _limit(self, seconds):
+        limit = self.max_sample_periods
+        return np.where(limit > 0, np.minimum(seconds, limit), seconds)
+
+    def _periods(self, index):
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.to_period(self.per_period)
+
+
+def _localize_labels(index, tz):
+    """Localizes the naive period starts `index` to `tz`.  Ambiguous
+    labels become NaT.  Labels in a DST gap, e.g. days which start at
+    a midnight which is skipped, move forward by the length of the gap."""
+    try:
+        return index.tz_localize(tz, ambiguous='NaT')
+    except pytz.NonExistentTimeError:
+        return pd.DatetimeIndex([_localize_label(label, tz) for label in index])
+
+
+def _localize_label(label, tz):
+    try:
+        return label.tz_localize(tz, ambiguous='NaT')
+    except pytz.NonExistentTimeError:
+        # The UTC offset before the gap maps the label past the gap
+        offset = (label - pd.Timedelta(days=1)).tz_localize(tz).utcoffset()
+        return (label - offset).tz_localize('UTC').tz_convert(tz)
+
+
+def energy_per_column(df, max_sample_periods, per_period=None):
+    """Integrates every column of a power DataFrame in a single pass.
+    See `EnergyIntegrator`.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Power, one column per meter.  NaN where a meter has no sample.
+    max_sample_periods : list of numbers, one per column
+    per_period : str, optional
+
+    Returns
+    -------
+    pd.Series or pd.DataFrame, energy in kWh, see `EnergyIntegrator.energy`
+    """
+    integrator = EnergyIntegrator(max_sample_periods, per_period=per_period,
+                                  columns=df.columns)
+    integrator.update(df.index, df.values)
+    return integrator.energy()
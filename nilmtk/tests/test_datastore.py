@@ -2,10 +2,17 @@
 from __future__ import print_function, division
 import unittest
 from os.path import join
+from tempfile import mkdtemp
+from shutil import rmtree
+from unittest.mock import patch
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 from .testingtools import data_dir
-from nilmtk.datastore import HDFDataStore, CSVDataStore
+from nilmtk.datastore import (HDFDataStore, CSVDataStore, NpyDataStore,
+                              BufferedWriter)
+from nilmtk.datastore.datastore import prefetch_generator
+from nilmtk.datastore.csvdatastore import _ForwardCSVReader
 from nilmtk import TimeFrame
 
 
@@ -122,6 +129,39 @@ class TestHDFDataStore(unittest.TestCase, SuperTestDataStore):
             self.datastore.window.enabled = False
             self.assertEqual(self.datastore._nrows(key), self.NROWS)
 
+    def test_load_prefetch(self):
+        self.datastore.window.clear()
+        timeframes = [TimeFrame('2012-01-01 00:00:00', '2012-01-01 00:01:00'),
+                      TimeFrame('2012-01-01 00:10:00', '2012-01-01 00:11:00')]
+        kwargs = dict(key=self.keys[0], sections=timeframes, chunksize=20,
+                      n_look_ahead_rows=10)
+        expected = list(self.datastore.load(**kwargs))
+        prefetched = list(self.datastore.load(prefetch=3, **kwargs))
+        self.assertEqual(len(expected), len(prefetched))
+        for chunk, prefetched_chunk in zip(expected, prefetched):
+            self.assertTrue(chunk.equals(prefetched_chunk))
+            self.assertEqual(chunk.timeframe, prefetched_chunk.timeframe)
+            self.assertEqual(len(chunk.look_ahead),
+                             len(prefetched_chunk.look_ahead))
+
+    def test_row_range(self):
+        key = self.keys[0]
+        timeframes = [TimeFrame('2012-01-01 00:00:00', '2012-01-01 00:00:05'),
+                      TimeFrame('2012-01-01 00:10:00.5', '2012-01-01 00:20:00'),
+                      TimeFrame('2011-12-31', '2012-01-01 00:00:01'),
+                      TimeFrame('2012-01-01 02:00:00', '2012-01-02')]
+        timeframes[1].include_end = True
+        for timeframe in timeframes:
+            terms = timeframe.query_terms('timeframe')
+            coords = self.datastore.store.select_as_coordinates(key, terms)
+            first_row, stop_row = self.datastore._row_range(key, timeframe)
+            self.assertEqual(first_row, coords[0])
+            self.assertEqual(stop_row, coords[-1] + 1)
+
+        timeframe = TimeFrame('2013-01-01', '2013-01-02')
+        first_row, stop_row = self.datastore._row_range(key, timeframe)
+        self.assertLessEqual(stop_row, first_row)
+
     def test_estimate_memory_requirement(self):
         self._apply_mask()
         for key in self.keys:
@@ -132,6 +172,145 @@ class TestHDFDataStore(unittest.TestCase, SuperTestDataStore):
             mem = self.datastore._estimate_memory_requirement(key, self.datastore._nrows(key))
             self.assertEqual(mem, 200000)
 
+    def test_batch(self):
+        dirname = mkdtemp()
+        datastore = HDFDataStore(join(dirname, 'batch.h5'), mode='w')
+        flushes = []
+        flush = datastore.store.flush
+        def counting_flush(*args, **kwargs):
+            flushes.append(True)
+            return flush(*args, **kwargs)
+        datastore.store.flush = counting_flush
+        try:
+            index = pd.date_range(self.START_DATE, periods=10,
+                                  freq=timedelta(seconds=1))
+            df = pd.DataFrame({'a': np.arange(10.)}, index=index)
+            with datastore.batch():
+                for i in range(5):
+                    datastore.append('/table{:d}'.format(i), df)
+                    with datastore.batch():
+                        datastore.put('/cache{:d}'.format(i), df, fixed=True)
+                self.assertEqual(flushes, [])
+            self.assertEqual(len(flushes), 1)
+            self.assertEqual(len(datastore['/table4']), 10)
+            datastore.remove('/table4')
+            self.assertEqual(len(flushes), 2)
+        finally:
+            datastore.close()
+            rmtree(dirname)
+
+    def test_compression(self):
+        dirname = mkdtemp()
+        index = pd.date_range(self.START_DATE, periods=10,
+                              freq=timedelta(seconds=1))
+        df = pd.DataFrame({'a': np.arange(10.)}, index=index)
+        settings = [({}, 9, 'blosc'),
+                    ({'compression': 'archive'}, 5, 'blosc:zstd'),
+                    ({'compression': 'analysis', 'complevel': 2}, 2, 'blosc:lz4'),
+                    ({'compression': 'scratch'}, 0, None)]
+        try:
+            for store_kwargs, complevel, complib in settings:
+                datastore = HDFDataStore(join(dirname, 'compression.h5'),
+                                         mode='w', **store_kwargs)
+                datastore.append('/table', df)
+                datastore.put('/fixed', df, fixed=True)
+                for key in ['/table', '/fixed']:
+                    storer = datastore.store.get_storer(key)
+                    node = storer.table if key == '/table' else storer.group.axis0
+                    self.assertEqual(node.filters.complevel, complevel)
+                    if complevel:
+                        self.assertEqual(node.filters.complib, complib)
+                datastore.close()
+        finally:
+            rmtree(dirname)
+        self.assertRaises(ValueError, HDFDataStore, 'unused.h5', mode='w',
+                          compression='unknown')
+
+class TestPrefetchGenerator(unittest.TestCase):
+
+    def test_order_and_attributes(self):
+        def generator():
+            for i in range(10):
+                df = pd.DataFrame({'a': [i]})
+                df.timeframe = i
+                yield df
+
+        chunks = list(prefetch_generator(generator(), n_chunks=2))
+        self.assertEqual([chunk.timeframe for chunk in chunks], list(range(10)))
+
+    def test_exception_is_reraised(self):
+        def generator():
+            yield 1
+            raise KeyError('missing')
+
+        prefetched = prefetch_generator(generator())
+        self.assertEqual(next(prefetched), 1)
+        with self.assertRaises(KeyError):
+            next(prefetched)
+
+    def test_early_stop(self):
+        closed = []
+        def generator():
+            try:
+                for i in range(1000):
+                    yield i
+            finally:
+                closed.append(True)
+
+        prefetched = prefetch_generator(generator(), n_chunks=1)
+        self.assertEqual(next(prefetched), 0)
+        prefetched.close()
+        self.assertEqual(closed, [True])
+
+class TestBufferedWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = mkdtemp()
+        self.datastore = HDFDataStore(join(self.dirname, 'out.h5'), mode='w')
+
+    def tearDown(self):
+        self.datastore.close()
+        rmtree(self.dirname)
+
+    def _chunks(self, n_chunks=10, chunk_len=100):
+        index = pd.date_range('2012-01-01', periods=n_chunks*chunk_len,
+                              freq=timedelta(seconds=1))
+        df = pd.DataFrame({'a': np.arange(len(index), dtype=np.float32)},
+                          index=index)
+        return [df.iloc[i:i+chunk_len] for i in range(0, len(df), chunk_len)]
+
+    def test_append(self):
+        chunks = self._chunks()
+        appends = []
+        append = self.datastore.append
+        def counting_append(key, value, **kwargs):
+            appends.append(key)
+            return append(key, value, **kwargs)
+        self.datastore.append = counting_append
+        # Both keys together exceed the budget after every 5th chunk, so
+        # each key is written in 2 blocks
+        max_bytes = 9 * chunks[0].memory_usage(index=True).sum()
+        with BufferedWriter(self.datastore, max_bytes=max_bytes) as writer:
+            for chunk in chunks:
+                writer.append('/meter1', chunk)
+                writer.append('/meter2', chunk * 2)
+                self.assertLessEqual(writer._n_bytes, max_bytes)
+        self.assertEqual(len(appends), 4)
+        expected = pd.concat(chunks)
+        self.assertTrue(self.datastore['/meter1'].equals(expected))
+        self.assertTrue(self.datastore['/meter2'].equals(expected * 2))
+        table = self.datastore.store.get_storer('/meter1').table
+        self.assertTrue(table.cols.index.is_indexed)
+
+    def test_unindexed(self):
+        with BufferedWriter(self.datastore, index=False) as writer:
+            for chunk in self._chunks():
+                writer.append('/meter1', chunk)
+        table = self.datastore.store.get_storer('/meter1').table
+        self.assertFalse(table.cols.index.is_indexed)
+        self.assertEqual(len(self.datastore['/meter1']), 1000)
+
+
 class TestCSVDataStore(unittest.TestCase, SuperTestDataStore):
 
     @classmethod
@@ -143,6 +322,120 @@ class TestCSVDataStore(unittest.TestCase, SuperTestDataStore):
     @classmethod
     def tearDownClass(cls):
         cls.datastore.close()
-    
+
+    def test_load_sections_look_ahead(self):
+        self.datastore.window.clear()
+        timeframes = [TimeFrame('2012-01-01 00:10:00', '2012-01-01 00:10:05'),
+                      TimeFrame('2012-01-01 00:00:00', '2012-01-01 00:00:05'),
+                      TimeFrame('2013-01-01 00:00:00', '2013-01-01 00:00:05')]
+        chunks = list(self.datastore.load(key=self.keys[0], sections=timeframes,
+                                          chunksize=2, n_look_ahead_rows=3))
+        # a section without data yields one empty chunk
+        self.assertEqual(len(chunks), 7)
+        self.assertEqual(chunks[0].index[0], timeframes[0].start)
+        self.assertEqual(chunks[3].index[0], timeframes[1].start)
+        self.assertTrue(chunks[-1].empty)
+        for chunk in chunks[:-1]:
+            self.assertEqual(chunk.look_ahead.index[0],
+                             chunk.index[-1] + timedelta(seconds=1))
+            self.assertEqual(len(chunk.look_ahead), 3)
+
+    def test_load_many_blocks(self):
+        # Parse the section in many small blocks, which must only be
+        # concatenated once per chunk
+        self.datastore.window.clear()
+        expected = next(self.datastore.load(key=self.keys[0]))
+        read_chunksize = _ForwardCSVReader.READ_CHUNKSIZE
+        _ForwardCSVReader.READ_CHUNKSIZE = 7
+        try:
+            with patch.object(pd, 'concat', wraps=pd.concat) as concat:
+                chunks = list(self.datastore.load(key=self.keys[0],
+                                                  chunksize=len(expected) // 3 + 1))
+        finally:
+            _ForwardCSVReader.READ_CHUNKSIZE = read_chunksize
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(concat.call_count, 3)
+        self.assertTrue(pd.concat(chunks).equals(expected))
+
+
+class TestNpyDataStore(unittest.TestCase, SuperTestDataStore):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirname = mkdtemp()
+        cls.datastore = NpyDataStore(cls.dirname)
+        cls.keys = ['/building1/elec/meter{:d}'.format(i) for i in range(1, 6)]
+        index = pd.date_range(cls.START_DATE, periods=int(cls.NROWS),
+                              freq=timedelta(seconds=1))
+        columns = pd.MultiIndex.from_tuples(
+            [('power', 'active'), ('energy', 'reactive'), ('voltage', '')],
+            names=['physical_quantity', 'type'])
+        for key in cls.keys:
+            data = pd.DataFrame(np.random.rand(len(index), 3), index=index,
+                                columns=columns)
+            # Write in two parts to exercise `append`
+            cls.datastore.append(key, data.iloc[:5000])
+            cls.datastore.append(key, data.iloc[5000:])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.datastore.close()
+        rmtree(cls.dirname)
+
+    def test_getitem(self):
+        data = self.datastore[self.keys[0]]
+        self.assertEqual(len(data), self.NROWS)
+        self.assertEqual(data.index[-1], self.END_DATE)
+        self.assertTrue((data.dtypes == np.float32).all())
+
+    def test_put_cache_table(self):
+        key = '/building1/elec/cache/meter1/good_sections'
+        index = pd.date_range('2014-01-01', periods=3, freq=timedelta(hours=1),
+                              tz='Europe/London')
+        cached = pd.DataFrame({'end': index + timedelta(minutes=30),
+                               'count': [1, 2, 3]}, index=index)
+        self.datastore.put(key, cached)
+        loaded = self.datastore[key]
+        self.assertTrue((loaded.index == cached.index).all())
+        self.assertTrue((loaded['end'] == cached['end']).all())
+        self.assertEqual(loaded['count'].tolist(), [1, 2, 3])
+        self.assertEqual(self.datastore.elements_below_key('building1/elec'),
+                         ['cache'] + [key.split('/')[-1] for key in self.keys])
+        self.datastore.remove('/building1/elec/cache')
+        self.assertRaises(KeyError, self.datastore.__getitem__, key)
+
+    def test_nested_tables_survive(self):
+        key = '/building2/elec/meter1'
+        nested_key = key + '/rollup_60'
+        data = self.datastore[self.keys[0]].iloc[:100]
+        self.datastore.put(key, data)
+        self.datastore.put(nested_key, data.iloc[::6])
+        # Replacing or removing a table keeps the tables below it
+        self.datastore.put(key, data.iloc[:50])
+        self.assertEqual(len(self.datastore[key]), 50)
+        self.assertEqual(len(self.datastore[nested_key]), 17)
+        self.datastore.remove(key)
+        self.assertFalse(key in self.datastore)
+        self.assertEqual(len(self.datastore[nested_key]), 17)
+        self.datastore.remove('/building2')
+        self.assertFalse(nested_key in self.datastore)
+
+    def test_empty_table(self):
+        key = '/building2/elec/meter1'
+        self.datastore.put(key, self.datastore[self.keys[0]].iloc[:0])
+        try:
+            self.assertTrue(self.datastore.get_timeframe(key).empty)
+            self.assertEqual(self.datastore.fingerprint(key), (0, None))
+        finally:
+            self.datastore.remove('/building2')
+
+    def test_chunks_are_writable(self):
+        columns = [('power', 'active')]
+        chunk = next(self.datastore.load(self.keys[0], columns=columns,
+                                         chunksize=100))
+        value = self.datastore[self.keys[0]].iloc[0, 0]
+        chunk.iloc[0, 0] = -1
+        self.assertEqual(self.datastore[self.keys[0]].iloc[0, 0], value)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,4 @@
-from nilmtk.datastore import HDFDataStore, CSVDataStore 
+from nilmtk.datastore import HDFDataStore, CSVDataStore, NpyDataStore
 from nilmtk.datastore.datastore import convert_datastore
 import os
 import shutil
@@ -17,4 +17,31 @@ def test_convert_random_dataset():
 
     input_store.close()
     output_store.close()
-    
\ No newline at end of file
+
+def test_convert_random_dataset_to_npy_and_back():
+    input_filepath = 'data/random.h5'
+    npy_filepath = 'data/random_npy'
+    output_filepath = 'data/random_from_npy.h5'
+
+    if os.path.isdir(npy_filepath):
+        shutil.rmtree(npy_filepath)
+    if os.path.isfile(output_filepath):
+        os.remove(output_filepath)
+
+    input_store = HDFDataStore(input_filepath)
+    npy_store = NpyDataStore(npy_filepath)
+    output_store = HDFDataStore(output_filepath, 'w')
+
+    convert_datastore(input_store, npy_store)
+    convert_datastore(npy_store, output_store)
+
+    for meter in input_store.elements_below_key('/building1/elec'):
+        if meter == 'cache':
+            continue
+        key = '/building1/elec/' + meter
+        assert input_store[key].equals(output_store[key])
+
+    input_store.close()
+    output_store.close()
+    os.remove(output_filepath)
+    shutil.rmtree(npy_filepath)
@@ -2,11 +2,14 @@
 from __future__ import print_function, division
 import unittest
 from os.path import join
+from shutil import copyfile, rmtree
+from tempfile import mkdtemp
 import pandas as pd
 from datetime import timedelta
 from .testingtools import data_dir, WarningTestMixin
 from ..datastore import HDFDataStore
 from ..elecmeter import ElecMeter, ElecMeterID
+from ..timeframe import TimeFrame
 from ..stats.tests.test_totalenergy import check_energy_numbers
 
 METER_ID = ElecMeterID(instance=1, building=1, dataset='REDD')
@@ -52,6 +55,85 @@ class TestElecMeter(WarningTestMixin, unittest.TestCase):
                                        periods=5, freq='D')
         meter.total_energy(sections=period_index, full_results=True)
         
+    def test_rollups(self):
+        meter = ElecMeter(store=self.datastore, metadata=self.meter_meta, 
+                          meter_id=METER_ID)
+        expected = next(meter.load(sample_period=60, use_rollups=False))
+        self.assertIsNone(meter._rollup_period_for(sample_period=60, resample=True))
+        meter.build_rollups(periods=[5, 60])
+        try:
+            # 5 seconds is shorter than the meter's sample period
+            self.assertFalse(meter.rollup_key(5) in self.datastore)
+            self.assertEqual(meter._rollup_period_for(sample_period=120, 
+                                                      resample=True), 60)
+            loaded = next(meter.load(sample_period=60))
+            self.assertTrue(expected.equals(loaded))
+        finally:
+            self.datastore.remove(meter.rollup_key(60))
+            self.datastore.remove(meter.rollup_sources_key())
+
+    def test_rollups_after_append(self):
+        tmpdir = mkdtemp()
+        try:
+            filename = join(tmpdir, 'energy.h5')
+            copyfile(join(data_dir(), 'energy.h5'), filename)
+            datastore = HDFDataStore(filename, 'a')
+            meter = ElecMeter(store=datastore, metadata=self.meter_meta,
+                              meter_id=METER_ID)
+            meter.build_rollups(periods=[60])
+            self.assertEqual(meter._rollup_period_for(sample_period=60,
+                                                      resample=True), 60)
+
+            # Append an hour later, the rollup does not cover the new rows
+            data = datastore[meter.key]
+            new_rows = data.iloc[-3:].copy()
+            new_rows.index = new_rows.index + timedelta(hours=1)
+            datastore.append(meter.key, new_rows)
+            self.assertIsNone(meter._rollup_period_for(sample_period=60,
+                                                       resample=True))
+            expected = next(meter.load(sample_period=60, use_rollups=False))
+            loaded = next(meter.load(sample_period=60))
+            self.assertTrue(expected.equals(loaded))
+            self.assertEqual(loaded.index[-1], new_rows.index[-1].floor('60S'))
+
+            meter.build_rollups(periods=[60])
+            self.assertEqual(meter._rollup_period_for(sample_period=60,
+                                                      resample=True), 60)
+            self.assertTrue(expected.equals(next(meter.load(sample_period=60))))
+            datastore.close()
+        finally:
+            rmtree(tmpdir)
+
+    def test_rollups_with_gap(self):
+        tmpdir = mkdtemp()
+        try:
+            filename = join(tmpdir, 'energy.h5')
+            copyfile(join(data_dir(), 'energy.h5'), filename)
+            datastore = HDFDataStore(filename, 'a')
+            meter = ElecMeter(store=datastore, metadata=self.meter_meta,
+                              meter_id=METER_ID)
+            # A gap of two minutes, longer than the max_sample_period
+            data = datastore[meter.key]
+            start = data.index[0]
+            in_gap = ((data.index > start + timedelta(seconds=10)) &
+                      (data.index < start + timedelta(seconds=130)))
+            datastore.remove(meter.key)
+            datastore.append(meter.key, data[~in_gap])
+            expected = next(meter.load(sample_period=60, use_rollups=False))
+            self.assertTrue(expected.iloc[-1].isnull().all())
+
+            meter.build_rollups(periods=[60])
+            self.assertEqual(meter._rollup_period_for(sample_period=60,
+                                                      resample=True), 60)
+            loaded = next(meter.load(sample_period=60))
+            self.assertTrue(expected.equals(loaded))
+            # The rollup itself is forward filled without a limit
+            rollup = datastore[meter.rollup_key(60)]
+            self.assertFalse(rollup.iloc[-1].isnull().any())
+            datastore.close()
+        finally:
+            rmtree(tmpdir)
+
     def test_upstream_meter(self):
         meter1 = ElecMeter(metadata={'site_meter': True}, meter_id=METER_ID)
         self.assertIsNone(meter1.upstream_meter())
@@ -65,6 +147,51 @@ class TestElecMeter(WarningTestMixin, unittest.TestCase):
                           meter_id=METER_ID)
         self.assertEquals(meter.proportion_of_energy(meter), 1.0)
 
+    def test_compute_stats(self):
+        meter = ElecMeter(store=self.datastore, metadata=self.meter_meta,
+                          meter_id=METER_ID)
+        stats = ['good_sections', 'nonzero_sections']
+        meter.clear_cache()
+        expected = [meter.good_sections(), meter.nonzero_sections()]
+        meter.clear_cache()
+        try:
+            computed = meter.compute_stats(stats)
+            for stat in stats:
+                self.assertIsNotNone(meter.get_cached_stat(stat))
+            # Second time from cache
+            cached = meter.compute_stats(stats)
+            for stat, sections in zip(stats, expected):
+                self.assertTrue(computed[stat]._df.equals(sections._df))
+                self.assertTrue(cached[stat]._df.equals(sections._df))
+        finally:
+            meter.clear_cache()
+
+        with self.assertRaises(ValueError):
+            meter.compute_stats(['dropout_rate'])
+
+    def test_incremental_cache(self):
+        meter = ElecMeter(store=self.datastore, metadata=self.meter_meta,
+                          meter_id=METER_ID)
+        meter.clear_cache()
+        expected = meter.good_sections()
+        meter.clear_cache()
+        timeframe = meter.get_timeframe()
+        middle = timeframe.start + (timeframe.end - timeframe.start) / 2
+        try:
+            first_half = TimeFrame(timeframe.start, middle)
+            meter.good_sections(sections=[first_half])
+            cached = meter.get_cached_timeframes('good_sections')
+            self.assertEqual(cached[-1].end, middle)
+
+            # Only the second half is computed and merged with the cache
+            sections = meter.good_sections()
+            self.assertTrue(sections._df.equals(expected._df))
+            cached = meter.get_cached_timeframes('good_sections')
+            self.assertEqual(cached.count(), 1)
+            self.assertGreater(cached[0].end, timeframe.end)
+        finally:
+            meter.clear_cache()
+
     def correlation(self):
         meter_1 = ElecMeter(store=self.datastore, metadata=self.meter_meta, 
                           meter_id=METER_ID)
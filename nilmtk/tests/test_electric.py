@@ -0,0 +1,58 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+from os.path import join
+import numpy as np
+import pandas as pd
+from .testingtools import data_dir
+from ..dataset import DataSet
+from ..electric import align_two_meters, iterate_in_lockstep
+
+
+def chunked(series, *lengths):
+    """Generator of consecutive chunks of `series` with `lengths` rows."""
+    start = 0
+    for length in lengths:
+        yield series.iloc[start:start + length]
+        start += length
+
+
+class TestElectric(unittest.TestCase):
+
+    def test_iterate_in_lockstep(self):
+        index = pd.date_range('2014-01-01', periods=20, freq='10S', tz='UTC')
+        master = pd.Series(np.arange(20.), index=index)
+        # The slave has a gap, is chunked differently and ends earlier
+        slave = pd.concat([master.iloc[:5], master.iloc[8:15]]) * 2
+        steps = list(iterate_in_lockstep(
+            [chunked(master, 7, 0, 13), chunked(slave, 3, 3, 6)]))
+        for master_chunk, slave_chunk in steps:
+            if not slave_chunk.empty:
+                self.assertLessEqual(slave_chunk.index[-1], master_chunk.index[-1])
+        self.assertEqual([len(step[0]) for step in steps], [3, 4, 2, 6, 5])
+        df = pd.concat([pd.DataFrame({'master': m, 'slave': s}) for m, s in steps])
+        pd.testing.assert_series_equal(df['master'], master, check_names=False,
+                                       check_freq=False)
+        pd.testing.assert_series_equal(df['slave'].dropna(), slave,
+                                       check_names=False, check_freq=False)
+
+        # Iteration stops with the master
+        steps = list(iterate_in_lockstep([chunked(slave, 5), chunked(master, 20)]))
+        self.assertEqual(steps[-1][1].index[-1], slave.index[4])
+
+    def test_align_two_meters(self):
+        ds = DataSet(join(data_dir(), 'energy.h5'))
+        meter1, meter2, meter3 = ds.buildings[1].elec.meters
+        sections = meter1.good_sections()
+        power = next(meter1.power_series(sections=sections, sample_period=10))
+        aligned = pd.concat(align_two_meters(meter1, meter2))
+        self.assertEqual(list(aligned.columns), ['master', 'slave'])
+        np.testing.assert_allclose(aligned['master'].values, power.values)
+        np.testing.assert_allclose(aligned['slave'].values, power.values)
+        aligned = pd.concat(align_two_meters(meter1, [meter2, meter3]))
+        self.assertEqual(list(aligned.columns), ['master', 0, 1])
+        ds.store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,15 @@
 from __future__ import print_function, division
 import unittest
 from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
 from nilmtk.tests.testingtools import data_dir
 from nilmtk import (Appliance, MeterGroup, ElecMeter, HDFDataStore, 
                     global_meter_group, TimeFrame, DataSet)
+from nilmtk import metergroup
 from nilmtk.utils import tree_root, nodes_adjacent_to_root
 from nilmtk.elecmeter import ElecMeterID
 from nilmtk.building import BuildingID
@@ -138,6 +144,30 @@ class TestMeterGroup(unittest.TestCase):
         ds.buildings[1].elec.clear_cache()
         ds.store.close()
 
+    def test_batched_energy(self):
+        filename = join(data_dir(), 'energy.h5')
+        ds = DataSet(filename)
+        elec = ds.buildings[1].elec
+        per_meter = elec.energy_per_meter().loc['active']
+        # Blocks of 2 sample periods are stitched together
+        for kwargs in [{}, {'chunksize': 2}]:
+            batched = elec.energy_per_meter(batched=True, **kwargs)
+            np.testing.assert_allclose(batched.loc['active'].astype(float),
+                                       per_meter.astype(float))
+            total = elec.total_energy(batched=True, **kwargs)
+            self.assertAlmostEqual(total['active'], per_meter.sum())
+            per_day = elec.energy_per_period('D', **kwargs)
+            self.assertEqual(len(per_day), 1)
+            np.testing.assert_allclose(per_day.sum().values,
+                                       per_meter.astype(float).values)
+
+        # Without sections and chunksize the data is still loaded in blocks
+        with patch.object(metergroup, 'DEFAULT_BLOCK_SIZE', 3):
+            blocks = list(elec._aligned_blocks(ac_type='active'))
+        self.assertEqual(len(blocks), 5)
+        self.assertEqual(sum(len(block) for block in blocks), 14)
+        ds.store.close()
+
     def test_load(self):
         filename = join(data_dir(), 'energy.h5')
         ds = DataSet(filename)
@@ -151,7 +181,104 @@ class TestMeterGroup(unittest.TestCase):
         self.assertEqual(df.columns.levels, [['energy'], ['reactive']])
         df = next(elec.load(ac_type='active'))
         self.assertEqual(df.columns.levels, [['power'], ['active']])
-        
+        ds.store.close()
+
+    def test_load_n_workers(self):
+        filename = join(data_dir(), 'energy.h5')
+        ds = DataSet(filename)
+        elec = ds.buildings[1].elec
+        serial = next(elec.load())
+        parallel = next(elec.load(n_workers=4))
+        self.assertTrue(serial.equals(parallel))
+        self.assertEqual(serial.timeframe, parallel.timeframe)
+        ds.store.close()
+
+    def test_pairwise_correlation(self):
+        filename = join(data_dir(), 'energy.h5')
+        ds = DataSet(filename)
+        elec = ds.buildings[1].elec
+        sample_period = elec.sample_period()
+        df = pd.concat([next(meter.power_series(sample_period=sample_period))
+                        for meter in elec.meters], axis=1)
+        correlation = elec.pairwise_correlation()
+        np.testing.assert_allclose(correlation.values, df.corr().values)
+        self.assertEqual(list(correlation.index), list(elec.identifier.meters))
+        np.testing.assert_allclose(
+            elec.pairwise_correlation(chunksize=100).values, correlation.values)
+        with patch.object(metergroup, 'DEFAULT_BLOCK_SIZE', 3):
+            np.testing.assert_allclose(elec.pairwise_correlation().values,
+                                       correlation.values)
+        meter1, meter2 = elec.meters[:2]
+        self.assertAlmostEqual(meter1.correlation(meter2), correlation.iloc[0, 1])
+        ds.store.close()
+
+    def test_pairwise_mutual_information(self):
+        filename = join(data_dir(), 'energy.h5')
+        ds = DataSet(filename)
+        elec = ds.buildings[1].elec
+        mutual_information = elec.pairwise_mutual_information(random_state=0)
+        self.assertEqual(list(mutual_information.index),
+                         list(elec.identifier.meters))
+        np.testing.assert_allclose(mutual_information.values,
+                                   mutual_information.values.T)
+        np.testing.assert_allclose(
+            elec.pairwise_mutual_information(random_state=0, n_workers=3).values,
+            mutual_information.values)
+        entropy = elec.entropy_per_meter(random_state=0, n_workers=2)
+        self.assertEqual(list(entropy.index), list(elec.identifier.meters))
+        ds.store.close()
+
+    def test_dataframe_of_meters(self):
+        filename = join(data_dir(), 'energy.h5')
+        ds = DataSet(filename)
+        elec = ds.buildings[1].elec
+        power = next(elec.meters[0].power_series(sample_period=30))
+        df = elec.dataframe_of_meters(sample_period=30)
+        self.assertEqual(list(df.columns), [m.identifier for m in elec.meters])
+        self.assertTrue((df.dtypes == np.float32).all())
+        for column in df.columns:
+            np.testing.assert_array_equal(df[column].values, power.values)
+        self.assertTrue((df.index == power.index).all())
+
+        # Open-ended sections end with the data
+        middle = df.index[len(df) // 2]
+        open_ended = elec.dataframe_of_meters(
+            sample_period=30, sections=[TimeFrame(start=middle)])
+        self.assertTrue(open_ended.equals(df[middle:]))
+        open_ended = elec.dataframe_of_meters(
+            sample_period=30, sections=[TimeFrame(end=middle)])
+        self.assertTrue(open_ended.equals(df[:middle].iloc[:-1]))
+
+        # Chunks which do not line up, written into a memory-mapped file
+        dirname = mkdtemp()
+        try:
+            memmap_filename = join(dirname, 'dataframe_of_meters.dat')
+            mapped = elec.dataframe_of_meters(sample_period=30, chunksize=5,
+                                              memmap_filename=memmap_filename,
+                                              n_workers=2)
+            np.testing.assert_array_equal(mapped.values, df.values)
+            mapped.iloc[0, 1] = 42
+            on_disk = np.memmap(memmap_filename, dtype=np.float32, mode='r',
+                                shape=mapped.shape, order='F')
+            self.assertEqual(on_disk[0, 1], 42)
+            del mapped, on_disk
+        finally:
+            rmtree(dirname)
+            ds.store.close()
+
+    def test_grid_of_sections(self):
+        # Rows line up with the bins of resampling, which start at
+        # midnight in local time
+        for tz, period in [('Asia/Kolkata', 3600), ('Europe/London', 7)]:
+            start = pd.Timestamp('2014-06-01 05:00:10', tz=tz)
+            section = TimeFrame(start, start + pd.Timedelta(hours=2))
+            starts, offsets = metergroup._grid_of_sections(
+                [section], period * 10**9)
+            bins = pd.Series(1., index=[section.start, section.end]).resample(
+                '{:d}S'.format(period)).mean()
+            self.assertEqual(starts[0], bins.index[0].value)
+            self.assertEqual(offsets.tolist(), [0, len(bins)])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+from os.path import join
+from .testingtools import data_dir
+from ..pipeline import Pipeline
+from ..node import Node
+from ..preprocessing import Clip
+from ..stats import GoodSections, TotalEnergy
+from .. import DataSet
+
+
+class Counter(Node):
+
+    def reset(self):
+        self.n_chunks = 0
+
+    def process(self):
+        for chunk in self.upstream.process():
+            self.n_chunks += 1
+            yield chunk
+
+
+class Failing(Node):
+
+    def process(self):
+        for chunk in self.upstream.process():
+            raise ValueError("failed")
+            yield chunk
+
+
+class TestPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(join(data_dir(), 'energy.h5'))
+        cls.meter = cls.dataset.buildings[1].elec.meters[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.dataset.store.close()
+
+    def _linear_results(self):
+        good_sections = GoodSections(self.meter.get_source_node(chunksize=5))
+        good_sections.run()
+        energy = TotalEnergy(Clip(self.meter.get_source_node(chunksize=5)))
+        energy.run()
+        return good_sections.results, energy.results
+
+    def _pipeline(self):
+        pipeline = Pipeline(self.meter.get_source_node(chunksize=5))
+        counter = pipeline.add(Counter)
+        good_sections = pipeline.add(GoodSections, upstream=counter)
+        clip = pipeline.add(Clip, upstream=counter, copy=True)
+        energy = pipeline.add(TotalEnergy, upstream=clip)
+        counter_after_clip = pipeline.add(Counter, upstream=clip)
+        return pipeline, counter, good_sections, energy, counter_after_clip
+
+    def _check(self, threads):
+        true_good_sections, true_energy = self._linear_results()
+        pipeline, counter, good_sections, energy, counter_after_clip = self._pipeline()
+        self.assertEqual(pipeline.leaves(), [good_sections, energy, counter_after_clip])
+        results = pipeline.run(threads=threads, max_queue_size=1)
+        self.assertGreater(counter.n_chunks, 1)
+        self.assertEqual(counter_after_clip.n_chunks, counter.n_chunks)
+        self.assertTrue(results[energy]._data.equals(true_energy._data))
+        results[good_sections].finalize()
+        true_good_sections.finalize()
+        self.assertTrue(results[good_sections]._data._df.equals(
+            true_good_sections._data._df))
+
+    def test_run(self):
+        self._check(threads=False)
+
+    def test_run_threads(self):
+        self._check(threads=True)
+
+    def test_error(self):
+        for threads in [False, True]:
+            pipeline = Pipeline(self.meter.get_source_node(chunksize=5))
+            pipeline.add(Counter)
+            pipeline.add(Failing)
+            with self.assertRaises(ValueError):
+                pipeline.run(threads=threads)
+
+
+if __name__ == '__main__':
+    unittest.main()
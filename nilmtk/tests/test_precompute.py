@@ -0,0 +1,97 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+from os.path import join, isfile
+from tempfile import mkdtemp
+from shutil import rmtree, copyfile
+from .testingtools import data_dir
+from nilmtk import DataSet
+from nilmtk.datastore import HDFDataStore
+from nilmtk.precompute import precompute_stats
+from nilmtk.statcache import StatCache
+
+
+class TestPrecompute(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = mkdtemp()
+        self.filename = join(self.dirname, 'energy.h5')
+        copyfile(join(data_dir(), 'energy.h5'), self.filename)
+        self.journal = join(self.dirname, 'journal.h5')
+
+    def tearDown(self):
+        rmtree(self.dirname)
+
+    def _check_cached(self):
+        dataset = DataSet(self.filename, mode='r')
+        try:
+            for meter in dataset.buildings[1].elec.all_elecmeters():
+                for stat in ['good_sections', 'nonzero_sections']:
+                    self.assertIsNotNone(meter.get_cached_stat(stat))
+        finally:
+            dataset.store.close()
+
+    def test_resume(self):
+        jobs = precompute_stats(self.filename, n_workers=1,
+                                journal=self.journal, verbose=False)
+        self.assertTrue(isfile(self.journal))
+        self.assertTrue((jobs['status'] == 'done').all())
+        self.assertTrue((jobs['n_rows'] > 0).all())
+        self._check_cached()
+
+        # Forget the first meter, as if the run had been interrupted
+        dataset = DataSet(self.filename)
+        dataset.clear_cache()
+        dataset.store.close()
+        journal = HDFDataStore(self.journal)
+        journal.put('/jobs', jobs.iloc[1:], fixed=True)
+        journal.close()
+
+        resumed = precompute_stats(self.filename, n_workers=1,
+                                   journal=self.journal, verbose=False)
+        self.assertEqual(len(resumed), len(jobs))
+        # Only the first meter has been computed again
+        finished = resumed.set_index('meter')['finished']
+        previous = jobs.set_index('meter')['finished']
+        first = jobs['meter'].iloc[0]
+        self.assertGreater(finished[first], previous[first])
+        self.assertTrue(finished.drop(first).equals(previous.drop(first)))
+        # Done meters are copied from the journal again
+        self._check_cached()
+
+    def test_given_datasets(self):
+        dataset = DataSet(self.filename)
+        jobs = precompute_stats(dataset, n_workers=1, journal=self.journal,
+                                verbose=False)
+        self.assertTrue((jobs['status'] == 'done').all())
+        dataset.store.close()
+        self._check_cached()
+
+        # Read-only datasets are rejected before anything is computed
+        dataset = DataSet(self.filename, mode='r')
+        journal = join(self.dirname, 'journal_read_only.h5')
+        try:
+            with self.assertRaises(ValueError):
+                precompute_stats(dataset, n_workers=1, journal=journal,
+                                 verbose=False)
+            self.assertFalse(isfile(journal))
+            # ...unless their stats are cached elsewhere
+            sidecar = StatCache(HDFDataStore(join(self.dirname, 'stats.h5'), 'w'))
+            dataset.set_stat_cache(sidecar)
+            precompute_stats(dataset, n_workers=1, journal=journal,
+                             verbose=False)
+            for meter in dataset.buildings[1].elec.all_elecmeters():
+                self.assertIsNotNone(meter.get_cached_stat('good_sections'))
+            sidecar.store.close()
+        finally:
+            dataset.store.close()
+
+    def test_workers(self):
+        jobs = precompute_stats(self.filename, n_workers=2,
+                                journal=self.journal, verbose=False)
+        self.assertTrue((jobs['status'] == 'done').all())
+        self._check_cached()
+
+
+if __name__ == '__main__':
+    unittest.main()
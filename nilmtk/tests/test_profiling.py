@@ -0,0 +1,59 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import json
+import unittest
+from os.path import join
+from .testingtools import data_dir
+from ..profiling import profile, get_profiler
+from ..processing import Processing
+from ..stats import GoodSections
+from .. import DataSet
+
+
+class Dummy(Processing):
+
+    def train(self, metergroup):
+        return 42
+
+
+class TestProfiling(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = DataSet(join(data_dir(), 'energy.h5'))
+        cls.meter = cls.dataset.buildings[1].elec.meters[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.dataset.store.close()
+
+    def test_nodes(self):
+        with profile() as profiler:
+            node = GoodSections(self.meter.get_source_node(chunksize=5))
+            node.run()
+        self.assertIsNone(get_profiler())
+        table = profiler.table()
+        self.assertEqual(sorted(table.index), ['DataStore.load', 'GoodSections'])
+        load, good_sections = table.loc['DataStore.load'], table.loc['GoodSections']
+        self.assertGreater(load['chunks'], 1)
+        self.assertGreaterEqual(load['rows_out'], 14)
+        self.assertEqual(good_sections['rows_in'], load['rows_out'])
+        self.assertEqual(good_sections['rows_out'], load['rows_out'])
+        self.assertEqual(good_sections['calls'], 1)
+        self.assertGreater(load['bytes_out'], 0)
+        self.assertGreaterEqual(good_sections['seconds'], good_sections['self_seconds'])
+        self.assertEqual(json.loads(profiler.to_json())['GoodSections']['chunks'],
+                         good_sections['chunks'])
+
+        # Nothing is recorded when profiling is off
+        GoodSections(self.meter.get_source_node()).run()
+        self.assertEqual(profiler.table()['calls'].sum(), table['calls'].sum())
+
+    def test_processing(self):
+        with profile() as profiler:
+            self.assertEqual(Dummy().train(None), 42)
+        self.assertEqual(profiler.to_dict()['Dummy.train']['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
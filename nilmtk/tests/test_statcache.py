@@ -0,0 +1,101 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+from os.path import join
+from tempfile import mkdtemp
+from shutil import rmtree
+from unittest.mock import patch
+import pandas as pd
+from nilmtk.datastore import HDFDataStore
+from nilmtk.statcache import StatCache, get_stat_cache
+
+METER = 'REDD/building1/elec/meter1'
+PARAMS = {'max_sample_period': 20}
+LAST = pd.Timestamp('2014-01-01 12:00', tz='Europe/London')
+
+
+class TestStatCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = mkdtemp()
+        self.datastore = HDFDataStore(join(self.dirname, 'stats.h5'), mode='w')
+        self.cache = StatCache(self.datastore)
+        start = pd.Timestamp('2014-01-01', tz='Europe/London')
+        self.data = pd.DataFrame({'section_start': [start],
+                                  'section_end': [LAST]})
+        self.timeframes = self.data.copy()
+
+    def tearDown(self):
+        self.datastore.close()
+        rmtree(self.dirname)
+
+    def _put(self, stat='good_sections', params=PARAMS, fingerprint=(10, LAST)):
+        self.cache.put(METER, stat, params, fingerprint, self.data,
+                       self.timeframes)
+
+    def test_get(self):
+        self.assertIsNone(self.cache.get(METER, 'good_sections', PARAMS, (10, LAST)))
+        self._put()
+        data, timeframes = self.cache.get(METER, 'good_sections', PARAMS, (10, LAST))
+        self.assertTrue(data.equals(self.data))
+        self.assertTrue(timeframes.equals(self.timeframes))
+        # Other parameters are another entry
+        self.assertIsNone(self.cache.get(METER, 'good_sections',
+                                         {'max_sample_period': 30}, (10, LAST)))
+        # The index is persisted
+        reopened = StatCache(self.datastore)
+        self.assertIsNotNone(reopened.get(METER, 'good_sections', PARAMS, (10, LAST)))
+
+    def test_fingerprint(self):
+        self._put()
+        # Appended rows keep the entry
+        later = LAST + pd.Timedelta('1h')
+        self.assertIsNotNone(self.cache.get(METER, 'good_sections', PARAMS, (20, later)))
+        # Rewritten data invalidates it
+        self.assertIsNone(self.cache.get(METER, 'good_sections', PARAMS, (9, LAST)))
+        self.assertEqual(len(self.cache.entries()), 0)
+
+    def test_evict(self):
+        self.cache.max_entries = 2
+        for stat in ['good_sections', 'nonzero_sections', 'total_energy']:
+            self._put(stat)
+        entries = self.cache.entries()
+        self.assertEqual(sorted(entries['stat']),
+                         ['nonzero_sections', 'total_energy'])
+        self.assertEqual(self.cache.remove(stat='total_energy'), 1)
+        self.cache.clear()
+        self.assertEqual(len(self.cache.entries()), 0)
+
+    def test_store_fingerprint(self):
+        index = pd.date_range('2014-01-01', periods=20, freq='1min',
+                              tz='Europe/London')
+        frame = pd.DataFrame({'power': range(20)}, index=index, dtype=float)
+        self.datastore.put('/fixed', frame, fixed=True)
+        self.datastore.store.put('/series', frame['power'], format='fixed')
+        self.datastore.put('/empty', frame.iloc[:0], fixed=True)
+        # Only the last row is read, not the whole table
+        with patch.object(pd.HDFStore, 'get', side_effect=AssertionError):
+            self.assertEqual(self.datastore.fingerprint('/fixed'),
+                             (20, index[-1]))
+            self.assertEqual(self.datastore.fingerprint('/series'),
+                             (20, index[-1]))
+            self.assertEqual(self.datastore.fingerprint('/empty'), (0, None))
+
+    def test_read_only(self):
+        read_only = StatCache(self.datastore, read_only=True)
+        read_only.put(METER, 'good_sections', PARAMS, (10, LAST), self.data,
+                      self.timeframes)
+        self.assertIsNone(read_only.get(METER, 'good_sections', PARAMS, (10, LAST)))
+
+    def test_cache_of_read_only_store(self):
+        self.assertFalse(get_stat_cache(self.datastore, 1).read_only)
+        self.datastore.close()
+        self.datastore = HDFDataStore(join(self.dirname, 'stats.h5'), mode='r')
+        cache = get_stat_cache(self.datastore, 1)
+        self.assertTrue(cache.read_only)
+        cache.put(METER, 'good_sections', PARAMS, (10, LAST), self.data,
+                  self.timeframes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+import numpy as np
+import pandas as pd
+from nilmtk.timeframe import TimeFrame
+from nilmtk.timeframegroup import TimeFrameGroup
+
+TZ = 'Europe/London'
+
+
+def group(*sections):
+    """Builds a TimeFrameGroup from (start, end) pairs of minutes."""
+    base = pd.Timestamp('2014-01-01', tz=TZ)
+    return TimeFrameGroup([TimeFrame(base + pd.Timedelta(minutes=start),
+                                     base + pd.Timedelta(minutes=end))
+                           for start, end in sections])
+
+
+def minutes(timeframegroup):
+    base = pd.Timestamp('2014-01-01', tz=TZ)
+    return [(int((tf.start - base).total_seconds() // 60),
+             int((tf.end - base).total_seconds() // 60))
+            for tf in timeframegroup]
+
+
+class TestTimeFrameGroup(unittest.TestCase):
+
+    def setUp(self):
+        #  self:   |######----#####-----######-#|
+        #  other:  |---##---####----##-----###-#|
+        self.a = group((0, 6), (10, 15), (20, 26), (27, 28))
+        self.b = group((3, 5), (8, 12), (16, 18), (23, 26), (27, 28))
+
+    def test_union(self):
+        self.assertEqual(minutes(self.a.union(self.b)),
+                         [(0, 6), (8, 15), (16, 18), (20, 26), (27, 28)])
+        # Touching sections are joined
+        self.assertEqual(minutes(TimeFrameGroup.union_many(
+            [group((0, 5)), group((5, 10)), group((20, 30))])),
+            [(0, 10), (20, 30)])
+
+    def test_intersection(self):
+        self.assertEqual(minutes(self.a.intersection(self.b)),
+                         [(3, 5), (10, 12), (23, 26), (27, 28)])
+        self.assertEqual(
+            minutes(TimeFrameGroup.intersect_many([group((0, 5)), group((5, 10))])),
+            [])
+        self.assertEqual(TimeFrameGroup.intersect_many([self.a, TimeFrameGroup()]).count(), 0)
+
+    def test_diff(self):
+        self.assertEqual(minutes(self.a.diff(self.b)),
+                         [(0, 3), (5, 6), (12, 15), (20, 23)])
+        # A section of other which spans several sections of self
+        self.assertEqual(minutes(group((0, 2), (4, 6), (8, 10)).diff(group((1, 9)))),
+                         [(0, 1), (9, 10)])
+
+    def test_matching(self):
+        self.assertEqual(minutes(self.a.matching(self.b)),
+                         [(3, 5), (6, 8), (10, 12), (15, 16), (18, 20),
+                          (23, 28)])
+
+    def test_merge_and_remove(self):
+        merged = self.a.merge_shorter_gaps_than(pd.Timedelta(minutes=3))
+        self.assertEqual(minutes(merged), [(0, 6), (10, 15), (20, 28)])
+        self.assertEqual(minutes(self.a.merge_shorter_gaps_than('5min')),
+                         [(0, 28)])
+        self.assertEqual(minutes(self.a.remove_shorter_than(pd.Timedelta(minutes=5))),
+                         [(0, 6), (20, 26)])
+        self.assertEqual(minutes(group((0, 5), (5, 10), (11, 12)).simplify()),
+                         [(0, 10), (11, 12)])
+
+    def test_truncate_and_invert(self):
+        truncated = TimeFrameGroup(self.a)
+        truncated.truncate(start=self.a[0].start + pd.Timedelta(minutes=2),
+                           end=self.a[2].start + pd.Timedelta(minutes=1))
+        self.assertEqual(minutes(truncated), [(2, 6), (10, 15), (20, 21)])
+        # self.a is not changed
+        self.assertEqual(self.a.count(), 4)
+
+        start = self.a[0].start - pd.Timedelta(minutes=5)
+        end = self.a[-1].end + pd.Timedelta(minutes=5)
+        self.assertEqual(minutes(self.a.invert(start, end)),
+                         [(-5, 0), (6, 10), (15, 20), (26, 27), (28, 33)])
+        self.assertEqual(minutes(self.a.invert()),
+                         [(6, 10), (15, 20), (26, 27)])
+
+    def test_frame_and_arrays(self):
+        df = self.a._df
+        self.assertEqual(str(df['section_start'].dt.tz), TZ)
+        # Changes to the frame are kept
+        df.iloc[-1, 1] = df.iloc[-1, 1] + pd.Timedelta(minutes=1)
+        self.assertEqual(minutes(self.a)[-1], (27, 29))
+
+        starts, ends, tz = self.a.arrays()
+        copied = TimeFrameGroup.from_arrays(starts, ends, tz)
+        self.assertTrue(copied._df.equals(self.a._df))
+        self.assertEqual(self.a.uptime(), pd.Timedelta(minutes=19))
+
+        # Open edges
+        opened = TimeFrameGroup([TimeFrame(start=self.a[0].start)])
+        self.assertIsNone(opened[0].end)
+        self.assertTrue(opened._df['section_end'].isnull().all())
+        self.assertEqual(minutes(TimeFrameGroup.intersect_many([opened, self.b])),
+                         minutes(self.b))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/python
+from __future__ import print_function, division
+import unittest
+import json
+import threading
+import time
+import pandas as pd
+from datetime import timedelta
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import unquote
+from nilmtk import TimeFrame
+from nilmtk.datastore.VEP.vepconnector import VEPConnector
+
+
+START = pd.Timestamp('2016-01-01', tz='UTC')
+END = START + timedelta(days=1)
+COLUMNS = [('power', 'active')]
+
+
+class StubVEPHandler(BaseHTTPRequestHandler):
+    """Answers `gettoken` and `load` like the VEP API.  `load` returns one
+    value per `sample_period` between start (inclusive) and end (exclusive)
+    where the value is the number of seconds since `START`.
+    """
+    protocol_version = 'HTTP/1.1' # keep-alive
+    DELAY = 0.05
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self._respond({'access_token': 'token'})
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.clients.add(self.client_address)
+        time.sleep(self.DELAY)
+        path = unquote(self.path).split('/EnergyTK/load/')[1]
+        key, start, end, columns, sample_period = path.rsplit('/', 4)
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        index = pd.date_range(start, end,
+                              freq=timedelta(seconds=int(sample_period)))
+        index = index[index < end]
+        values = (index - START).total_seconds()
+        with server.lock:
+            server.in_flight -= 1
+        self._respond({'TimeStamps': [str(t) for t in index],
+                       'Values': [[v] for v in values]})
+
+    def _respond(self, content):
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubVEPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubVEPHandler)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.clients = set()
+
+
+class TestVEPConnector(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubVEPServer()
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        address = 'http://127.0.0.1:{:d}/'.format(cls.server.server_port)
+        cls.connector = VEPConnector(
+            address, {'username': 'user', 'password': 'secret'},
+            logging=False, n_connections=4)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.connector.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def _load(self, **load_kwargs):
+        return list(self.connector.load(
+            '/building1/elec/meter1', columns=COLUMNS,
+            sections=[TimeFrame(START, END)], sample_period=60,
+            chunksize=100, **load_kwargs))
+
+    def test_load_in_order(self):
+        self.server.max_in_flight = 0
+        chunks = self._load(n_look_ahead_rows=5)
+        self.assertEqual(len(chunks), 15)
+        data = pd.concat(chunks)
+        self.assertEqual(len(data), 24 * 60)
+        self.assertTrue(data.index.is_monotonic_increasing)
+        self.assertEqual(data.iloc[-1, 0], (END - START).total_seconds() - 60)
+        self.assertEqual(chunks[0].timeframe.start, START)
+        self.assertEqual(chunks[-1].timeframe.end, END)
+        for chunk in chunks[:-1]:
+            self.assertEqual(len(chunk.look_ahead), 5)
+            self.assertEqual(chunk.look_ahead.index[0],
+                             chunk.index[-1] + timedelta(minutes=1))
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 4)
+        # All requests went through the pooled keep-alive connections
+        self.assertLessEqual(len(self.server.clients), 4)
+
+    def test_serial_equals_concurrent(self):
+        serial = self._load(n_concurrent_requests=1)
+        concurrent = self._load(n_concurrent_requests=4)
+        self.assertEqual(len(serial), len(concurrent))
+        for chunk, other in zip(serial, concurrent):
+            self.assertTrue(chunk.equals(other))
+            self.assertEqual(chunk.timeframe, other.timeframe)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,6 +11,12 @@ import numpy as np
 from nilmtk.consts import SECS_PER_DAY
 from nilmtk.timeframe import TimeFrame, convert_none_to_nat
 
+# Open edges of sections, i.e. TimeFrames with a start or end of None
+OPEN_START = np.iinfo(np.int64).min
+OPEN_END = np.iinfo(np.int64).max
+_COLUMNS = ['section_start', 'section_end']
+_EMPTY = np.empty(0, dtype=np.int64)
+
 
 class TimeFrameGroup():
     """ A collection of nilmtk.TimeFrame objects.
@@ -20,8 +26,14 @@ class TimeFrameGroup():
     load profiles to eg. find the good timeframes in all 
     the TimeFrameGroups.
 
-    The TimeFrameGroup has been rewritten using pandas DataFrames 
-    because the previous implementation was far to slow
+    The sections are held in two sorted int64 arrays of nanoseconds 
+    since the epoch (UTC), together with the timezone.  The set 
+    operations (union, intersection, diff, matching) are a single 
+    sweep over the merge sorted starts and ends of all groups.  The 
+    pandas DataFrame `_df` is only built when it is accessed.  As it 
+    may then be modified in place, it replaces the arrays until the 
+    next operation.  Open edges are OPEN_START and OPEN_END in the 
+    arrays and NaT in `_df`.
 
     Attributes:
     ----------
@@ -30,18 +42,72 @@ class TimeFrameGroup():
     """
 
     def __init__(self, timeframes=None, starts_and_ends = None):
+        self._frame = None
+        self._arrays = None
         if isinstance(timeframes, TimeFrameGroup):
-            self._df = timeframes._df.copy()
-        if isinstance(timeframes, pd.core.indexes.datetimes.DatetimeIndex):
-            self._df = timeframes
+            self._arrays = timeframes.arrays()
+        elif isinstance(timeframes, pd.core.indexes.datetimes.DatetimeIndex):
+            self._frame = timeframes
         elif isinstance(timeframes, pd.DataFrame):
-            self._df = timeframes.copy() 
+            self._frame = timeframes.copy() 
         elif not starts_and_ends is None:
-            self._df = pd.DataFrame({'section_start': starts_and_ends['starts'],  'section_end': starts_and_ends['ends']})
+            self._frame = pd.DataFrame({'section_start': starts_and_ends['starts'],  'section_end': starts_and_ends['ends']})
         elif not timeframes is None:
-            self._df = pd.DataFrame([(frame.start, frame.end) for frame in timeframes], columns = ['section_start', 'section_end'])
+            timeframes = list(timeframes)
+            starts = np.array([_to_ns(frame.start, OPEN_START) for frame in timeframes], dtype=np.int64)
+            ends = np.array([_to_ns(frame.end, OPEN_END) for frame in timeframes], dtype=np.int64)
+            tz = None
+            for frame in timeframes:
+                for timestamp in [frame.start, frame.end]:
+                    if tz is None and timestamp is not None:
+                        tz = timestamp.tz
+            self._arrays = (starts, ends, tz)
         else:
-            self._df = pd.DataFrame(columns = ['section_start', 'section_end'])
+            self._frame = pd.DataFrame(columns = _COLUMNS)
+
+
+    @classmethod
+    def from_arrays(cls, starts, ends, tz=None):
+        ''' Creates a TimeFrameGroup without going through pandas.
+
+        Paramters
+        ---------
+        starts, ends: np.ndarray of int64
+            Nanoseconds since the epoch (UTC) as in `DatetimeIndex.asi8`.
+            Open edges are OPEN_START (or NaT) and OPEN_END.
+        tz: str or tzinfo, optional
+            The timezone of the timestamps in `_df` and the TimeFrames.
+        '''
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        if len(ends) and ends.min() == OPEN_START:
+            ends = np.where(ends == OPEN_START, OPEN_END, ends)
+        group = cls.__new__(cls)
+        group._frame = None
+        group._arrays = (starts, ends, tz)
+        return group
+
+
+    def arrays(self):
+        ''' Returns the sections as (starts, ends, tz).
+        The arrays must not be modified. '''
+        if self._arrays is not None:
+            return self._arrays
+        return _arrays_from_frame(self._frame)
+
+
+    @property
+    def _df(self):
+        if self._frame is None:
+            self._frame = _frame_from_arrays(*self._arrays)
+            # The frame may be modified in place from here on
+            self._arrays = None
+        return self._frame
+
+    @_df.setter
+    def _df(self, df):
+        self._frame = df
+        self._arrays = None
 
 
     def plot(self, ax=None, y=0, height=1, gap=0.05, color='b', **plot_kwargs):
@@ -81,12 +147,10 @@ class TimeFrameGroup():
         Returns:
             timeframe: outer timeframe of this TimeFrameGroup
         '''
-
-        if self._df.empty:
+        starts, ends, tz = self.arrays()
+        if len(starts) == 0:
             return TimeFrame(start = None, end = None)
-
-        idx = self._df.index
-        return TimeFrame(start = self._df.loc[idx[0], 'section_start'], end = self._df.loc[idx[-1], 'section_end'])
+        return TimeFrame(start = _to_timestamp(starts[0], tz), end = _to_timestamp(ends[-1], tz))
 
 
     def union(self, other):
@@ -96,30 +160,22 @@ class TimeFrameGroup():
         diff():                 |######--#######-##--######-#|
         '''
         assert isinstance(other, (TimeFrameGroup, list))
-        return TimeFrameGroup.union_many([self, other])
+        return TimeFrameGroup.union_many([self, _as_group(other)])
 
 
     def union_many(groups):
         ''' 
-        Function to do a do a fast intersection between many timeframes
+        Function to do a do a fast union between many timeframes.
+        Sections which touch each other are joined.
         
         Paramters
         ---------
         groups: [nilmtk.TimeFrameGroup]
             The group of timeframegroups to calculate the union for.
         '''
-        all_events = pd.Series()
-        for group in groups:
-            all_events = all_events.append(pd.Series(1, index=pd.DatetimeIndex(group._df['section_start'])))
-            all_events = all_events.append(pd.Series(-1, index=pd.DatetimeIndex(group._df['section_end'])))
-        all_events.sort_index(inplace=True)
-        any_active = (all_events.cumsum()>0).astype(int)
-
-        switches = (any_active - any_active.shift(1).fillna(0))
-        starts = all_events[switches == 1].index
-        ends = all_events[switches == -1].index
-        result = pd.DataFrame({'section_start': starts, 'section_end':ends})
-        return TimeFrameGroup(result)
+        starts, ends, weights, tz = _events_of(groups)
+        starts, ends = _sweep(starts, ends, weights, lambda level: level > 0)
+        return TimeFrameGroup.from_arrays(starts, ends, tz)
 
 
 
@@ -132,22 +188,17 @@ class TimeFrameGroup():
         diff():                 |###--#------###-----###-----|
         '''
         assert isinstance(other, (TimeFrameGroup, list))
-        
-        all_events = pd.Series()
-        all_events = all_events.append(pd.Series(1, index=pd.DatetimeIndex(self._df['section_start'])))
-        all_events = all_events.append(pd.Series(-1, index=pd.DatetimeIndex(self._df['section_end'])))
-        all_events = all_events.append(pd.Series(-1, index=pd.DatetimeIndex(other._df['section_start'])))
-        all_events = all_events.append(pd.Series(+1, index=pd.DatetimeIndex(other._df['section_end'])))
-        all_events.sort_index(inplace=True)
-
-        all_active = (all_events.cumsum()>0)
-        starts = all_events.index[all_active]
-        ends = all_active.shift(1)
-        if len(ends > 0):
-            ends[0] = False
-        ends = all_events[ends].index
-        result = pd.DataFrame({'section_start': starts, 'section_end':ends})
-        return TimeFrameGroup(result)
+        other = _as_group(other)
+        starts, ends, tz = self.arrays()
+        other_starts, other_ends, other_tz = other.arrays()
+        # Any section of other outweighs all sections of self
+        weights = np.concatenate([
+            np.ones(len(starts), dtype=np.int64),
+            np.full(len(other_starts), -(len(starts) + 1), dtype=np.int64)])
+        starts, ends = _sweep(np.concatenate([starts, other_starts]),
+                              np.concatenate([ends, other_ends]),
+                              weights, lambda level: level > 0)
+        return TimeFrameGroup.from_arrays(starts, ends, tz if tz is not None else other_tz)
 
 
 
@@ -164,7 +215,7 @@ class TimeFrameGroup():
         # Hier hat es geknallt als ich Accuracy als Error Metric berechnen wollte. Bei der Assertion
 
         assert isinstance(other, (TimeFrameGroup, list))
-        return TimeFrameGroup.intersect_many([self, other])
+        return TimeFrameGroup.intersect_many([self, _as_group(other)])
 
 
     def intersect_many(groups):
@@ -176,22 +227,14 @@ class TimeFrameGroup():
         groups: [nilmtk.TimeFrameGroup]
             The group of timeframegroups to calculate the intersection for.
         '''
-        if any(map(lambda grp: len(grp._df) == 0, groups)):
+        groups = list(groups)
+        if any(map(lambda grp: grp.count() == 0, groups)):
             return TimeFrameGroup()
 
-        all_events = pd.Series()
-        for group in groups:
-            all_events = all_events.append(pd.Series(1, index=pd.DatetimeIndex(group._df['section_start'])))
-            all_events = all_events.append(pd.Series(-1, index=pd.DatetimeIndex(group._df['section_end'])))
-        all_events.sort_index(inplace=True)
-        all_active = (all_events.cumsum()==len(groups))
-        starts = all_events.index[all_active]
-        ends = all_active.shift(1).fillna(False)
-        #if len(ends > 0):
-        #    ends[0] = False
-        ends = all_events[ends].index
-        result = pd.DataFrame({'section_start': starts, 'section_end':ends})
-        return TimeFrameGroup(result)
+        starts, ends, weights, tz = _events_of(groups)
+        n_groups = len(groups)
+        starts, ends = _sweep(starts, ends, weights, lambda level: level == n_groups)
+        return TimeFrameGroup.from_arrays(starts, ends, tz)
 
 
 
@@ -214,7 +257,7 @@ class TimeFrameGroup():
         '''
         
         assert isinstance(other, (TimeFrameGroup, list))
-        return TimeFrameGroup.matching_many([self, other])
+        return TimeFrameGroup.matching_many([self, _as_group(other)])
 
 
     def matching_many(groups):
@@ -228,24 +271,15 @@ class TimeFrameGroup():
         groups: [nilmtk.TimeFrameGroup]
             The group of timeframegroups to calculate the matching for.
         '''
-        if any(map(lambda grp: len(grp._df) == 0, groups)):
+        groups = list(groups)
+        if any(map(lambda grp: grp.count() == 0, groups)):
             return TimeFrameGroup()
 
-        all_events = pd.Series()
-        for group in groups:
-            all_events = all_events.append(pd.Series(1, index=pd.DatetimeIndex(group._df['section_start'])))
-            all_events = all_events.append(pd.Series(-1, index=pd.DatetimeIndex(group._df['section_end'])))
-        all_events.sort_index(inplace=True)
-        all_events_sum = all_events.cumsum()
-        all_active = ((all_events_sum==len(groups)) | (all_events_sum == 0))
-        # Remove last, which is always created after end of all sections
-        starts = all_events.index[all_active][:-1] 
-        ends = all_active.shift(1)
-        if len(ends > 0):
-            ends[0] = False
-        ends = all_events[ends].index
-        result = pd.DataFrame({'section_start': starts, 'section_end':ends})
-        return TimeFrameGroup(result).simplify()
+        starts, ends, weights, tz = _events_of(groups)
+        n_groups = len(groups)
+        starts, ends = _sweep(starts, ends, weights,
+                              lambda level: (level == n_groups) | (level == 0))
+        return TimeFrameGroup.from_arrays(starts, ends, tz)
 
 
     def get_TP_TN_FP_FN(self, ground_truth, good_sections):
@@ -271,58 +305,37 @@ class TimeFrameGroup():
         FN: TimeFrameGroup
             TimeFrameGroup designating sections where the state is False Negative
         '''
-        all_events = pd.Series()
-        for i, cur in enumerate([self, ground_truth]):
-            i += 1 # The i is used to distinguish FP and FN
-            all_events = all_events.append(pd.Series(1*i, index=pd.DatetimeIndex(cur._df['section_start'])))
-            all_events = all_events.append(pd.Series(-1*i, index=pd.DatetimeIndex(cur._df['section_end'])))
-        all_events.sort_index(inplace=True)
-        # Take care that regions in the end not forgotten
-        all_events = all_events.groupby(all_events.index).sum()
-        if all_events.index[-1] != good_sections.get_timeframe().end:
-            all_events[good_sections.get_timeframe().end] = 0
-        if all_events.index[0] != good_sections.get_timeframe().start:
-            all_events[good_sections.get_timeframe().start] = 0
-        all_events.sort_index(inplace=True)
-
-        all_events_sum = all_events.cumsum()
-        TP = (all_events_sum == 3) # both on
-        TN = (all_events_sum == 0) # both off
-        FP = (all_events_sum == 1) # gt == 0 but self == 1
-        FN = (all_events_sum == 2) # gt == 2 but self == 0
-
-        # Remove last, which is always created after end of all sections
+        starts, ends, tz = self.arrays()
+        truth_starts, truth_ends, _ = ground_truth.arrays()
+        good_starts, good_ends, _ = good_sections.arrays()
+        # The i is used to distinguish FP and FN.  The borders of the 
+        # good sections are events without weight so that regions in 
+        # the end are not forgotten.
+        weights = np.concatenate([np.ones(len(starts), dtype=np.int64),
+                                  np.full(len(truth_starts), 2, dtype=np.int64),
+                                  np.zeros(len(good_starts[:1]), dtype=np.int64)])
+        starts = np.concatenate([starts, truth_starts, good_starts[:1]])
+        ends = np.concatenate([ends, truth_ends, good_ends[-1:]])
+
         results = []
-        for cur in [TP, TN, FP, FN]:
-            starts = all_events.index[cur]#[:-1]
-            ends = cur.shift(1)
-            #if len(ends) > 0:
-            ends = ends.fillna(False)
-            ends = all_events[ends].index
-
-            if len(starts) == 0 or len(ends) == 0:
-                results.append(TimeFrameGroup())
-                continue
-
-            if starts[-1] >= ends[-1]:
-                starts = starts[:-1]
-            result = pd.DataFrame({'section_start': starts, 'section_end':ends})
-            results.append(TimeFrameGroup(result).simplify())
+        for state in [3, 0, 1, 2]: # both on, both off, only self, only ground truth
+            state_starts, state_ends = _sweep(starts, ends, weights, lambda level: level == state)
+            results.append(TimeFrameGroup.from_arrays(state_starts, state_ends, tz))
         return results
 
     def uptime(self):
         """
         Calculates total timedelta of all timeframes joined together.
+        Open sections are left out.
 
         Returns
         -------
         uptime: int
             total timedelta of all timeframes joined together.
         """
-        if self._df.empty:
-            return pd.Timedelta(0)
-
-        return (self._df['section_end'] - self._df['section_start']).sum()
+        starts, ends, _ = self.arrays()
+        closed = (starts != OPEN_START) & (ends != OPEN_END)
+        return pd.Timedelta(int((ends[closed] - starts[closed]).sum()))
 
 
 
@@ -332,7 +345,7 @@ class TimeFrameGroup():
 
         Parameters
         ----------
-        threshold: int
+        threshold: int, str or pd.Timedelta
             Only keep segments, with a duration longer than threshold.
 
         Returns
@@ -340,7 +353,11 @@ class TimeFrameGroup():
         simplified: nilmtk.TimeFrameGroup
             A timeframegroup with the targeted segments removed.
         """
-        return TimeFrameGroup(self._df[self._df['section_end']-self._df['section_start'] > threshold])
+        starts, ends, tz = self.arrays()
+        open_ = (starts == OPEN_START) | (ends == OPEN_END)
+        durations = np.where(open_, 0, ends - starts)
+        keep = open_ | (durations > _to_ns_delta(threshold))
+        return TimeFrameGroup.from_arrays(starts[keep], ends[keep], tz)
 
 
     def merge_shorter_gaps_than(self, threshold):
@@ -350,7 +367,7 @@ class TimeFrameGroup():
 
         Parameters
         ----------
-        threshold: int
+        threshold: int, str or pd.Timedelta
             Only keep gaps, with a duration longer than threshold.
 
         Returns
@@ -358,19 +375,11 @@ class TimeFrameGroup():
         simplified: nilmtk.TimeFrameGroup
             A timeframegroup with the targeted segments removed.
         """
-        if len(self._df) < 2:
-            return TimeFrameGroup(self._df.copy())
-
-        if isinstance(threshold, str):
-            threshold = pd.Timedelta(threshold)
-        if isinstance(threshold, int):
-            threshold = pd.Timedelta(str(threshold) + "s")
-
-        gap_larger = ((self._df["section_start"].shift(-1).ffill() - self._df["section_end"]) > threshold)
-        gap_larger.iloc[-1] = True # keep last
-        relevant_starts = self._df[["section_start"]][gap_larger.shift(1).fillna(True)].reset_index(drop=True)
-        relevant_ends = self._df[["section_end"]][gap_larger].reset_index(drop=True)
-        return TimeFrameGroup(pd.concat([relevant_starts, relevant_ends], axis=1))
+        starts, ends, tz = self.arrays()
+        if len(starts) < 2:
+            return TimeFrameGroup.from_arrays(starts, ends, tz)
+        gap_larger = (starts[1:] - ends[:-1]) > _to_ns_delta(threshold)
+        return TimeFrameGroup.from_arrays(*_split_at(starts, ends, gap_larger), tz=tz)
 
 
     def simplify(self):
@@ -383,11 +392,11 @@ class TimeFrameGroup():
         simplified: TimeFrameGroup:
             The simplified timeframegroup.
         '''
-        to_keep = (self._df["section_start"].shift(-1) != self._df["section_end"])
-        #to_keep.iloc[-1] = True # keep last
-        relevant_starts = self._df[["section_start"]][to_keep.shift(1).fillna(True)].reset_index(drop=True)
-        relevant_ends = self._df[["section_end"]][to_keep].reset_index(drop=True)
-        return TimeFrameGroup(pd.concat([relevant_starts, relevant_ends], axis=1))
+        starts, ends, tz = self.arrays()
+        if len(starts) < 2:
+            return TimeFrameGroup.from_arrays(starts, ends, tz)
+        to_keep = starts[1:] != ends[:-1]
+        return TimeFrameGroup.from_arrays(*_split_at(starts, ends, to_keep), tz=tz)
 
 
 
@@ -395,6 +404,7 @@ class TimeFrameGroup():
     def truncate(self, timeframe = None, start = None, end = None, ):
         ''' Removes all sections outside the given section.
         The input can be either a timeframe of start and end.
+        The TimeFrameGroup is modified in place.
 
         Paramter
         --------
@@ -410,14 +420,14 @@ class TimeFrameGroup():
             mystart = timeframe.start
         if end == None and not timeframe is None:
             myend = timeframe.end
+        mystart = _to_ns(mystart, OPEN_START)
+        myend = _to_ns(myend, OPEN_END)
 
-        # Cut front
-        self._df  = self._df[self._df["section_end"] > mystart]
-        self._df.loc[self._df["section_start"] < mystart,"section_start"] = mystart
-
-        # Cut end
-        self._df  = self._df[self._df["section_start"] < myend]
-        self._df.loc[self._df["section_end"] > myend,"section_end"] = myend
+        starts, ends, tz = self.arrays()
+        keep = (ends > mystart) & (starts < myend)
+        self._arrays = (np.maximum(starts[keep], mystart),
+                        np.minimum(ends[keep], myend), tz)
+        self._frame = None
 
 
     def invert(self, start = None, end = None):
@@ -430,6 +440,8 @@ class TimeFrameGroup():
         --------
         start, end: pd.TimeStamp
             Defining the start and end of the region to invert.
+            Without them there is no section before the first 
+            and after the last section.
 
         Returns
         -------
@@ -437,44 +449,34 @@ class TimeFrameGroup():
             The inverted timeframegroup, with the section beeing the 
             gaps and the other ways arround.
         '''
-        if self._df.empty:
+        starts, ends, tz = self.arrays()
+        if len(starts) == 0:
             if not start is None and not end is None:
                 return TimeFrameGroup([TimeFrame(start=start, end=end)])
             return TimeFrameGroup()
 
-        inversion = self._df.copy()
-        if self._df.iloc[-1,:]["section_end"] < end:
-            val_to_append = self._df.iloc[-1,:]["section_start"]
-            inversion['section_end'] = inversion['section_end'].shift(1)
-            row = len(inversion)
-            inversion.loc[row, :] = [start, start]
-            inversion.loc[row, 'section_start'] = end
-            inversion.loc[row, 'section_end'] = val_to_append
-
-        else:
-            inversion['section_end'] = inversion['section_end'].shift(1)
-        if not start is None and start < self._df.iloc[-1,:]['section_start']:
-            inversion.loc[0, 'section_end'] = start
-
-        inversion = inversion.dropna().rename(columns={"section_end":"section_start", "section_start": "section_end"})
-        if not start is None and inversion.loc[0, 'section_start'] < start:
-            inversion.loc[0, 'section_start'] = start
-        if not end is None and inversion.loc[inversion.index[-1], 'section_end'] > end:
-            inversion.loc[inversion.index[-1], 'section_end'] = end
-
-        return TimeFrameGroup(inversion)
+        mystart = _to_ns(start, OPEN_START)
+        myend = _to_ns(end, OPEN_END)
+        inverted_starts, inverted_ends = ends[:-1], starts[1:]
+        if not start is None:
+            inverted_starts = np.concatenate([[mystart], inverted_starts])
+            inverted_ends = np.concatenate([starts[:1], inverted_ends])
+        if not end is None:
+            inverted_starts = np.concatenate([inverted_starts, ends[-1:]])
+            inverted_ends = np.concatenate([inverted_ends, [myend]])
+        inverted_starts = np.maximum(inverted_starts, mystart)
+        inverted_ends = np.minimum(inverted_ends, myend)
+        keep = inverted_ends > inverted_starts
+        return TimeFrameGroup.from_arrays(inverted_starts[keep], inverted_ends[keep], tz)
 
 
 
     def __iter__(self):
         ''' Enabled an iterator to iterate the TimeframeGroup
         '''
-        if len(self._df) == 0:
-            return iter([])
-        else:
-            for i, row in self._df.iterrows():
-                yield TimeFrame(start=row['section_start'], end=row['section_end'])
-            #return iter(list(self._df.apply(lambda row: TimeFrame(start=row['section_start'], end=row['section_end']), axis=1)))
+        starts, ends, tz = self.arrays()
+        for start, end in zip(_to_timestamps(starts, tz), _to_timestamps(ends, tz)):
+            yield TimeFrame(start=start, end=end)
         
 
     def __getitem__(self, i):
@@ -490,8 +492,8 @@ class TimeFrameGroup():
         elements: nilmtk.TimeFrame
             The element at position i
         '''
-        elements = self._df.iloc[i,:]
-        return TimeFrame(elements['section_start'], elements['section_end'])
+        starts, ends, tz = self.arrays()
+        return TimeFrame(_to_timestamp(starts[i], tz), _to_timestamp(ends[i], tz))
         
 
 
@@ -503,17 +505,21 @@ class TimeFrameGroup():
         new_timeframes: TimeFrameGroup
             Another timeframggroup which shall be added to the current one.
         '''
-
-        if not new_timeframes._df.empty:
-            if len(self._df) == 0:
-                self._df = new_timeframes._df.copy()
-            else:
-                self._df = self._df.append(new_timeframes._df)
+        new_starts, new_ends, new_tz = new_timeframes.arrays()
+        if len(new_starts) == 0:
+            return
+        starts, ends, tz = self.arrays()
+        self._arrays = (np.concatenate([starts, new_starts]),
+                        np.concatenate([ends, new_ends]),
+                        tz if len(starts) else new_tz)
+        self._frame = None
 
 
     def count(self):
         ''' Returns number of conained TimeFrames '''
-        return len(self._df)
+        if self._arrays is not None:
+            return len(self._arrays[0])
+        return len(self._frame)
 
 
     def pop(self, i):
@@ -527,9 +533,11 @@ class TimeFrameGroup():
         '''
         if i is None:
             i = -1
-        last = self._df.iloc[i,:]
-        self._df.drop(self._df.index[i], inplace = True)
-        return TimeFrame(last['section_start'], last['section_end'])
+        last = self[i]
+        starts, ends, tz = self.arrays()
+        self._arrays = (np.delete(starts, i), np.delete(ends, i), tz)
+        self._frame = None
+        return last
 
 
     def drop_all_but(self,i):
@@ -541,7 +549,8 @@ class TimeFrameGroup():
             The location of the event to keep.
         
         '''
-        return TimeFrameGroup(self._df[i:i+1].reset_index(drop=True))
+        starts, ends, tz = self.arrays()
+        return TimeFrameGroup.from_arrays(starts[i:i+1], ends[i:i+1], tz)
 
 
 
@@ -562,13 +571,125 @@ class TimeFrameGroup():
             the values can be afterwards read by using get_loc with the method set 
             to pad or ffill or by resampling to needed amount.
         '''
+        starts, ends, weights, tz = _events_of(timeframegroups)
+        times, levels = _levels(starts, ends, weights)
+        return pd.Series(levels, index=_to_timestamps(times, tz))
 
-        start, end = [], []
-        for tfg in timeframegroups:
-            start.append(tfg._df['section_start'])
-            end.append(tfg._df['section_end'])
-        start = pd.Series(1, index = pd.concat(start))
-        end = pd.Series(-1, index = pd.concat(end))
-        counts = start.append(end).sort_index().cumsum()
-        counts = counts.groupby(level=0).sum()
-        return counts
+
+
+def _as_group(timeframes):
+    if isinstance(timeframes, TimeFrameGroup):
+        return timeframes
+    return TimeFrameGroup(timeframes)
+
+
+def _events_of(groups):
+    """Concatenates the sections of all groups.
+
+    Returns
+    -------
+    starts, ends, weights : np.ndarray of int64
+        The weights are all 1.
+    tz : The timezone of the first group which has one.
+    """
+    starts, ends, tz = [_EMPTY], [_EMPTY], None
+    for group in groups:
+        group_starts, group_ends, group_tz = group.arrays()
+        starts.append(group_starts)
+        ends.append(group_ends)
+        if tz is None:
+            tz = group_tz
+    starts = np.concatenate(starts)
+    return starts, np.concatenate(ends), np.ones(len(starts), dtype=np.int64), tz
+
+
+def _levels(starts, ends, weights):
+    """Sweeps over the merge sorted starts and ends of sections.  Each 
+    start adds its weight to the level and each end subtracts it.
+
+    Returns
+    -------
+    times : np.ndarray of int64
+        The distinct times of all starts and ends.
+    levels : np.ndarray of int64
+        The level from each time up to the next one.
+    """
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([weights, -weights])
+    order = np.argsort(times, kind='mergesort')
+    times = times[order]
+    deltas = deltas[order]
+    # Starts and ends at the same time are summed up
+    distinct = np.empty(len(times), dtype=bool)
+    distinct[:1] = True
+    np.not_equal(times[1:], times[:-1], out=distinct[1:])
+    at = np.flatnonzero(distinct)
+    if len(at) == 0:
+        return _EMPTY, _EMPTY
+    return times[at], np.cumsum(np.add.reduceat(deltas, at))
+
+
+def _sweep(starts, ends, weights, condition):
+    """Returns the sections in which `condition(level)` holds, 
+    see `_levels`.  Touching sections are joined.  A section which 
+    still holds after the last time ends there."""
+    times, levels = _levels(starts, ends, weights)
+    active = np.zeros(len(times) + 2, dtype=np.int8)
+    active[1:-1] = condition(levels)
+    switches = np.diff(active)
+    section_starts = times[switches[:-1] == 1]
+    section_ends = times[np.minimum(np.flatnonzero(switches == -1), len(times) - 1)]
+    keep = section_ends > section_starts
+    return section_starts[keep], section_ends[keep]
+
+
+def _split_at(starts, ends, split):
+    """Joins each pair of consecutive sections which is not to `split`."""
+    return (np.concatenate([starts[:1], starts[1:][split]]),
+            np.concatenate([ends[:-1][split], ends[-1:]]))
+
+
+def _to_ns(timestamp, open_value):
+    timestamp = convert_none_to_nat(timestamp)
+    if timestamp is pd.NaT:
+        return open_value
+    return pd.Timestamp(timestamp).value
+
+
+def _to_ns_delta(threshold):
+    if isinstance(threshold, str):
+        threshold = pd.Timedelta(threshold)
+    if isinstance(threshold, (int, float, np.integer, np.floating)):
+        threshold = pd.Timedelta(seconds=threshold)
+    return pd.Timedelta(threshold).value
+
+
+def _to_timestamps(times, tz):
+    """Converts int64 ns to a DatetimeIndex in `tz`.  Open edges are NaT."""
+    times = np.where(times == OPEN_END, OPEN_START, times)
+    index = pd.DatetimeIndex(times.view('datetime64[ns]'))
+    if tz is not None:
+        index = index.tz_localize('UTC').tz_convert(tz)
+    return index
+
+
+def _to_timestamp(time, tz):
+    if time == OPEN_START or time == OPEN_END:
+        return None
+    timestamp = pd.Timestamp(int(time), tz='UTC')
+    return timestamp.tz_localize(None) if tz is None else timestamp.tz_convert(tz)
+
+
+def _frame_from_arrays(starts, ends, tz):
+    return pd.DataFrame({'section_start': _to_timestamps(starts, tz),
+                         'section_end': _to_timestamps(ends, tz)})
+
+
+def _arrays_from_frame(df):
+    starts = pd.DatetimeIndex(df['section_start'])
+    ends = pd.DatetimeIndex(df['section_end'])
+    end_times = ends.asi8
+    if ends.hasnans:
+        end_times = np.where(ends.isna(), OPEN_END, end_times)
+    tz = starts.tz if starts.tz is not None else ends.tz
+    return starts.asi8, end_times, tz
@@ -10,7 +10,7 @@ from IPython.core.display import HTML, display
 from collections import OrderedDict
 import datetime
 import pytz
-from nilmtk.datastore import HDFDataStore, CSVDataStore
+from nilmtk.datastore import HDFDataStore, CSVDataStore, NpyDataStore
 import warnings
 
 # Python 2/3 compatibility
@@ -308,13 +308,17 @@ def timestamp_is_naive(timestamp):
         return False
 
 
-def get_datastore(filename, format, mode='a'):
+def get_datastore(filename, format, mode='a', **store_kwargs):
     """
     Parameters
     ----------
     filename : string
-    format : 'CSV' or 'HDF'
+    format : 'CSV', 'HDF' or 'NPY'
     mode : 'a' (append) or 'w' (write), optional
+    **store_kwargs : compression settings for HDF stores, optional
+        e.g. `compression='archive'` or `complib`, `complevel` and
+        `expectedrows`.  See `HDFDataStore.__init__`.  Ignored for
+        the uncompressed CSV and NPY formats.
 
     Returns
     -------
@@ -322,9 +326,11 @@ def get_datastore(filename, format, mode='a'):
     """
     if filename is not None:
         if format == 'HDF':
-            return HDFDataStore(filename, mode)
+            return HDFDataStore(filename, mode, **store_kwargs)
         elif format == 'CSV':
             return CSVDataStore(filename)
+        elif format == 'NPY':
+            return NpyDataStore(filename)
         else:
             raise ValueError('format not recognised')
     else:
@@ -407,8 +413,9 @@ def safe_resample(data, **resample_kwargs):
         if level is not None: resample_kwargs['level'] = level
 
         fill_method_str = all_resample_kwargs.pop('fill_method', None)
+        fill_limit = all_resample_kwargs.pop('limit', None)
         if fill_method_str:
-            fill_method = lambda df: getattr(df, fill_method_str)()
+            fill_method = lambda df: getattr(df, fill_method_str)(limit=fill_limit)
         else:
             fill_method = lambda df: df
             
@@ -102,10 +102,29 @@ short_version = '%s'
 write_version_py()
 # End of Version Check
 
+
+def stats_extensions():
+    """The compiled section kernels of nilmtk.stats.  They are optional:
+    without Cython, numpy or a compiler nilmtk uses the NumPy kernels in
+    nilmtk/stats/sectionkernels.py.  See setup_max.py for all
+    extensions."""
+    try:
+        from Cython.Build import cythonize
+        import numpy
+    except ImportError:
+        return []
+    extension = Extension('nilmtk.stats.accelerators_stat',
+                          [join('nilmtk', 'stats', 'accelerators_stat.pyx')],
+                          include_dirs=[numpy.get_include()],
+                          optional=True)
+    return cythonize([extension], language_level=2)
+
+
 setup(
     name='nilmtk',
     version=FULLVERSION,
     packages=find_packages(),
+    ext_modules=stats_extensions(),
     package_data={'': ['*.yaml']},
     install_requires=[
         'future',
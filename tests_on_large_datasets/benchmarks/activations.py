@@ -0,0 +1,69 @@
+from __future__ import print_function, division
+from time import time
+import sys
+import numpy as np
+import pandas as pd
+from nilmtk.electric import get_activations
+from nilmtk.stats.activations import (ActivationFinder, activation_histogram,
+                                      activity_histogram)
+
+"""
+Compares `get_activations`, which returns a pd.Series per activation, with
+the activation table of `ActivationFinder` on a year of 6 second data of
+an appliance switching every few minutes, loaded in chunks.
+
+Usage: python activations.py [n_samples] [chunksize]
+"""
+
+n_samples = int(float(sys.argv[1])) if len(sys.argv) > 1 else 365 * 24 * 600
+chunksize = int(float(sys.argv[2])) if len(sys.argv) > 2 else 1000000
+NS_PER_HOUR = 3600 * 10**9
+
+
+def create_data():
+    rng = np.random.RandomState(0)
+    index = pd.date_range('2014-01-01', periods=n_samples, freq='6S',
+                          tz='Europe/London')
+    on = (np.cumsum(rng.rand(n_samples) < 1. / 50) % 2).astype(bool)
+    values = np.where(on, 100 + rng.rand(n_samples) * 50, rng.rand(n_samples) * 3)
+    values[rng.rand(n_samples) < 1E-5] = np.nan
+    return pd.Series(values.astype(np.float32), index=index)
+
+
+def chunks(series):
+    for start in range(0, len(series), chunksize):
+        yield series.iloc[start:start + chunksize]
+
+
+def run_get_activations(series):
+    activations = []
+    for chunk in chunks(series):
+        activations.extend(get_activations(chunk, min_off_duration=60,
+                                           min_on_duration=30,
+                                           on_power_threshold=10))
+    return len(activations)
+
+
+def run_activation_finder(series):
+    finder = ActivationFinder(10, min_off_duration=60, min_on_duration=30,
+                              max_gap=6)
+    for chunk in chunks(series):
+        finder.update(chunk.index, chunk.values)
+    activations = finder.activations()
+    activation_histogram(activations, 'hour', tz='Europe/London')
+    activity_histogram(activations, 24 * NS_PER_HOUR, NS_PER_HOUR,
+                       tz='Europe/London')
+    return len(activations)
+
+
+def measure(name, func, *args):
+    t_start = time()
+    n_activations = func(*args)
+    duration = time() - t_start
+    print("{:40s} {:6.2f}s {:8d} activations".format(name, duration,
+                                                    n_activations))
+
+
+series = create_data()
+measure('get_activations', run_get_activations, series)
+measure('ActivationFinder and histograms', run_activation_finder, series)
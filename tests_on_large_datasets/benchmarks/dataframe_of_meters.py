@@ -0,0 +1,36 @@
+from __future__ import print_function, division
+from os.path import join
+from time import time
+import resource
+import sys
+from nilmtk import DataSet
+
+"""
+Measures `MeterGroup.dataframe_of_meters` on all meters of a building,
+held in memory and backed by a memory-mapped file, with the peak memory
+of the process after each run.
+
+Usage: python dataframe_of_meters.py [dataset] [building] [memmap_dir] [sample_period]
+"""
+
+filename = sys.argv[1] if len(sys.argv) > 1 else '/data/REDD/redd.h5'
+building = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+memmap_dir = sys.argv[3] if len(sys.argv) > 3 else '/tmp'
+sample_period = int(sys.argv[4]) if len(sys.argv) > 4 else 6
+
+
+def measure(name, **kwargs):
+    t_start = time()
+    df = elec.dataframe_of_meters(sample_period=sample_period, **kwargs)
+    duration = time() - t_start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print("{:30s} {:8.2f}s {:10d} rows x {:3d} meters, peak {:8.0f} MB".format(
+        name, duration, df.shape[0], df.shape[1], peak_mb))
+
+
+dataset = DataSet(filename)
+elec = dataset.buildings[building].elec
+measure('memmap', memmap_filename=join(memmap_dir, 'dataframe_of_meters.dat'))
+measure('in memory')
+measure('in memory, 4 workers', n_workers=4)
+dataset.store.close()
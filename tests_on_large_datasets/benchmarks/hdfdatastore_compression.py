@@ -0,0 +1,23 @@
+from __future__ import print_function, division
+import sys
+from nilmtk import DataSet
+from nilmtk.datastore import benchmark_compression
+
+"""
+Compares the compression presets of `HDFDataStore` on real meter data:
+write and read throughput and compression ratio.
+
+Usage: python hdfdatastore_compression.py dataset.h5 [building] [meter] [n_rows]
+"""
+
+filename = sys.argv[1]
+building = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+meter = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+n_rows = int(float(sys.argv[4])) if len(sys.argv) > 4 else int(5E6)
+
+dataset = DataSet(filename)
+elecmeter = dataset.buildings[building].elec[meter]
+sample = next(elecmeter.store.load(elecmeter.key, chunksize=n_rows))
+print("Sample of", len(sample), "rows from", elecmeter.key)
+print(benchmark_compression(sample, directory=None))
+dataset.store.close()
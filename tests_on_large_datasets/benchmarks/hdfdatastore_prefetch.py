@@ -0,0 +1,72 @@
+from __future__ import print_function, division
+from os.path import join, isfile
+from time import time
+import sys
+import numpy as np
+import pandas as pd
+from nilmtk import HDFDataStore
+
+"""
+Measures the throughput of `HDFDataStore.load` with and without the
+`prefetch` option on a large synthetic store.
+
+The store holds a single meter with 1 Hz data and is created on the
+first run (about 2.5 GB uncompressed for the default 100 million rows).
+The `work` function simulates the downstream pipeline, e.g. resampling
+and GoodSections, so that there is compute to overlap with the I/O.
+
+Usage: python hdfdatastore_prefetch.py [data_dir] [n_rows]
+"""
+
+data_dir = sys.argv[1] if len(sys.argv) > 1 else '/data'
+n_rows = int(float(sys.argv[2])) if len(sys.argv) > 2 else int(1E8)
+filename = join(data_dir, 'prefetch_benchmark.h5')
+key = '/building1/elec/meter1'
+columns = pd.MultiIndex.from_tuples(
+    [('power', 'active'), ('power', 'reactive'), ('voltage', '')],
+    names=['physical_quantity', 'type'])
+CHUNKSIZE = 2000000
+
+
+def create_store():
+    print("Creating", filename, "with", n_rows, "rows")
+    store = pd.HDFStore(filename, 'w', complevel=9, complib='blosc')
+    start = pd.Timestamp('2014-01-01', tz='Europe/London')
+    block = 10000000
+    for block_start in range(0, n_rows, block):
+        n = min(block, n_rows - block_start)
+        index = pd.date_range(start + pd.Timedelta(seconds=block_start),
+                              periods=n, freq='S')
+        data = np.random.rand(n, len(columns)).astype(np.float32) * 1000
+        store.append(key, pd.DataFrame(data, index=index, columns=columns),
+                     expectedrows=n_rows, index=False)
+    store.create_table_index(key, columns=['index'], kind='full', optlevel=9)
+    store.close()
+
+
+def work(chunk):
+    resampled = chunk.resample('10S').mean()
+    diff = np.diff(chunk.index.values)
+    return resampled.sum().sum() + diff.max()
+
+
+def run(prefetch):
+    datastore = HDFDataStore(filename, 'r')
+    n_loaded = 0
+    t_start = time()
+    for chunk in datastore.load(key, chunksize=CHUNKSIZE,
+                                n_look_ahead_rows=10, prefetch=prefetch):
+        work(chunk)
+        n_loaded += len(chunk)
+    duration = time() - t_start
+    datastore.close()
+    mbytes = n_loaded * (8 + 4 * len(columns)) / 1E6
+    print("prefetch={:d}: {:.1f}s, {:.1f} MB/s, {:.0f} rows/s"
+          .format(prefetch, duration, mbytes / duration, n_loaded / duration))
+
+
+if not isfile(filename):
+    create_store()
+
+for prefetch in [0, 1, 2, 4]:
+    run(prefetch)
@@ -0,0 +1,66 @@
+from __future__ import print_function, division
+from time import time
+import sys
+import numpy as np
+from nilmtk.stats.entropy import (knn_entropy, knn_mutual_information,
+                                  sample_rows)
+from nilmtk.metergroup import _map
+
+"""
+Measures the entropy of each meter and the matrix of mutual information
+between all pairs of meters for a building with 40 circuits and a year
+of 1 minute data (525600 samples per meter), as computed by
+`MeterGroup.entropy_per_meter` and `MeterGroup.pairwise_mutual_information`
+once the meters are loaded.
+
+Usage: python knn_entropy.py [n_meters] [n_samples] [max_samples] [n_workers]
+"""
+
+n_meters = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+n_samples = int(float(sys.argv[2])) if len(sys.argv) > 2 else 365 * 24 * 60
+max_samples = int(float(sys.argv[3])) if len(sys.argv) > 3 else int(1E5)
+n_workers = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+
+
+def create_blocks(rng, n_blocks=50):
+    """Appliances switching between a few power levels, partly driven by
+    common occupancy, with 1% dropouts."""
+    occupancy = np.cumsum(rng.rand(n_samples) < 1. / 120) % 2
+    levels = rng.rand(n_meters, 4) * 2000
+    states = rng.randint(0, 4, size=(n_samples, n_meters)) * occupancy[:, np.newaxis]
+    values = levels[np.arange(n_meters), states] + rng.rand(n_samples, n_meters)
+    values[rng.rand(n_samples, n_meters) < 0.01] = np.nan
+    return np.array_split(values, n_blocks)
+
+
+rng = np.random.RandomState(0)
+blocks = create_blocks(rng)
+print("{} meters, {} samples each, max_samples={}, {} workers".format(
+    n_meters, n_samples, max_samples, n_workers))
+
+t_start = time()
+samples = sample_rows(blocks, max_samples, n_samples, rng)
+print("{:40s} {:8.2f}s {} rows".format('sample_rows', time() - t_start,
+                                       len(samples)))
+
+t_start = time()
+entropies = _map(lambda i: knn_entropy(samples[:, i], max_samples=max_samples,
+                                       random_state=i),
+                 range(n_meters), n_workers)
+print("{:40s} {:8.2f}s".format('entropy of each meter', time() - t_start))
+
+pairs = [(i, j) for i in range(n_meters) for j in range(i, n_meters)]
+t_start = time()
+_, error = knn_mutual_information(samples[:, 0], samples[:, 1],
+                                  max_samples=max_samples, random_state=0,
+                                  return_error=True)
+duration = time() - t_start
+print("{:40s} {:8.2f}s standard error {:.4f} bits".format(
+    'mutual information of one pair', duration, error))
+
+t_start = time()
+_map(lambda pair: knn_mutual_information(
+    samples[:, pair[0]], samples[:, pair[1]], max_samples=max_samples,
+    random_state=0), pairs, n_workers)
+print("{:40s} {:8.2f}s".format(
+    'mutual information of {} pairs'.format(len(pairs)), time() - t_start))
@@ -0,0 +1,79 @@
+from __future__ import print_function, division
+from time import time
+import sys
+import numpy as np
+from nilmtk.stats import sectionkernels
+
+"""
+Compares the NumPy and the compiled section kernels on a year of 1 Hz
+data (31.5 million samples) with random gaps and switching appliances.
+
+The compiled kernels are only measured if nilmtk.stats.accelerators_stat
+has been built, e.g. with `python setup.py build_ext --inplace`.
+
+Usage: python section_kernels.py [n_samples] [chunksize]
+"""
+
+n_samples = int(float(sys.argv[1])) if len(sys.argv) > 1 else 365 * 24 * 3600
+chunksize = int(float(sys.argv[2])) if len(sys.argv) > 2 else 1000000
+NS = sectionkernels.NS_PER_SECOND
+
+
+def create_data():
+    rng = np.random.RandomState(0)
+    periods = np.ones(n_samples, dtype=np.int64)
+    gaps = rng.rand(n_samples) < 1E-4
+    periods[gaps] = rng.randint(60, 3600, size=gaps.sum())
+    times = np.cumsum(periods) * NS + 1388534400 * NS
+    # Appliance switching on and off every few minutes
+    switches = np.cumsum(rng.rand(n_samples) < 1. / 300) % 2
+    values = (switches * 100 + rng.rand(n_samples) * 10).astype(np.float32)
+    return times, values
+
+
+def run_good_sections(kernel, times):
+    n_sections = 0
+    previous_open = False
+    for start in range(0, len(times), chunksize):
+        chunk = times[start:start + chunksize]
+        end = start + chunksize
+        look_ahead = times[end] if end < len(times) else sectionkernels.NO_TIME
+        starts, ends = kernel(chunk, 60, look_ahead, previous_open)
+        if len(ends):
+            previous_open = ends[-1] == sectionkernels.NO_TIME
+        n_sections += len(starts)
+    return n_sections
+
+
+def run_threshold_sections(kernel, times, values):
+    n_sections = 0
+    open_start = sectionkernels.NO_TIME
+    for start in range(0, len(times), chunksize):
+        starts, ends, open_start = kernel(
+            times[start:start + chunksize], values[start:start + chunksize],
+            15, open_start)
+        n_sections += len(starts)
+    return n_sections
+
+
+def measure(name, func, *args):
+    t_start = time()
+    n_sections = func(*args)
+    duration = time() - t_start
+    print("{:40s} {:6.2f}s {:6.1f} M samples/s {:8d} sections".format(
+        name, duration, n_samples / duration / 1E6, n_sections))
+
+
+times, values = create_data()
+kernels = [('numpy', sectionkernels.good_sections_numpy,
+            sectionkernels.threshold_sections_numpy)]
+if sectionkernels.COMPILED:
+    kernels.append(('compiled', sectionkernels.good_sections_compiled,
+                    sectionkernels.threshold_sections_compiled))
+else:
+    print("accelerators_stat is not built, only measuring NumPy")
+
+for name, good_sections, threshold_sections in kernels:
+    measure('good_sections ' + name, run_good_sections, good_sections, times)
+    measure('threshold_sections ' + name, run_threshold_sections,
+            threshold_sections, times, values)
@@ -0,0 +1,59 @@
+from __future__ import print_function, division
+from time import time
+import sys
+import numpy as np
+import pandas as pd
+from nilmtk import TimeFrameGroup
+
+"""
+Measures the set operations of TimeFrameGroup on groups with 10^5
+sections each, e.g. the good sections of a year of data with frequent
+dropouts, and on many smaller groups as in `MeterGroup.good_sections`.
+
+Usage: python timeframegroup_set_algebra.py [n_sections] [n_groups]
+"""
+
+n_sections = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(1E5)
+n_groups = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+TZ = 'Europe/London'
+NS_PER_MINUTE = 60 * 1000000000
+
+
+def random_group(rng, n):
+    """Sections of 1 to 60 minutes with gaps of 1 to 10 minutes."""
+    lengths = rng.randint(1, 61, size=n) * NS_PER_MINUTE
+    gaps = rng.randint(1, 11, size=n) * NS_PER_MINUTE
+    starts = np.cumsum(lengths + gaps) - lengths + 1388534400 * 10**9
+    return TimeFrameGroup.from_arrays(starts, starts + lengths, TZ)
+
+
+def measure(name, func, *args):
+    t_start = time()
+    result = func(*args)
+    duration = time() - t_start
+    count = result.count() if isinstance(result, TimeFrameGroup) else ''
+    print("{:40s} {:8.3f}s {}".format(name, duration, count))
+    return result
+
+
+rng = np.random.RandomState(0)
+a = random_group(rng, n_sections)
+b = random_group(rng, n_sections)
+timeframe = a.get_timeframe()
+many = [random_group(rng, n_sections // n_groups) for _ in range(n_groups)]
+print("{} sections per group".format(n_sections))
+
+measure('union', a.union, b)
+measure('intersection', a.intersection, b)
+measure('diff', a.diff, b)
+measure('matching', a.matching, b)
+measure('merge_shorter_gaps_than', a.merge_shorter_gaps_than, '5min')
+measure('remove_shorter_than', a.remove_shorter_than, '30min')
+measure('invert', a.invert, timeframe.start, timeframe.end)
+measure('truncate', TimeFrameGroup(a).truncate, timeframe)
+measure('union_many of {} groups'.format(n_groups), TimeFrameGroup.union_many, many)
+measure('intersect_many of {} groups'.format(n_groups),
+        TimeFrameGroup.intersect_many, many)
+measure('_df', lambda: TimeFrameGroup(a)._df)
+measure('from _df', lambda df: TimeFrameGroup(df).union(b), a._df)
+measure('iterate', lambda: list(a))